@@ -2,16 +2,17 @@
 Hlavný spúšťací súbor pre Elena STT.
 """
 
+import argparse
 import os
 import sys
 from pathlib import Path
 from dotenv import load_dotenv
 import logging
 from datetime import datetime
-from src.core.elena import Elena
+from src.utils.startup import StartupProfiler
 
 
-def setup_logging():
+def setup_logging(level: int = logging.INFO):
     """Nastaví základné logovanie."""
     # Vytvorenie formátovača pre súbor
     file_formatter = logging.Formatter(
@@ -24,18 +25,34 @@ def setup_logging():
         encoding="utf-8",
     )
     file_handler.setFormatter(file_formatter)
-    file_handler.setLevel(logging.INFO)
+    file_handler.setLevel(level)
 
     # Základné nastavenie
-    logging.basicConfig(level=logging.INFO, handlers=[file_handler])
+    logging.basicConfig(level=level, handlers=[file_handler])
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Elena STT")
+    parser.add_argument("--debug", action="store_true", help="Detailné logovanie")
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Po štarte vypíše waterfall importov a inicializácie služieb",
+    )
+    return parser.parse_args()
 
 
 def main():
+    args = parse_args()
+    # Meranie importov musí začať pred importom aplikácie
+    profiler = StartupProfiler(enabled=args.profile_startup)
+    profiler.install()
+
     # Vytvorenie logs priečinka ak neexistuje
     Path("logs").mkdir(exist_ok=True)
 
     # Nastavenie logovania
-    setup_logging()
+    setup_logging(logging.DEBUG if args.debug else logging.INFO)
     logger = logging.getLogger(__name__)
 
     # Načítanie environment variables
@@ -50,7 +67,9 @@ def main():
 
     try:
         # Spustenie aplikácie
-        elena = Elena(Path("config.yaml"))
+        with profiler.phase("import aplikácie"):
+            from src.core.elena import Elena
+        elena = Elena(Path("config.yaml"), profiler=profiler)
         elena.run()
     except KeyboardInterrupt:
         logger.info("Program ukončený používateľom")
@@ -4,7 +4,6 @@
 Collects quest data from external sources for LLM generation
 """
 
-import requests
 import json
 import yaml
 from bs4 import BeautifulSoup
@@ -12,6 +11,8 @@ from pathlib import Path
 import time
 import logging
 
+from http_session import create_session
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -19,8 +20,7 @@ class CyberpunkDataScraper:
     """Scrapes Cyberpunk 2077 quest data from various sources"""
     
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.session = create_session(timeout=(5.0, 30.0), headers={
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
         self.data = {
@@ -14,7 +14,7 @@ import yaml
 import json
 import re
 import time
-import requests
+from http_session import OLLAMA_URL, create_session
 from pathlib import Path
 from typing import Dict, Any, List, Set
 from dataclasses import dataclass
@@ -58,8 +58,8 @@ class OllamaTranslator:
     
     def __init__(self, model_name: str = "llama3.1:8b"):
         self.model_name = model_name
-        self.base_url = "http://localhost:11434"
-        self.session = requests.Session()
+        self.base_url = OLLAMA_URL
+        self.session = create_session()
         
         # Test connection
         self._test_connection()
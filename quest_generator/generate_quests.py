@@ -12,6 +12,8 @@ from pathlib import Path
 from typing import List, Dict, Any
 from dataclasses import dataclass
 import requests
+
+from http_session import OLLAMA_URL, create_session
 import time
 
 # Setup logging
@@ -32,10 +34,10 @@ class QuestInfo:
 class OllamaClient:
     """Local LLM client using Ollama"""
     
-    def __init__(self, model: str = "llama3.1:8b", base_url: str = "http://localhost:11434"):
+    def __init__(self, model: str = "llama3.1:8b", base_url: str = OLLAMA_URL):
         self.model = model
         self.base_url = base_url
-        self.session = requests.Session()
+        self.session = create_session()
     
     async def generate(self, prompt: str, system_prompt: str = None) -> str:
         """Generate response using local LLM"""
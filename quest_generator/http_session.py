@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP session for the quest tools (Ollama, wiki scraping).
+
+One place for connection pooling, keep-alive, default timeouts, bounded
+retries and a simple circuit breaker, instead of a bare requests.Session
+in every tool. Synchronous counterpart of src/services/http_transport.py.
+"""
+
+import logging
+import time
+from typing import Dict, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+OLLAMA_URL = "http://localhost:11434"
+
+# (connect, read) - a local LLM can take minutes to answer
+DEFAULT_TIMEOUT: Tuple[float, float] = (5.0, 300.0)
+RETRY_STATUS = (429, 502, 503, 504)
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Endpoint failed too many times in a row - request was not sent"""
+
+
+class PooledSession(requests.Session):
+    """requests.Session with default timeout and a per-host circuit breaker"""
+
+    def __init__(
+        self,
+        timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT,
+        breaker_failures: int = 5,
+        breaker_reset_sec: float = 30.0,
+    ):
+        super().__init__()
+        self.timeout = timeout
+        self.breaker_failures = breaker_failures
+        self.breaker_reset_sec = breaker_reset_sec
+        self.stats: Dict[str, int] = {"requests": 0, "failures": 0, "rejected": 0}
+        self._failures: Dict[str, int] = {}
+        self._opened_at: Dict[str, float] = {}
+
+    def request(self, method, url, *args, **kwargs):
+        host = requests.utils.urlparse(url).netloc
+        opened_at = self._opened_at.get(host)
+        if opened_at is not None and time.monotonic() - opened_at < self.breaker_reset_sec:
+            self.stats["rejected"] += 1
+            raise CircuitOpenError(f"Circuit open for {host}")
+
+        kwargs.setdefault("timeout", self.timeout)
+        self.stats["requests"] += 1
+        try:
+            response = super().request(method, url, *args, **kwargs)
+        except requests.RequestException:
+            self._record_failure(host)
+            raise
+        if response.status_code >= 500:
+            self._record_failure(host)
+        else:
+            self._failures[host] = 0
+            self._opened_at.pop(host, None)
+        return response
+
+    def _record_failure(self, host: str):
+        self.stats["failures"] += 1
+        self._failures[host] = self._failures.get(host, 0) + 1
+        # Half-open probe failed or too many failures in a row
+        if host in self._opened_at or self._failures[host] >= self.breaker_failures:
+            self._opened_at[host] = time.monotonic()
+            logger.warning(
+                f"⚠️ {host} failed {self._failures[host]}x - pausing requests "
+                f"for {self.breaker_reset_sec:.0f}s"
+            )
+
+
+def create_session(
+    timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT,
+    pool_size: int = 4,
+    retries: int = 2,
+    headers: Optional[Dict[str, str]] = None,
+) -> PooledSession:
+    """
+    Create a pooled session with keep-alive and bounded retries.
+
+    Args:
+        timeout: Default (connect, read) timeout for requests without one
+        pool_size: Kept-alive connections per host
+        retries: Retries for connect errors and 429/5xx (with backoff)
+        headers: Extra default headers (e.g. User-Agent)
+
+    Returns:
+        Configured session
+    """
+    session = PooledSession(timeout=timeout)
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=0,  # a read timeout means the LLM is still busy - don't pile on
+        status=retries,
+        status_forcelist=RETRY_STATUS,
+        allowed_methods=None,  # Ollama generate is safe to repeat
+        backoff_factor=0.5,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
@@ -12,7 +12,7 @@ from pathlib import Path
 from typing import Dict, Any, List
 from dataclasses import dataclass
 import re
-import requests
+from http_session import OLLAMA_URL, create_session
 
 # Setup logging
 logging.basicConfig(
@@ -56,8 +56,8 @@ class OllamaTranslator:
     
     def __init__(self, model_name: str = "llama3.1:8b"):
         self.model_name = model_name
-        self.base_url = "http://localhost:11434"
-        self.session = requests.Session()
+        self.base_url = OLLAMA_URL
+        self.session = create_session()
         
         # Test connection
         self._test_connection()
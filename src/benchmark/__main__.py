@@ -0,0 +1,234 @@
+"""
+Spúšťač benchmarku.
+
+    # Replay nahrávok so stub LLM a TTS (bez siete), skutočný Whisper
+    python -m src.benchmark run recordings/ --stub llm,tts --label small-int8
+
+    # Celá pipeline so stubmi (bez GPU aj siete), iný beam_size
+    python -m src.benchmark run recordings/ --stub all --set model.beam_size=1
+
+    # Porovnanie behov (prvý je baseline)
+    python -m src.benchmark compare benchmarks/a.json benchmarks/b.json
+
+    # Auto-tuning Whisper parametrov na označenej sade (clip.wav + clip.txt)
+    python -m src.benchmark tune clips/ --sizes small,medium --max-latency-ms 1500
+
+    # Denoiser + AGC: CPU na blok a WER/čas dekódovania so zvukom hry pri SNR 10/5/0 dB
+    python -m src.benchmark denoise clips/ --noise game.wav --snr 10,5,0
+"""
+
+import argparse
+import logging
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from ..config.config import AppConfig
+from .denoise import DenoiseBenchmark, format_denoise
+from .replay import (
+    STUB_COMPONENTS,
+    ReplayBenchmark,
+    ReplayElena,
+    compare_results,
+    format_result,
+    load_recordings,
+    load_result,
+    read_wav,
+    save_result,
+)
+from .stubs import StubConfig
+from .whisper_tuner import TuningGrid, WhisperTuner, build_profile, format_front, save_profile
+
+
+def _parse_stubs(value: str) -> set:
+    if value in ("", "none"):
+        return set()
+    if value == "all":
+        return set(STUB_COMPONENTS)
+    stubs = {part.strip() for part in value.split(",") if part.strip()}
+    unknown = stubs - set(STUB_COMPONENTS)
+    if unknown:
+        raise argparse.ArgumentTypeError(f"Neznámy stub: {', '.join(sorted(unknown))}")
+    return stubs
+
+
+def _parse_override(value: str) -> tuple:
+    key, sep, raw = value.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"Očakávam kľúč=hodnota, dostal som {value}")
+    return key.strip(), raw.strip()
+
+
+def _run(args) -> int:
+    stub_config = StubConfig(
+        stt_rtf=args.stub_stt_rtf,
+        llm_ms=args.stub_llm_ms,
+        tts_ms_per_char=args.stub_tts_ms_per_char,
+    )
+    elena = ReplayElena(
+        args.config,
+        stubs=args.stub,
+        stub_config=stub_config,
+        playback_speed=args.playback_speed,
+        overrides=dict(args.set),
+    )
+    recordings = load_recordings(args.recordings, elena.config.audio.stt_sample_rate)
+    benchmark = ReplayBenchmark(
+        elena, recordings, warmup=args.warmup, repeat=args.repeat
+    )
+    try:
+        result = elena.loop.run_until_complete(benchmark.run())
+    finally:
+        elena.loop.close()
+
+    label = args.label or datetime.now().strftime("%Y%m%d_%H%M%S")
+    output = args.output or Path("benchmarks") / f"{label}.json"
+    save_result(result, output)
+    print(format_result(result))
+    print(f"\nVýsledok uložený do {output}")
+    return 0
+
+
+def _compare(args) -> int:
+    results = [load_result(path) for path in args.results]
+    print(compare_results(results, [path.stem for path in args.results]))
+    return 0
+
+
+def _csv(cast):
+    def parse(value: str) -> list:
+        return [cast(part.strip()) for part in value.split(",") if part.strip()]
+
+    return parse
+
+
+def _bool(value: str) -> bool:
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+def _tune(args) -> int:
+    config = AppConfig.from_yaml(args.config)
+    clips = load_recordings(args.clips, config.audio.stt_sample_rate)
+    grid = TuningGrid(
+        sizes=args.sizes,
+        devices=args.devices,
+        compute_types=args.compute_types,
+        beam_sizes=args.beams,
+        vad_filters=args.vad,
+        cpu_threads=args.threads,
+        num_workers=args.workers,
+    )
+    tuner = WhisperTuner(clips, config.model, grid, sample_rate=config.audio.stt_sample_rate)
+    points = tuner.run()
+    profile = build_profile(
+        points, clips, max_latency_ms=args.max_latency_ms, wer_tolerance=args.wer_tolerance
+    )
+    save_profile(profile, args.output)
+    print(format_front(profile))
+    print(f"\nProfil uložený do {args.output} (v config.yaml nastav model.profile)")
+    return 0
+
+
+def _denoise(args) -> int:
+    config = AppConfig.from_yaml(args.config)
+    sample_rate = config.audio.stt_sample_rate
+    benchmark = DenoiseBenchmark(
+        load_recordings(args.clips, sample_rate),
+        read_wav(args.noise, sample_rate),
+        config.audio,
+        config.model,
+        snr_levels=args.snr,
+        device=args.device,
+    )
+    result = benchmark.run(decode=not args.cpu_only)
+    print(format_denoise(result))
+    if args.output:
+        save_result(result, args.output)
+        print(f"\nVýsledok uložený do {args.output}")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Replay benchmark pipeline Eleny")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Logovať aj INFO")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Prehrať adresár nahrávok")
+    run.add_argument("recordings", type=Path, help="Adresár s *.wav (a voliteľne *.txt)")
+    run.add_argument("--config", type=Path, default=Path("config.yaml"))
+    run.add_argument(
+        "--stub",
+        type=_parse_stubs,
+        default=set(),
+        help="Komponenty nahradené stubom: stt,llm,tts | all | none",
+    )
+    run.add_argument(
+        "--set",
+        type=_parse_override,
+        action="append",
+        default=[],
+        metavar="KĽÚČ=HODNOTA",
+        help="Prepísanie konfigurácie, napr. model.size=small",
+    )
+    run.add_argument("--repeat", type=int, default=1)
+    run.add_argument("--warmup", type=int, default=1)
+    run.add_argument(
+        "--playback-speed",
+        type=float,
+        default=0.0,
+        help="Rýchlosť prehrávania TTS (1 = reálny čas, 0 = okamžite)",
+    )
+    run.add_argument("--label", help="Názov behu (aj názov výsledného súboru)")
+    run.add_argument("--output", type=Path, help="Cesta k JSON výsledku")
+    run.add_argument("--stub-stt-rtf", type=float, default=StubConfig.stt_rtf)
+    run.add_argument("--stub-llm-ms", type=float, default=StubConfig.llm_ms)
+    run.add_argument("--stub-tts-ms-per-char", type=float, default=StubConfig.tts_ms_per_char)
+    run.set_defaults(handler=_run)
+
+    compare = commands.add_parser("compare", help="Porovnať uložené behy")
+    compare.add_argument("results", type=Path, nargs="+", help="JSON výsledky (prvý = baseline)")
+    compare.set_defaults(handler=_compare)
+
+    grid = TuningGrid()
+    tune = commands.add_parser("tune", help="Auto-tuning parametrov Whisper dekódovania")
+    tune.add_argument("clips", type=Path, help="Adresár s *.wav a referenčnými *.txt")
+    tune.add_argument("--config", type=Path, default=Path("config.yaml"))
+    tune.add_argument("--sizes", type=_csv(str), default=grid.sizes)
+    tune.add_argument("--devices", type=_csv(str), default=grid.devices)
+    tune.add_argument("--compute-types", type=_csv(str), default=grid.compute_types)
+    tune.add_argument("--beams", type=_csv(int), default=grid.beam_sizes)
+    tune.add_argument("--vad", type=_csv(_bool), default=grid.vad_filters)
+    tune.add_argument("--threads", type=_csv(int), default=grid.cpu_threads)
+    tune.add_argument("--workers", type=_csv(int), default=grid.num_workers)
+    tune.add_argument("--max-latency-ms", type=float, help="Limit p95 latencie pre výber bodu")
+    tune.add_argument(
+        "--wer-tolerance",
+        type=float,
+        default=0.01,
+        help="Bez limitu latencie: najrýchlejší bod s WER do best + tolerancia",
+    )
+    tune.add_argument("--output", type=Path, default=Path("stt_profile.yaml"))
+    tune.set_defaults(handler=_tune)
+
+    denoise = commands.add_parser("denoise", help="Benchmark potlačenia šumu a AGC")
+    denoise.add_argument("clips", type=Path, help="Adresár s čistými *.wav a referenčnými *.txt")
+    denoise.add_argument("--noise", type=Path, required=True, help="WAV so šumom (napr. zvuk hry)")
+    denoise.add_argument("--config", type=Path, default=Path("config.yaml"))
+    denoise.add_argument("--snr", type=_csv(float), default=[20.0, 10.0, 5.0, 0.0])
+    denoise.add_argument("--device", default="cpu", choices=["cpu", "cuda"])
+    denoise.add_argument(
+        "--cpu-only", action="store_true", help="Len CPU náklady na blok, bez Whisper dekódovania"
+    )
+    denoise.add_argument("--output", type=Path, help="Cesta k JSON výsledku")
+    denoise.set_defaults(handler=_denoise)
+
+    args = parser.parse_args()
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
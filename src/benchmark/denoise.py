@@ -0,0 +1,284 @@
+"""
+Benchmark potlačenia šumu a AGC.
+
+Čisté označené nahrávky (clip.wav + clip.txt) sa zmiešajú so šumom
+(napr. nahrávka zvuku hry) pri zvolených SNR a prejdú rovnakým reťazcom
+ako pri zachytávaní: profil šumu sa naučí z úseku pred rečou, potom sa
+nahrávka spracuje po blokoch. Meria sa CPU čas na blok každého stupňa
+a pre surový aj spracovaný variant WER, čas dekódovania a počet
+segmentov, ktoré Whisper dekódoval až pri vyššej teplote (fallback).
+"""
+
+import logging
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from ..config.config import AudioConfig, ModelConfig
+from ..services.audio_dsp import AutoGain, SpectralGate
+from ..utils.telemetry import LatencyHistogram
+from .replay import Recording
+from .whisper_tuner import WhisperTuner, normalize_text, word_error_rate
+
+logger = logging.getLogger(__name__)
+
+
+def noise_scale(clean: np.ndarray, noise: np.ndarray, snr_db: float) -> float:
+    """Násobok šumu, pri ktorom má zmes daný SNR (v dB)."""
+    clean_power = float(np.mean(np.square(clean))) or 1e-12
+    noise_power = float(np.mean(np.square(noise))) or 1e-12
+    return float(np.sqrt(clean_power / (noise_power * 10 ** (snr_db / 10))))
+
+
+def noise_segment(noise: np.ndarray, length: int, offset: int = 0) -> np.ndarray:
+    """Výrez šumu danej dĺžky (šum sa opakuje, ak je kratší)."""
+    return np.resize(np.roll(noise, -offset), length).astype(np.float32)
+
+
+def process_capture(
+    audio: np.ndarray,
+    lead_noise: np.ndarray,
+    config: AudioConfig,
+    block: int,
+    costs: Optional[Dict[str, LatencyHistogram]] = None,
+) -> np.ndarray:
+    """
+    Spracuje nahrávku rovnako ako AudioProcessor (po blokoch).
+
+    Args:
+        audio: Zašumená nahrávka vo vzorkovaní stt_sample_rate
+        lead_noise: Šum pred stlačením PTT (učenie profilu)
+        config: Nastavenia denoisera a AGC
+        block: Veľkosť bloku vo vzorkách
+        costs: Histogramy {"denoise", "agc"}, do ktorých sa zapisuje
+            CPU čas na blok v µs
+
+    Returns:
+        Spracovaná nahrávka (rovnaká dĺžka)
+    """
+    denoiser = (
+        SpectralGate(config.stt_sample_rate, noise_floor=config.noise_floor)
+        if config.noise_reduction
+        else None
+    )
+    agc = (
+        AutoGain(target_dbfs=config.agc_target_dbfs, max_gain_db=config.agc_max_gain_db)
+        if config.agc_enabled
+        else None
+    )
+    if denoiser is not None:
+        for start in range(0, len(lead_noise), block):
+            denoiser.learn(lead_noise[start:start + block])
+
+    output = []
+    for start in range(0, len(audio), block):
+        chunk = audio[start:start + block]
+        if denoiser is not None:
+            began = time.perf_counter_ns()
+            chunk = denoiser.process(chunk)
+            if start + block >= len(audio):
+                chunk = np.concatenate((chunk, denoiser.flush()))
+            if costs is not None:
+                costs["denoise"].record((time.perf_counter_ns() - began) / 1000)
+        if agc is not None:
+            began = time.perf_counter_ns()
+            chunk = agc.process(chunk)
+            if costs is not None:
+                costs["agc"].record((time.perf_counter_ns() - began) / 1000)
+        output.append(chunk)
+    return np.concatenate(output) if output else audio
+
+
+class DenoiseBenchmark:
+    """Porovná surové a spracované zašumené nahrávky."""
+
+    def __init__(
+        self,
+        clips: List[Recording],
+        noise: np.ndarray,
+        audio_config: AudioConfig,
+        model_config: ModelConfig,
+        snr_levels: Sequence[float] = (20.0, 10.0, 5.0, 0.0),
+        lead_sec: float = 2.0,
+        device: str = "cpu",
+    ):
+        """
+        Args:
+            clips: Čisté nahrávky s referenčným prepisom
+            noise: Šum vo vzorkovaní stt_sample_rate
+            audio_config: Nastavenia zachytávania (denoiser, AGC, blocksize)
+            model_config: Nastavenia Whisper dekódovania
+            snr_levels: Testované SNR v dB
+            lead_sec: Dĺžka šumu pred rečou na učenie profilu
+            device: Zariadenie pre Whisper (cpu | cuda)
+        """
+        missing = [clip.name for clip in clips if not clip.transcript]
+        if missing:
+            raise ValueError(f"Chýba referenčný prepis (.txt) pre: {', '.join(missing)}")
+        if not len(noise):
+            raise ValueError("Nahrávka šumu je prázdna")
+        self.clips = clips
+        self.noise = noise
+        self.audio_config = audio_config
+        self.model_config = model_config
+        self.snr_levels = list(snr_levels)
+        self.lead = int(lead_sec * audio_config.stt_sample_rate)
+        self.device = device
+        # Blok po prevzorkovaní (v callbacku chodí blocksize vzoriek zariadenia)
+        self.block = max(
+            1,
+            audio_config.blocksize * audio_config.stt_sample_rate // audio_config.sample_rate,
+        )
+        self.costs = {"denoise": LatencyHistogram(), "agc": LatencyHistogram()}
+
+    def fixtures(self) -> Dict[float, List[Dict[str, np.ndarray]]]:
+        """Zašumené varianty klipov pre každý SNR (surový a spracovaný)."""
+        result: Dict[float, List[Dict[str, np.ndarray]]] = {}
+        for snr in self.snr_levels:
+            variants = []
+            for index, clip in enumerate(self.clips):
+                # Každý klip dostane iný úsek šumu, úsek pred rečou naň nadväzuje
+                offset = (index * 104_729) % len(self.noise)
+                lead = noise_segment(self.noise, self.lead, offset)
+                speech_noise = noise_segment(self.noise, len(clip.audio), offset + self.lead)
+                scale = noise_scale(clip.audio, speech_noise, snr)
+                noisy = np.clip(clip.audio + scale * speech_noise, -1.0, 1.0).astype(np.float32)
+                processed = process_capture(
+                    noisy, scale * lead, self.audio_config, self.block, self.costs
+                )
+                variants.append({"raw": noisy, "processed": processed})
+            result[snr] = variants
+        return result
+
+    def run(self, decode: bool = True) -> Dict[str, Any]:
+        """
+        Pripraví zašumené varianty a (voliteľne) ich prepíše Whisperom.
+
+        Args:
+            decode: False = len CPU náklady denoisera/AGC (bez modelu)
+        """
+        fixtures = self.fixtures()
+        block_ms = self.block * 1000 / self.audio_config.stt_sample_rate
+        result: Dict[str, Any] = {
+            "meta": {
+                "clips": len(self.clips),
+                "audio_sec": round(
+                    sum(len(c.audio) for c in self.clips) / self.audio_config.stt_sample_rate, 2
+                ),
+                "noise_reduction": self.audio_config.noise_reduction,
+                "noise_floor": self.audio_config.noise_floor,
+                "agc": self.audio_config.agc_enabled,
+                "model": self.model_config.size,
+                "device": self.device,
+            },
+            "cpu": {
+                "block_ms": round(block_ms, 2),
+                "denoise_us": self.costs["denoise"].snapshot(),
+                "agc_us": self.costs["agc"].snapshot(),
+            },
+            "snr": {},
+        }
+        if not decode:
+            return result
+
+        compute_type = (
+            self.model_config.cuda_compute_type
+            if self.device == "cuda"
+            else self.model_config.cpu_compute_type
+        )
+        model = WhisperTuner._load_model(
+            size=self.model_config.size,
+            device=self.device,
+            compute_type=compute_type,
+            cpu_threads=self.model_config.cpu_threads,
+            num_workers=1,
+        )
+        # Zahriatie sa nemeria
+        self._transcribe(model, self.clips[0].audio)
+
+        for snr, variants in fixtures.items():
+            entry = {}
+            for variant in ("raw", "processed"):
+                entry[variant] = self._measure(
+                    model, [(clip, v[variant]) for clip, v in zip(self.clips, variants)]
+                )
+            result["snr"][str(snr)] = entry
+            logger.info(
+                f"SNR {snr:g} dB: WER {entry['raw']['wer']:.3f} -> {entry['processed']['wer']:.3f}, "
+                f"dekódovanie {entry['raw']['decode_ms_total']:.0f} -> "
+                f"{entry['processed']['decode_ms_total']:.0f}ms"
+            )
+        return result
+
+    def _measure(self, model, pairs) -> Dict[str, Any]:
+        histogram = LatencyHistogram()
+        errors = 0.0
+        words = 0
+        fallbacks = 0
+        decode_ms = 0.0
+        for clip, audio in pairs:
+            start = time.perf_counter()
+            text, clip_fallbacks = self._transcribe(model, audio)
+            elapsed = (time.perf_counter() - start) * 1000
+            decode_ms += elapsed
+            histogram.record(elapsed)
+            fallbacks += clip_fallbacks
+            clip_words = len(normalize_text(clip.transcript))
+            errors += word_error_rate(clip.transcript, text) * clip_words
+            words += clip_words
+        return {
+            "wer": round(errors / max(1, words), 4),
+            "decode_ms_total": round(decode_ms, 1),
+            "decode_ms_p50": round(histogram.percentile(50), 1),
+            "decode_ms_p95": round(histogram.percentile(95), 1),
+            "temperature_fallbacks": fallbacks,
+        }
+
+    def _transcribe(self, model, audio: np.ndarray):
+        temperature = self.model_config.temperature
+        segments, _ = model.transcribe(
+            audio=audio,
+            language=self.model_config.language,
+            beam_size=self.model_config.beam_size,
+            best_of=self.model_config.best_of,
+            temperature=temperature,
+            vad_filter=self.model_config.vad_filter,
+            no_speech_threshold=self.model_config.no_speech_threshold,
+        )
+        segments = list(segments)
+        first = min(temperature) if isinstance(temperature, (list, tuple)) else temperature
+        fallbacks = sum(1 for segment in segments if segment.temperature > first)
+        return " ".join(segment.text.strip() for segment in segments), fallbacks
+
+
+def format_denoise(result: Dict[str, Any]) -> str:
+    """Textový súhrn benchmarku denoisera."""
+    meta, cpu = result["meta"], result["cpu"]
+    lines = [
+        f"{meta['clips']} klipov ({meta['audio_sec']:.1f}s), noise_floor {meta['noise_floor']}, "
+        f"denoiser {'zap' if meta['noise_reduction'] else 'vyp'}, "
+        f"AGC {'zap' if meta['agc'] else 'vyp'}",
+        f"CPU na blok {cpu['block_ms']:.1f}ms audia:",
+    ]
+    for stage in ("denoise", "agc"):
+        stats = cpu[f"{stage}_us"]
+        if stats.get("count"):
+            lines.append(
+                f"  {stage:<10} p50 {stats['p50']:.0f}µs, p99 {stats['p99']:.0f}µs, "
+                f"max {stats['max']:.0f}µs ({stats['p99'] / 10 / cpu['block_ms']:.2f} % bloku)"
+            )
+    if result["snr"]:
+        lines += [
+            "",
+            f"{'SNR':>6}  {'WER surové':>11}{'WER spracované':>16}"
+            f"{'dekód. surové':>15}{'dekód. spracované':>19}{'fallbacky':>12}",
+        ]
+        for snr, entry in result["snr"].items():
+            raw, processed = entry["raw"], entry["processed"]
+            lines.append(
+                f"{float(snr):>4g}dB  {raw['wer']:>11.3f}{processed['wer']:>16.3f}"
+                f"{raw['decode_ms_total']:>13.0f}ms{processed['decode_ms_total']:>17.0f}ms"
+                f"{raw['temperature_fallbacks']:>6} -> {processed['temperature_fallbacks']}"
+            )
+    return "\n".join(lines)
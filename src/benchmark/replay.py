@@ -0,0 +1,427 @@
+"""
+Replay benchmark - prehrá adresár nahrávok PTT celou pipeline Eleny.
+
+Každá nahrávka (WAV, voliteľne s prepisom v .txt vedľa) prejde rovnakou
+cestou ako po pustení PTT: Elena._start_turn -> STT -> plánovač -> LLM ->
+TTS fronta -> mixer. Latencie fáz sa berú z trace turnu (src.utils.tracing)
+a ukladajú sa do JSON výsledku, ktorý sa dá porovnať s iným behom (iný
+commit, veľkosť modelu, beam_size, compute_type...).
+"""
+
+import asyncio
+import contextlib
+import dataclasses
+import io
+import json
+import logging
+import os
+import platform
+import subprocess
+import time
+from datetime import datetime
+from math import gcd
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+import numpy as np
+import yaml
+from scipy.io import wavfile
+from scipy.signal import resample_poly
+
+from ..core.elena import Elena
+from ..services.stt import WhisperSTT
+from ..utils.telemetry import LatencyHistogram
+from ..utils.tracing import SPAN_CAPTURE, SPAN_TTS_FIRST_AUDIO, Tracer, TurnTrace, now_ns
+from .stubs import (
+    NullAudioMixer,
+    StubAssistant,
+    StubConfig,
+    StubTTS,
+    StubWhisperModel,
+    load_transcript,
+)
+
+logger = logging.getLogger(__name__)
+
+STUB_COMPONENTS = ("stt", "llm", "tts")
+
+# Odvodená metrika: od pustenia PTT po prvý počuteľný zvuk odpovede
+RELEASE_TO_AUDIO = "release_to_audio"
+
+
+@dataclasses.dataclass
+class Recording:
+    """Jedna nahrávka PTT pripravená na replay."""
+
+    path: Path
+    audio: np.ndarray  # mono float32 vo vzorkovaní audio.stt_sample_rate
+    transcript: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        return self.path.name
+
+
+def read_wav(path: Path, sample_rate: int) -> np.ndarray:
+    """
+    Načíta WAV ako mono float32 a prevzorkuje ho na sample_rate.
+
+    Args:
+        path: Cesta k WAV súboru (PCM 8/16/24/32 bit alebo float32/64)
+        sample_rate: Cieľová vzorkovacia frekvencia
+
+    Returns:
+        Mono float32 audio v rozsahu -1..1
+    """
+    source_rate, data = wavfile.read(str(path))
+
+    if data.dtype == np.uint8:
+        audio = (data.astype(np.float32) - 128.0) / 128.0
+    elif data.dtype == np.int16:
+        audio = data.astype(np.float32) / 32768.0
+    elif data.dtype == np.int32:
+        # 24-bit vzorky vracia scipy zarovnané doľava v int32
+        audio = data.astype(np.float32) / 2147483648.0
+    elif data.dtype in (np.float32, np.float64):
+        audio = data.astype(np.float32)
+    else:
+        raise ValueError(f"Nepodporovaný formát vzoriek {data.dtype}: {path}")
+
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1)
+    if source_rate != sample_rate:
+        divisor = gcd(source_rate, sample_rate)
+        audio = resample_poly(audio, sample_rate // divisor, source_rate // divisor)
+    return audio.astype(np.float32)
+
+
+def load_recordings(directory: Path, sample_rate: int) -> List[Recording]:
+    """Načíta všetky *.wav z adresára (zoradené podľa názvu)."""
+    paths = sorted(Path(directory).glob("*.wav"))
+    if not paths:
+        raise FileNotFoundError(f"V {directory} nie sú žiadne WAV nahrávky")
+    return [
+        Recording(path=path, audio=read_wav(path, sample_rate), transcript=load_transcript(path))
+        for path in paths
+    ]
+
+
+def apply_overrides(config: Any, overrides: Dict[str, str]):
+    """
+    Prepíše hodnoty konfigurácie podľa bodkovej cesty.
+
+    Args:
+        config: AppConfig (alebo vnorená dataclass)
+        overrides: Napr. {"model.beam_size": "1", "model.size": "small"};
+            hodnota sa parsuje ako YAML (čísla, bool, null)
+
+    Raises:
+        AttributeError: Ak konfigurácia daný kľúč nemá
+    """
+    for key, raw_value in overrides.items():
+        *path, name = key.split(".")
+        target = config
+        for part in path:
+            target = getattr(target, part)
+        if not hasattr(target, name):
+            raise AttributeError(f"Neznámy kľúč konfigurácie: {key}")
+        setattr(target, name, yaml.safe_load(raw_value))
+
+
+class ReplayElena(Elena):
+    """
+    Elena bez klávesnice a zvukovej karty, s voliteľnými stub backendmi.
+
+    Inicializácia ide cez Elena.initialize, nahrádzajú sa len továrne
+    na model, asistenta, mixer a TTS.
+    """
+
+    def __init__(
+        self,
+        config_path: Path,
+        stubs: Set[str],
+        stub_config: StubConfig,
+        playback_speed: float = 0.0,
+        overrides: Optional[Dict[str, str]] = None,
+    ):
+        super().__init__(config_path)
+        self.stubs = stubs
+        self.stub_config = stub_config
+        self.playback_speed = playback_speed
+        self.stub_model = StubWhisperModel(stub_config, sample_rate=self.config.audio.stt_sample_rate)
+
+        apply_overrides(self.config, overrides or {})
+        # Benchmark nemá zapisovať do produkčných súborov ani otvárať porty
+        self.config.twitch.enabled = False
+        self.config.metrics.enabled = False
+        self.config.usage.enabled = False
+        self.config.tracing.enabled = False
+        self.config.reply.overlay_path = None
+        self.config.reply.streamer_to_chat = False
+        self.overlay = None
+
+    def _create_stt(self):
+        if "stt" in self.stubs:
+            return WhisperSTT(
+                self.config.model,
+                sample_rate=self.config.audio.stt_sample_rate,
+                model_factory=lambda size, **kwargs: self.stub_model,
+            )
+        return super()._create_stt()
+
+    def _create_assistant(self):
+        if "llm" in self.stubs:
+            return StubAssistant(self.stub_config)
+        return super()._create_assistant()
+
+    def _create_mixer(self):
+        return NullAudioMixer(sample_rate=StubTTS.SAMPLE_RATE, speed=self.playback_speed)
+
+    def _create_tts_engine(self):
+        if "tts" in self.stubs:
+            return StubTTS(self.stub_config, mixer=self.mixer)
+        return super()._create_tts_engine()
+
+    def _setup_keyboard_listener(self):
+        pass
+
+
+class ReplayBenchmark:
+    """Spustí replay nahrávok a zozbiera latencie z trace turnov."""
+
+    def __init__(
+        self,
+        elena: ReplayElena,
+        recordings: List[Recording],
+        warmup: int = 1,
+        repeat: int = 1,
+        turn_timeout_sec: float = 120.0,
+    ):
+        """
+        Args:
+            elena: Inicializovaná (alebo neinicializovaná) ReplayElena
+            recordings: Nahrávky na prehranie
+            warmup: Počet úvodných turnov, ktoré sa nezapočítajú
+            repeat: Koľkokrát prehrať celý adresár
+            turn_timeout_sec: Maximálna doba jedného turnu
+        """
+        self.elena = elena
+        self.recordings = recordings
+        self.warmup = warmup
+        self.repeat = repeat
+        self.turn_timeout_sec = turn_timeout_sec
+        self._finished: "asyncio.Queue[TurnTrace]" = asyncio.Queue()
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Prehrá všetky nahrávky a vráti výsledok (JSON serializovateľný).
+        """
+        elena = self.elena
+        loop = asyncio.get_running_loop()
+        init_start = time.perf_counter()
+        await elena.initialize()
+        init_ms = (time.perf_counter() - init_start) * 1000
+
+        elena.tracer = Tracer(ring_size=len(self.recordings) * self.repeat + self.warmup)
+        elena.tracer.add_listener(
+            lambda trace: loop.call_soon_threadsafe(self._finished.put_nowait, trace)
+        )
+
+        sample_rate = elena.config.audio.stt_sample_rate
+        schedule = [rec for _ in range(self.repeat) for rec in self.recordings]
+        warmup = [self.recordings[i % len(self.recordings)] for i in range(self.warmup)]
+
+        for recording in warmup:
+            await self._replay(recording, sample_rate)
+
+        turns: List[Dict[str, Any]] = []
+        audio_sec = 0.0
+        wall_start = time.perf_counter()
+        for recording in schedule:
+            turn = await self._replay(recording, sample_rate)
+            turns.append(turn)
+            audio_sec += len(recording.audio) / sample_rate
+        wall_sec = time.perf_counter() - wall_start
+
+        await elena._shutdown()
+        return self._result(turns, wall_sec, audio_sec, init_ms)
+
+    async def _replay(self, recording: Recording, sample_rate: int) -> Dict[str, Any]:
+        """Prehrá jednu nahrávku ako turn a počká na jeho dokončenie."""
+        elena = self.elena
+        if "stt" in elena.stubs and recording.transcript:
+            elena.stub_model.transcript = recording.transcript
+
+        # Capture sa neprehráva v reálnom čase, jeho span má dĺžku nahrávky
+        capture_end = now_ns()
+        capture_start = capture_end - int(len(recording.audio) / sample_rate * 1e9)
+        with contextlib.redirect_stdout(io.StringIO()):
+            elena._start_turn(recording.audio, capture_start, capture_end)
+            try:
+                trace = await asyncio.wait_for(self._finished.get(), self.turn_timeout_sec)
+            except asyncio.TimeoutError:
+                logger.error(f"Turn {recording.name} nedobehol do {self.turn_timeout_sec:.0f}s")
+                if elena._turn_task:
+                    elena._turn_task.cancel()
+                return {"recording": recording.name, "status": "timeout", "stages": {}}
+
+        stages = {
+            name: ms for name, ms in trace.summary().items() if name != SPAN_CAPTURE
+        }
+        capture = trace.get(SPAN_CAPTURE)
+        first_audio = trace.get(SPAN_TTS_FIRST_AUDIO)
+        if capture and first_audio and first_audio.end_ns:
+            stages[RELEASE_TO_AUDIO] = (first_audio.end_ns - capture.end_ns) / 1e6
+        attributes = trace.root.attributes
+        return {
+            "recording": recording.name,
+            "audio_sec": len(recording.audio) / sample_rate,
+            "status": attributes.get("tts_status") or attributes.get("status", "unknown"),
+            "stages": stages,
+        }
+
+    def _result(
+        self, turns: List[Dict[str, Any]], wall_sec: float, audio_sec: float, init_ms: float
+    ) -> Dict[str, Any]:
+        histograms: Dict[str, LatencyHistogram] = {}
+        statuses: Dict[str, int] = {}
+        for turn in turns:
+            statuses[turn["status"]] = statuses.get(turn["status"], 0) + 1
+            for stage, ms in turn["stages"].items():
+                histograms.setdefault(stage, LatencyHistogram()).record(ms)
+
+        model, stt = self.elena.config.model, self.elena.stt
+        return {
+            "meta": {
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "commit": git_commit(),
+                "host": f"{platform.node()} ({platform.machine()}, {os.cpu_count()} CPU)",
+                "stubs": sorted(self.elena.stubs),
+                "stub_config": dataclasses.asdict(self.elena.stub_config),
+                "model": {
+                    "size": model.size,
+                    "beam_size": model.beam_size,
+                    "device": stt.device,
+                    "compute_type": stt.compute_type,
+                    "loaded": stt.loaded_models,
+                    "cpu_threads": stt.cpu_threads,
+                    "vad_filter": model.vad_filter,
+                },
+                "recordings": len(self.recordings),
+                "repeat": self.repeat,
+                "warmup": self.warmup,
+                "playback_speed": self.elena.playback_speed,
+            },
+            "throughput": {
+                "turns": len(turns),
+                "wall_sec": wall_sec,
+                "turns_per_min": len(turns) / wall_sec * 60 if wall_sec else 0.0,
+                "audio_sec_per_sec": audio_sec / wall_sec if wall_sec else 0.0,
+                "init_ms": init_ms,
+            },
+            "statuses": statuses,
+            "stages": {stage: h.snapshot() for stage, h in sorted(histograms.items())},
+            "turns": turns,
+        }
+
+
+def git_commit() -> Optional[str]:
+    """Skrátený hash aktuálneho commitu (alebo None mimo git repozitára)."""
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    commit = result.stdout.strip()
+    if not commit:
+        return None
+    dirty = subprocess.run(["git", "diff", "--quiet", "HEAD"], capture_output=True).returncode
+    return f"{commit}-dirty" if dirty else commit
+
+
+def save_result(result: Dict[str, Any], path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+def load_result(path: Path) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def format_result(result: Dict[str, Any]) -> str:
+    """Textový súhrn jedného behu."""
+    meta, throughput = result["meta"], result["throughput"]
+    model = meta["model"]
+    lines = [
+        f"Commit {meta['commit'] or '?'}, model {model['size']} "
+        f"({model['compute_type']}, beam {model['beam_size']}), "
+        f"stuby: {', '.join(meta['stubs']) or 'žiadne'}",
+        f"Turny: {throughput['turns']} za {throughput['wall_sec']:.1f}s "
+        f"({throughput['turns_per_min']:.1f}/min, "
+        f"{throughput['audio_sec_per_sec']:.2f}s audia za sekundu), "
+        f"init {throughput['init_ms']:.0f}ms",
+        f"Výsledky: {', '.join(f'{k}={v}' for k, v in result['statuses'].items())}",
+        "",
+        f"{'Fáza':<20}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}",
+    ]
+    for stage, stats in result["stages"].items():
+        lines.append(
+            f"{stage:<20}{stats['p50']:>8.0f}ms{stats['p95']:>8.0f}ms"
+            f"{stats['p99']:>8.0f}ms{stats['max']:>8.0f}ms"
+        )
+    return "\n".join(lines)
+
+
+def compare_results(results: List[Dict[str, Any]], labels: List[str]) -> str:
+    """
+    Porovná behy voči prvému (baseline) - p50/p95 fáz a priepustnosť.
+
+    Args:
+        results: Načítané JSON výsledky
+        labels: Názvy behov (napr. názvy súborov)
+    """
+    baseline = results[0]
+    stages = list(baseline["stages"])
+    for result in results[1:]:
+        stages.extend(stage for stage in result["stages"] if stage not in stages)
+
+    def delta(value: float, base: Optional[float]) -> str:
+        if not base:
+            return ""
+        return f" ({(value - base) / base * 100:+.0f}%)"
+
+    lines = []
+    for label, result in zip(labels, results):
+        model = result["meta"]["model"]
+        lines.append(
+            f"{label}: {result['meta']['commit'] or '?'}, {model['size']} "
+            f"{model['compute_type']} beam {model['beam_size']}, "
+            f"stuby {','.join(result['meta']['stubs']) or '-'}"
+        )
+    lines.append("")
+
+    for stage in stages:
+        lines.append(stage)
+        base = baseline["stages"].get(stage, {})
+        for label, result in zip(labels, results):
+            stats = result["stages"].get(stage)
+            if not stats or not stats.get("count"):
+                lines.append(f"  {label:<24}-")
+                continue
+            lines.append(
+                f"  {label:<24}p50 {stats['p50']:>7.0f}ms{delta(stats['p50'], base.get('p50')):<8}"
+                f"p95 {stats['p95']:>7.0f}ms{delta(stats['p95'], base.get('p95'))}"
+            )
+
+    lines.append("priepustnosť")
+    base_rate = baseline["throughput"]["turns_per_min"]
+    for label, result in zip(labels, results):
+        rate = result["throughput"]["turns_per_min"]
+        lines.append(f"  {label:<24}{rate:>7.1f} turnov/min{delta(rate, base_rate)}")
+    return "\n".join(lines)
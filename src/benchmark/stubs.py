@@ -0,0 +1,377 @@
+"""
+Náhradné (stub) backendy pre benchmark bez GPU, siete a zvukovej karty.
+
+Stuby napodobňujú rozhranie a časovanie skutočných služieb (Whisper,
+OpenAI asistent, TTS, výstup a vstup zvuku), takže replay prechádza celou
+pipeline Eleny vrátane plánovača a TTS fronty, ale deterministicky.
+"""
+
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from ..services.reply import AssistantReply
+from ..services.tts.audio_mixer import AudioMixer
+from ..services.tts.base import RenderedSpeech, TTSEngine
+from ..utils.tracing import TurnTrace
+
+DEFAULT_TRANSCRIPT = "Ahoj Elena, čo si myslíš o tejto výprave?"
+DEFAULT_REPLY = (
+    "Tá výprava je riskantná, ale odmena stojí za to. "
+    "Vezmi si zásoby a nezabudni na mapu."
+)
+
+
+@dataclass
+class StubConfig:
+    """Simulované latencie stub backendov."""
+
+    stt_base_ms: float = 40.0  # VAD, mel a detekcia jazyka
+    stt_rtf: float = 0.08  # dekódovanie: ms na ms audia
+    llm_ms: float = 350.0
+    reply: str = DEFAULT_REPLY
+    tts_base_ms: float = 60.0
+    tts_ms_per_char: float = 1.5
+    tts_chars_per_sec: float = 15.0  # dĺžka vyrenderovanej reči
+
+
+@dataclass
+class StubSegment:
+    text: str
+    start: float
+    end: float
+
+
+@dataclass
+class StubTranscriptionInfo:
+    language: str
+    language_probability: float
+    duration: float
+
+
+class StubWhisperModel:
+    """
+    Náhrada WhisperModel s rovnakým rozhraním transcribe().
+
+    Ako faster-whisper robí prípravu hneď a dekóduje až pri iterácii
+    segmentov. Text berie z priradeného prepisu nahrávky.
+    """
+
+    def __init__(self, config: StubConfig, sample_rate: int = 16000):
+        self.config = config
+        self.sample_rate = sample_rate
+        self.transcript = DEFAULT_TRANSCRIPT  # prepis nasledujúcej nahrávky
+
+    def transcribe(self, audio: np.ndarray, language: Optional[str] = None, **kwargs):
+        duration = len(audio) / self.sample_rate
+        time.sleep(self.config.stt_base_ms / 1000.0)
+        text = self.transcript
+        info = StubTranscriptionInfo(
+            language=language or "sk", language_probability=0.99, duration=duration
+        )
+        return self._decode(text, duration), info
+
+    def _decode(self, text: str, duration: float) -> Iterator[StubSegment]:
+        time.sleep(duration * self.config.stt_rtf)
+        yield StubSegment(text=text, start=0.0, end=duration)
+
+
+class StubAssistant:
+    """Náhrada AssistantService s pevnou latenciou odpovede."""
+
+    def __init__(self, config: StubConfig):
+        self.config = config
+        self.requests = 0
+        self.errors = 0
+
+    async def get_response(self, user_name: str, message: str) -> Optional[str]:
+        self.requests += 1
+        await asyncio.sleep(self.config.llm_ms / 1000.0)
+        return self.config.reply
+
+    async def get_reply(
+        self, user_name: str, message: str, trace: Optional[TurnTrace] = None
+    ) -> Optional[AssistantReply]:
+        # Bez skracovania - benchmark porovnáva latenciu pri pevnej dĺžke odpovede
+        response = await self.get_response(user_name, message)
+        return AssistantReply(spoken=response, detail=response)
+
+
+class StubTTS(TTSEngine):
+    """TTS provider, ktorý renderuje ticho so simulovanou latenciou."""
+
+    name = "stub"
+
+    def __init__(self, config: StubConfig, mixer: Optional[AudioMixer] = None, cache_size: int = 0):
+        super().__init__(mixer=mixer, cache_size=cache_size)
+        self.config = config
+
+    def _render_blocking(self, parts: List[str]) -> RenderedSpeech:
+        text = " ".join(parts)
+        time.sleep((self.config.tts_base_ms + self.config.tts_ms_per_char * len(text)) / 1000.0)
+        samples = int(len(text) / self.config.tts_chars_per_sec * self.SAMPLE_RATE)
+        return RenderedSpeech(
+            text=text, pcm=np.zeros(samples, dtype=np.int16), sample_rate=self.SAMPLE_RATE
+        )
+
+
+class _CallbackStatus:
+    output_underflow = False
+
+
+class ClockOutputStream:
+    """
+    Náhrada sd.OutputStream bez zvukovej karty.
+
+    Volá callback mixera z vlastného threadu podľa hodín; speed=0 prehrá
+    všetko okamžite (na meranie spracovania bez čakania na dohranie).
+    """
+
+    def __init__(
+        self,
+        callback,
+        samplerate: int,
+        blocksize: int,
+        speed: float = 0.0,
+        idle: Optional[Callable[[], bool]] = None,
+    ):
+        self.callback = callback
+        self.idle = idle or (lambda: True)
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.speed = speed
+        self.latency = 0.0
+        self._running = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._running.set()
+        self._thread = threading.Thread(target=self._run, name="clock-output", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running.clear()
+        if self._thread:
+            self._thread.join(1.0)
+
+    def close(self):
+        self.stop()
+
+    def _run(self):
+        outdata = np.zeros((self.blocksize, 1), dtype=np.float32)
+        status = _CallbackStatus()
+        block_sec = self.blocksize / self.samplerate
+        next_at = time.perf_counter()
+        while self._running.is_set():
+            self.callback(outdata, self.blocksize, None, status)
+            if self.speed > 0:
+                next_at += block_sec / self.speed
+                time.sleep(max(0.0, next_at - time.perf_counter()))
+            elif self.idle():
+                # Pri okamžitom prehrávaní sa čaká len keď nie je čo hrať
+                time.sleep(0.001)
+
+
+@dataclass
+class FakeInputDevice:
+    """Simulované vstupné zariadenie pre meranie bez zvukovej karty."""
+
+    name: str = "Fake mikrofón"
+    default_samplerate: int = 48000
+    max_input_channels: int = 2
+    sample_rates: Tuple[int, ...] = (16000, 44100, 48000)
+    latency_ms: float = 6.0  # ADC -> callback nad rámec plnenia bloku
+    jitter_ms: float = 0.3  # náhodné oneskorenie callbacku
+    min_stable_block_ms: float = 5.0  # kratšie bloky občas pretečú
+
+
+class _InputStatus:
+    def __init__(self, overflow: bool = False):
+        self.input_overflow = overflow
+        self.input_underflow = False
+
+    def __bool__(self):
+        return self.input_overflow
+
+
+class VirtualClock:
+    """
+    Virtuálne hodiny pre FakeInputStream a AudioProbe (clock=now, sleep=sleep).
+
+    sleep posunie čas a postupne spustí naplánované udalosti, takže meranie
+    nezávisí od plánovača OS ani zaťaženia stroja.
+    """
+
+    def __init__(self, start: float = 1000.0):
+        self._now = start
+        self._events: List[Tuple[float, int, Callable[[], None]]] = []
+        self._sequence = itertools.count()
+
+    def now(self) -> float:
+        return self._now
+
+    def call_at(self, at: float, callback: Callable[[], None]):
+        heapq.heappush(self._events, (at, next(self._sequence), callback))
+
+    def sleep(self, seconds: float):
+        until = self._now + max(0.0, seconds)
+        while self._events and self._events[0][0] <= until:
+            at, _, callback = heapq.heappop(self._events)
+            self._now = max(self._now, at)
+            callback()
+        self._now = until
+
+
+class FakeInputStream:
+    """
+    Náhrada sd.InputStream: callback z vlastného threadu podľa hodín.
+
+    S VirtualClock sa callbacky nespúšťajú z threadu, ale pri clock.sleep
+    (deterministicky, jitter je daný seedom).
+    """
+
+    def __init__(
+        self,
+        device: FakeInputDevice,
+        samplerate,
+        channels,
+        blocksize,
+        callback,
+        seed=0,
+        clock: Optional[VirtualClock] = None,
+    ):
+        if samplerate not in device.sample_rates:
+            raise ValueError(f"Invalid sample rate {samplerate}")
+        if channels > device.max_input_channels:
+            raise ValueError(f"Invalid number of channels {channels}")
+        self.device = device
+        self.samplerate = samplerate
+        self.channels = channels
+        self.blocksize = blocksize
+        self.callback = callback
+        self.clock = clock
+        self.latency = device.latency_ms / 1000.0
+        self.period = blocksize / samplerate
+        self._unstable = self.period * 1000 < device.min_stable_block_ms
+        self._indata = np.zeros((blocksize, channels), dtype=np.float32)
+        self._count = 0
+        self._random = np.random.default_rng(seed)
+        self._running = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._running.set()
+        if self.clock is not None:
+            self._schedule(self.clock.now() + self.period)
+            return
+        self._thread = threading.Thread(target=self._run, name="fake-input", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running.clear()
+        if self._thread:
+            self._thread.join(1.0)
+
+    def close(self):
+        self.stop()
+
+    def _delay(self) -> float:
+        return self._random.uniform(0, self.device.jitter_ms / 1000.0)
+
+    def _deliver(self, now: float):
+        time_info = SimpleNamespace(
+            inputBufferAdcTime=now - self.period - self.latency,
+            currentTime=now,
+        )
+        self._count += 1
+        overflow = self._unstable and self._count % 10 == 0
+        self.callback(self._indata, self.blocksize, time_info, _InputStatus(overflow))
+
+    def _schedule(self, next_at: float):
+        def tick():
+            if not self._running.is_set():
+                return
+            self._deliver(self.clock.now())
+            self._schedule(next_at + self.period)
+
+        self.clock.call_at(next_at + self._delay(), tick)
+
+    def _run(self):
+        next_at = time.perf_counter() + self.period
+        while self._running.is_set():
+            time.sleep(max(0.0, next_at + self._delay() - time.perf_counter()))
+            self._deliver(time.perf_counter())
+            next_at += self.period
+
+
+class FakeInputBackend:
+    """Náhrada modulu sounddevice pre AudioProbe (query_devices, default, InputStream)."""
+
+    def __init__(
+        self,
+        devices: Optional[List[FakeInputDevice]] = None,
+        default_device: int = 0,
+        clock: Optional[VirtualClock] = None,
+    ):
+        """
+        Args:
+            devices: Simulované zariadenia (None = jedno predvolené)
+            default_device: Index predvoleného vstupu
+            clock: Virtuálne hodiny streamov (None = reálny čas a thread)
+        """
+        self.devices = devices or [FakeInputDevice()]
+        self.default = SimpleNamespace(device=[default_device, -1])
+        self.clock = clock
+
+    def query_devices(self, device: Optional[int] = None):
+        infos = [
+            {
+                "name": d.name,
+                "max_input_channels": d.max_input_channels,
+                "default_samplerate": float(d.default_samplerate),
+            }
+            for d in self.devices
+        ]
+        return infos if device is None else infos[device]
+
+    def InputStream(self, samplerate, channels, blocksize, device, callback, dtype=None):
+        index = self.default.device[0] if device is None else device
+        return FakeInputStream(
+            self.devices[index], samplerate, channels, blocksize, callback, clock=self.clock
+        )
+
+
+class NullAudioMixer(AudioMixer):
+    """AudioMixer, ktorý prehráva do ClockOutputStream namiesto zariadenia."""
+
+    def __init__(self, sample_rate: int = 48000, blocksize: int = 480, speed: float = 0.0):
+        super().__init__(sample_rate=sample_rate, blocksize=blocksize)
+        self.speed = speed
+
+    def start(self):
+        if self._stream is not None:
+            return
+        self._stream = ClockOutputStream(
+            self._callback,
+            self.sample_rate,
+            self.blocksize,
+            speed=self.speed,
+            idle=lambda: not self.is_playing,
+        )
+        self._stream.start()
+
+
+def load_transcript(wav_path: Path) -> Optional[str]:
+    """Prepis nahrávky zo súboru vedľa WAV (clip.wav -> clip.txt)."""
+    txt_path = wav_path.with_suffix(".txt")
+    if txt_path.exists():
+        return txt_path.read_text(encoding="utf-8").strip()
+    return None
@@ -0,0 +1,365 @@
+"""
+Auto-tuner parametrov Whisper dekódovania.
+
+Na označenej sade slovenských nahrávok (clip.wav + clip.txt s referenčným
+prepisom) prejde kombinácie veľkosti modelu, compute_type, beam_size,
+vad_filter a cpu_threads/num_workers priamo na tomto stroji, zmeria
+latenciu a WER a zapíše Pareto-optimálne body do YAML profilu. Vybraný
+bod profilu načíta AppConfig cez model.profile.
+"""
+
+import itertools
+import logging
+import os
+import platform
+import re
+import time
+import unicodedata
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import yaml
+
+from ..config.config import ModelConfig
+from ..utils.telemetry import LatencyHistogram
+from .replay import Recording
+
+logger = logging.getLogger(__name__)
+
+# compute_type, ktoré CTranslate2 na danom zariadení podporuje
+DEVICE_COMPUTE_TYPES = {
+    "cpu": {"int8", "int8_float32", "int16", "float32"},
+    "cuda": {"int8", "int8_float16", "int8_float32", "float16", "float32"},
+}
+
+
+@dataclass
+class TuningPoint:
+    """Výsledok jednej kombinácie parametrov."""
+
+    size: str
+    device: str
+    compute_type: str
+    beam_size: int
+    vad_filter: bool
+    cpu_threads: int
+    num_workers: int
+    wer: float = 0.0
+    latency_p50_ms: float = 0.0
+    latency_p95_ms: float = 0.0
+    rtf: float = 0.0  # čas dekódovania / dĺžka audia
+    load_ms: float = 0.0
+    error: Optional[str] = None
+
+    def settings(self) -> Dict[str, Any]:
+        """Nastavenia pre ModelConfig.apply_profile."""
+        return {
+            "size": self.size,
+            "device": self.device,
+            "compute_type": self.compute_type,
+            "beam_size": self.beam_size,
+            "vad_filter": self.vad_filter,
+            "cpu_threads": self.cpu_threads,
+            "num_workers": self.num_workers,
+        }
+
+
+@dataclass
+class TuningGrid:
+    """Priestor prehľadávania."""
+
+    sizes: List[str] = field(default_factory=lambda: ["small", "medium", "large-v2"])
+    devices: List[str] = field(default_factory=lambda: ["cuda", "cpu"])
+    compute_types: List[str] = field(default_factory=lambda: ["int8", "int8_float16", "float16"])
+    beam_sizes: List[int] = field(default_factory=lambda: [1, 2, 5])
+    vad_filters: List[bool] = field(default_factory=lambda: [True, False])
+    cpu_threads: List[int] = field(default_factory=lambda: [0])
+    num_workers: List[int] = field(default_factory=lambda: [1])
+
+
+def normalize_text(text: str) -> List[str]:
+    """
+    Normalizuje text na slová pre WER.
+
+    Malé písmená, bez interpunkcie; diakritika sa zachováva (v slovenčine
+    mení význam slova).
+    """
+    text = unicodedata.normalize("NFC", text.lower())
+    text = re.sub(r"[^\w\s]", " ", text)
+    return text.split()
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """
+    WER = (substitúcie + vymazania + vloženia) / počet slov referencie.
+
+    Returns:
+        WER (môže byť > 1 pri veľa vloženiach); prázdna referencia vráti
+        0.0 pre prázdnu hypotézu, inak 1.0
+    """
+    ref, hyp = normalize_text(reference), normalize_text(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word),
+            )
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def pareto_front(points: Iterable[TuningPoint]) -> List[TuningPoint]:
+    """
+    Body, ktoré žiadny iný bod neprekonáva súčasne vo WER aj latencii p95.
+
+    Returns:
+        Pareto front zoradený podľa latencie
+    """
+    valid = sorted(
+        (p for p in points if p.error is None),
+        key=lambda p: (p.latency_p95_ms, p.wer),
+    )
+    front: List[TuningPoint] = []
+    best_wer = float("inf")
+    for point in valid:
+        if point.wer < best_wer:
+            front.append(point)
+            best_wer = point.wer
+    return front
+
+
+def select_point(
+    front: Sequence[TuningPoint],
+    max_latency_ms: Optional[float] = None,
+    wer_tolerance: float = 0.01,
+) -> Optional[TuningPoint]:
+    """
+    Vyberie bod z Pareto frontu.
+
+    Args:
+        front: Pareto front (zoradený podľa latencie)
+        max_latency_ms: Ak je zadaný, najnižší WER s p95 latenciou v limite
+        wer_tolerance: Inak najrýchlejší bod, ktorého WER je najviac o toľko
+            horší ako najlepší
+
+    Returns:
+        Vybraný bod alebo None pri prázdnom fronte
+    """
+    if not front:
+        return None
+    if max_latency_ms is not None:
+        within = [p for p in front if p.latency_p95_ms <= max_latency_ms]
+        if within:
+            return min(within, key=lambda p: p.wer)
+        logger.warning(f"Žiadna kombinácia nestihne {max_latency_ms:.0f}ms, beriem najrýchlejšiu")
+        return front[0]
+    best_wer = min(p.wer for p in front)
+    return next(p for p in front if p.wer <= best_wer + wer_tolerance)
+
+
+class WhisperTuner:
+    """Prehľadá mriežku parametrov a zmeria latenciu a WER."""
+
+    def __init__(
+        self,
+        clips: List[Recording],
+        model_config: ModelConfig,
+        grid: TuningGrid,
+        sample_rate: int = 16000,
+    ):
+        """
+        Args:
+            clips: Nahrávky s referenčným prepisom
+            model_config: Aktuálna konfigurácia (jazyk, best_of, teplota...)
+            grid: Priestor prehľadávania
+            sample_rate: Vzorkovanie nahrávok
+        """
+        missing = [clip.name for clip in clips if not clip.transcript]
+        if missing:
+            raise ValueError(f"Chýba referenčný prepis (.txt) pre: {', '.join(missing)}")
+        self.clips = clips
+        self.model_config = model_config
+        self.grid = grid
+        self.sample_rate = sample_rate
+        self.audio_sec = sum(len(clip.audio) for clip in clips) / sample_rate
+
+    def combinations(self) -> List[Dict[str, Any]]:
+        """Platné kombinácie modelu (size, device, compute_type, vlákna)."""
+        result = []
+        for size, device, compute_type, threads, workers in itertools.product(
+            self.grid.sizes,
+            self.grid.devices,
+            self.grid.compute_types,
+            self.grid.cpu_threads,
+            self.grid.num_workers,
+        ):
+            if compute_type not in DEVICE_COMPUTE_TYPES.get(device, set()):
+                continue
+            # cpu_threads na GPU nemá vplyv, stačí jedna hodnota
+            if device == "cuda" and threads != self.grid.cpu_threads[0]:
+                continue
+            result.append(
+                {
+                    "size": size,
+                    "device": device,
+                    "compute_type": compute_type,
+                    "cpu_threads": threads,
+                    "num_workers": workers,
+                }
+            )
+        return result
+
+    def run(self) -> List[TuningPoint]:
+        """Prejde celú mriežku. Model sa načíta raz pre každú kombináciu modelu."""
+        points: List[TuningPoint] = []
+        combinations = self.combinations()
+        for index, combo in enumerate(combinations, 1):
+            logger.info(f"[{index}/{len(combinations)}] Načítavam {combo}")
+            load_start = time.perf_counter()
+            try:
+                model = self._load_model(**combo)
+            except Exception as e:
+                # Nepodporovaný compute_type, chýbajúca CUDA, nedostatok pamäte...
+                logger.warning(f"Kombinácia {combo} nedostupná: {e}")
+                points.extend(
+                    TuningPoint(**combo, beam_size=beam, vad_filter=vad, error=str(e))
+                    for beam, vad in itertools.product(self.grid.beam_sizes, self.grid.vad_filters)
+                )
+                continue
+            load_ms = (time.perf_counter() - load_start) * 1000
+
+            # Zahriatie (alokácie, JIT kernely) sa nemeria
+            self._transcribe(model, self.clips[0], beam_size=1, vad_filter=False)
+
+            for beam_size, vad_filter in itertools.product(
+                self.grid.beam_sizes, self.grid.vad_filters
+            ):
+                point = self._measure(model, combo, beam_size, vad_filter)
+                point.load_ms = load_ms
+                points.append(point)
+                logger.info(
+                    f"  beam={beam_size} vad={vad_filter}: WER {point.wer:.3f}, "
+                    f"p95 {point.latency_p95_ms:.0f}ms, RTF {point.rtf:.2f}"
+                )
+            del model
+        return points
+
+    def _measure(
+        self, model, combo: Dict[str, Any], beam_size: int, vad_filter: bool
+    ) -> TuningPoint:
+        histogram = LatencyHistogram()
+        errors = 0.0
+        words = 0
+        decode_sec = 0.0
+        for clip in self.clips:
+            start = time.perf_counter()
+            text = self._transcribe(model, clip, beam_size=beam_size, vad_filter=vad_filter)
+            elapsed = time.perf_counter() - start
+            decode_sec += elapsed
+            histogram.record(elapsed * 1000)
+            # WER sady váži klipy počtom slov (nie priemer WER klipov)
+            clip_words = len(normalize_text(clip.transcript))
+            errors += word_error_rate(clip.transcript, text) * clip_words
+            words += clip_words
+        return TuningPoint(
+            **combo,
+            beam_size=beam_size,
+            vad_filter=vad_filter,
+            wer=errors / max(1, words),
+            latency_p50_ms=histogram.percentile(50),
+            latency_p95_ms=histogram.percentile(95),
+            rtf=decode_sec / self.audio_sec if self.audio_sec else 0.0,
+        )
+
+    def _transcribe(self, model, clip: Recording, beam_size: int, vad_filter: bool) -> str:
+        segments, _ = model.transcribe(
+            audio=clip.audio,
+            language=self.model_config.language,
+            beam_size=beam_size,
+            best_of=self.model_config.best_of,
+            temperature=self.model_config.temperature,
+            vad_filter=vad_filter,
+            no_speech_threshold=self.model_config.no_speech_threshold,
+        )
+        return " ".join(segment.text.strip() for segment in segments)
+
+    @staticmethod
+    def _load_model(size: str, device: str, compute_type: str, cpu_threads: int, num_workers: int):
+        from faster_whisper import WhisperModel
+
+        return WhisperModel(
+            size,
+            device=device,
+            compute_type=compute_type,
+            cpu_threads=cpu_threads,
+            num_workers=num_workers,
+        )
+
+
+def build_profile(
+    points: List[TuningPoint],
+    clips: List[Recording],
+    max_latency_ms: Optional[float] = None,
+    wer_tolerance: float = 0.01,
+) -> Dict[str, Any]:
+    """
+    Zostaví profil pre AppConfig (kľúč selected) s Pareto frontom.
+
+    Raises:
+        RuntimeError: Ak žiadna kombinácia neprebehla
+    """
+    front = pareto_front(points)
+    selected = select_point(front, max_latency_ms=max_latency_ms, wer_tolerance=wer_tolerance)
+    if selected is None:
+        raise RuntimeError("Žiadna kombinácia parametrov neprebehla úspešne")
+    return {
+        "selected": selected.settings(),
+        "selection": {
+            "max_latency_ms": max_latency_ms,
+            "wer_tolerance": wer_tolerance,
+            "wer": round(selected.wer, 4),
+            "latency_p95_ms": round(selected.latency_p95_ms, 1),
+        },
+        "machine": {
+            "host": platform.node(),
+            "cpu": platform.processor() or platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "tuned_at": datetime.now().isoformat(timespec="seconds"),
+            "clips": len(clips),
+        },
+        "pareto": [_rounded(asdict(point)) for point in front],
+        "all": [_rounded(asdict(point)) for point in points],
+    }
+
+
+def _rounded(values: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: round(v, 4) if isinstance(v, float) else v for k, v in values.items()}
+
+
+def save_profile(profile: Dict[str, Any], path: Path):
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(profile, f, allow_unicode=True, sort_keys=False)
+
+
+def format_front(profile: Dict[str, Any]) -> str:
+    """Tabuľka Pareto frontu s označeným vybraným bodom."""
+    selected = profile["selected"]
+    lines = [
+        f"{'':2}{'model':<10}{'zariadenie':<12}{'compute':<14}{'beam':>5}{'vad':>6}"
+        f"{'vlákna':>8}{'WER':>8}{'p95':>9}{'RTF':>7}"
+    ]
+    for point in profile["pareto"]:
+        marker = "*" if all(point[k] == v for k, v in selected.items()) else " "
+        lines.append(
+            f"{marker:2}{point['size']:<10}{point['device']:<12}{point['compute_type']:<14}"
+            f"{point['beam_size']:>5}{str(point['vad_filter']):>6}{point['cpu_threads']:>8}"
+            f"{point['wer']:>8.3f}{point['latency_p95_ms']:>7.0f}ms{point['rtf']:>7.2f}"
+        )
+    return "\n".join(lines)
@@ -3,8 +3,8 @@ Konfiguračný modul pre Elena STT.
 Obsahuje všetky konfiguračné triedy a metódy pre načítanie konfigurácie.
 """
 
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
 import yaml
 from pathlib import Path
 
@@ -21,6 +21,52 @@ class ModelConfig:
     temperature: float
     vad_filter: bool
     no_speech_threshold: float
+    cpu_threads: int = 0  # 0 = predvolené CTranslate2 (v CPU režime podľa voľných jadier)
+    num_workers: int = 1
+    profile: Optional[str] = None
+    cpu_performance_mode: bool = True
+    cpu_reserved_cores: int = 1
+    batch_enabled: bool = True
+    batch_window_ms: float = 0.0
+    batch_max_size: int = 8
+    batch_max_wait_ms: float = 200.0
+    # Uvoľnenie modelu počas nečinnosti (dlhé hranie bez PTT)
+    idle_enabled: bool = False
+    idle_timeout_sec: float = 600.0
+    idle_action: str = "demote"  # demote = malý CPU model namiesto veľkého, unload = bez modelu
+    idle_model: str = "small"
+    idle_compute_type: str = "int8"
+    idle_reload_wait_sec: float = 1.5  # dlhšie čakanie na veľký model prepíše malý (demote)
+    cpu_models: List[Dict[str, Any]] = field(
+        default_factory=lambda: [
+            {"max_sec": 8.0, "size": "small"},
+            {"max_sec": None, "size": "base"},
+        ]
+    )
+
+    def apply_profile(self, settings: Dict[str, Any]):
+        """
+        Prepíše nastavenia modelu vybraným bodom z profilu auto-tunera.
+
+        Args:
+            settings: Slovník s kľúčmi size, device, compute_type, beam_size,
+                vad_filter, cpu_threads, num_workers (chýbajúce sa nemenia)
+        """
+        if "size" in settings:
+            self.size = settings["size"]
+        if "device" in settings:
+            self.cuda_enabled = settings["device"] == "cuda"
+        if "compute_type" in settings:
+            if self.cuda_enabled:
+                self.cuda_compute_type = settings["compute_type"]
+            else:
+                self.cpu_compute_type = settings["compute_type"]
+        for key in ("beam_size", "vad_filter", "cpu_threads", "num_workers"):
+            if key in settings:
+                setattr(self, key, settings[key])
+        # Zmeraný CPU model má prednosť pred tiermi podľa dĺžky výpovede
+        if not self.cuda_enabled and "size" in settings:
+            self.cpu_models = [{"max_sec": None, "size": settings["size"]}]
 
 
 @dataclass
@@ -31,12 +77,40 @@ class AudioConfig:
     pre_roll_sec: float
     post_roll_sec: float
     input_device_index: Optional[int]
+    # Whisper dostáva mono v tomto vzorkovaní; zariadenie beží na sample_rate
+    stt_sample_rate: int = 16000
+    downmix: str = "mean"  # mean | first (kanál 0)
+    # Potlačenie šumu (profil sa učí mimo nahrávania) a AGC
+    noise_reduction: bool = True
+    noise_floor: float = 0.1  # minimálny zisk binu (0.1 = max. -20 dB)
+    agc_enabled: bool = True
+    agc_target_dbfs: float = -20.0
+    agc_max_gain_db: float = 20.0
+    # Zachytávanie v samostatnom procese (zdieľaný kruhový buffer)
+    capture_process: bool = False
+    ring_sec: float = 120.0
+    # Profil z merania zariadenia (python -m src.services.audio_probe)
+    profile: Optional[str] = None
+    auto_probe: bool = False  # pri štarte zmerať zariadenie, ak profil ešte neexistuje
+
+    def apply_profile(self, settings: Dict[str, Any]):
+        """
+        Prepíše nastavenia zariadenia vybraným bodom z merania.
+
+        Args:
+            settings: Slovník s kľúčmi input_device_index, sample_rate,
+                blocksize, channels (chýbajúce sa nemenia)
+        """
+        for key in ("input_device_index", "sample_rate", "blocksize", "channels"):
+            if key in settings:
+                setattr(self, key, settings[key])
 
 
 @dataclass
 class ControlsConfig:
     ptt_key: str
     print_partials: bool
+    barge_in: bool = True
 
 
 @dataclass
@@ -48,6 +122,168 @@ class TTSConfig:
     pitch: float
     volume: float
     queue_max_size: int
+    queue_drop_policy: str = "drop_new"
+    output_device_index: Optional[int] = None
+    cache_size: int = 64
+    duck_gain: float = 0.3
+    english_terms: bool = False
+    sentence_break_ms: int = 250
+    batch_max_chars: int = 300
+    local_engine: str = "espeak-ng"
+    local_voice: str = "sk"
+    local_model: Optional[str] = None
+    failover_enabled: bool = True
+    failover_latency_ms: float = 1500.0
+    failover_latency_per_char_ms: float = 8.0
+    failover_max_failures: int = 2
+    failover_cooldown_sec: float = 120.0
+
+
+@dataclass
+class TwitchConfig:
+    """Konfigurácia pre Twitch chat (token a kanál sú v .env)"""
+
+    enabled: bool = False
+    host: str = "irc.chat.twitch.tv"
+    port: int = 6697
+    use_tls: bool = True
+    trigger_prefixes: List[str] = field(default_factory=lambda: ["!elena", "@elena"])
+    user_cooldown_sec: float = 30.0
+    dedup_window_sec: float = 120.0
+    batch_window_sec: float = 2.0
+    max_batch_size: int = 8
+    max_pending: int = 500
+    max_outbound: int = 40
+    rate_limit_messages: int = 20
+    rate_limit_period_sec: float = 30.0
+    max_reply_length: int = 450
+    speak_replies: bool = True
+
+
+@dataclass
+class SchedulerConfig:
+    """Konfigurácia plánovača požiadaviek (pruhy a limity súbežnosti)"""
+
+    llm_concurrency: int = 3
+    tts_concurrency: int = 2
+    reserved_streamer_slots: int = 1
+    lanes: Dict[str, Dict[str, Any]] = field(
+        default_factory=lambda: {
+            "streamer": {"weight": 8.0, "deadline_sec": None, "tts_priority": 0, "reserved": True},
+            "vip": {"weight": 3.0, "deadline_sec": 60.0, "tts_priority": 1},
+            "chat": {"weight": 1.0, "deadline_sec": 30.0, "tts_priority": 2},
+        }
+    )
+
+
+@dataclass
+class UsageConfig:
+    """Konfigurácia počítania spotreby a mäkkého rozpočtu (Azure TTS, OpenAI)"""
+
+    enabled: bool = True
+    store_path: str = "usage.json"
+    retention_days: int = 62
+    flush_interval_sec: float = 30.0
+    tts_monthly_char_budget: int = 500_000
+    llm_monthly_token_budget: int = 2_000_000
+    soft_limit_ratio: float = 0.8
+    tts_price_per_million_chars: float = 16.0
+    prompt_price_per_million_tokens: float = 0.5
+    completion_price_per_million_tokens: float = 1.5
+    short_reply_hint: str = "Odpovedz stručne, najviac dvoma vetami."
+
+
+@dataclass
+class TracingConfig:
+    """Konfigurácia trasovania latencie turnov (OTLP/JSON export)"""
+
+    enabled: bool = True
+    ring_size: int = 200
+    export_path: Optional[str] = "traces.otlp.jsonl"
+    service_name: str = "elena"
+    metrics_path: Optional[str] = "metrics.jsonl"  # JSONL záznamy telemetrie (None = bez zápisu)
+
+
+@dataclass
+class MetricsConfig:
+    """Konfigurácia lokálneho Prometheus endpointu"""
+
+    enabled: bool = True
+    host: str = "127.0.0.1"
+    port: int = 9108
+
+
+@dataclass
+class RemoteSTTConfig:
+    """Konfigurácia vzdialeného STT servera (Whisper na inom stroji)"""
+
+    enabled: bool = False
+    host: str = "127.0.0.1"
+    port: int = 8765
+    token: str = ""  # zdieľaný kľúč klienta a servera (prázdny = bez overenia)
+    codec: str = "pcm16"  # pcm16 | opus (vyžaduje opuslib na oboch stranách)
+    pool_size: int = 2
+    connect_timeout_sec: float = 1.0
+    result_timeout_sec: float = 5.0
+    stream_while_recording: bool = True  # posielať audio už počas držania PTT
+    fallback_local: bool = True  # pri výpadku/timeoute prepísať lokálnym modelom
+    fallback_preload: bool = False  # načítať lokálny model hneď (inak pri prvom výpadku)
+    max_utterance_sec: float = 120.0  # server: dlhšiu výpoveď odmietne (limit pamäte)
+
+
+@dataclass
+class HttpConfig:
+    """Konfigurácia zdieľanej HTTP vrstvy pre cloudové API (OpenAI)"""
+
+    max_connections: int = 10
+    max_keepalive_connections: int = 5
+    keepalive_expiry_sec: float = 60.0
+    http2: bool = True  # len ak je nainštalované h2 (httpx[http2])
+    connect_timeout_sec: float = 5.0
+    read_timeout_sec: float = 30.0
+    write_timeout_sec: float = 10.0
+    pool_timeout_sec: float = 5.0
+    breaker_failures: int = 5  # zlyhania po sebe, po ktorých sa endpoint odpojí
+    breaker_reset_sec: float = 30.0
+    retry_max_attempts: int = 2  # opakovania jednej požiadavky
+    retry_budget_ratio: float = 0.2  # opakovania najviac 20 % bežných požiadaviek
+    retry_min_per_sec: float = 0.2
+    retry_backoff_ms: float = 250.0
+    retry_after_max_sec: float = 10.0  # dlhší Retry-After sa nečaká
+
+
+@dataclass
+class LoreConfig:
+    """Konfigurácia lokálnych lore funkcií asistenta (tool calling)"""
+
+    enabled: bool = True
+    path: str = "lore"
+    max_spoiler_level: int = 2  # 0 žiadne, 1 začiatok, 2 stred hry, 3 finále a konce
+    search_limit: int = 5
+    summary_chars: int = 300
+    max_card_chars: int = 4000  # dlhšie karty sa modelu orežú (menej tokenov)
+    tool_timeout_sec: float = 5.0
+
+
+@dataclass
+class ReplyConfig:
+    """Dvojdĺžkové odpovede: krátka sa vysloví, podrobná ide do chatu/overlay"""
+
+    dual_length: bool = True
+    spoken_max_chars: int = 220
+    format_hint: str = (
+        "Odpovedz v dvoch častiach: najprv [HLAS] a krátka odpoveď na vyslovenie "
+        "(najviac dve vety), potom [DETAIL] a podrobná odpoveď."
+    )
+    overlay_path: Optional[str] = "overlay/odpoved.txt"  # None = bez overlay súboru
+    streamer_to_chat: bool = False  # podrobnú odpoveď na PTT otázku poslať aj do chatu
+
+
+@dataclass
+class SystemConfig:
+    """Systémové limity (sekcia system zdieľaná s config_v2)"""
+
+    memory_limit_mb: int = 0  # RAM procesu + VRAM modelu; 0 = bez limitu
 
 
 @dataclass
@@ -56,6 +292,16 @@ class AppConfig:
     audio: AudioConfig
     controls: ControlsConfig
     tts: TTSConfig
+    twitch: TwitchConfig = field(default_factory=TwitchConfig)
+    scheduler: SchedulerConfig = field(default_factory=SchedulerConfig)
+    usage: UsageConfig = field(default_factory=UsageConfig)
+    tracing: TracingConfig = field(default_factory=TracingConfig)
+    metrics: MetricsConfig = field(default_factory=MetricsConfig)
+    remote_stt: RemoteSTTConfig = field(default_factory=RemoteSTTConfig)
+    system: SystemConfig = field(default_factory=SystemConfig)
+    http: HttpConfig = field(default_factory=HttpConfig)
+    lore: LoreConfig = field(default_factory=LoreConfig)
+    reply: ReplyConfig = field(default_factory=ReplyConfig)
 
     @classmethod
     def from_yaml(cls, path: Path) -> "AppConfig":
@@ -74,7 +320,28 @@ class AppConfig:
             temperature=data["model"]["inference"]["temperature"],
             vad_filter=data["model"]["inference"]["vad_filter"],
             no_speech_threshold=data["model"]["inference"]["no_speech_threshold"],
+            cpu_threads=data["model"].get("runtime", {}).get("cpu_threads", 0),
+            num_workers=data["model"].get("runtime", {}).get("num_workers", 1),
+            profile=data["model"].get("profile"),
+            cpu_performance_mode=data["model"]["cpu"].get("performance_mode", True),
+            cpu_reserved_cores=data["model"]["cpu"].get("reserved_cores", 1),
+            batch_enabled=data["model"].get("batching", {}).get("enabled", True),
+            batch_window_ms=data["model"].get("batching", {}).get("window_ms", 0.0),
+            batch_max_size=data["model"].get("batching", {}).get("max_size", 8),
+            batch_max_wait_ms=data["model"].get("batching", {}).get("max_wait_ms", 200.0),
+            idle_enabled=data["model"].get("idle", {}).get("enabled", False),
+            idle_timeout_sec=data["model"].get("idle", {}).get("timeout_sec", 600.0),
+            idle_action=data["model"].get("idle", {}).get("action", "demote"),
+            idle_model=data["model"].get("idle", {}).get("model", "small"),
+            idle_compute_type=data["model"].get("idle", {}).get("compute_type", "int8"),
+            idle_reload_wait_sec=data["model"].get("idle", {}).get("reload_wait_sec", 1.5),
         )
+        if "models" in data["model"]["cpu"]:
+            model.cpu_models = data["model"]["cpu"]["models"]
+        # Profil z auto-tunera (python -m src.benchmark tune) má prednosť
+        if model.profile and Path(model.profile).exists():
+            with open(model.profile, "r", encoding="utf-8") as f:
+                model.apply_profile(yaml.safe_load(f)["selected"])
 
         audio = AudioConfig(
             sample_rate=data["audio"]["sample_rate"],
@@ -83,11 +350,27 @@ class AppConfig:
             pre_roll_sec=data["audio"]["pre_roll_sec"],
             post_roll_sec=data["audio"]["post_roll_sec"],
             input_device_index=data["audio"]["input_device_index"],
+            stt_sample_rate=data["audio"].get("stt_sample_rate", 16000),
+            downmix=data["audio"].get("downmix", "mean"),
+            noise_reduction=data["audio"].get("noise_reduction", True),
+            noise_floor=data["audio"].get("noise_floor", 0.1),
+            agc_enabled=data["audio"].get("agc", {}).get("enabled", True),
+            agc_target_dbfs=data["audio"].get("agc", {}).get("target_dbfs", -20.0),
+            agc_max_gain_db=data["audio"].get("agc", {}).get("max_gain_db", 20.0),
+            capture_process=data["audio"].get("capture", {}).get("process", False),
+            ring_sec=data["audio"].get("capture", {}).get("ring_sec", 120.0),
+            profile=data["audio"].get("profile"),
+            auto_probe=data["audio"].get("auto_probe", False),
         )
+        # Profil z merania zariadenia má prednosť
+        if audio.profile and Path(audio.profile).exists():
+            with open(audio.profile, "r", encoding="utf-8") as f:
+                audio.apply_profile(yaml.safe_load(f)["selected"])
 
         controls = ControlsConfig(
             ptt_key=data["controls"]["ptt_key"],
             print_partials=data["controls"]["print_partials"],
+            barge_in=data["controls"].get("barge_in", True),
         )
 
         tts = TTSConfig(
@@ -98,6 +381,48 @@ class AppConfig:
             pitch=data["tts"]["pitch"],
             volume=data["tts"]["volume"],
             queue_max_size=data["tts"]["queue"]["max_size"],
+            queue_drop_policy=data["tts"]["queue"].get("drop_policy", "drop_new"),
+            output_device_index=data["tts"].get("output_device_index"),
+            cache_size=data["tts"].get("cache_size", 64),
+            duck_gain=data["tts"].get("duck_gain", 0.3),
+            english_terms=data["tts"].get("ssml", {}).get("english_terms", False),
+            sentence_break_ms=data["tts"].get("ssml", {}).get("sentence_break_ms", 250),
+            batch_max_chars=data["tts"].get("ssml", {}).get("batch_max_chars", 300),
+            local_engine=data["tts"].get("local", {}).get("engine", "espeak-ng"),
+            local_voice=data["tts"].get("local", {}).get("voice", "sk"),
+            local_model=data["tts"].get("local", {}).get("model"),
+            failover_enabled=data["tts"].get("failover", {}).get("enabled", True),
+            failover_latency_ms=data["tts"].get("failover", {}).get("latency_ms", 1500.0),
+            failover_latency_per_char_ms=data["tts"].get("failover", {}).get("latency_per_char_ms", 8.0),
+            failover_max_failures=data["tts"].get("failover", {}).get("max_failures", 2),
+            failover_cooldown_sec=data["tts"].get("failover", {}).get("cooldown_sec", 120.0),
         )
 
-        return cls(model=model, audio=audio, controls=controls, tts=tts)
+        twitch = TwitchConfig(**data.get("twitch", {}))
+        scheduler = SchedulerConfig(**data.get("scheduler", {}))
+        usage = UsageConfig(**data.get("usage", {}))
+        tracing = TracingConfig(**data.get("tracing", {}))
+        metrics = MetricsConfig(**data.get("metrics", {}))
+        remote_stt = RemoteSTTConfig(**data.get("remote_stt", {}))
+        http = HttpConfig(**data.get("http", {}))
+        lore = LoreConfig(**data.get("lore", {}))
+        reply = ReplyConfig(**data.get("reply", {}))
+        # Ostatné kľúče sekcie system (log_level, thread_pool_size) číta config_v2
+        system = SystemConfig(memory_limit_mb=data.get("system", {}).get("memory_limit_mb", 0))
+
+        return cls(
+            model=model,
+            audio=audio,
+            controls=controls,
+            tts=tts,
+            twitch=twitch,
+            scheduler=scheduler,
+            usage=usage,
+            tracing=tracing,
+            metrics=metrics,
+            remote_stt=remote_stt,
+            system=system,
+            http=http,
+            lore=lore,
+            reply=reply,
+        )
@@ -78,6 +78,11 @@ class AudioConfig:
     noise_reduction: bool = True
     noise_floor: float = 0.1
 
+    # AGC
+    agc_enabled: bool = True
+    agc_target_dbfs: float = -20.0
+    agc_max_gain_db: float = 20.0
+
     def validate(self):
         """Validuje konfiguráciu"""
         if self.sample_rate <= 0:
@@ -95,6 +100,9 @@ class AudioConfig:
         if self.post_roll_sec < 0:
             raise ValueError("Post-roll čas nemôže byť záporný")
 
+        if not 0.0 <= self.noise_floor <= 1.0:
+            raise ValueError("Noise floor musí byť v rozsahu 0-1")
+
 
 @dataclass
 class UIConfig:
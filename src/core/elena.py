@@ -18,22 +18,47 @@ Táto trieda predstavuje jadro aplikácie Elena STT, ktorá zabezpečuje:
 
 import asyncio
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 import logging
 import time
 from datetime import datetime
 from colorama import init, Fore, Style
 from ..config.config import AppConfig
-from ..services.assistant import AssistantService, AssistantConfig
-from ..services.audio_processor import AudioProcessor
-from ..utils.keyboard_listener import KeyboardListener
-from ..services.tts.azure_tts import AzureTTS, TTSError
+from .scheduler import PriorityScheduler, LANE_STREAMER
+from ..services.usage import UsageMeter
+from ..utils.telemetry import telemetry
+from ..utils.metrics_server import MetricsRegistry, MetricsServer, ProcessStats
+from ..utils.tracing import (
+    Tracer,
+    TurnTrace,
+    now_ns,
+    SPAN_CAPTURE,
+    SPAN_VAD,
+    SPAN_STT,
+    SPAN_LLM_FIRST_TOKEN,
+    SPAN_LLM_DONE,
+)
+from ..utils.startup import StartupProfiler
+from ..services.audio_probe import probe_and_save
+from ..services.reply import AssistantReply, ReplyOverlay, ReplyStats
+from ..services.stt import WhisperSTT
+from ..services.stt_idle import IdleModelManager
+from ..services.stt_remote import RemoteSTT
+from ..services.tts.base import TTSEngine, TTSError, TTSConfigError
+from ..services.tts.failover import FailoverTTS
 from ..services.tts.tts_queue import TTSQueue
-from faster_whisper import WhisperModel
+from ..services.tts.audio_mixer import AudioMixer
+from ..services.tts.ssml import SSMLBuilder, DEFAULT_ENGLISH_TERMS, load_glossary_terms
+from ..services.twitch_chat import TwitchChatService, TwitchCredentials, TwitchChatError
 import numpy as np
 
-# Inicializácia colorama pre Windows
-init()
+# Ťažké závislosti (openai, Azure Speech SDK, PortAudio, scipy, pynput) sa
+# importujú až v továrňach služieb - počas paralelnej inicializácie
+if TYPE_CHECKING:
+    from ..services.assistant import AssistantService
+    from ..services.http_transport import HttpTransport
+    from ..services.audio_processor import AudioProcessor
+    from ..utils.keyboard_listener import KeyboardListener
 
 logger = logging.getLogger(__name__)
 
@@ -56,21 +81,38 @@ class Elena:
         clean_text = re.sub(r'[\U0001F000-\U0001F9FF]', '', clean_text)
         return clean_text.strip()
 
-    def __init__(self, config_path: Path):
+    def __init__(self, config_path: Path, profiler: Optional[StartupProfiler] = None):
         """
         Inicializuje Elena STT.
 
         Args:
             config_path: Cesta ku konfiguračnému YAML súboru
+            profiler: Profil štartu (--profile-startup); None = len fázy do logu
         """
+        self.profiler = profiler or StartupProfiler()
         self.config = AppConfig.from_yaml(config_path)
-        self.assistant: Optional[AssistantService] = None
-        self.audio: Optional[AudioProcessor] = None
-        self.keyboard_listener: Optional[KeyboardListener] = None
-        self.tts: Optional[AzureTTS] = None
+        self.assistant: Optional["AssistantService"] = None
+        self.http: Optional["HttpTransport"] = None
+        self.audio: Optional["AudioProcessor"] = None
+        self.keyboard_listener: Optional["KeyboardListener"] = None
+        self.tts: Optional[TTSEngine] = None
         self.tts_queue: Optional[TTSQueue] = None
+        self.mixer: Optional[AudioMixer] = None
+        self.chat: Optional[TwitchChatService] = None
+        self.scheduler: Optional[PriorityScheduler] = None
+        self.usage: Optional[UsageMeter] = None
+        self.tracer: Optional[Tracer] = None
+        self.metrics_server: Optional[MetricsServer] = None
+        self.reply_stats = ReplyStats()
+        self.overlay: Optional[ReplyOverlay] = (
+            ReplyOverlay(Path(self.config.reply.overlay_path))
+            if self.config.reply.dual_length and self.config.reply.overlay_path
+            else None
+        )
+        self._capture_started_ns: Optional[int] = None
+        self._turn_task: Optional[asyncio.Task] = None
         self.loop = asyncio.new_event_loop()
-        self.model: Optional[WhisperModel] = None
+        self.stt: Optional[WhisperSTT] = None
         self._setup_logging()
 
     def _setup_logging(self):
@@ -83,72 +125,630 @@ class Elena:
     async def initialize(self):
         """Inicializuje všetky služby."""
         try:
-            # Inicializácia OpenAI asistenta
-            assistant_config = AssistantConfig()
-            self.assistant = AssistantService(assistant_config)
-            logger.info("OpenAI Assistant API inicializované")
+            metrics_path = self.config.tracing.metrics_path
+            telemetry.set_metrics_file(Path(metrics_path) if metrics_path else None)
 
-            # Inicializácia audio procesora
-            self.audio = AudioProcessor(
-                config=self.config.audio, callback=self._handle_audio
-            )
-            logger.info("Audio processor inicializovaný")
+            # Trasovanie latencie turnov
+            if self.config.tracing.enabled:
+                self.tracer = Tracer.from_config(self.config.tracing)
+                self.tracer.add_listener(
+                    lambda trace: telemetry.record_turn(
+                        trace.summary(), {"turn_id": trace.turn_id, **trace.root.attributes}
+                    )
+                )
+
+            # Počítadlo spotreby a rozpočtu
+            if self.config.usage.enabled:
+                self.usage = UsageMeter(self.config.usage)
+                self.usage.start()
 
-            # Inicializácia Whisper modelu
-            logger.info(f"Načítavam Whisper model: {self.config.model.size}")
-            self.model = self._load_whisper_model()
-            logger.info("Whisper model načítaný")
+            # Plánovač pre PTT streamera, chat a TTS
+            self.scheduler = PriorityScheduler.from_config(self.config.scheduler)
+            self.scheduler.start()
+
+            # Asistent, audio, Whisper a TTS sú nezávislé - importy a
+            # konštruktory bežia vo vláknach, model vo vlastnom STT pool-e
+            await asyncio.gather(
+                self._init_assistant(),
+                self._init_audio(),
+                self._init_stt(),
+                self._init_tts(),
+            )
+            self.audio.pin_cores = self.stt.reserved_cores
 
             # Nastavenie klávesových skratiek
-            self._setup_keyboard_listener()
+            with self.profiler.phase("klávesnica"):
+                self._setup_keyboard_listener()
             logger.info("Klávesové skratky nastavené")
 
-            # Inicializácia TTS ak je povolené
-            if self.config.tts.enabled:
+            # Inicializácia Twitch chatu ak je povolený
+            if self.config.twitch.enabled:
+                try:
+                    self.chat = TwitchChatService(
+                        config=self.config.twitch,
+                        credentials=TwitchCredentials(),
+                        assistant=self.assistant,
+                        scheduler=self.scheduler,
+                        on_reply=self._handle_chat_reply,
+                    )
+                    self.chat.start()
+                    logger.info("Twitch chat inicializovaný")
+                except TwitchChatError as e:
+                    logger.error(f"Twitch chat inicializácia zlyhala: {e}")
+                    self.chat = None
+
+            # Prometheus endpoint s metrikami
+            if self.config.metrics.enabled:
                 try:
-                    self.tts = AzureTTS(voice=self.config.tts.voice)
-                    self.tts_queue = TTSQueue(
-                        tts=self.tts,
-                        max_size=self.config.tts.queue_max_size
+                    self.metrics_server = MetricsServer(
+                        self._create_metrics_registry(),
+                        host=self.config.metrics.host,
+                        port=self.config.metrics.port,
                     )
-                    logger.info("TTS inicializované")
-                except TTSError as e:
-                    logger.error(f"TTS inicializácia zlyhala: {e}")
-                    logger.info("Prepínam na text-only mód")
-                    self.tts = None
-                    self.tts_queue = None
+                    await self.metrics_server.start()
+                except OSError as e:
+                    logger.error(f"Metrics endpoint sa nepodarilo spustiť: {e}")
+                    self.metrics_server = None
 
         except Exception as e:
             logger.error(f"Chyba pri inicializácii: {str(e)}")
             raise
+        finally:
+            self.profiler.finish()
+        logger.info(f"Služby inicializované za {self.profiler.total_ms:.0f} ms")
+
+    async def _in_thread(self, phase: str, func, *args):
+        """Spustí blokujúcu časť inicializácie vo vlákne a zmeria ju."""
+
+        def measured():
+            with self.profiler.phase(phase):
+                return func(*args)
+
+        return await asyncio.get_running_loop().run_in_executor(None, measured)
+
+    async def _init_assistant(self):
+        self.assistant = await self._in_thread("asistent", self._create_assistant)
+        logger.info("OpenAI Assistant API inicializované")
 
-    def _load_whisper_model(self) -> WhisperModel:
-        """Načíta a inicializuje Whisper model."""
-        if self.config.model.cuda_enabled:
+    async def _init_audio(self):
+        # Meranie zariadenia pri prvom štarte (blocksize, vzorkovanie)
+        audio_config = self.config.audio
+        if audio_config.auto_probe and not (
+            audio_config.profile and Path(audio_config.profile).exists()
+        ):
+            logger.info("Meriam vstupné audio zariadenie...")
+            await self._in_thread(
+                "meranie zariadenia",
+                probe_and_save,
+                audio_config,
+                Path(audio_config.profile or "audio_profile.yaml"),
+            )
+        self.audio = await self._in_thread("audio", self._create_audio_capture)
+        logger.info("Audio processor inicializovaný")
+
+    async def _init_stt(self):
+        logger.info(f"Načítavam Whisper model: {self.config.model.size}")
+        with self.profiler.phase("whisper"):
+            self.stt = self._create_stt()
+            await self.stt.load()
+        logger.info(f"Whisper model načítaný ({', '.join(self.stt.loaded_models)})")
+
+    async def _init_tts(self):
+        if not self.config.tts.enabled:
+            return
+        try:
+            self.mixer = await self._in_thread("tts mixer", self._create_mixer)
+            self.tts = await self._in_thread("tts engine", self._create_tts_engine)
+            self.tts_queue = TTSQueue(
+                tts=self.tts,
+                max_size=self.config.tts.queue_max_size,
+                synthesis_slot=self.scheduler.tts_slot,
+                drop_policy=self.config.tts.queue_drop_policy,
+                batch_max_chars=self.config.tts.batch_max_chars,
+            )
+            self.tts_queue.start()
+            logger.info(f"TTS inicializované ({self.tts.name})")
+        except TTSError as e:
+            logger.error(f"TTS inicializácia zlyhala: {e}")
+            logger.info("Prepínam na text-only mód")
+            self.tts = None
+            self.tts_queue = None
+
+    def _create_assistant(self) -> "AssistantService":
+        """Vytvorí klienta OpenAI asistenta."""
+        from ..services.assistant import AssistantService, AssistantConfig
+        from ..services.http_transport import HttpTransport
+        from ..services.lore import LoreTools
+
+        tools = None
+        if self.config.lore.enabled:
+            try:
+                with self.profiler.phase("lore index"):
+                    tools = LoreTools.from_config(self.config.lore)
+            except OSError as e:
+                logger.warning(f"Lore index sa nenačítal, asistent bude bez lore funkcií: {e}")
+        self.http = HttpTransport(self.config.http)
+        return AssistantService(
+            AssistantConfig(),
+            usage=self.usage,
+            http=self.http,
+            tools=tools,
+            reply=self.config.reply,
+        )
+
+    def _create_mixer(self) -> AudioMixer:
+        """Vytvorí audio mixer pre výstup TTS."""
+        return AudioMixer(
+            sample_rate=TTSEngine.SAMPLE_RATE,
+            device=self.config.tts.output_device_index,
+        )
+
+    def _create_tts_engine(self) -> TTSEngine:
+        """
+        Vytvorí TTS providera podľa tts.provider.
+
+        Pri Azure s povoleným failoverom sa pridá lokálny engine ako záloha;
+        ak Azure nie je nakonfigurované, použije sa rovno lokálny engine.
+
+        Raises:
+            TTSError: Ak sa nepodarí vytvoriť žiadny provider
+        """
+        tts_config = self.config.tts
+        if tts_config.provider not in ("azure", "local"):
+            raise TTSConfigError(f"Neznámy TTS provider: {tts_config.provider}")
+
+        primary: Optional[TTSEngine] = None
+        if tts_config.provider == "azure":
             try:
-                import torch
+                try:
+                    from ..services.tts.azure_tts import AzureTTS
+                except ImportError as e:
+                    raise TTSConfigError(f"Azure Speech SDK nie je nainštalované: {e}") from e
 
-                if not torch.cuda.is_available():
-                    raise RuntimeError("CUDA nie je dostupná")
+                primary = AzureTTS(
+                    voice=tts_config.voice,
+                    mixer=self.mixer,
+                    cache_size=tts_config.cache_size,
+                    ssml=self._create_ssml_builder(),
+                    usage=self.usage,
+                )
+            except TTSConfigError as e:
+                if not tts_config.failover_enabled:
+                    raise
+                logger.warning(f"Azure TTS nedostupné ({e}), použijem lokálny engine")
+
+        local: Optional[TTSEngine] = None
+        if tts_config.provider == "local" or tts_config.failover_enabled:
+            try:
+                from ..services.tts.local_tts import LocalTTS
 
-                logger.info("Inicializujem Whisper na CUDA...")
-                return WhisperModel(
-                    self.config.model.size,
-                    device="cuda",
-                    compute_type=self.config.model.cuda_compute_type,
+                local = LocalTTS(
+                    engine=tts_config.local_engine,
+                    voice=tts_config.local_voice,
+                    model_path=tts_config.local_model,
+                    rate=tts_config.rate,
+                    pitch=tts_config.pitch,
+                    volume=tts_config.volume,
+                    sentence_break_ms=tts_config.sentence_break_ms,
+                    mixer=self.mixer,
+                    cache_size=tts_config.cache_size,
                 )
-            except Exception as e:
-                logger.error(f"CUDA zlyhala: {str(e)}")
-                logger.info("Prepínam na CPU")
+            except TTSConfigError as e:
+                if primary is None:
+                    raise
+                logger.warning(f"Lokálny TTS nedostupný ({e}), failover vypnutý")
 
-        return WhisperModel(
-            self.config.model.size,
-            device="cpu",
-            compute_type=self.config.model.cpu_compute_type,
+        if primary is not None and local is not None:
+            return FailoverTTS(
+                primary=primary,
+                fallback=local,
+                latency_threshold_ms=tts_config.failover_latency_ms,
+                latency_per_char_ms=tts_config.failover_latency_per_char_ms,
+                max_failures=tts_config.failover_max_failures,
+                cooldown_sec=tts_config.failover_cooldown_sec,
+                usage=self.usage,
+            )
+        return primary or local
+
+    def _tts_engines(self) -> list:
+        """Všetky TTS providery (pri failoveri primárny aj záložný)."""
+        if isinstance(self.tts, FailoverTTS):
+            return [self.tts.primary, self.tts.fallback]
+        return [self.tts] if self.tts else []
+
+    def _create_metrics_registry(self) -> MetricsRegistry:
+        """Zaregistruje metriky fronty, plánovača, latencií, cache a chýb."""
+        registry = MetricsRegistry()
+        process = ProcessStats()
+
+        def stage_stats():
+            return [
+                (stage, stats)
+                for stage, stats in telemetry.snapshot().items()
+                if stats.get("count") and "p50" in stats
+            ]
+
+        registry.gauge(
+            "stage_latency_ms",
+            "Latencia fáz turnu (percentily)",
+            lambda: [
+                ({"stage": stage, "quantile": quantile}, stats[key])
+                for stage, stats in stage_stats()
+                for quantile, key in (("0.5", "p50"), ("0.95", "p95"), ("0.99", "p99"))
+            ],
         )
+        registry.counter(
+            "stage_observations",
+            "Počet meraní fáz turnu",
+            lambda: [({"stage": stage}, stats["count"]) for stage, stats in stage_stats()],
+        )
+
+        if self.tts_queue:
+            queue_metrics = self.tts_queue.metrics
+            registry.gauge(
+                "tts_queue_depth", "Počet čakajúcich TTS položiek", lambda: self.tts_queue.depth
+            )
+            registry.gauge(
+                "tts_queue_wait_ms",
+                "Čakanie položky vo fronte TTS",
+                lambda: [
+                    ({"quantile": "0.5"}, queue_metrics()["wait_p50_ms"]),
+                    ({"quantile": "0.95"}, queue_metrics()["wait_p95_ms"]),
+                ],
+            )
+            registry.counter(
+                "tts_queue_items",
+                "Spracované TTS položky podľa výsledku",
+                lambda: [
+                    ({"outcome": key}, queue_metrics()[key])
+                    for key in (
+                        "enqueued", "played", "dropped", "interrupted",
+                        "failed", "prefetch_hits", "batched",
+                    )
+                ],
+            )
+
+        if self.tts:
+            engines = self._tts_engines()
+            registry.counter(
+                "tts_cache_hits",
+                "Zásahy TTS cache",
+                lambda: [({"provider": e.name}, e.cache_hits) for e in engines],
+            )
+            registry.counter(
+                "tts_cache_misses",
+                "Výpadky TTS cache",
+                lambda: [({"provider": e.name}, e.cache_misses) for e in engines],
+            )
+            registry.gauge(
+                "tts_cache_hit_ratio",
+                "Podiel zásahov TTS cache",
+                lambda: [
+                    ({"provider": e.name}, e.cache_hits / max(1, e.cache_hits + e.cache_misses))
+                    for e in engines
+                ],
+            )
+            registry.counter(
+                "tts_errors",
+                "Chyby syntézy podľa providera",
+                lambda: [({"provider": e.name}, e.render_errors) for e in engines],
+            )
+            if isinstance(self.tts, FailoverTTS):
+                registry.counter(
+                    "tts_failover_events",
+                    "Udalosti failoveru (timeouty, chyby, prepnutia)",
+                    lambda: [({"event": key}, value) for key, value in self.tts.stats.items()],
+                )
+        if self.mixer:
+            registry.counter(
+                "audio_underflows", "Podtečenia výstupného audio bufferu", lambda: self.mixer.underflows
+            )
+        if self.audio:
+            registry.counter(
+                "audio_input_overflows",
+                "Pretečenia vstupného audio bufferu (stratené vzorky mikrofónu)",
+                lambda: self.audio.stats()["input_overflows"],
+            )
+            registry.counter(
+                "audio_input_callbacks", "Volania callbacku mikrofónu", lambda: self.audio.stats()["callbacks"]
+            )
+            if self.config.audio.capture_process:
+                registry.counter(
+                    "audio_ring_overruns",
+                    "Výpovede orezané kvôli kapacite zdieľaného bufferu",
+                    lambda: self.audio.ring_overruns,
+                )
+        if isinstance(self.stt, RemoteSTT):
+            registry.counter(
+                "stt_remote_utterances",
+                "Výpovede podľa toho, kde boli prepísané",
+                lambda: [
+                    ({"target": "remote"}, self.stt.remote_count),
+                    ({"target": "local"}, self.stt.fallback_count),
+                ],
+            )
+        if isinstance(self.stt, IdleModelManager):
+            idle = self.stt
+            registry.gauge(
+                "stt_model_state",
+                "Stav Whisper modelu (1 = aktuálny stav)",
+                lambda: [
+                    ({"state": state}, float(idle.state == state))
+                    for state in ("loaded", "restoring", "offloaded")
+                ],
+            )
+            registry.gauge(
+                "stt_model_memory_mb", "Odhad pamäte načítaných Whisper modelov", idle.model_memory_mb
+            )
+            registry.gauge(
+                "memory_limit_mb",
+                "Limit pamäte procesu (system.memory_limit_mb)",
+                lambda: idle.memory_limit_mb,
+            )
+            registry.gauge(
+                "stt_reload_ms",
+                "Trvanie posledného načítania modelu po nečinnosti",
+                lambda: idle.last_reload_ms,
+            )
+            registry.gauge(
+                "stt_reload_wait_ms",
+                "Čakanie prepisu na načítanie modelu (posledné)",
+                lambda: idle.last_wait_ms,
+            )
+            registry.counter(
+                "stt_offloads",
+                "Uvoľnenia modelu podľa dôvodu",
+                lambda: [({"reason": key}, value) for key, value in idle.offloads.items()],
+            )
+            registry.counter(
+                "stt_reloads",
+                "Opätovné načítania modelu podľa výsledku",
+                lambda: [({"result": key}, value) for key, value in idle.reloads.items()],
+            )
+            registry.counter(
+                "stt_standby_transcriptions",
+                "Prepisy náhradným modelom (veľký sa nestihol načítať)",
+                lambda: idle.standby_transcriptions,
+            )
+
+        if self.scheduler:
+            scheduler_metrics = self.scheduler.metrics
+            registry.gauge(
+                "scheduler_queue_depth",
+                "Čakajúce požiadavky na asistenta podľa pruhu",
+                lambda: [({"lane": lane}, m["depth"]) for lane, m in scheduler_metrics().items()],
+            )
+            registry.gauge(
+                "scheduler_wait_ms",
+                "Čakanie požiadavky v plánovači (p95)",
+                lambda: [({"lane": lane}, m["wait_p95_ms"]) for lane, m in scheduler_metrics().items()],
+            )
+            registry.counter(
+                "scheduler_requests",
+                "Požiadavky plánovača podľa pruhu a výsledku",
+                lambda: [
+                    ({"lane": lane, "outcome": key}, m[key])
+                    for lane, m in scheduler_metrics().items()
+                    for key in ("submitted", "completed", "failed", "dropped_deadline")
+                ],
+            )
+
+        if self.stt and self.stt.batcher:
+            batcher = self.stt.batcher
+            registry.counter(
+                "stt_batches", "Dekódované STT dávky (2+ výpovede)", lambda: batcher.batches
+            )
+            registry.counter(
+                "stt_batched_utterances",
+                "Výpovede dekódované v dávke",
+                lambda: batcher.batched_utterances,
+            )
+            registry.counter(
+                "stt_cancelled_utterances",
+                "Výpovede zrušených turnov vynechané z dekódovania",
+                lambda: batcher.dropped_cancelled,
+            )
+
+        if self.assistant:
+            registry.counter(
+                "openai_requests", "Volania OpenAI asistenta", lambda: self.assistant.requests
+            )
+            registry.counter(
+                "openai_errors", "Zlyhané volania OpenAI asistenta", lambda: self.assistant.errors
+            )
+        if self.tts_queue and self.config.reply.dual_length:
+            stats = self.reply_stats
+            registry.counter(
+                "tts_reply_chars",
+                "Znaky odpovedí: vyslovené vs. podrobná verzia",
+                lambda: [
+                    ({"version": "spoken"}, stats.spoken_chars),
+                    ({"version": "detail"}, stats.detail_chars),
+                ],
+            )
+            registry.gauge(
+                "tts_reply_char_reduction",
+                "Podiel TTS znakov ušetrených krátkymi odpoveďami",
+                lambda: stats.char_reduction,
+            )
+            registry.counter(
+                "tts_playback_saved_ms",
+                "Odhad ušetreného času prehrávania (nameraná rýchlosť reči)",
+                lambda: stats.saved_playback_ms,
+            )
+            registry.counter(
+                "assistant_replies",
+                "Vyslovené odpovede podľa formátu",
+                lambda: [
+                    ({"format": "structured"}, stats.structured),
+                    ({"format": "fallback"}, stats.replies - stats.structured),
+                ],
+            )
+
+        if self.assistant and self.assistant.tools:
+            tools = self.assistant.tools
+            registry.counter(
+                "assistant_tool_calls",
+                "Volania lore funkcií asistentom",
+                lambda: [({"tool": name}, value) for name, value in tools.calls.items()],
+            )
+            registry.counter(
+                "assistant_tool_errors", "Zlyhané volania lore funkcií", lambda: tools.errors
+            )
+            registry.counter(
+                "assistant_tool_rounds",
+                "Kolá requires_action (jedno odoslanie výsledkov)",
+                lambda: self.assistant.tool_rounds,
+            )
+
+        if self.http:
+            endpoints = self.http.endpoints
+            registry.counter(
+                "http_requests",
+                "HTTP požiadavky podľa endpointu (bez opakovaní)",
+                lambda: [({"endpoint": host}, e.stats.requests) for host, e in endpoints.items()],
+            )
+            registry.counter(
+                "http_connections_opened",
+                "Nové HTTP spojenia (TCP/TLS handshake)",
+                lambda: [
+                    ({"endpoint": host}, e.stats.connections_opened) for host, e in endpoints.items()
+                ],
+            )
+            registry.counter(
+                "http_connections_reused",
+                "Odpovede cez už otvorené spojenie (keep-alive/HTTP/2)",
+                lambda: [({"endpoint": host}, e.stats.reused) for host, e in endpoints.items()],
+            )
+            registry.gauge(
+                "http_connection_reuse_ratio",
+                "Podiel odpovedí cez znovu použité spojenie",
+                lambda: [({"endpoint": host}, e.stats.reuse_ratio) for host, e in endpoints.items()],
+            )
+            registry.counter(
+                "http2_responses",
+                "Odpovede cez HTTP/2",
+                lambda: [({"endpoint": host}, e.stats.http2) for host, e in endpoints.items()],
+            )
+            registry.counter(
+                "http_failures",
+                "Zlyhania podľa druhu (výnimka alebo HTTP status)",
+                lambda: [
+                    ({"endpoint": host, "kind": kind}, value)
+                    for host, e in endpoints.items()
+                    for kind, value in e.stats.failures.items()
+                ],
+            )
+            registry.counter(
+                "http_retries",
+                "Opakované HTTP požiadavky",
+                lambda: [({"endpoint": host}, e.stats.retries) for host, e in endpoints.items()],
+            )
+            registry.counter(
+                "http_retry_budget_exhausted",
+                "Opakovania zamietnuté vyčerpaným retry budgetom",
+                lambda: [({"endpoint": host}, e.budget.exhausted) for host, e in endpoints.items()],
+            )
+            registry.gauge(
+                "http_retry_budget_tokens",
+                "Dostupné opakovania v retry budgete",
+                lambda: [({"endpoint": host}, e.budget.tokens) for host, e in endpoints.items()],
+            )
+            registry.gauge(
+                "http_breaker_state",
+                "Stav circuit breakera (1 = aktuálny stav)",
+                lambda: [
+                    ({"endpoint": host, "state": state}, float(e.breaker.state == state))
+                    for host, e in endpoints.items()
+                    for state in ("closed", "open", "half_open")
+                ],
+            )
+            registry.counter(
+                "http_breaker_opens",
+                "Otvorenia circuit breakera",
+                lambda: [({"endpoint": host}, e.breaker.opens) for host, e in endpoints.items()],
+            )
+            registry.counter(
+                "http_breaker_rejected",
+                "Požiadavky odmietnuté otvoreným breakerom",
+                lambda: [({"endpoint": host}, e.breaker.rejected) for host, e in endpoints.items()],
+            )
+
+        if self.usage:
+            registry.gauge(
+                "usage_month",
+                "Spotreba za aktuálny mesiac",
+                lambda: [
+                    ({"kind": key[len("month_"):]}, value)
+                    for key, value in self.usage.metrics().items()
+                    if key.startswith("month_")
+                ],
+            )
+            registry.gauge(
+                "usage_cost_usd", "Odhad nákladov za mesiac", lambda: self.usage.cost_usd()["total"]
+            )
+
+        if self.chat:
+            registry.counter(
+                "chat_messages",
+                "Správy z Twitch chatu podľa výsledku",
+                lambda: [({"outcome": key}, value) for key, value in vars(self.chat.stats).items()],
+            )
+
+        registry.gauge(
+            "process_cpu_percent", "CPU vyťaženie procesu (% jedného jadra)", process.cpu_percent
+        )
+        registry.gauge("process_memory_mb", "Rezidentná pamäť procesu (RSS)", process.memory_mb)
+        registry.gauge("system_load1", "Systémový load average (1 min)", process.load_average)
+        registry.gauge("gpu_utilization_percent", "Vyťaženie GPU", process.gpu_utilization)
+        registry.gauge("gpu_memory_used_mb", "Využitá pamäť GPU", process.gpu_memory_mb)
+        return registry
+
+    def _create_ssml_builder(self) -> SSMLBuilder:
+        """Vytvorí SSML builder z TTS konfigurácie."""
+        terms = None
+        if self.config.tts.english_terms:
+            terms = DEFAULT_ENGLISH_TERMS + load_glossary_terms(Path("lore/glossary.md"))
+        return SSMLBuilder(
+            voice=self.config.tts.voice,
+            rate=self.config.tts.rate,
+            pitch=self.config.tts.pitch,
+            volume=self.config.tts.volume,
+            sentence_break_ms=self.config.tts.sentence_break_ms,
+            english_terms=terms,
+        )
+
+    def _create_audio_capture(self):
+        """Vytvorí zachytávanie zvuku (v tomto alebo samostatnom procese)."""
+        if self.config.audio.capture_process:
+            from ..services.capture_process import ProcessAudioCapture
+
+            # Bloky z bufferu sa čítajú len pre vzdialený STT, ktorý streamuje počas PTT
+            remote = self.config.remote_stt
+            streaming = remote.enabled and remote.stream_while_recording
+            return ProcessAudioCapture(
+                config=self.config.audio, callback=self._handle_audio if streaming else None
+            )
+        from ..services.audio_processor import AudioProcessor
+
+        return AudioProcessor(config=self.config.audio, callback=self._handle_audio)
+
+    def _create_stt(self) -> WhisperSTT:
+        """Vytvorí STT službu (model sa načíta v initialize)."""
+        sample_rate = self.config.audio.stt_sample_rate
+        local = WhisperSTT(self.config.model, sample_rate=sample_rate)
+        if self.config.remote_stt.enabled:
+            return RemoteSTT(self.config.remote_stt, local=local, sample_rate=sample_rate)
+        if self.config.model.idle_enabled or self.config.system.memory_limit_mb:
+            return IdleModelManager(
+                local, self.config.model, memory_limit_mb=self.config.system.memory_limit_mb
+            )
+        return local
 
     def _setup_keyboard_listener(self):
         """Nastaví listener pre klávesové skratky."""
+        from ..utils.keyboard_listener import KeyboardListener
+
         self.keyboard_listener = KeyboardListener(
             ptt_key=self.config.controls.ptt_key,
             on_press_callback=self._start_recording_ui,
@@ -158,7 +758,24 @@ class Elena:
 
     def _start_recording_ui(self):
         """UI akcia pri začiatku nahrávania."""
+        # Autorepeat klávesy posiela press opakovane počas držania
+        if self.audio.state.is_recording:
+            return
+        pressed_at = time.perf_counter()
+        self._capture_started_ns = now_ns()
+        if isinstance(self.stt, RemoteSTT):
+            # Naplánované pred prvým blokom nahrávky
+            self.loop.call_soon_threadsafe(self.stt.begin_stream)
+        elif isinstance(self.stt, IdleModelManager):
+            # Uvoľnený model sa načítava súbežne s nahrávaním
+            self.loop.call_soon_threadsafe(self.stt.wake)
         self.audio.start_recording()
+        if self.config.controls.barge_in:
+            self.loop.call_soon_threadsafe(
+                lambda: self.loop.create_task(self._barge_in(pressed_at))
+            )
+        elif self.mixer:
+            self.mixer.duck(self.config.tts.duck_gain)
         print("\033[2K\r", end="")  # Vyčisti riadok
         print(f"{Fore.RED}● NAHRÁVAM...{Style.RESET_ALL}", end="\r")
         logger.info(f"Nahrávam... ({datetime.now().strftime('%H:%M:%S')})")
@@ -166,22 +783,67 @@ class Elena:
     def _stop_recording_and_process(self):
         """UI akcia a spracovanie po skončení nahrávania."""
         print("\033[2K\r", end="")
+        if self.mixer:
+            self.mixer.unduck()
         audio_data = self.audio.stop_recording()
         if audio_data is not None:
-            asyncio.run_coroutine_threadsafe(self._process_audio(audio_data), self.loop)
+            self.loop.call_soon_threadsafe(
+                self._start_turn, audio_data, self._capture_started_ns, now_ns()
+            )
+
+    def _start_turn(
+        self,
+        audio_data: np.ndarray,
+        capture_start_ns: Optional[int] = None,
+        capture_end_ns: Optional[int] = None,
+    ):
+        """Spustí spracovanie nového turnu streamera (beží v event loope)."""
+        trace = None
+        if self.tracer:
+            trace = self.tracer.new_turn(start_ns=capture_start_ns, lane=LANE_STREAMER)
+            if capture_start_ns is not None:
+                trace.add(
+                    SPAN_CAPTURE,
+                    capture_start_ns,
+                    capture_end_ns or now_ns(),
+                    audio_sec=len(audio_data) / self.config.audio.stt_sample_rate,
+                )
+        self._turn_task = self.loop.create_task(self._process_audio(audio_data, trace))
+
+    async def _barge_in(self, pressed_at: float):
+        """
+        Barge-in: streamer stlačil PTT počas odpovede.
+
+        Zruší rozpracovaný turn (vrátane runu asistenta), stíši TTS
+        a zahodí zastarané odpovede streamera vo fronte.
+        """
+        if self._turn_task and not self._turn_task.done():
+            self._turn_task.cancel()
+            logger.info("Barge-in: predchádzajúci turn zrušený")
+
+        if self.tts_queue:
+            stopped = await self.tts_queue.interrupt(
+                drop_priority=self.scheduler.tts_priority(LANE_STREAMER)
+            )
+            if stopped is not None:
+                silence_ms = (time.perf_counter() - pressed_at) * 1000
+                logger.info(f"Barge-in: od stlačenia PTT po ticho {silence_ms:.0f}ms")
 
     def _handle_audio(self, audio_data: np.ndarray):
         """Callback pre spracovanie audio dát."""
-        # Tu môžeme pridať real-time spracovanie ak potrebujeme
-        pass
+        # Remote STT posiela audio serveru už počas držania PTT
+        if isinstance(self.stt, RemoteSTT):
+            self.stt.feed(audio_data)
 
-    async def _process_audio(self, audio_data: np.ndarray):
+    async def _process_audio(self, audio_data: np.ndarray, trace: Optional[TurnTrace] = None):
         """
         Spracuje audio data - transkripcia a získanie odpovede.
 
         Args:
             audio_data: Audio dáta ako numpy array
+            trace: Voliteľný trace turnu (TTS fronta ho po dohraní ukončí)
         """
+        trace_status = "no_response"
         try:
             # Čistenie obrazovky pre nové spracovanie
             print("\033[2J\033[H", end="")  # Clear screen and move cursor to top
@@ -192,20 +854,28 @@ class Elena:
 
             print(f"\n{Fore.YELLOW}⌛ Prebieha transkripcia...{Style.RESET_ALL}")
 
-            # Transkripcia
-            segments, info = self.model.transcribe(
-                audio=audio_data,
-                language=self.config.model.language,
-                beam_size=self.config.model.beam_size,
-                best_of=self.config.model.best_of,
-                temperature=self.config.model.temperature,
-                vad_filter=self.config.model.vad_filter,
-                no_speech_threshold=self.config.model.no_speech_threshold,
-            )
-
-            # Spracovanie segmentov
-            text = " ".join(segment.text.strip() for segment in segments)
+            # Transkripcia beží v STT threade, event loop zostáva voľný
+            result = await self.stt.transcribe(audio_data)
+            text = result.text
             transcription_end = time.perf_counter()
+            if trace:
+                stt_span = trace.add(
+                    SPAN_STT,
+                    result.submitted_ns,
+                    result.finished_ns,
+                    chars=len(text),
+                    language=result.language,
+                    model=result.model,
+                    queue_ms=result.queue_ms,
+                    batch_size=result.batch_size,
+                )
+                trace.add(
+                    SPAN_VAD,
+                    result.started_ns,
+                    result.prepared_ns,
+                    parent=stt_span,
+                    vad_filter=self.config.model.vad_filter,
+                )
             transcription_time = transcription_end - transcription_start
 
             if text:
@@ -222,8 +892,24 @@ class Elena:
                     f"\n{Fore.YELLOW}⌛ Generujem odpoveď od Eleny...{Style.RESET_ALL}"
                 )
                 assistant_start = time.perf_counter()
-                response = await self.assistant.get_response("Používateľ", text)
+                # Assistants API nestreamuje - prvý token prichádza s celou odpoveďou
+                first_token_span = llm_span = None
+                if trace:
+                    first_token_span = trace.start(SPAN_LLM_FIRST_TOKEN, streaming=False)
+                    llm_span = trace.start(SPAN_LLM_DONE)
+                reply = await self.scheduler.submit(
+                    LANE_STREAMER,
+                    lambda: self.assistant.get_reply("Používateľ", text, trace=trace),
+                )
+                response = reply.detail if reply else None
                 assistant_end = time.perf_counter()
+                if trace:
+                    trace.end(first_token_span)
+                    trace.end(
+                        llm_span,
+                        chars=len(response or ""),
+                        spoken_chars=len(reply.spoken) if reply else 0,
+                    )
                 assistant_time = assistant_end - assistant_start
                 total_time = assistant_end - process_start
 
@@ -231,11 +917,16 @@ class Elena:
                     # Jednoduchý výpis odpovede
                     print(f"\n{Fore.MAGENTA}Elena: {Style.BRIGHT}{response}{Style.RESET_ALL}")
 
-                    # Spustenie TTS ak je k dispozícii
+                    await self._show_detail(reply)
+
+                    # Spustenie TTS ak je k dispozícii (len krátka verzia)
                     if self.tts_queue:
                         try:
-                            clean_text = self._clean_text_for_tts(response)
-                            await self.tts_queue.add(clean_text)
+                            await self._speak_reply(
+                                reply, self.scheduler.tts_priority(LANE_STREAMER), trace=trace
+                            )
+                            # Turn ukončí TTS fronta po dohraní
+                            trace = None
                         except Exception as e:
                             logger.error(f"Chyba pri TTS: {e}")
 
@@ -268,14 +959,20 @@ class Elena:
                     print(
                         f"  • Celkový čas: {total_color}{total_time:.1f}s{Style.RESET_ALL}"
                     )
+                    if self.tts_queue and reply.shortened:
+                        print(
+                            f"  • TTS: {Fore.GREEN}{len(reply.spoken)}/{len(reply.detail)} znakov "
+                            f"(~{self.reply_stats.last_saved_ms / 1000:.0f}s kratšie){Style.RESET_ALL}"
+                        )
+                    trace_status = "text_only"
 
-                    if info.language_probability > 0.9:
+                    if result.language_probability > 0.9:
                         print(
-                            f"  • Jazyk: {Fore.GREEN}{info.language}{Style.RESET_ALL}"
+                            f"  • Jazyk: {Fore.GREEN}{result.language}{Style.RESET_ALL}"
                         )
                     else:
                         print(
-                            f"  • Jazyk: {Fore.YELLOW}{info.language} ({info.language_probability:.0%}){Style.RESET_ALL}"
+                            f"  • Jazyk: {Fore.YELLOW}{result.language} ({result.language_probability:.0%}){Style.RESET_ALL}"
                         )
 
                     print(
@@ -289,22 +986,78 @@ class Elena:
                 logger.warning("Nezachytený žiadny text")
                 print(f"\n{Fore.YELLOW}⚠️ Nezachytený žiadny text{Style.RESET_ALL}")
 
+        except asyncio.CancelledError:
+            trace_status = "cancelled"
+            logger.info("Spracovanie turnu zrušené (barge-in)")
         except Exception as e:
+            trace_status = "error"
             logger.error(f"Chyba pri spracovaní audia: {str(e)}")
             print(f"\n{Fore.RED}❌ Chyba pri spracovaní: {str(e)}{Style.RESET_ALL}")
+        finally:
+            if trace:
+                trace.finish(status=trace_status)
+
+    async def _handle_chat_reply(self, messages, reply: AssistantReply):
+        """Vypíše odpoveď do konzoly a voliteľne prečíta jej krátku verziu cez TTS."""
+        authors = ", ".join(m.author for m in messages)
+        print(f"\n{Fore.GREEN}💬 {authors}: {Style.BRIGHT}{reply.detail}{Style.RESET_ALL}")
+
+        if self.tts_queue and self.config.twitch.speak_replies:
+            try:
+                await self._speak_reply(reply, self.scheduler.tts_priority(messages[0].lane))
+            except Exception as e:
+                logger.error(f"Chyba pri TTS: {e}")
+
+    async def _speak_reply(
+        self, reply: AssistantReply, priority: int, trace: Optional[TurnTrace] = None
+    ):
+        """Zaradí krátku verziu odpovede do TTS a započíta ušetrené znaky."""
+        await self.tts_queue.add(self._clean_text_for_tts(reply.spoken), priority=priority, trace=trace)
+        self.reply_stats.record(reply, self.tts_queue.ms_per_char)
+        if reply.shortened:
+            logger.info(
+                f"TTS skrátené: {len(reply.spoken)}/{len(reply.detail)} znakov, "
+                f"~{self.reply_stats.last_saved_ms / 1000:.1f}s prehrávania ušetrených "
+                f"({'štruktúrovaná odpoveď' if reply.structured else 'prvé vety'})"
+            )
+
+    async def _show_detail(self, reply: AssistantReply):
+        """Podrobnú odpoveď streamerovi zobrazí v overlay, prípadne pošle do chatu."""
+        if self.overlay:
+            await self.overlay.show(reply.detail)
+        if self.chat and self.config.reply.streamer_to_chat:
+            await self.chat.send_message(reply.detail)
 
     async def _shutdown(self):
         """Graceful shutdown všetkých služieb."""
+        if self.chat:
+            await self.chat.stop()
+        if self.scheduler:
+            await self.scheduler.stop()
         if self.audio:
             self.audio.stop_stream()
         if self.keyboard_listener:
             self.keyboard_listener.stop()
         if self.tts_queue:
-            await self.tts_queue.flush()
-        self.loop.close()
+            await self.tts_queue.stop()
+        if self.stt:
+            self.stt.close()
+        if self.http:
+            await self.http.aclose()
+        if self.mixer:
+            self.mixer.close()
+        if self.usage:
+            await self.usage.stop()
+        if self.metrics_server:
+            await self.metrics_server.stop()
+        if self.tracer:
+            self.tracer.close()
+        telemetry.close()
 
     def run(self):
         """Spustí hlavnú slučku aplikácie."""
+        # Inicializácia colorama pre Windows (až pri spustení UI, nie pri importe)
+        init()
         try:
             print("\033[2J\033[H", end="")  # Clear screen
             print(
@@ -349,6 +1102,9 @@ class Elena:
             print(
                 f"  • Stlač {Fore.CYAN}{Style.BRIGHT}[Ctrl+C]{Style.RESET_ALL} pre ukončenie\n"
             )
+            if self.profiler.enabled:
+                print(f"{Fore.BLUE}━━━ Profil štartu ━━━{Style.RESET_ALL}")
+                print(self.profiler.format_waterfall() + "\n")
 
             # Hlavná slučka
             self.loop.run_forever()
@@ -361,3 +1117,4 @@ class Elena:
         finally:
             # Graceful shutdown
             self.loop.run_until_complete(self._shutdown())
+            self.loop.close()
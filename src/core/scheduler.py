@@ -0,0 +1,280 @@
+"""
+Centrálny plánovač požiadaviek na asistenta (LLM) a TTS.
+
+Požiadavky prichádzajú do oddelených pruhov (streamer PTT > mody/suby > chat).
+Pruhy sa obsluhujú váženým férovým radením (self-clocked fair queuing),
+streamer má vyhradené sloty, aby ho pomalá odpoveď do chatu nikdy nebrzdila,
+a požiadavky z chatu sa po uplynutí deadlinu zahadzujú.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+LANE_STREAMER = "streamer"
+LANE_VIP = "vip"
+LANE_CHAT = "chat"
+
+
+class DeadlineExceeded(Exception):
+    """Požiadavka čakala vo fronte dlhšie ako deadline pruhu."""
+
+    pass
+
+
+@dataclass
+class LaneConfig:
+    """Konfigurácia jedného pruhu plánovača."""
+
+    name: str
+    weight: float = 1.0
+    deadline_sec: Optional[float] = None
+    tts_priority: int = 0
+    reserved: bool = False
+
+
+@dataclass
+class LaneStats:
+    """Metriky jedného pruhu."""
+
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    dropped_deadline: int = 0
+    wait_ms: Deque[float] = field(default_factory=lambda: deque(maxlen=1000))
+
+    def snapshot(self, depth: int) -> Dict[str, float]:
+        """Vráti aktuálne metriky vrátane percentilov čakania vo fronte."""
+        waits = sorted(self.wait_ms)
+
+        def pct(p: float) -> float:
+            if not waits:
+                return 0.0
+            return waits[min(len(waits) - 1, int(p * len(waits)))]
+
+        return {
+            "depth": depth,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "dropped_deadline": self.dropped_deadline,
+            "wait_p50_ms": pct(0.50),
+            "wait_p95_ms": pct(0.95),
+            "wait_max_ms": waits[-1] if waits else 0.0,
+        }
+
+
+@dataclass
+class _Job:
+    lane: "_Lane"
+    factory: Callable[[], Awaitable[Any]]
+    future: asyncio.Future
+    enqueued_at: float
+    deadline: Optional[float]
+    finish_tag: float
+    task: Optional[asyncio.Task] = None
+
+
+class _Lane:
+    def __init__(self, config: LaneConfig):
+        self.config = config
+        self.jobs: Deque[_Job] = deque()
+        self.last_finish = 0.0
+        self.stats = LaneStats()
+
+
+class PriorityScheduler:
+    """Vážený férový plánovač s obmedzením súbežných LLM a TTS volaní."""
+
+    def __init__(
+        self,
+        lanes: List[LaneConfig],
+        llm_concurrency: int = 3,
+        tts_concurrency: int = 1,
+        reserved_slots: int = 1,
+    ):
+        """
+        Inicializuje plánovač.
+
+        Args:
+            lanes: Konfigurácia pruhov
+            llm_concurrency: Maximálny počet súbežných volaní asistenta
+            tts_concurrency: Maximálny počet súbežných TTS syntéz
+            reserved_slots: Počet LLM slotov vyhradených pre pruhy s reserved=True
+        """
+        self.lanes: Dict[str, _Lane] = {lane.name: _Lane(lane) for lane in lanes}
+        self.llm_concurrency = llm_concurrency
+        self.shared_limit = max(1, llm_concurrency - reserved_slots)
+        self.tts_slot = asyncio.Semaphore(tts_concurrency)
+
+        self._virtual_time = 0.0
+        self._running = 0
+        self._running_shared = 0
+        self._wakeup = asyncio.Event()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._active: Dict[str, set] = {name: set() for name in self.lanes}
+
+    @classmethod
+    def from_config(cls, config) -> "PriorityScheduler":
+        """Vytvorí plánovač zo SchedulerConfig."""
+        lanes = [
+            LaneConfig(name=name, **options) for name, options in config.lanes.items()
+        ]
+        return cls(
+            lanes=lanes,
+            llm_concurrency=config.llm_concurrency,
+            tts_concurrency=config.tts_concurrency,
+            reserved_slots=config.reserved_streamer_slots,
+        )
+
+    def start(self):
+        """Spustí dispatcher v bežiacom event loope."""
+        if self._dispatcher is None:
+            self._dispatcher = asyncio.create_task(self._dispatch_loop())
+
+    async def stop(self):
+        """Zastaví dispatcher a zruší čakajúce požiadavky."""
+        if self._dispatcher:
+            self._dispatcher.cancel()
+            await asyncio.gather(self._dispatcher, return_exceptions=True)
+            self._dispatcher = None
+        for lane in self.lanes.values():
+            while lane.jobs:
+                lane.jobs.popleft().future.cancel()
+
+    def tts_priority(self, lane_name: str) -> int:
+        """Priorita pre TTSQueue zodpovedajúca pruhu (nižšie = skôr)."""
+        return self.lanes[lane_name].config.tts_priority
+
+    async def submit(
+        self,
+        lane_name: str,
+        factory: Callable[[], Awaitable[Any]],
+        deadline_sec: Optional[float] = None,
+    ) -> Any:
+        """
+        Zaradí volanie do pruhu a počká na jeho výsledok.
+
+        Args:
+            lane_name: Názov pruhu
+            factory: Funkcia vracajúca korutínu (volá sa až pri spustení)
+            deadline_sec: Prepíše deadline pruhu
+
+        Returns:
+            Výsledok korutíny
+
+        Raises:
+            DeadlineExceeded: Ak požiadavka nestihla začať pred deadlinom
+        """
+        lane = self.lanes[lane_name]
+        now = time.monotonic()
+        deadline = deadline_sec if deadline_sec is not None else lane.config.deadline_sec
+
+        start_tag = max(self._virtual_time, lane.last_finish)
+        lane.last_finish = start_tag + 1.0 / lane.config.weight
+
+        job = _Job(
+            lane=lane,
+            factory=factory,
+            future=asyncio.get_running_loop().create_future(),
+            enqueued_at=now,
+            deadline=now + deadline if deadline is not None else None,
+            finish_tag=lane.last_finish,
+        )
+        lane.jobs.append(job)
+        lane.stats.submitted += 1
+        if deadline is not None:
+            asyncio.get_running_loop().call_later(deadline, self._wakeup.set)
+        self._wakeup.set()
+        try:
+            return await job.future
+        except asyncio.CancelledError:
+            if job.task is not None:
+                job.task.cancel()
+            raise
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        """Vráti metriky všetkých pruhov."""
+        return {
+            name: lane.stats.snapshot(depth=len(lane.jobs))
+            for name, lane in self.lanes.items()
+        }
+
+    def _expire(self):
+        """Zahodí zrušené požiadavky a tie, ktorým uplynul deadline."""
+        now = time.monotonic()
+        for lane in self.lanes.values():
+            if not lane.jobs:
+                continue
+            kept: Deque[_Job] = deque()
+            for job in lane.jobs:
+                if job.future.done():
+                    continue
+                if job.deadline is not None and now > job.deadline:
+                    lane.stats.dropped_deadline += 1
+                    job.future.set_exception(
+                        DeadlineExceeded(f"Požiadavka v pruhu '{lane.config.name}' prekročila deadline")
+                    )
+                    continue
+                kept.append(job)
+            lane.jobs = kept
+
+    def _pick(self) -> Optional[_Job]:
+        """Vyberie ďalšiu požiadavku (reserved pruhy prednostne, potom najmenší finish tag)."""
+        best: Optional[_Lane] = None
+
+        for lane in self.lanes.values():
+            if not lane.jobs:
+                continue
+            if not lane.config.reserved and self._running_shared >= self.shared_limit:
+                continue
+            if best is None or (lane.config.reserved, -lane.jobs[0].finish_tag) > (
+                best.config.reserved,
+                -best.jobs[0].finish_tag,
+            ):
+                best = lane
+
+        return best.jobs.popleft() if best else None
+
+    async def _dispatch_loop(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            self._expire()
+
+            while self._running < self.llm_concurrency:
+                job = self._pick()
+                if job is None:
+                    break
+                self._virtual_time = job.finish_tag
+                self._running += 1
+                if not job.lane.config.reserved:
+                    self._running_shared += 1
+                job.lane.stats.wait_ms.append((time.monotonic() - job.enqueued_at) * 1000)
+                task = job.task = asyncio.create_task(self._run(job))
+                self._active[job.lane.config.name].add(task)
+                task.add_done_callback(self._active[job.lane.config.name].discard)
+
+    async def _run(self, job: _Job):
+        try:
+            result = await job.factory()
+            job.lane.stats.completed += 1
+            if not job.future.done():
+                job.future.set_result(result)
+        except asyncio.CancelledError:
+            if not job.future.done():
+                job.future.cancel()
+        except Exception as e:
+            job.lane.stats.failed += 1
+            if not job.future.done():
+                job.future.set_exception(e)
+        finally:
+            self._running -= 1
+            if not job.lane.config.reserved:
+                self._running_shared -= 1
+            self._wakeup.set()
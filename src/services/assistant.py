@@ -3,16 +3,28 @@ Asynchrónna služba pre komunikáciu s OpenAI Assistant API.
 """
 
 import asyncio
+import json
 from openai import AsyncOpenAI
-from typing import Optional
+from typing import Any, Dict, List, Optional
 import time
 import logging
 import os
 from datetime import datetime
 from pathlib import Path
 
+from ..config.config import ReplyConfig
+from ..utils.telemetry import telemetry
+from ..utils.tracing import SPAN_LLM_DONE, SPAN_RETRIEVE, TurnTrace
+from .http_transport import HttpTransport
+from .lore import LoreTools
+from .reply import AssistantReply, parse_reply
+from .usage import LLM_MODE_SHORT, UsageMeter
+
 logger = logging.getLogger(__name__)
 
+# Stavy, v ktorých run už neblokuje vlákno (okrem completed)
+RUN_TERMINAL_STATUSES = ("failed", "cancelled", "expired")
+
 
 class AssistantConfig:
     def __init__(self):
@@ -57,42 +69,141 @@ class AssistantConfig:
 
 
 class AssistantService:
-    def __init__(self, config: AssistantConfig):
-        """Inicializuje službu s konfiguráciou asistenta."""
+    def __init__(
+        self,
+        config: AssistantConfig,
+        usage: Optional[UsageMeter] = None,
+        http: Optional[HttpTransport] = None,
+        tools: Optional[LoreTools] = None,
+        reply: Optional[ReplyConfig] = None,
+    ):
+        """
+        Inicializuje službu s konfiguráciou asistenta.
+
+        Args:
+            config: Konfigurácia asistenta
+            usage: Voliteľné počítadlo spotreby tokenov a rozpočtu
+            http: Zdieľaná HTTP vrstva (pool, breaker, retry budget);
+                None = predvolený transport SDK
+            tools: Lokálne lore funkcie, ktoré môže asistent volať
+            reply: Dvojdĺžkové odpovede (None = jedna odpoveď pre TTS aj text)
+        """
         self.config = config
-        self.client = AsyncOpenAI(api_key=config.api_key)
+        self.usage = usage
+        self.http = http
+        self.tools = tools
+        self.reply = reply
+        self.requests = 0
+        self.errors = 0
+        self.tool_rounds = 0
+        # Nástroje asistenta + lore funkcie (None = ešte nezistené)
+        self._run_tools: Optional[List[Dict[str, Any]]] = None
+        if http is not None:
+            # Opakovania riadi transport v rámci retry budgetu
+            self.client = AsyncOpenAI(
+                api_key=config.api_key,
+                http_client=http.client(),
+                timeout=http.timeout,
+                max_retries=0,
+            )
+        else:
+            self.client = AsyncOpenAI(api_key=config.api_key)
         self.assistant_id = config.assistant_id
-        self._thread = None
+        self._threads: Dict[str, Any] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
 
-    async def init_thread(self):
+    async def init_thread(self, conversation: str = "default"):
         """Inicializuje alebo vráti existujúce konverzačné vlákno."""
-        if not self._thread:
-            self._thread = await self.client.beta.threads.create()
-            logger.info(f"Vytvorené nové konverzačné vlákno: {self._thread.id}")
-        return self._thread
+        if conversation not in self._threads:
+            thread = await self.client.beta.threads.create()
+            self._threads[conversation] = thread
+            logger.info(f"Vytvorené nové konverzačné vlákno ({conversation}): {thread.id}")
+        return self._threads[conversation]
 
     async def get_response(
-        self, author_name: str, user_input: str, max_retries: int = 2
+        self,
+        author_name: str,
+        user_input: str,
+        max_retries: int = 2,
+        conversation: str = "default",
     ) -> Optional[str]:
         """
         Získa odpoveď od OpenAI asistenta s retry logikou.
 
+        Pri dvojdĺžkových odpovediach vráti podrobnú verziu (get_reply
+        vráti obe).
+
         Args:
             author_name: Meno autora správy
             user_input: Text od používateľa
             max_retries: Maximálny počet pokusov pri zlyhaní
+            conversation: Kľúč konverzačného vlákna (napr. "default", "chat")
 
         Returns:
             Odpoveď od asistenta alebo None v prípade chyby
         """
+        reply = await self.get_reply(author_name, user_input, max_retries, conversation)
+        return reply.detail if reply else None
+
+    async def get_reply(
+        self,
+        author_name: str,
+        user_input: str,
+        max_retries: int = 2,
+        conversation: str = "default",
+        trace: Optional[TurnTrace] = None,
+    ) -> Optional[AssistantReply]:
+        """
+        Získa odpoveď v krátkej (na vyslovenie) a podrobnej verzii.
+
+        Do jedného vlákna môže naraz bežať len jeden run, preto sa volania
+        v rámci jednej konverzácie serializujú a streamer a chat používajú
+        oddelené konverzácie.
+
+        Args:
+            author_name: Meno autora správy
+            user_input: Text od používateľa
+            max_retries: Maximálny počet pokusov pri zlyhaní
+            conversation: Kľúč konverzačného vlákna (napr. "default", "chat")
+            trace: Voliteľný trace turnu (každé kolo lore funkcií je span retrieve)
+
+        Returns:
+            AssistantReply alebo None v prípade chyby
+        """
+        lock = self._locks.setdefault(conversation, asyncio.Lock())
+        async with lock:
+            response = await self._get_response_locked(
+                author_name, user_input, max_retries, conversation, trace
+            )
+        if response is None:
+            return None
+        if self.reply is None or not self.reply.dual_length:
+            return AssistantReply(spoken=response, detail=response)
+        return parse_reply(response, self.reply.spoken_max_chars)
+
+    async def _get_response_locked(
+        self,
+        author_name: str,
+        user_input: str,
+        max_retries: int,
+        conversation: str,
+        trace: Optional[TurnTrace] = None,
+    ) -> Optional[str]:
         backoff = 2.0
         for attempt in range(1, max_retries + 1):
+            thread = None
+            run = None
             try:
-                thread = await self.init_thread()
+                thread = await self.init_thread(conversation)
                 timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                 prompt = f"[{timestamp}] [{author_name}]: {user_input}"
+                if self.usage is not None and self.usage.llm_mode() == LLM_MODE_SHORT:
+                    prompt = f"{prompt}\n({self.usage.config.short_reply_hint})"
+                if self.reply is not None and self.reply.dual_length:
+                    prompt = f"{prompt}\n({self.reply.format_hint})"
 
                 logger.info(f"Odosielam správu do OpenAI (pokus {attempt}): {prompt}")
+                self.requests += 1
 
                 # Pridaj správu do vlákna
                 await self.client.beta.threads.messages.create(
@@ -101,7 +212,9 @@ class AssistantService:
 
                 # Spusti asistenta
                 run = await self.client.beta.threads.runs.create(
-                    thread_id=thread.id, assistant_id=self.assistant_id
+                    thread_id=thread.id,
+                    assistant_id=self.assistant_id,
+                    **await self._run_options(),
                 )
 
                 # Čakaj na dokončenie s timeoutom
@@ -112,7 +225,10 @@ class AssistantService:
                     )
                     if run.status == "completed":
                         break
-                    elif run.status in ["failed", "cancelled", "expired"]:
+                    elif run.status == "requires_action":
+                        # Model volá lore funkcie - výsledky sa odošlú naraz
+                        run = await self._submit_tool_outputs(thread.id, run, trace)
+                    elif run.status in RUN_TERMINAL_STATUSES:
                         logger.error(f"Asistent zlyhal: {run.last_error}")
                         raise RuntimeError(f"Asistent zlyhal: {run.status}")
                     elif time.perf_counter() - start_time > 30:  # 30s timeout
@@ -132,12 +248,29 @@ class AssistantService:
 
                 response = messages.data[0].content[0].text.value
                 logger.info(f"Prijatá odpoveď od asistenta: {response}")
+                self._record_usage(run, prompt, response)
                 return response.strip()
 
+            except asyncio.CancelledError:
+                # Turn bol nahradený (barge-in) - zrušíme run, aby neblokoval vlákno
+                if thread is not None and run is not None:
+                    await self._cancel_run(thread.id, run.id)
+                raise
             except Exception as e:
+                self.errors += 1
                 logger.warning(
                     f"Pokus {attempt} pre {author_name} zlyhal: {str(e)}", exc_info=True
                 )
+                # Aktívny run (napr. v requires_action) by blokoval vlákno pre ďalšie správy
+                if (
+                    thread is not None
+                    and run is not None
+                    and run.status not in RUN_TERMINAL_STATUSES
+                ):
+                    await self._cancel_run(thread.id, run.id)
+                if self._endpoint_down():
+                    # Breaker je otvorený - ďalší pokus by zlyhal rovnako
+                    return "Prepáč, Elena má technický problém s OpenAI komunikáciou."
                 if attempt < max_retries:
                     await asyncio.sleep(backoff)
                     backoff *= 2
@@ -145,3 +278,114 @@ class AssistantService:
                     return "Prepáč, Elena má technický problém s OpenAI komunikáciou."
 
         return "Elena momentálne nemôže odpovedať."
+
+    async def _run_options(self) -> Dict[str, Any]:
+        """
+        Parametre runu s lore funkciami.
+
+        tools v runs.create nahrádza nástroje asistenta, preto sa pri prvom
+        rune načítajú a lore funkcie sa k nim pridajú. Ak už ich má asistent
+        nastavené (v OpenAI dashboarde), nič sa neprepisuje.
+        """
+        if self.tools is None:
+            return {}
+        if self._run_tools is None:
+            try:
+                assistant = await self.client.beta.assistants.retrieve(self.assistant_id)
+            except Exception as e:
+                logger.warning(f"Nástroje asistenta sa nepodarilo načítať: {e}")
+                return {}
+            existing = [_tool_dict(tool) for tool in assistant.tools]
+            names = {tool["function"]["name"] for tool in existing if tool.get("type") == "function"}
+            if set(self.tools.names) <= names:
+                self._run_tools = []
+            else:
+                self._run_tools = [
+                    tool
+                    for tool in existing
+                    if tool.get("type") != "function" or tool["function"]["name"] not in self.tools.names
+                ] + self.tools.definitions
+            logger.info(f"Lore funkcie asistenta: {', '.join(self.tools.names)}")
+        return {"tools": self._run_tools} if self._run_tools else {}
+
+    async def _submit_tool_outputs(self, thread_id: str, run, trace: Optional[TurnTrace] = None):
+        """Vykoná všetky volania funkcií súbežne a odošle výsledky jedným requestom."""
+        calls = run.required_action.submit_tool_outputs.tool_calls
+        span = None
+        if trace:
+            # Kolo funkcií je vnorené v LLM spane, aby sa dalo odčítať od generovania
+            span = trace.start(
+                SPAN_RETRIEVE,
+                parent=trace.get(SPAN_LLM_DONE),
+                tools=",".join(call.function.name for call in calls),
+                calls=len(calls),
+            )
+        start = time.perf_counter()
+        try:
+            outputs = await asyncio.gather(*(self._call_tool(call) for call in calls))
+        finally:
+            if span is not None:
+                trace.end(span)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.tool_rounds += 1
+        telemetry.record("assistant_tools", elapsed_ms)
+        logger.info(
+            f"Lore funkcie ({', '.join(call.function.name for call in calls)}) "
+            f"za {elapsed_ms:.0f} ms"
+        )
+        return await self.client.beta.threads.runs.submit_tool_outputs(
+            thread_id=thread_id,
+            run_id=run.id,
+            tool_outputs=[
+                {"tool_call_id": call.id, "output": output} for call, output in zip(calls, outputs)
+            ],
+        )
+
+    async def _call_tool(self, call) -> str:
+        # Run čaká na výstup každého volania - chyba sa vráti modelu ako výsledok
+        if self.tools is None:
+            return json.dumps({"error": "lore funkcie sú vypnuté"}, ensure_ascii=False)
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(
+                    None, self.tools.call, call.function.name, call.function.arguments
+                ),
+                timeout=self.tools.config.tool_timeout_sec,
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Lore funkcia {call.function.name} prekročila timeout")
+            return json.dumps({"error": "timeout"}, ensure_ascii=False)
+
+    def _endpoint_down(self) -> bool:
+        return self.http is not None and self.http.is_open(self.client.base_url.host)
+
+    def _record_usage(self, run, prompt: str, response: str):
+        """
+        Započíta tokeny runu. Ak API nevracia run.usage, použije sa hrubý
+        odhad (~4 znaky na token) len zo správy a odpovede bez kontextu vlákna.
+        """
+        if self.usage is None:
+            return
+        usage = getattr(run, "usage", None)
+        if usage is not None:
+            self.usage.record_llm(usage.prompt_tokens, usage.completion_tokens)
+        else:
+            self.usage.record_llm(len(prompt) // 4, len(response) // 4)
+
+    async def _cancel_run(self, thread_id: str, run_id: str):
+        """Zruší prebiehajúci run asistenta."""
+        try:
+            await asyncio.wait_for(
+                self.client.beta.threads.runs.cancel(thread_id=thread_id, run_id=run_id),
+                timeout=5.0,
+            )
+            logger.info(f"Run {run_id} zrušený")
+        except Exception as e:
+            logger.warning(f"Zrušenie runu {run_id} zlyhalo: {e}")
+
+
+def _tool_dict(tool) -> Dict[str, Any]:
+    """Nástroj asistenta z API ako dict pre runs.create (pydantic v1 aj v2)."""
+    dump = getattr(tool, "model_dump", None) or tool.dict
+    return dump(exclude_none=True)
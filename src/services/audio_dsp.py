@@ -0,0 +1,377 @@
+"""
+Spracovanie zachyteného zvuku po blokoch (v audio callbacku).
+
+Zariadenie môže bežať na natívnej frekvencii (44.1/48 kHz) a s viacerými
+kanálmi; downmix a polyfázový resampler s pamäťou filtra medzi blokmi
+z neho priebežne robia mono 16 kHz pre Whisper. Potom nasleduje
+potlačenie šumu (zvuk hry v mikrofóne) a AGC. Všetko beží inkrementálne
+po blokoch, takže po pustení PTT je nahrávka hneď pripravená.
+"""
+
+from math import gcd
+from typing import Optional
+
+import numpy as np
+from scipy.signal import firwin
+
+from ..config.config import AudioConfig
+
+
+def downmix(block: np.ndarray, mode: str = "mean") -> np.ndarray:
+    """
+    Zmieša viackanálový blok (frames x channels) do mono.
+
+    Args:
+        block: Blok zo sounddevice (2D) alebo už mono (1D)
+        mode: "mean" = priemer kanálov, "first" = len prvý kanál
+
+    Returns:
+        Mono float32 blok (nová kópia, indata sa po callbacku prepisuje)
+    """
+    if block.ndim == 1:
+        return block.astype(np.float32, copy=True)
+    if mode == "first" or block.shape[1] == 1:
+        return block[:, 0].astype(np.float32, copy=True)
+    return block.mean(axis=1, dtype=np.float32)
+
+
+class StreamingResampler:
+    """
+    Polyfázový FIR resampler pre po sebe idúce bloky.
+
+    Rovnaký návrh filtra ako scipy.signal.resample_poly (Kaiser okno,
+    beta 5), ale so zachovaním histórie vstupu medzi blokmi - výstup
+    spojených blokov zodpovedá prevzorkovaniu celého signálu naraz.
+    Oneskorenie filtra sa kompenzuje posunom fázy prvého výstupu, koniec
+    signálu dopočíta flush().
+    """
+
+    def __init__(self, source_rate: int, target_rate: int, half_len_factor: int = 10):
+        """
+        Args:
+            source_rate: Vzorkovanie vstupu (zariadenie)
+            target_rate: Vzorkovanie výstupu (STT)
+            half_len_factor: Dĺžka filtra v násobkoch max(up, down)
+        """
+        divisor = gcd(source_rate, target_rate)
+        self.up = target_rate // divisor
+        self.down = source_rate // divisor
+        self.source_rate = source_rate
+        self.target_rate = target_rate
+        self.passthrough = self.up == self.down
+
+        if not self.passthrough:
+            max_rate = max(self.up, self.down)
+            half_len = half_len_factor * max_rate
+            taps = firwin(2 * half_len + 1, 1.0 / max_rate, window=("kaiser", 5.0)) * self.up
+            # Polyfázové rozloženie: phases[p, k] = h[k * up + p], obrátené pre konvolúciu
+            per_phase = -(-len(taps) // self.up)
+            padded = np.zeros(per_phase * self.up)
+            padded[: len(taps)] = taps
+            self._phases = padded.reshape(per_phase, self.up).T[:, ::-1].astype(np.float32)
+            self._taps_per_phase = per_phase
+            # Prvý výstup je v strede filtra (kompenzácia oneskorenia ako v resample_poly)
+            self._delay = half_len
+        self.reset()
+
+    def reset(self):
+        """Vymaže históriu (nová nahrávka)."""
+        if self.passthrough:
+            return
+        self._history = np.zeros(self._taps_per_phase - 1, dtype=np.float32)
+        # Pozícia ďalšieho výstupu v jednotkách 1/up vstupnej vzorky,
+        # relatívne k prvej vzorke za históriou
+        self._position = self._delay
+        self._consumed = 0  # počet vstupných vzoriek
+        self._produced = 0  # počet vrátených výstupných vzoriek
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """
+        Prevzorkuje ďalší mono blok.
+
+        Returns:
+            Výstupné vzorky, ktoré sa z doterajšieho vstupu dajú spočítať
+        """
+        if self.passthrough:
+            return block
+        self._consumed += len(block)
+        output = self._run(block)
+        self._produced += len(output)
+        return output
+
+    def flush(self) -> np.ndarray:
+        """Dopočíta koniec signálu (oneskorenie filtra) a resetuje stav."""
+        if self.passthrough:
+            return np.zeros(0, dtype=np.float32)
+        expected = -(-self._consumed * self.up // self.down)
+        tail = self._run(np.zeros(self._taps_per_phase + 1, dtype=np.float32))
+        result = tail[: max(0, expected - self._produced)]
+        self.reset()
+        return result
+
+    def _run(self, block: np.ndarray) -> np.ndarray:
+        buffer = np.concatenate((self._history, block.astype(np.float32, copy=False)))
+        width = self._taps_per_phase
+        first = width - 1  # prvá vzorka s plnou históriou
+
+        # Výstupy, ktorých posledná vstupná vzorka n = t // up už je v bufferi
+        last_t = (len(buffer) - first) * self.up - 1
+        count = max(0, (last_t - self._position) // self.down + 1)
+        t = self._position + np.arange(count, dtype=np.int64) * self.down
+        n = first + t // self.up
+
+        if count:
+            windows = np.lib.stride_tricks.sliding_window_view(buffer, width)
+            output = np.einsum("ij,ij->i", windows[n - first], self._phases[t % self.up])
+            self._position = int(t[-1]) + self.down
+        else:
+            output = np.zeros(0, dtype=np.float32)
+
+        # Zachovaj históriu pre ďalší blok a posuň pozíciu
+        keep = len(buffer) - first
+        shift = keep * self.up
+        self._history = buffer[keep:].copy()
+        self._position -= shift
+        return output.astype(np.float32, copy=False)
+
+
+class SpectralGate:
+    """
+    Streamingové potlačenie stacionárneho šumu (spectral gating).
+
+    STFT so sqrt-Hann oknom a 50 % prekryvom (overlap-add rekonštruuje
+    signál presne pri jednotkovom zisku). Profil šumu sa učí z blokov
+    mimo nahrávania (learn) - PTT presne oddeľuje reč od hudby a zvukov
+    hry, takže odhad sa počas reči nezaťaží hlasom. Zisk každého binu je
+    výkonové spektrálne odčítanie ohraničené zdola noise_floor a vyhladené
+    cez susedné biny (menej "hudobného" šumu).
+
+    Výstup je oproti vstupu oneskorený o hop vzoriek; oneskorenie sa
+    zahodí na začiatku a flush() dopočíta koniec, takže dĺžka nahrávky
+    sedí so vstupom.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        frame_size: int = 512,
+        noise_floor: float = 0.1,
+        over_subtraction: float = 1.5,
+        noise_time_sec: float = 1.0,
+    ):
+        """
+        Args:
+            sample_rate: Vzorkovanie vstupu
+            frame_size: Dĺžka STFT okna (párna, hop je polovica)
+            noise_floor: Minimálny zisk binu (0.1 = max. potlačenie -20 dB)
+            over_subtraction: Násobok odhadu šumu, ktorý sa odčíta
+            noise_time_sec: Časová konštanta učenia profilu šumu
+        """
+        if frame_size % 2:
+            raise ValueError("frame_size musí byť párny")
+        self.sample_rate = sample_rate
+        self.frame_size = frame_size
+        self.hop = frame_size // 2
+        self.noise_floor = noise_floor
+        self.over_subtraction = over_subtraction
+        # Váha jedného rámca pri exponenciálnom priemerovaní profilu
+        self._alpha = 1.0 - np.exp(-self.hop / (sample_rate * noise_time_sec))
+        self._window = np.sqrt(np.hanning(frame_size + 1)[:-1]).astype(np.float32)
+        self.noise: Optional[np.ndarray] = None  # výkonové spektrum šumu
+        self._learn_buffer = np.zeros(0, dtype=np.float32)
+        self.reset()
+
+    def reset(self):
+        """Vymaže stav streamu (profil šumu ostáva)."""
+        self._input = np.zeros(self.hop, dtype=np.float32)
+        self._overlap = np.zeros(self.hop, dtype=np.float32)
+        self._skip = self.hop
+        self._consumed = 0
+        self._produced = 0
+
+    def learn(self, block: np.ndarray):
+        """Aktualizuje profil šumu z bloku bez reči (PTT nestlačené)."""
+        buffer = np.concatenate((self._learn_buffer, block))
+        count = self._frame_count(len(buffer))
+        self._learn_buffer = buffer[count * self.hop:]
+        if count:
+            power = np.abs(self._spectra(buffer, count)) ** 2
+            weight = 1.0 - (1.0 - self._alpha) ** count
+            mean = power.mean(axis=0)
+            self.noise = mean if self.noise is None else self.noise + weight * (mean - self.noise)
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """Odšumí ďalší blok nahrávky."""
+        self._consumed += len(block)
+        return self._emit(self._run(block))
+
+    def flush(self) -> np.ndarray:
+        """Dopočíta koniec nahrávky a resetuje stav streamu."""
+        remaining = max(0, self._consumed - self._produced)
+        tail = self._emit(self._run(np.zeros(self.frame_size, dtype=np.float32)))
+        result = tail[:remaining]
+        self.reset()
+        return result
+
+    def _frame_count(self, length: int) -> int:
+        return max(0, (length - self.frame_size) // self.hop + 1)
+
+    def _spectra(self, buffer: np.ndarray, count: int) -> np.ndarray:
+        frames = np.lib.stride_tricks.sliding_window_view(buffer, self.frame_size)[
+            :: self.hop
+        ][:count]
+        return np.fft.rfft(frames * self._window, axis=1)
+
+    def _gains(self, power: np.ndarray) -> np.ndarray:
+        ratio = self.over_subtraction * self.noise / np.maximum(power, 1e-12)
+        gains = np.sqrt(np.clip(1.0 - ratio, 0.0, 1.0))
+        # Vyhladenie cez susedné biny (1-2-1)
+        padded = np.pad(gains, ((0, 0), (1, 1)), mode="edge")
+        gains = 0.25 * padded[:, :-2] + 0.5 * padded[:, 1:-1] + 0.25 * padded[:, 2:]
+        return np.maximum(gains, self.noise_floor)
+
+    def _run(self, block: np.ndarray) -> np.ndarray:
+        buffer = np.concatenate((self._input, block.astype(np.float32, copy=False)))
+        count = self._frame_count(len(buffer))
+        self._input = buffer[count * self.hop:]
+        if not count:
+            return np.zeros(0, dtype=np.float32)
+
+        spectra = self._spectra(buffer, count)
+        if self.noise is not None:
+            spectra *= self._gains(np.abs(spectra) ** 2)
+        frames = np.fft.irfft(spectra, n=self.frame_size, axis=1) * self._window
+
+        # Overlap-add pri 50 % prekryve: prvá polovica rámca i + druhá polovica i-1
+        chunks = np.zeros((count + 1, self.hop), dtype=np.float32)
+        chunks[:count] += frames[:, : self.hop]
+        chunks[1:] += frames[:, self.hop:]
+        chunks[0] += self._overlap
+        self._overlap = chunks[count]
+        return chunks[:count].ravel()
+
+    def _emit(self, output: np.ndarray) -> np.ndarray:
+        if self._skip:
+            dropped = min(self._skip, len(output))
+            output = output[dropped:]
+            self._skip -= dropped
+        self._produced += len(output)
+        return output
+
+
+class AutoGain:
+    """
+    Automatické riadenie zisku (AGC) po blokoch.
+
+    Meria RMS bloku a plynule ťahá zisk k cieľovej úrovni (rýchly útok pri
+    prebudení, pomalší dobeh). Bloky pod prahom ticha zisk nezvyšujú, aby
+    sa medzi slovami nezosilňoval šum. Zisk sa v rámci bloku interpoluje
+    lineárne a obmedzí tak, aby špička neprekročila peak_limit.
+    """
+
+    def __init__(
+        self,
+        target_dbfs: float = -20.0,
+        max_gain_db: float = 20.0,
+        min_gain_db: float = -10.0,
+        silence_dbfs: float = -50.0,
+        attack: float = 0.5,
+        release: float = 0.1,
+        peak_limit: float = 0.99,
+    ):
+        """
+        Args:
+            target_dbfs: Cieľová RMS úroveň reči
+            max_gain_db: Maximálne zosilnenie
+            min_gain_db: Maximálne zoslabenie
+            silence_dbfs: Bloky pod touto úrovňou sa považujú za ticho
+            attack: Rýchlosť znižovania zisku (podiel rozdielu na blok)
+            release: Rýchlosť zvyšovania zisku (podiel rozdielu na blok)
+            peak_limit: Maximálna amplitúda výstupu
+        """
+        self.target = 10 ** (target_dbfs / 20)
+        self.max_gain = 10 ** (max_gain_db / 20)
+        self.min_gain = 10 ** (min_gain_db / 20)
+        self.silence = 10 ** (silence_dbfs / 20)
+        self.attack = attack
+        self.release = release
+        self.peak_limit = peak_limit
+        self.reset()
+
+    def reset(self):
+        """Začne novú nahrávku s jednotkovým ziskom."""
+        self.gain = 1.0
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """Aplikuje zisk na blok (mono float32)."""
+        if not len(block):
+            return block
+        rms = float(np.sqrt(np.mean(np.square(block, dtype=np.float32))))
+        target_gain = self.gain
+        if rms > self.silence:
+            desired = min(self.max_gain, max(self.min_gain, self.target / rms))
+            rate = self.attack if desired < self.gain else self.release
+            target_gain = self.gain + rate * (desired - self.gain)
+
+        peak = float(np.max(np.abs(block)))
+        if peak * target_gain > self.peak_limit:
+            target_gain = self.peak_limit / peak
+        ramp = np.linspace(self.gain, target_gain, len(block), endpoint=False, dtype=np.float32)
+        self.gain = target_gain
+        # Ramp začína na predošlom (možno vyššom) zisku, špičky sa preto ešte orežú
+        return np.clip(block * ramp, -self.peak_limit, self.peak_limit)
+
+
+class CaptureChain:
+    """
+    Celý reťazec zachytávania podľa AudioConfig:
+    downmix -> resampler -> potlačenie šumu -> AGC.
+
+    Používa ho AudioProcessor v callbacku aj samostatný proces
+    zachytávania (capture_process).
+    """
+
+    def __init__(self, config: AudioConfig):
+        self.config = config
+        # Prevzorkovanie priebežne v callbacku, po pustení PTT sa už nekonvertuje
+        self.resampler = StreamingResampler(config.sample_rate, config.stt_sample_rate)
+        self.denoiser = (
+            SpectralGate(config.stt_sample_rate, noise_floor=config.noise_floor)
+            if config.noise_reduction
+            else None
+        )
+        self.agc = (
+            AutoGain(target_dbfs=config.agc_target_dbfs, max_gain_db=config.agc_max_gain_db)
+            if config.agc_enabled
+            else None
+        )
+
+    def start(self):
+        """Začiatok nahrávky (profil šumu ostáva)."""
+        self.resampler.reset()
+        if self.denoiser is not None:
+            self.denoiser.reset()
+        if self.agc is not None:
+            self.agc.reset()
+
+    def process(self, indata: np.ndarray) -> np.ndarray:
+        """Spracuje blok nahrávky zo zariadenia na mono vo vzorkovaní stt_sample_rate."""
+        return self._filter(self.resampler.process(downmix(indata, self.config.downmix)))
+
+    def idle(self, indata: np.ndarray):
+        """Blok mimo nahrávania - v mikrofóne je len hra/okolie, učí sa profil šumu."""
+        if self.denoiser is not None:
+            self.denoiser.learn(self.resampler.process(downmix(indata, self.config.downmix)))
+
+    def finish(self) -> np.ndarray:
+        """Koniec nahrávky - dopočíta oneskorenie resampleru a denoisera."""
+        return self._filter(self.resampler.flush(), final=True)
+
+    def _filter(self, block: np.ndarray, final: bool = False) -> np.ndarray:
+        if self.denoiser is not None:
+            block = self.denoiser.process(block)
+            if final:
+                block = np.concatenate((block, self.denoiser.flush()))
+        if self.agc is not None:
+            block = self.agc.process(block)
+        return block
@@ -0,0 +1,399 @@
+"""
+Meranie vstupných audio zariadení a automatický výber blocksize.
+
+Pre kandidátske zariadenia a vzorkovania otvorí vstupný stream
+s rôznymi veľkosťami bloku a zmeria skutočnú vstupnú latenciu (čas od
+ADC po callback), jitter intervalov medzi callbackmi a podiel pretečení.
+Z nameraných bodov vyberie najlepšie natívne vzorkovanie a najmenší
+stabilný blocksize a uloží ich do profilu, ktorý AppConfig načíta cez
+audio.profile (podobne ako model.profile z auto-tunera).
+
+    python -m src.services.audio_probe --output audio_profile.yaml
+    python -m src.services.audio_probe --all-devices --duration 3
+"""
+
+import argparse
+import logging
+import platform
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import yaml
+
+from ..config.config import AppConfig, AudioConfig
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SAMPLE_RATES = (48000, 44100, 16000)
+DEFAULT_BLOCKSIZES = (128, 256, 512, 1024, 2048)
+# Prvé callbacky po štarte streamu majú nepravidelné časovanie
+WARMUP_CALLBACKS = 5
+# Minimálny počet meraných callbackov (veľké bloky sa merajú dlhšie)
+MIN_CALLBACKS = 20
+
+
+@dataclass
+class ProbeResult:
+    """Meranie jednej kombinácie zariadenia, vzorkovania a bloku."""
+
+    device: int
+    device_name: str
+    sample_rate: int
+    blocksize: int
+    channels: int
+    native: bool = False  # predvolené vzorkovanie zariadenia (bez resamplingu v OS)
+    callbacks: int = 0
+    expected_callbacks: int = 0
+    overflows: int = 0
+    overflow_rate: float = 0.0
+    latency_ms: float = 0.0
+    jitter_p99_ms: float = 0.0
+    max_gap_ms: float = 0.0
+    stable: bool = False
+    error: Optional[str] = None
+
+    @property
+    def block_ms(self) -> float:
+        return self.blocksize * 1000.0 / self.sample_rate
+
+    def settings(self) -> Dict[str, Any]:
+        """Nastavenia pre AudioConfig.apply_profile."""
+        return {
+            "input_device_index": self.device,
+            "sample_rate": self.sample_rate,
+            "blocksize": self.blocksize,
+            "channels": self.channels,
+        }
+
+
+class AudioProbe:
+    """Otvára vstupné streamy cez sounddevice (alebo náhradný backend) a meria ich."""
+
+    def __init__(
+        self,
+        backend=None,
+        duration_sec: float = 1.5,
+        sample_rates: Sequence[int] = DEFAULT_SAMPLE_RATES,
+        blocksizes: Sequence[int] = DEFAULT_BLOCKSIZES,
+        channels: int = 1,
+        stt_sample_rate: int = 16000,
+        clock: Callable[[], float] = time.perf_counter,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        Args:
+            backend: Modul s rozhraním sounddevice (query_devices, default,
+                InputStream); None = sounddevice
+            duration_sec: Dĺžka merania jednej kombinácie
+            sample_rates: Skúšané vzorkovania (okrem natívneho zariadenia)
+            blocksizes: Skúšané veľkosti bloku
+            channels: Požadovaný počet kanálov
+            stt_sample_rate: Vzorkovanie STT (celočíselný pomer = lacnejší resampling)
+            clock: Hodiny pre časy príchodu callbackov (sekundy)
+            sleep: Čakanie počas merania; s náhradným backendom sa dajú
+                použiť virtuálne hodiny (VirtualClock.now/sleep)
+        """
+        if backend is None:
+            import sounddevice as backend
+        self.backend = backend
+        self.duration_sec = duration_sec
+        self.sample_rates = list(sample_rates)
+        self.blocksizes = sorted(blocksizes)
+        self.channels = channels
+        self.stt_sample_rate = stt_sample_rate
+        self.clock = clock
+        self.sleep = sleep
+
+    def default_device(self) -> Optional[int]:
+        """Index predvoleného vstupného zariadenia."""
+        device = self.backend.default.device
+        index = device[0] if isinstance(device, (list, tuple)) else device
+        return index if index is not None and index >= 0 else None
+
+    def candidate_devices(self, all_devices: bool = False, device: Optional[int] = None) -> List[int]:
+        """
+        Zariadenia na meranie.
+
+        Args:
+            all_devices: Všetky vstupné zariadenia (inak len zvolené/predvolené)
+            device: Konkrétne zariadenie (napr. audio.input_device_index)
+        """
+        inputs = [
+            index
+            for index, info in enumerate(self.backend.query_devices())
+            if info["max_input_channels"] > 0
+        ]
+        preferred = device if device is not None else self.default_device()
+        if not all_devices:
+            return [preferred] if preferred in inputs else inputs[:1]
+        # Preferované zariadenie prvé
+        return sorted(inputs, key=lambda index: index != preferred)
+
+    def run(self, devices: Sequence[int]) -> List[ProbeResult]:
+        """Zmeria všetky kombinácie vzorkovania a bloku pre dané zariadenia."""
+        results = []
+        for device in devices:
+            info = self.backend.query_devices(device)
+            native = int(info["default_samplerate"])
+            channels = max(1, min(self.channels, int(info["max_input_channels"])))
+            rates = [native] + [rate for rate in self.sample_rates if rate != native]
+            for rate in rates:
+                for blocksize in self.blocksizes:
+                    result = self.measure(device, info["name"], rate, blocksize, channels)
+                    result.native = rate == native
+                    results.append(result)
+                    logger.info(
+                        f"{info['name']} {rate}Hz/{blocksize}: "
+                        + (
+                            f"chyba {result.error}"
+                            if result.error
+                            else f"latencia {result.latency_ms:.1f}ms, jitter p99 "
+                            f"{result.jitter_p99_ms:.1f}ms, pretečenia {result.overflows}"
+                            f"{'' if result.stable else ' (nestabilné)'}"
+                        )
+                    )
+                    if result.error:
+                        # Nepodporované vzorkovanie - ďalšie bloky netreba skúšať
+                        break
+        return results
+
+    def measure(
+        self, device: int, name: str, sample_rate: int, blocksize: int, channels: int
+    ) -> ProbeResult:
+        """Otvorí stream (aspoň na duration_sec) a vyhodnotí callbacky."""
+        result = ProbeResult(
+            device=device,
+            device_name=name,
+            sample_rate=sample_rate,
+            blocksize=blocksize,
+            channels=channels,
+        )
+        arrivals: List[float] = []
+        latencies: List[float] = []
+        overflows = [0]
+        lock = threading.Lock()
+        period = blocksize / sample_rate
+        duration = max(self.duration_sec, (WARMUP_CALLBACKS + MIN_CALLBACKS) * period)
+
+        def callback(indata, frames, time_info, status):
+            now = self.clock()
+            adc = getattr(time_info, "inputBufferAdcTime", 0.0) or 0.0
+            current = getattr(time_info, "currentTime", 0.0) or 0.0
+            with lock:
+                arrivals.append(now)
+                if adc > 0 and current > adc:
+                    latencies.append(current - adc)
+                if status and status.input_overflow:
+                    overflows[0] += 1
+
+        try:
+            stream = self.backend.InputStream(
+                samplerate=sample_rate,
+                channels=channels,
+                blocksize=blocksize,
+                device=device,
+                callback=callback,
+                dtype=np.float32,
+            )
+            stream.start()
+            try:
+                self.sleep(duration)
+            finally:
+                stream.stop()
+                stream.close()
+        except Exception as e:
+            result.error = str(e)
+            return result
+
+        with lock:
+            times = np.array(arrivals[WARMUP_CALLBACKS:])
+            measured = list(latencies[WARMUP_CALLBACKS:])
+            result.overflows = overflows[0]
+        result.callbacks = len(arrivals)
+        result.expected_callbacks = int(duration / period)
+        result.overflow_rate = result.overflows / max(1, result.callbacks)
+
+        if len(times) >= 2:
+            intervals = np.diff(times)
+            result.jitter_p99_ms = float(np.percentile(np.abs(intervals - period), 99) * 1000)
+            result.max_gap_ms = float(intervals.max() * 1000)
+        if measured:
+            result.latency_ms = float(np.median(measured) * 1000)
+        else:
+            # Host API nedáva časy ADC - odhad z hlásenej latencie a plnenia bloku
+            reported = getattr(stream, "latency", 0.0) or 0.0
+            result.latency_ms = (reported + period) * 1000
+
+        result.stable = (
+            result.overflows == 0
+            and result.callbacks >= 0.9 * result.expected_callbacks - 1
+            and len(times) >= 2
+            # Oneskorenie callbacku s rezervou pod dĺžkou bloku (pri celom bloku PortAudio pretečie)
+            and result.jitter_p99_ms < period * 500
+        )
+        return result
+
+    def select(self, results: List[ProbeResult], device: Optional[int] = None) -> Optional[ProbeResult]:
+        """
+        Vyberie najlepšiu kombináciu.
+
+        Zariadenie: zvolené/predvolené, ak má stabilnú kombináciu, inak to
+        s najnižšou latenciou. Vzorkovanie: natívne, potom celočíselný
+        násobok STT vzorkovania (lacný resampling), potom latencia. Blok:
+        najmenší stabilný.
+        """
+        stable = [r for r in results if r.stable]
+        if not stable:
+            return None
+        preferred = device if device is not None else self.default_device()
+        if any(r.device == preferred for r in stable):
+            stable = [r for r in stable if r.device == preferred]
+        else:
+            best = min(stable, key=lambda r: r.latency_ms)
+            stable = [r for r in stable if r.device == best.device]
+
+        def rate_key(result: ProbeResult):
+            integer_ratio = result.sample_rate % self.stt_sample_rate == 0
+            return (not result.native, not integer_ratio, result.latency_ms)
+
+        rate = min(stable, key=rate_key).sample_rate
+        return min((r for r in stable if r.sample_rate == rate), key=lambda r: r.blocksize)
+
+
+def build_profile(results: List[ProbeResult], selected: ProbeResult) -> Dict[str, Any]:
+    """Profil pre AppConfig (kľúč selected) s nameranými bodmi."""
+
+    def rounded(result: ProbeResult) -> Dict[str, Any]:
+        return {
+            key: round(value, 2) if isinstance(value, float) else value
+            for key, value in asdict(result).items()
+        }
+
+    return {
+        "selected": selected.settings(),
+        "measurement": {
+            "device_name": selected.device_name,
+            "latency_ms": round(selected.latency_ms, 1),
+            "jitter_p99_ms": round(selected.jitter_p99_ms, 2),
+            "block_ms": round(selected.block_ms, 1),
+        },
+        "machine": {
+            "host": platform.node(),
+            "probed_at": datetime.now().isoformat(timespec="seconds"),
+        },
+        "results": [rounded(result) for result in results],
+    }
+
+
+def save_profile(profile: Dict[str, Any], path: Path):
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(profile, f, allow_unicode=True, sort_keys=False)
+
+
+def format_results(results: List[ProbeResult], selected: Optional[ProbeResult]) -> str:
+    """Tabuľka meraní s označeným vybraným bodom."""
+    lines = [
+        f"{'':2}{'zariadenie':<28}{'Hz':>7}{'blok':>6}{'blok ms':>9}{'latencia':>10}"
+        f"{'jitter p99':>12}{'pretečenia':>12}"
+    ]
+    for result in results:
+        marker = "*" if result is selected else " "
+        name = f"{result.device}: {result.device_name}"[:27]
+        if result.error:
+            lines.append(f"{marker:2}{name:<28}{result.sample_rate:>7}{result.blocksize:>6}  {result.error}")
+            continue
+        lines.append(
+            f"{marker:2}{name:<28}{result.sample_rate:>7}{result.blocksize:>6}"
+            f"{result.block_ms:>9.1f}{result.latency_ms:>8.1f}ms{result.jitter_p99_ms:>10.1f}ms"
+            f"{result.overflows:>12}{'' if result.stable else '  nestabilné'}"
+        )
+    return "\n".join(lines)
+
+
+def probe_and_save(config: AudioConfig, path: Path, backend=None, duration_sec: float = 1.0) -> bool:
+    """
+    Zmeria zvolené/predvolené zariadenie, uloží profil a aplikuje ho.
+
+    Používa sa pri štarte (audio.auto_probe), keď profil ešte neexistuje.
+
+    Returns:
+        True ak sa našla stabilná kombinácia
+    """
+    probe = AudioProbe(
+        backend=backend,
+        duration_sec=duration_sec,
+        channels=config.channels,
+        stt_sample_rate=config.stt_sample_rate,
+    )
+    results = probe.run(probe.candidate_devices(device=config.input_device_index))
+    selected = probe.select(results, device=config.input_device_index)
+    if selected is None:
+        logger.warning("Meranie audio zariadenia nenašlo stabilnú kombináciu, ostáva konfigurácia")
+        return False
+    save_profile(build_profile(results, selected), path)
+    config.apply_profile(selected.settings())
+    config.profile = str(path)
+    logger.info(
+        f"Audio profil uložený do {path}: {selected.device_name}, {selected.sample_rate}Hz, "
+        f"blok {selected.blocksize} ({selected.latency_ms:.0f}ms)"
+    )
+    return True
+
+
+def _csv_ints(value: str) -> List[int]:
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Meranie latencie vstupných audio zariadení")
+    parser.add_argument("--config", type=Path, default=Path("config.yaml"))
+    parser.add_argument("--device", type=int, help="Index zariadenia (inak audio.input_device_index/predvolené)")
+    parser.add_argument("--all-devices", action="store_true", help="Zmerať všetky vstupné zariadenia")
+    parser.add_argument("--rates", type=_csv_ints, default=list(DEFAULT_SAMPLE_RATES))
+    parser.add_argument("--blocksizes", type=_csv_ints, default=list(DEFAULT_BLOCKSIZES))
+    parser.add_argument("--duration", type=float, default=1.5, help="Sekundy na kombináciu")
+    parser.add_argument("--output", type=Path, default=Path("audio_profile.yaml"))
+    parser.add_argument(
+        "--fake", action="store_true", help="Náhradný backend bez zvukovej karty (ukážka/testy)"
+    )
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+    config = AppConfig.from_yaml(args.config).audio
+    backend = None
+    if args.fake:
+        from ..benchmark.stubs import FakeInputBackend
+
+        backend = FakeInputBackend()
+    device = args.device if args.device is not None else config.input_device_index
+    probe = AudioProbe(
+        backend=backend,
+        duration_sec=args.duration,
+        sample_rates=args.rates,
+        blocksizes=args.blocksizes,
+        channels=config.channels,
+        stt_sample_rate=config.stt_sample_rate,
+    )
+    results = probe.run(probe.candidate_devices(all_devices=args.all_devices, device=device))
+    selected = probe.select(results, device=device)
+    print(format_results(results, selected))
+    if selected is None:
+        print("\nŽiadna stabilná kombinácia, profil sa neuložil")
+        return 1
+    save_profile(build_profile(results, selected), args.output)
+    print(f"\nProfil uložený do {args.output} (v config.yaml nastav audio.profile)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,12 +4,13 @@ Audio processor pre zachytávanie a spracovanie zvuku.
 
 from dataclasses import dataclass
 import numpy as np
-import sounddevice as sd
-from typing import Optional, Callable
+from typing import Any, Dict, List, Optional, Callable
 import threading
 import logging
 from datetime import datetime
 from ..config.config import AudioConfig
+from ..utils.affinity import pin_current_thread
+from .audio_dsp import CaptureChain
 
 logger = logging.getLogger(__name__)
 
@@ -32,15 +33,25 @@ class AudioProcessor:
         Args:
             config: Konfigurácia pre audio zariadenie
             callback: Callback funkcia volaná pri nahratí nového audio framu
+                (mono, už vo vzorkovaní stt_sample_rate)
         """
         self.config = config
         self.callback = callback
         self.state = AudioState()
-        self.stream: Optional[sd.InputStream] = None
+        self.stream: Optional[Any] = None  # sounddevice.InputStream
         self._lock = threading.Lock()
+        # Jadrá pre audio callback (oddelené od STT v CPU výkonovom režime)
+        self.pin_cores: List[int] = []
+        self._pinned = False
+        self.chain = CaptureChain(config)
+        # Počítadlá statusov PortAudio (export do metrík)
+        self.input_overflows = 0
+        self.callbacks = 0
 
     def start_stream(self):
         """Spustí audio stream zo vstupného zariadenia."""
+        import sounddevice as sd
+
         try:
             self.stream = sd.InputStream(
                 samplerate=self.config.sample_rate,
@@ -52,7 +63,8 @@ class AudioProcessor:
             )
             self.stream.start()
             logger.info(
-                f"Audio stream spustený (vzorkovanie: {self.config.sample_rate}Hz)"
+                f"Audio stream spustený (vzorkovanie: {self.config.sample_rate}Hz"
+                f" -> {self.config.stt_sample_rate}Hz)"
             )
         except Exception as e:
             logger.error(f"Nepodarilo sa spustiť audio stream: {str(e)}")
@@ -77,6 +89,7 @@ class AudioProcessor:
                 self.state.is_recording = True
                 self.state.recording_start = datetime.now().timestamp()
                 self.state.frames = []
+                self.chain.start()
                 logger.info("Nahrávanie spustené")
 
     def stop_recording(self) -> Optional[np.ndarray]:
@@ -89,24 +102,40 @@ class AudioProcessor:
         with self._lock:
             if self.state.is_recording:
                 self.state.is_recording = False
+                tail = self.chain.finish()
+                if len(tail):
+                    self.state.frames.append(tail)
                 if not self.state.frames:
                     logger.warning("Žiadne audio dáta neboli nahraté")
                     return None
 
                 audio = np.concatenate(self.state.frames, axis=0)
-                duration = len(audio) / self.config.sample_rate
+                duration = len(audio) / self.config.stt_sample_rate
                 logger.info(f"Nahrávanie ukončené (dĺžka: {duration:.1f}s)")
                 return audio
             return None
 
+    def stats(self) -> Dict[str, int]:
+        """Počítadlá zachytávania pre metriky."""
+        return {"callbacks": self.callbacks, "input_overflows": self.input_overflows}
+
     def _audio_callback(self, indata, frames, time_info, status):
         """Callback volaný pri každom novom audio frame."""
+        if not self._pinned:
+            # Callback beží v threade PortAudio, pinuje sa pri prvom volaní
+            self._pinned = True
+            pin_current_thread(self.pin_cores)
+        self.callbacks += 1
         if status:
+            if status.input_overflow:
+                self.input_overflows += 1
             logger.warning(f"Audio status: {status}")
 
         with self._lock:
             if self.state.is_recording:
-                # Berieme len prvý kanál pre mono
-                mono = indata[:, 0].copy()
-                self.state.frames.append(mono)
-                self.callback(mono)
+                mono = self.chain.process(indata)
+                if len(mono):
+                    self.state.frames.append(mono)
+                    self.callback(mono)
+            else:
+                self.chain.idle(indata)
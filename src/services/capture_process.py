@@ -0,0 +1,360 @@
+"""
+Zachytávanie zvuku v samostatnom procese.
+
+PortAudio callback v hlavnom procese súperí o GIL s Whisperom, event
+loopom a pynputom; pri záťaži to končí statusom "input overflow".
+Tu callback (aj downmix, resampler, denoiser a AGC) beží v dcérskom
+procese a spracované mono vzorky zapisuje do kruhového bufferu
+v multiprocessing.shared_memory.
+
+Synchronizácia je bez zámkov: každé pole hlavičky má jediného
+zapisovateľa (dcérsky proces index zápisu a počítadlá, hlavný proces
+príznak nahrávania a požiadavku na flush) a index zápisu sa zvyšuje až
+po zapísaní dát. Dáta sú v bufferi dvakrát za sebou (zrkadlo), takže
+každý úsek kratší ako kapacita je súvislý a hlavný proces dostane
+výpoveď ako NumPy view bez kopírovania.
+"""
+
+import logging
+import multiprocessing
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from ..config.config import AudioConfig
+from ..utils.affinity import pin_current_thread
+from .audio_processor import AudioState
+
+logger = logging.getLogger(__name__)
+
+# Polia hlavičky (int64)
+WRITE_POS = 0  # počet zapísaných vzoriek (dcérsky proces)
+RECORDING = 1  # 1 = PTT stlačené (hlavný proces)
+FLUSH_REQUEST = 2  # poradové číslo požiadavky na koniec nahrávky (hlavný proces)
+FLUSH_ACK = 3  # posledná vybavená požiadavka (dcérsky proces)
+STATE = 4  # 0 = štartuje, 1 = beží, -1 = chyba (dcérsky proces)
+STOP = 5  # 1 = ukončiť proces (hlavný proces)
+CALLBACKS = 6
+INPUT_OVERFLOWS = 7
+INPUT_UNDERFLOWS = 8
+HEADER_FIELDS = 16
+HEADER_BYTES = HEADER_FIELDS * 8
+
+STATE_RUNNING = 1
+STATE_FAILED = -1
+
+# Ako často sa počas nahrávania posielajú nové vzorky callbacku (streamovaný STT)
+CALLBACK_POLL_SEC = 0.05
+
+
+class SharedRing:
+    """Zrkadlený kruhový buffer float32 vzoriek v zdieľanej pamäti."""
+
+    def __init__(self, capacity: int, name: Optional[str] = None):
+        """
+        Args:
+            capacity: Kapacita vo vzorkách
+            name: Názov existujúceho segmentu (dcérsky proces); None = vytvoriť
+        """
+        self.capacity = capacity
+        size = HEADER_BYTES + 2 * capacity * 4
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size)
+        self.header = np.ndarray((HEADER_FIELDS,), dtype=np.int64, buffer=self.shm.buf)
+        self.data = np.ndarray(
+            (2 * capacity,), dtype=np.float32, buffer=self.shm.buf, offset=HEADER_BYTES
+        )
+        if self.owner:
+            self.header[:] = 0
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def write(self, block: np.ndarray):
+        """Zapíše blok (len jeden zapisovateľ) a až potom posunie index."""
+        if not len(block):
+            return
+        block = block[-self.capacity:]
+        position = int(self.header[WRITE_POS])
+        start = position % self.capacity
+        head = min(len(block), self.capacity - start)
+        for offset in (0, self.capacity):
+            self.data[offset + start:offset + start + head] = block[:head]
+            self.data[offset:offset + len(block) - head] = block[head:]
+        self.header[WRITE_POS] = position + len(block)
+
+    def view(self, start: int, end: int) -> np.ndarray:
+        """
+        Súvislý view na vzorky [start, end) bez kopírovania.
+
+        View platí, kým zápis nepokročí o ďalšiu kapacitu vzoriek.
+        """
+        length = end - start
+        if length > self.capacity:
+            raise ValueError("Úsek je dlhší ako kapacita bufferu")
+        offset = start % self.capacity
+        view = self.data[offset:offset + length]
+        view.flags.writeable = False
+        return view
+
+    def close(self):
+        # Header a data sú view na shm.buf, bez ich uvoľnenia close() zlyhá
+        del self.header, self.data
+        try:
+            self.shm.close()
+        except BufferError:
+            # Niekto ešte drží view na výpoveď; segment sa uvoľní s procesom
+            logger.warning("Zdieľaný audio buffer sa ešte používa, zatváram neskôr")
+            return
+        if self.owner:
+            self.shm.unlink()
+
+
+def _capture_main(ring_name: str, capacity: int, config: AudioConfig, pin_cores: List[int]):
+    """Telo dcérskeho procesu: PortAudio stream + reťazec spracovania."""
+    import sounddevice as sd
+
+    from .audio_dsp import CaptureChain
+
+    ring = SharedRing(capacity, name=ring_name)
+    chain = CaptureChain(config)
+    recording = False
+    pinned = False
+
+    def callback(indata, frames, time_info, status):
+        nonlocal recording, pinned
+        header = ring.header
+        if not pinned:
+            # Callback beží v threade PortAudio, pinuje sa pri prvom volaní
+            pinned = True
+            pin_current_thread(pin_cores)
+        header[CALLBACKS] += 1
+        if status:
+            if status.input_overflow:
+                header[INPUT_OVERFLOWS] += 1
+            if status.input_underflow:
+                header[INPUT_UNDERFLOWS] += 1
+
+        wanted = bool(header[RECORDING])
+        if wanted and not recording:
+            chain.start()
+            recording = True
+        if recording:
+            ring.write(chain.process(indata))
+        else:
+            chain.idle(indata)
+
+        # Koniec nahrávky: dopíš oneskorenie filtrov a potvrď požiadavku
+        request = int(header[FLUSH_REQUEST])
+        if not wanted and request != header[FLUSH_ACK]:
+            if recording:
+                ring.write(chain.finish())
+                recording = False
+            header[FLUSH_ACK] = request
+
+    try:
+        stream = sd.InputStream(
+            samplerate=config.sample_rate,
+            channels=config.channels,
+            blocksize=config.blocksize,
+            device=config.input_device_index,
+            callback=callback,
+            dtype=np.float32,
+        )
+        stream.start()
+    except Exception as e:
+        logger.error(f"Audio proces nespustil stream: {e}")
+        ring.header[STATE] = STATE_FAILED
+        ring.close()
+        return
+
+    ring.header[STATE] = STATE_RUNNING
+    parent = multiprocessing.parent_process()
+    try:
+        # Koniec na požiadanie alebo keď hlavný proces zanikne
+        while not ring.header[STOP] and (parent is None or parent.is_alive()):
+            time.sleep(0.05)
+    finally:
+        stream.stop()
+        stream.close()
+        ring.close()
+
+
+class ProcessAudioCapture:
+    """
+    Náhrada AudioProcessor so zachytávaním v samostatnom procese.
+
+    Rozhranie je rovnaké (start_stream, start/stop_recording, state,
+    pin_cores, stats). Callback dostáva počas nahrávania nové vzorky
+    z bufferu (kópie, každých CALLBACK_POLL_SEC) z vlastného threadu,
+    napr. pre vzdialený STT, ktorý posiela audio už počas držania PTT.
+    """
+
+    def __init__(self, config: AudioConfig, callback: Optional[Callable] = None):
+        """
+        Args:
+            config: Konfigurácia pre audio zariadenie
+            callback: Funkcia volaná s novými vzorkami počas nahrávania
+        """
+        self.config = config
+        self.callback = callback
+        self.state = AudioState()
+        self.pin_cores: List[int] = []
+        self.capacity = int(config.ring_sec * config.stt_sample_rate)
+        self.ring: Optional[SharedRing] = None
+        self.process: Optional[multiprocessing.Process] = None
+        self._lock = threading.Lock()
+        self._start = 0
+        self._flush_request = 0
+        self._poll_thread: Optional[threading.Thread] = None
+        # Výpovede dlhšie ako buffer (začiatok sa prepísal)
+        self.ring_overruns = 0
+
+    def start_stream(self, timeout: float = 10.0):
+        """
+        Spustí dcérsky proces a počká, kým beží stream.
+
+        Raises:
+            RuntimeError: Ak proces stream nespustil
+        """
+        self.ring = SharedRing(self.capacity)
+        # spawn: rovnaké správanie na Windows aj Linuxe, bez forku threadov
+        context = multiprocessing.get_context("spawn")
+        self.process = context.Process(
+            target=_capture_main,
+            args=(self.ring.name, self.capacity, self.config, list(self.pin_cores)),
+            name="elena-audio",
+            daemon=True,
+        )
+        self.process.start()
+
+        deadline = time.monotonic() + timeout
+        while self.ring.header[STATE] == 0:
+            if not self.process.is_alive() or time.monotonic() > deadline:
+                break
+            time.sleep(0.01)
+        if self.ring.header[STATE] != STATE_RUNNING:
+            self.stop_stream()
+            raise RuntimeError("Audio proces nespustil stream")
+        logger.info(
+            f"Audio stream spustený v procese {self.process.pid} "
+            f"(vzorkovanie: {self.config.sample_rate}Hz -> {self.config.stt_sample_rate}Hz, "
+            f"buffer {self.config.ring_sec:.0f}s)"
+        )
+
+    def stop_stream(self):
+        """Ukončí dcérsky proces a uvoľní zdieľanú pamäť."""
+        self.state.is_recording = False
+        if self._poll_thread is not None:
+            self._poll_thread.join()
+            self._poll_thread = None
+        if self.process is not None:
+            self.ring.header[STOP] = 1
+            self.process.join(timeout=2.0)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join(timeout=1.0)
+            self.process = None
+            logger.info("Audio stream zastavený")
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+    def start_recording(self):
+        """Začne nahrávanie (od aktuálnej pozície v bufferi)."""
+        with self._lock:
+            if self.state.is_recording or self.ring is None:
+                return
+            # Proces zapisuje len počas nahrávania, pozícia sa teda nepohne
+            # pred nastavením príznaku
+            self._start = int(self.ring.header[WRITE_POS])
+            self.ring.header[RECORDING] = 1
+            self.state.is_recording = True
+            self.state.recording_start = time.time()
+            if self.callback is not None:
+                self._poll_thread = threading.Thread(
+                    target=self._poll_recording, args=(self._start,), name="audio-poll", daemon=True
+                )
+                self._poll_thread.start()
+            logger.info("Nahrávanie spustené")
+
+    def _poll_recording(self, position: int):
+        """Posiela callbacku vzorky zapísané od posledného čítania, kým trvá nahrávanie."""
+        ring = self.ring
+        while self.state.is_recording:
+            time.sleep(CALLBACK_POLL_SEC)
+            end = int(ring.header[WRITE_POS])
+            if end - position > self.capacity:
+                # Callback nestíhal, prepísané vzorky sa už nedajú poslať
+                break
+            if end > position:
+                block = ring.view(position, end).copy()
+                position = end
+                try:
+                    self.callback(block)
+                except Exception as e:
+                    logger.error(f"Chyba v audio callbacku: {e}")
+
+    def stop_recording(self, timeout: float = 0.5) -> Optional[np.ndarray]:
+        """
+        Zastaví nahrávanie a vráti výpoveď ako view do zdieľaného bufferu.
+
+        Počká, kým proces dopíše koniec (flush resampleru a denoisera),
+        najviac timeout sekúnd.
+
+        Returns:
+            Read-only NumPy view alebo None ak nie sú žiadne dáta
+        """
+        with self._lock:
+            if not self.state.is_recording:
+                return None
+            self.state.is_recording = False
+            if self._poll_thread is not None:
+                # Posledné bloky musia odísť pred výpoveďou (zvyšok doplní príjemca)
+                self._poll_thread.join()
+                self._poll_thread = None
+            header = self.ring.header
+            self._flush_request += 1
+            header[RECORDING] = 0
+            header[FLUSH_REQUEST] = self._flush_request
+
+            deadline = time.monotonic() + timeout
+            while header[FLUSH_ACK] != self._flush_request:
+                if time.monotonic() > deadline:
+                    logger.warning("Audio proces nedopísal koniec nahrávky včas")
+                    break
+                time.sleep(0.002)
+
+            end = int(header[WRITE_POS])
+            start = self._start
+            if end - start > self.capacity:
+                self.ring_overruns += 1
+                logger.warning(
+                    f"Výpoveď dlhšia ako buffer ({self.config.ring_sec:.0f}s), začiatok orezaný"
+                )
+                start = end - self.capacity
+            if end == start:
+                logger.warning("Žiadne audio dáta neboli nahraté")
+                return None
+
+            audio = self.ring.view(start, end)
+            logger.info(
+                f"Nahrávanie ukončené (dĺžka: {len(audio) / self.config.stt_sample_rate:.1f}s)"
+            )
+            return audio
+
+    def stats(self) -> Dict[str, int]:
+        """Počítadlá zachytávania pre metriky."""
+        if self.ring is None:
+            return {"callbacks": 0, "input_overflows": 0, "ring_overruns": self.ring_overruns}
+        header = self.ring.header
+        return {
+            "callbacks": int(header[CALLBACKS]),
+            "input_overflows": int(header[INPUT_OVERFLOWS]),
+            "input_underflows": int(header[INPUT_UNDERFLOWS]),
+            "ring_overruns": self.ring_overruns,
+        }
@@ -0,0 +1,361 @@
+"""
+Zdieľaná HTTP vrstva pre cloudové API (OpenAI).
+
+Namiesto predvoleného transportu SDK jeden httpx.AsyncClient s vyladeným
+poolom spojení (keep-alive, HTTP/2 ak je nainštalované h2), spoločnými
+timeoutmi a pre každý endpoint (host):
+- circuit breaker - po sérii zlyhaní sa požiadavky na chvíľu odmietnu hneď,
+  namiesto čakania na timeout pri každom turne,
+- retry budget - opakovania sú obmedzené na zlomok bežných požiadaviek, takže
+  výpadok API nezdvojnásobí záťaž ani čakanie.
+
+Opakovania robí transport (SDK beží s max_retries=0), počty nových a znovu
+použitých spojení a zlyhaní sú v metrikách (http_*).
+"""
+
+import asyncio
+import importlib.util
+import logging
+import random
+import time
+import weakref
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+
+import httpx
+
+from ..config.config import HttpConfig
+
+logger = logging.getLogger(__name__)
+
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+BREAKER_STATES = (BREAKER_CLOSED, BREAKER_OPEN, BREAKER_HALF_OPEN)
+
+# Odpovede, ktoré znamenajú problém na strane endpointu (breaker, opakovanie)
+FAILURE_STATUS = {429, 500, 502, 503, 504}
+# POST nie je idempotentný - opakuje sa len keď server požiadavku určite nespracoval
+RETRY_STATUS = {429, 502, 503, 504}
+RETRY_STATUS_UNSAFE = {429, 503}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+# Chyby pred odoslaním požiadavky - bezpečné opakovať pri každej metóde
+CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+def h2_available() -> bool:
+    """HTTP/2 v httpx vyžaduje balík h2 (`pip install httpx[http2]`)."""
+    return importlib.util.find_spec("h2") is not None
+
+
+class CircuitOpenError(httpx.TransportError):
+    """Breaker endpointu je otvorený - požiadavka sa ani neodoslala."""
+
+
+class CircuitBreaker:
+    """Breaker closed -> open (po failure_threshold zlyhaniach) -> half_open (skúšobná požiadavka)."""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout_sec: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            name: Endpoint (do logu)
+            failure_threshold: Zlyhania po sebe, po ktorých sa breaker otvorí
+            reset_timeout_sec: Ako dlho odmietať požiadavky pred skúšobnou
+            clock: Zdroj času (testy)
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_sec = reset_timeout_sec
+        self.clock = clock
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_at: Optional[float] = None
+        self.opens = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return BREAKER_CLOSED
+        if self.clock() - self._opened_at < self.reset_timeout_sec:
+            return BREAKER_OPEN
+        return BREAKER_HALF_OPEN
+
+    def allow(self) -> bool:
+        """Môže požiadavka ísť von? V half_open prejde len jedna skúšobná naraz."""
+        state = self.state
+        if state == BREAKER_CLOSED:
+            return True
+        now = self.clock()
+        # Zrušená skúšobná požiadavka nesmie breaker zablokovať navždy
+        if state == BREAKER_HALF_OPEN and (
+            self._probe_at is None or now - self._probe_at >= self.reset_timeout_sec
+        ):
+            self._probe_at = now
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self):
+        if self._opened_at is not None:
+            logger.info(f"HTTP breaker {self.name} zatvorený - endpoint znova odpovedá")
+        self._failures = 0
+        self._opened_at = None
+        self._probe_at = None
+
+    def record_failure(self):
+        self._failures += 1
+        probe_failed = self._probe_at is not None
+        if probe_failed or (self._opened_at is None and self._failures >= self.failure_threshold):
+            self._opened_at = self.clock()
+            self._probe_at = None
+            self.opens += 1
+            logger.warning(
+                f"HTTP breaker {self.name} otvorený na {self.reset_timeout_sec:.0f}s "
+                f"({self._failures} zlyhaní po sebe)"
+            )
+
+
+class RetryBudget:
+    """Token bucket pre opakovania: požiadavka pridá ratio tokenu, opakovanie minie 1."""
+
+    def __init__(
+        self,
+        ratio: float = 0.2,
+        min_per_sec: float = 0.2,
+        capacity: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            ratio: Podiel opakovaní k bežným požiadavkám (0.2 = najviac 20 %)
+            min_per_sec: Minimálny prísun tokenov aj bez prevádzky
+            capacity: Strop nasporených opakovaní
+            clock: Zdroj času (testy)
+        """
+        self.ratio = ratio
+        self.min_per_sec = min_per_sec
+        self.capacity = capacity
+        self.clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self.exhausted = 0
+
+    @property
+    def tokens(self) -> float:
+        self._refill()
+        return self._tokens
+
+    def deposit(self):
+        """Započíta novú (nie opakovanú) požiadavku."""
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        """Minie token na opakovanie; False = rozpočet vyčerpaný."""
+        self._refill()
+        if self._tokens < 1.0:
+            self.exhausted += 1
+            return False
+        self._tokens -= 1.0
+        return True
+
+    def _refill(self):
+        now = self.clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.min_per_sec)
+        self._updated = now
+
+
+@dataclass
+class EndpointStats:
+    """Počítadlá jedného endpointu pre metriky."""
+
+    requests: int = 0
+    connections_opened: int = 0
+    reused: int = 0
+    http2: int = 0
+    retries: int = 0
+    failures: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def reuse_ratio(self) -> float:
+        tracked = self.connections_opened + self.reused
+        return self.reused / tracked if tracked else 0.0
+
+
+class Endpoint:
+    """Breaker, retry budget a štatistiky jedného hostu."""
+
+    def __init__(self, host: str, config: HttpConfig):
+        self.host = host
+        self.breaker = CircuitBreaker(host, config.breaker_failures, config.breaker_reset_sec)
+        self.budget = RetryBudget(config.retry_budget_ratio, config.retry_min_per_sec)
+        self.stats = EndpointStats()
+        # Sieťové streamy httpcore = spojenia; nový stream = nové spojenie
+        self._streams: "weakref.WeakSet" = weakref.WeakSet()
+
+    def track_connection(self, response: httpx.Response):
+        if response.http_version == "HTTP/2":
+            self.stats.http2 += 1
+        stream = response.extensions.get("network_stream")
+        if stream is None:
+            return
+        try:
+            if stream in self._streams:
+                self.stats.reused += 1
+                return
+            self._streams.add(stream)
+        except TypeError:
+            return  # stream bez weakref - spojenia sa nesledujú
+        self.stats.connections_opened += 1
+
+    def record_failure(self, kind: str):
+        self.stats.failures[kind] = self.stats.failures.get(kind, 0) + 1
+        self.breaker.record_failure()
+
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """Obalí httpx transport o breaker, retry budget a počítanie spojení."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, http: "HttpTransport"):
+        self.inner = inner
+        self.http = http
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        endpoint = self.http.endpoint(request.url.host)
+        endpoint.stats.requests += 1
+        endpoint.budget.deposit()
+        attempt = 0
+        while True:
+            if not endpoint.breaker.allow():
+                raise CircuitOpenError(
+                    f"HTTP breaker {endpoint.host} je otvorený", request=request
+                )
+            try:
+                response = await self.inner.handle_async_request(request)
+            except httpx.TransportError as e:
+                endpoint.record_failure(type(e).__name__)
+                if not self._should_retry(endpoint, request, attempt, error=e):
+                    raise
+                delay = self._backoff(attempt)
+            else:
+                endpoint.track_connection(response)
+                if response.status_code not in FAILURE_STATUS:
+                    endpoint.breaker.record_success()
+                    return response
+                endpoint.record_failure(str(response.status_code))
+                delay = self._retry_after(response, attempt)
+                if delay is None or not self._should_retry(
+                    endpoint, request, attempt, status=response.status_code
+                ):
+                    return response
+                await response.aclose()
+            attempt += 1
+            endpoint.stats.retries += 1
+            logger.info(f"Opakujem {request.method} {request.url.path} o {delay * 1000:.0f} ms")
+            await asyncio.sleep(delay)
+
+    async def aclose(self):
+        await self.inner.aclose()
+
+    def _should_retry(
+        self,
+        endpoint: Endpoint,
+        request: httpx.Request,
+        attempt: int,
+        error: Optional[Exception] = None,
+        status: Optional[int] = None,
+    ) -> bool:
+        if attempt >= self.http.config.retry_max_attempts:
+            return False
+        idempotent = request.method in IDEMPOTENT_METHODS
+        if error is not None and not (idempotent or isinstance(error, CONNECT_ERRORS)):
+            return False  # POST mohol dôjsť na server (napr. ReadTimeout)
+        if status is not None and status not in (RETRY_STATUS if idempotent else RETRY_STATUS_UNSAFE):
+            return False
+        if not endpoint.budget.try_spend():
+            logger.warning(f"Retry budget pre {endpoint.host} vyčerpaný - neopakujem")
+            return False
+        return True
+
+    def _backoff(self, attempt: int) -> float:
+        base = self.http.config.retry_backoff_ms / 1000 * (2 ** attempt)
+        return base * random.uniform(0.5, 1.0)
+
+    def _retry_after(self, response: httpx.Response, attempt: int) -> Optional[float]:
+        """Čakanie podľa Retry-After; None ak je dlhšie, než sa oplatí čakať v turne."""
+        header = response.headers.get("retry-after")
+        if header is None:
+            return self._backoff(attempt)
+        try:
+            delay = float(header)
+        except ValueError:
+            return self._backoff(attempt)
+        return delay if delay <= self.http.config.retry_after_max_sec else None
+
+
+class HttpTransport:
+    """Zdieľaný HTTP klient s poolom spojení a stavom endpointov."""
+
+    def __init__(self, config: HttpConfig):
+        """
+        Args:
+            config: Konfigurácia HTTP vrstvy (sekcia http)
+        """
+        self.config = config
+        self.http2 = config.http2 and h2_available()
+        if config.http2 and not self.http2:
+            logger.info("HTTP/2 nedostupné (chýba balík h2) - používam HTTP/1.1 s keep-alive")
+        self.endpoints: Dict[str, Endpoint] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(
+            connect=self.config.connect_timeout_sec,
+            read=self.config.read_timeout_sec,
+            write=self.config.write_timeout_sec,
+            pool=self.config.pool_timeout_sec,
+        )
+
+    @property
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.config.max_connections,
+            max_keepalive_connections=self.config.max_keepalive_connections,
+            keepalive_expiry=self.config.keepalive_expiry_sec,
+        )
+
+    def client(self) -> httpx.AsyncClient:
+        """Zdieľaný klient (vytvorí sa pri prvom použití)."""
+        if self._client is None:
+            inner = httpx.AsyncHTTPTransport(http2=self.http2, limits=self.limits)
+            self._client = httpx.AsyncClient(
+                transport=InstrumentedTransport(inner, self),
+                timeout=self.timeout,
+                limits=self.limits,
+                http2=self.http2,
+            )
+        return self._client
+
+    def endpoint(self, host: str) -> Endpoint:
+        endpoint = self.endpoints.get(host)
+        if endpoint is None:
+            endpoint = self.endpoints[host] = Endpoint(host, self.config)
+        return endpoint
+
+    def is_open(self, host: str) -> bool:
+        """Je breaker hostu otvorený (požiadavky sa odmietajú)?"""
+        endpoint = self.endpoints.get(host)
+        return endpoint is not None and endpoint.breaker.state == BREAKER_OPEN
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
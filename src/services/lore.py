@@ -0,0 +1,415 @@
+"""
+Lokálny index lore kariet a funkcie (tools) pre OpenAI asistenta.
+
+Namiesto pribaľovania kontextu do každého promptu si asistent fakty vyžiada
+sám volaním funkcií, ktoré bežia lokálne nad YAML kartami v lore/:
+- lookup_card(id) - celá karta podľa id, názvu alebo aliasu,
+- search_lore(query, spoiler_level) - najrelevantnejšie karty k otázke,
+- quest_choices(quest) - voľby, kľúčové momenty a následky questu.
+
+Úroveň spoilerov karty sa odvodí z cesty (akt hlavného príbehu), prípadne
+z poľa spoiler_level v karte; lore.max_spoiler_level je strop, ktorý model
+nemôže prekročiť.
+"""
+
+import json
+import logging
+import math
+import re
+import unicodedata
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import yaml
+
+from ..config.config import LoreConfig
+
+logger = logging.getLogger(__name__)
+
+# libyaml je rádovo rýchlejší pri načítaní stoviek kariet
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# 0 = bez spoilerov (svet, systémy, postavy), 1 = začiatok hry, 2 = stred, 3 = finále a konce
+SPOILER_NONE = 0
+SPOILER_MAX = 3
+ACT_SPOILER_LEVELS = {
+    "prologue": 1,
+    "act1": 1,
+    "interlude": 2,
+    "act2": 2,
+    "act3": 3,
+    "epilogue": 3,
+}
+
+# Prvých 5 znakov bez diakritiky - hrubé zjednotenie skloňovania (Panam/Panamou)
+STEM_LENGTH = 5
+TITLE_WEIGHT = 3.0
+MAX_CHOICES = 12
+# Kľúče karty, ktoré nie sú obsah (nevyhľadáva sa v nich a modelu sa neposielajú)
+META_KEYS = {"type", "id", "title", "name", "aliases", "category", "lang", "technical_metadata"}
+CHOICE_PATTERN = re.compile(r"voľb|volb|rozhod|choice|možnos|vetv|koniec|konce", re.IGNORECASE)
+
+TOOL_DEFINITIONS: List[Dict[str, Any]] = [
+    {
+        "type": "function",
+        "function": {
+            "name": "lookup_card",
+            "description": "Vráti lore kartu (postava, quest, lokácia, frakcia...) podľa id, názvu alebo aliasu.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "string", "description": "Id karty, názov alebo alias"},
+                },
+                "required": ["id"],
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "search_lore",
+            "description": (
+                "Vyhľadá v lore Cyberpunku 2077 karty relevantné k otázke. "
+                "Vráti id, názov a zhrnutie; detaily cez lookup_card."
+            ),
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {"type": "string", "description": "Čo hľadať (mená, miesta, témy)"},
+                    "spoiler_level": {
+                        "type": "integer",
+                        "description": "Najvyššia úroveň spoilerov: 0 žiadne, 1 začiatok, 2 stred, 3 finále",
+                        "minimum": 0,
+                        "maximum": SPOILER_MAX,
+                    },
+                },
+                "required": ["query"],
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "quest_choices",
+            "description": "Voľby, kľúčové momenty a následky questu (podľa id alebo názvu).",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "quest": {"type": "string", "description": "Id alebo názov questu"},
+                },
+                "required": ["quest"],
+            },
+        },
+    },
+]
+
+
+def _normalize(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def _stems(text: str) -> List[str]:
+    return [word[:STEM_LENGTH] for word in re.findall(r"\w{2,}", _normalize(text))]
+
+
+def _text_argument(name: str, value: Any) -> str:
+    """Textový argument od modelu (čísla sa prevedú, ostatné typy sú chyba)."""
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise ValueError(f"argument {name} musí byť text")
+    text = str(value).strip()
+    if not text:
+        raise ValueError(f"argument {name} je prázdny")
+    return text
+
+
+def _strings(value: Any) -> Iterator[str]:
+    """Všetky textové hodnoty karty (rekurzívne)."""
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _strings(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _strings(item)
+    elif value is not None:
+        yield str(value)
+
+
+def _find_values(value: Any, predicate: Callable[[str], bool]) -> Iterator[Tuple[str, Any]]:
+    """Dvojice (kľúč, hodnota) pre kľúče spĺňajúce predicate (rekurzívne)."""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if predicate(str(key)):
+                yield str(key), item
+            else:
+                yield from _find_values(item, predicate)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _find_values(item, predicate)
+
+
+@dataclass
+class LoreCard:
+    """Jedna karta z lore/ (YAML)."""
+
+    id: str
+    title: str
+    type: str
+    category: str
+    path: str
+    spoiler_level: int
+    aliases: List[str] = field(default_factory=list)
+    data: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def body(self) -> Dict[str, Any]:
+        """Obsah karty bez metadát (časť kariet má polia mimo content)."""
+        return {key: value for key, value in self.data.items() if key not in META_KEYS}
+
+    @property
+    def summary(self) -> str:
+        for _, value in _find_values(self.body, lambda key: key in ("summary", "description")):
+            if isinstance(value, str) and value.strip():
+                return value
+        return next((text for text in _strings(self.body) if text.strip()), "")
+
+
+class LoreIndex:
+    """Karty v pamäti s jednoduchým invertovaným indexom (TF-IDF nad kmeňmi slov)."""
+
+    def __init__(self, cards: List[LoreCard]):
+        self.cards = cards
+        self._by_key: Dict[str, LoreCard] = {}
+        self._postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        for index, card in enumerate(cards):
+            for key in [card.id, card.title, *card.aliases]:
+                self._by_key.setdefault(_normalize(key), card)
+            for stem in _stems(" ".join([card.id.replace("_", " "), card.title, *card.aliases])):
+                self._postings[stem][index] = self._postings[stem].get(index, 0.0) + TITLE_WEIGHT
+            for stem in _stems(" ".join(_strings(card.body))):
+                self._postings[stem][index] = self._postings[stem].get(index, 0.0) + 1.0
+
+    @classmethod
+    def load(cls, root: Path) -> "LoreIndex":
+        """
+        Načíta všetky karty pod root.
+
+        Prázdne a nevalidné súbory sa preskočia; zo súboru s viacerými
+        YAML dokumentmi sa použije prvý.
+        """
+        cards: List[LoreCard] = []
+        skipped = 0
+        for path in sorted(root.rglob("*.yaml")):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    documents = yaml.load_all(f, Loader=_YAML_LOADER)
+                    data = next((doc for doc in documents if isinstance(doc, dict)), None)
+            except (yaml.YAMLError, UnicodeDecodeError) as e:
+                logger.debug(f"Lore karta {path} preskočená: {e}")
+                data = None
+            if not data:
+                skipped += 1
+                continue
+            cards.append(cls._card(root, path, data))
+        logger.info(f"Lore index: {len(cards)} kariet ({skipped} prázdnych/nevalidných preskočených)")
+        return cls(cards)
+
+    @staticmethod
+    def _card(root: Path, path: Path, data: Dict[str, Any]) -> LoreCard:
+        relative = path.relative_to(root)
+        level = data.get("spoiler_level")
+        if not isinstance(level, int):
+            level = SPOILER_NONE
+            if relative.parts[0] == "quests":
+                level = 2  # vedľajšie questy a hlavný príbeh bez aktu
+                for part in relative.parts[1:-1]:
+                    level = ACT_SPOILER_LEVELS.get(part, level)
+                if "tutorial" in relative.parts[1]:
+                    level = SPOILER_NONE
+        aliases = data.get("aliases") or []
+        return LoreCard(
+            id=str(data.get("id") or path.stem),
+            title=str(data.get("title") or data.get("name") or path.stem),
+            type=str(data.get("type") or relative.parts[0]),
+            category=str(data.get("category") or ""),
+            path=str(relative),
+            spoiler_level=level,
+            aliases=[str(alias) for alias in aliases] if isinstance(aliases, list) else [],
+            data=data,
+        )
+
+    def get(self, key: str) -> Optional[LoreCard]:
+        """Karta podľa id, názvu alebo aliasu (bez ohľadu na diakritiku)."""
+        return self._by_key.get(_normalize(key.strip()))
+
+    def search(
+        self,
+        query: str,
+        max_spoiler_level: int = SPOILER_MAX,
+        limit: int = 5,
+        card_type: Optional[str] = None,
+    ) -> List[Tuple[LoreCard, float]]:
+        """
+        Najrelevantnejšie karty k otázke.
+
+        Args:
+            query: Voľný text
+            max_spoiler_level: Karty s vyššou úrovňou spoilerov sa vynechajú
+            limit: Počet výsledkov
+            card_type: Len karty daného typu (napr. "quest")
+
+        Returns:
+            Zoznam (karta, skóre) zoradený od najlepšej
+        """
+        scores: Dict[int, float] = defaultdict(float)
+        for stem in set(_stems(query)):
+            postings = self._postings.get(stem)
+            if not postings:
+                continue
+            idf = math.log(1 + len(self.cards) / len(postings))
+            for index, weight in postings.items():
+                scores[index] += (1 + math.log(weight)) * idf
+        results = []
+        for index, score in sorted(scores.items(), key=lambda item: item[1], reverse=True):
+            card = self.cards[index]
+            if card.spoiler_level > max_spoiler_level:
+                continue
+            if card_type is not None and card.type != card_type:
+                continue
+            results.append((card, score))
+            if len(results) >= limit:
+                break
+        return results
+
+
+class LoreTools:
+    """Vykonávanie funkcií asistenta nad LoreIndex (výstup je JSON text)."""
+
+    definitions = TOOL_DEFINITIONS
+
+    def __init__(self, index: LoreIndex, config: LoreConfig):
+        """
+        Args:
+            index: Načítaný index kariet
+            config: Konfigurácia (sekcia lore)
+        """
+        self.index = index
+        self.config = config
+        self.calls: Dict[str, int] = {definition["function"]["name"]: 0 for definition in TOOL_DEFINITIONS}
+        self.errors = 0
+        self._handlers: Dict[str, Callable[..., Dict[str, Any]]] = {
+            "lookup_card": self.lookup_card,
+            "search_lore": self.search_lore,
+            "quest_choices": self.quest_choices,
+        }
+
+    @classmethod
+    def from_config(cls, config: LoreConfig) -> "LoreTools":
+        return cls(LoreIndex.load(Path(config.path)), config)
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._handlers)
+
+    def call(self, name: str, arguments: str) -> str:
+        """
+        Vykoná volanie funkcie od modelu.
+
+        Chyby (aj argumenty nesprávneho typu) sa vracajú ako {"error": ...},
+        aby model dostal výstup pre každé volanie a run mohol pokračovať.
+
+        Args:
+            name: Názov funkcie
+            arguments: JSON argumenty od modelu
+
+        Returns:
+            JSON výstup pre submit_tool_outputs
+        """
+        handler = self._handlers.get(name)
+        try:
+            if handler is None:
+                raise ValueError(f"neznáma funkcia {name}")
+            kwargs = json.loads(arguments or "{}")
+            if not isinstance(kwargs, dict):
+                raise ValueError("argumenty musia byť JSON objekt")
+            self.calls[name] += 1
+            result = handler(**kwargs)
+        except (TypeError, ValueError) as e:
+            self.errors += 1
+            logger.warning(f"Volanie {name}({arguments}) zlyhalo: {e}")
+            result = {"error": str(e)}
+        except Exception as e:
+            # Výstup musí dostať každé volanie, inak run ostane v requires_action
+            self.errors += 1
+            logger.error(f"Volanie {name}({arguments}) zlyhalo: {e}", exc_info=True)
+            result = {"error": f"interná chyba funkcie {name}"}
+        return json.dumps(result, ensure_ascii=False, default=str)
+
+    def lookup_card(self, id: str) -> Dict[str, Any]:
+        id = _text_argument("id", id)
+        card = self.index.get(id)
+        if card is None:
+            # Model často pošle názov v inom tvare - skúsi sa vyhľadávanie
+            found = self.index.search(id, max_spoiler_level=SPOILER_MAX, limit=1)
+            card = found[0][0] if found else None
+        if card is None:
+            return {"error": f"karta '{id}' neexistuje"}
+        if card.spoiler_level > self.config.max_spoiler_level:
+            return {**self._header(card), "error": "obsah karty je za hranicou spoilerov"}
+        content = yaml.safe_dump(card.body, allow_unicode=True, sort_keys=False, width=1000)
+        return {**self._header(card), "content": content[: self.config.max_card_chars]}
+
+    def search_lore(self, query: str, spoiler_level: Optional[int] = None) -> Dict[str, Any]:
+        query = _text_argument("query", query)
+        level = self.config.max_spoiler_level
+        if spoiler_level is not None:
+            if isinstance(spoiler_level, bool) or not isinstance(spoiler_level, (int, float, str)):
+                raise ValueError("argument spoiler_level musí byť číslo")
+            level = max(SPOILER_NONE, min(int(spoiler_level), level))
+        results = self.index.search(query, max_spoiler_level=level, limit=self.config.search_limit)
+        return {
+            "spoiler_level": level,
+            "results": [
+                {**self._header(card), "summary": card.summary[: self.config.summary_chars]}
+                for card, _ in results
+            ],
+        }
+
+    def quest_choices(self, quest: str) -> Dict[str, Any]:
+        quest = _text_argument("quest", quest)
+        card = self.index.get(quest)
+        if card is None or card.type != "quest":
+            found = self.index.search(quest, max_spoiler_level=SPOILER_MAX, limit=1, card_type="quest")
+            card = found[0][0] if found else None
+        if card is None:
+            return {"error": f"quest '{quest}' neexistuje"}
+        if card.spoiler_level > self.config.max_spoiler_level:
+            return {**self._header(card), "error": "quest je za hranicou spoilerov"}
+        body = card.body
+        moments = [value for _, value in _find_values(body, lambda key: key == "kľúčové_momenty")]
+        consequences = [
+            value
+            for _, value in _find_values(
+                body, lambda key: key in ("následky", "rewards_and_consequences", "consequences")
+            )
+        ]
+        choices = [text for text in _strings(body) if CHOICE_PATTERN.search(text)]
+        return {
+            **self._header(card),
+            "choices": list(dict.fromkeys(choices))[:MAX_CHOICES],
+            "key_moments": moments[0] if len(moments) == 1 else moments,
+            "consequences": consequences,
+        }
+
+    @staticmethod
+    def _header(card: LoreCard) -> Dict[str, Any]:
+        return {
+            "id": card.id,
+            "title": card.title,
+            "type": card.type,
+            "spoiler_level": card.spoiler_level,
+        }
@@ -0,0 +1,143 @@
+"""
+Dvojdĺžkové odpovede asistenta: krátka na vyslovenie, dlhá do chatu/overlay.
+
+Asistent dostane v prompte pokyn vrátiť odpoveď v dvoch častiach
+([HLAS] a [DETAIL]). Cez TTS sa prečíta len krátka verzia - šetrí Azure
+znaky a neblokuje ďalšiu otázku dlhým prehrávaním; podrobná ide do Twitch
+chatu alebo do textového súboru pre OBS overlay. Ak model formát nedodrží,
+krátka verzia sa vytvorí z prvých viet odpovede.
+"""
+
+import asyncio
+import logging
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+SPOKEN_TAG = "[HLAS]"
+DETAIL_TAG = "[DETAIL]"
+_TAGGED = re.compile(r"\[HLAS\]\s*(?P<spoken>.*?)\s*\[DETAIL\]\s*(?P<detail>.*)", re.DOTALL | re.IGNORECASE)
+_TAG = re.compile(r"\[(?:HLAS|DETAIL)\]\s*", re.IGNORECASE)
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+
+# Odhad rýchlosti reči pred prvým meraním (~15 znakov/s pri slovenskom hlase)
+DEFAULT_MS_PER_CHAR = 65.0
+
+
+@dataclass
+class AssistantReply:
+    """Odpoveď asistenta v dvoch dĺžkach."""
+
+    spoken: str
+    detail: str
+    structured: bool = False  # model vrátil [HLAS]/[DETAIL]
+
+    @property
+    def shortened(self) -> bool:
+        return len(self.spoken) < len(self.detail)
+
+
+def split_sentences(text: str) -> List[str]:
+    return [sentence for sentence in _SENTENCE_END.split(text.strip()) if sentence]
+
+
+def shorten(text: str, max_chars: int) -> str:
+    """Celé vety zo začiatku textu do max_chars (prvá veta sa prípadne oreže na slove)."""
+    result = ""
+    for sentence in split_sentences(text):
+        candidate = f"{result} {sentence}".strip()
+        if len(candidate) > max_chars:
+            break
+        result = candidate
+    if result:
+        return result
+    cut = text.rfind(" ", 0, max_chars)
+    return text[: cut if cut > 0 else max_chars].rstrip(" ,;:-") + "…"
+
+
+def parse_reply(text: str, max_spoken_chars: int) -> AssistantReply:
+    """
+    Rozdelí odpoveď asistenta na krátku a podrobnú verziu.
+
+    Args:
+        text: Surová odpoveď asistenta
+        max_spoken_chars: Strop dĺžky vyslovenej verzie
+
+    Returns:
+        AssistantReply (bez značiek [HLAS]/[DETAIL])
+    """
+    match = _TAGGED.search(text)
+    if match and match.group("spoken"):
+        spoken = match.group("spoken").strip()
+        detail = match.group("detail").strip() or spoken
+        structured = True
+    else:
+        detail = _TAG.sub("", text).strip()
+        spoken = detail
+        structured = False
+    if len(spoken) > max_spoken_chars:
+        spoken = shorten(spoken, max_spoken_chars)
+    return AssistantReply(spoken=spoken, detail=detail, structured=structured)
+
+
+class ReplyStats:
+    """Úspora TTS znakov a času prehrávania vďaka krátkym odpovediam."""
+
+    def __init__(self):
+        self.replies = 0
+        self.structured = 0
+        self.shortened = 0
+        self.spoken_chars = 0
+        self.detail_chars = 0
+        self.saved_playback_ms = 0.0
+        self.last_saved_chars = 0
+        self.last_saved_ms = 0.0
+
+    @property
+    def char_reduction(self) -> float:
+        """Podiel ušetrených TTS znakov (0.7 = o 70 % menej)."""
+        if not self.detail_chars:
+            return 0.0
+        return 1.0 - self.spoken_chars / self.detail_chars
+
+    def record(self, reply: AssistantReply, ms_per_char: Optional[float] = None):
+        """
+        Započíta vyslovenú odpoveď.
+
+        Args:
+            reply: Odpoveď, ktorej krátka verzia ide do TTS
+            ms_per_char: Nameraná rýchlosť prehrávania (None = odhad)
+        """
+        self.replies += 1
+        self.structured += int(reply.structured)
+        self.shortened += int(reply.shortened)
+        self.spoken_chars += len(reply.spoken)
+        self.detail_chars += len(reply.detail)
+        self.last_saved_chars = max(0, len(reply.detail) - len(reply.spoken))
+        self.last_saved_ms = self.last_saved_chars * (ms_per_char or DEFAULT_MS_PER_CHAR)
+        self.saved_playback_ms += self.last_saved_ms
+
+
+class ReplyOverlay:
+    """Podrobná odpoveď do textového súboru (OBS: Text zdroj "Čítať zo súboru")."""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    async def show(self, text: str):
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, self._write, text)
+        except OSError as e:
+            logger.warning(f"Overlay {self.path} sa nepodarilo zapísať: {e}")
+
+    def _write(self, text: str):
+        # OBS číta súbor priebežne - nesmie vidieť rozpísaný obsah
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, self.path)
@@ -0,0 +1,582 @@
+"""
+Prepis reči (faster-whisper) mimo event loopu.
+
+Model beží vo vlastnom pool-e threadov, takže dlhé dekódovanie neblokuje
+event loop (TTS, chat, barge-in). Na CPU je k dispozícii výkonový režim:
+STT thready sa pinujú mimo jadier vyhradených pre audio callback, počet
+vlákien CTranslate2 sa odvodí od počtu voľných jadier a model sa vyberá
+podľa dĺžky výpovede (krátke vety presnejším, dlhé rýchlejším modelom).
+Viac čakajúcich výpovedí sa dekóduje súbežne (num_workers), pri
+nárazovej záťaži ich TranscriptionBatcher zlúči do jednej dávky
+(BatchedInferencePipeline z faster-whisper >= 1.1).
+"""
+
+import asyncio
+import bisect
+import gc
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..config.config import ModelConfig
+from ..utils.affinity import pin_current_thread, split_cores
+
+logger = logging.getLogger(__name__)
+
+# model_factory(size, device, compute_type, cpu_threads, num_workers) -> WhisperModel
+ModelFactory = Callable[..., Any]
+
+# Batched pipeline delí audio na okná Whisperu, dlhšie výpovede idú samostatne
+MAX_BATCH_UTTERANCE_SEC = 30.0
+
+
+@dataclass
+class Transcription:
+    """Výsledok prepisu jednej výpovede (časy sú perf_counter_ns)."""
+
+    text: str
+    language: str
+    language_probability: float
+    duration_sec: float
+    model: str
+    submitted_ns: int
+    started_ns: int
+    prepared_ns: int  # transcribe() vrátil (VAD, mel, detekcia jazyka)
+    finished_ns: int  # dekódované všetky segmenty
+
+    batch_size: int = 1
+
+    @property
+    def queue_ms(self) -> float:
+        return (self.started_ns - self.submitted_ns) / 1e6
+
+    @property
+    def decode_ms(self) -> float:
+        return (self.finished_ns - self.started_ns) / 1e6
+
+
+def _default_factory(size: str, device: str, compute_type: str, cpu_threads: int, num_workers: int):
+    from faster_whisper import WhisperModel
+
+    return WhisperModel(
+        size,
+        device=device,
+        compute_type=compute_type,
+        cpu_threads=cpu_threads,
+        num_workers=num_workers,
+    )
+
+
+class WhisperSTT:
+    """Whisper prepis vo vlastnom pool-e threadov s CPU výkonovým režimom."""
+
+    def __init__(
+        self,
+        config: ModelConfig,
+        sample_rate: int = 16000,
+        model_factory: Optional[ModelFactory] = None,
+    ):
+        """
+        Args:
+            config: Konfigurácia modelu
+            sample_rate: Vzorkovanie vstupného audia
+            model_factory: Voliteľná továreň modelu (benchmark stuby)
+        """
+        self.config = config
+        self.sample_rate = sample_rate
+        self.model_factory = model_factory or _default_factory
+        self.device = "cpu"
+        self.compute_type = config.cpu_compute_type
+        self.reserved_cores: List[int] = []
+        self.stt_cores: List[int] = []
+        self._pin: List[int] = []
+        self.cpu_threads = config.cpu_threads
+
+        self._models: Dict[str, Any] = {}
+        self._pipelines: Dict[str, Any] = {}
+        self._models_lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.batcher: Optional["TranscriptionBatcher"] = None
+        # Počas nečinnosti sú hlavné modely uvoľnené, prepisuje náhradný model
+        self._offloaded = False
+        self._standby: Optional[Tuple[str, Any]] = None
+
+    @property
+    def performance_mode(self) -> bool:
+        """True ak beží CPU výkonový režim."""
+        return self.device == "cpu" and self.config.cpu_performance_mode
+
+    @property
+    def loaded_models(self) -> List[str]:
+        return list(self._models)
+
+    @property
+    def offloaded(self) -> bool:
+        """True ak sú hlavné modely uvoľnené (nečinnosť)."""
+        return self._offloaded
+
+    @property
+    def standby_model(self) -> Optional[str]:
+        """Náhradný model počas nečinnosti (None = žiadny)."""
+        return self._standby[0] if self._standby else None
+
+    async def load(self):
+        """Vyberie zariadenie a načíta primárny model (v STT threade)."""
+        use_cuda = self.config.cuda_enabled and await asyncio.get_running_loop().run_in_executor(
+            None, self._cuda_available
+        )
+        try:
+            await self._load_on("cuda" if use_cuda else "cpu")
+        except Exception as e:
+            if not use_cuda:
+                raise
+            # Zlyhanie CUDA pri načítaní (ovládač, pamäť) - skús CPU
+            logger.error(f"CUDA zlyhala: {str(e)}")
+            logger.info("Prepínam na CPU")
+            self.close()
+            await self._load_on("cpu")
+
+    async def _load_on(self, device: str):
+        self.device = device
+        self.compute_type = (
+            self.config.cuda_compute_type if device == "cuda" else self.config.cpu_compute_type
+        )
+        self.cpu_threads = self.config.cpu_threads
+        self.reserved_cores, self.stt_cores = [], []
+        self._models.clear()
+
+        if self.performance_mode:
+            self.reserved_cores, self.stt_cores = split_cores(self.config.cpu_reserved_cores)
+            if not self.cpu_threads:
+                workers = max(1, self.config.num_workers)
+                self.cpu_threads = max(1, len(self.stt_cores) // workers)
+            logger.info(
+                f"CPU výkonový režim: STT na jadrách {self.stt_cores}, "
+                f"audio na {self.reserved_cores or 'všetkých'}, "
+                f"{self.cpu_threads} vlákien x {self.config.num_workers} workerov"
+            )
+
+        # Thready CTranslate2 zdedia pinovanie threadu, ktorý model načíta
+        self._pin = self.stt_cores if self.reserved_cores else []
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, self.config.num_workers),
+            thread_name_prefix="stt",
+            initializer=pin_current_thread,
+            initargs=(self._pin,),
+        )
+        loop = asyncio.get_running_loop()
+        for size in self.primary_sizes():
+            await loop.run_in_executor(self._executor, self._get_model, size)
+
+        if self.config.batch_enabled and self.config.batch_max_size > 1:
+            if self._batched_pipeline_class() is not None:
+                self.batcher = TranscriptionBatcher(
+                    self,
+                    window_ms=self.config.batch_window_ms,
+                    max_batch=self.config.batch_max_size,
+                    max_wait_ms=self.config.batch_max_wait_ms,
+                    slots=max(1, self.config.num_workers),
+                )
+                self.batcher.start()
+            else:
+                logger.info("faster-whisper bez BatchedInferencePipeline, výpovede sa dekódujú samostatne")
+
+    def primary_sizes(self) -> List[str]:
+        """Hlavné modely - v CPU režime modely tierov namiesto config.size."""
+        if self.performance_mode and self.config.cpu_models:
+            return list(dict.fromkeys(tier["size"] for tier in self.config.cpu_models))
+        return [self.config.size]
+
+    async def transcribe(self, audio: np.ndarray) -> Transcription:
+        """
+        Prepíše výpoveď v STT threade.
+
+        Args:
+            audio: Mono float32 audio vo vzorkovaní sample_rate
+
+        Returns:
+            Transcription s textom a časmi fáz
+        """
+        if self._executor is None:
+            raise RuntimeError("STT model nie je načítaný")
+        submitted_ns = time.perf_counter_ns()
+        if self.batcher is not None:
+            return await self.batcher.submit(audio, submitted_ns)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, self._transcribe_blocking, audio, submitted_ns
+        )
+
+    async def transcribe_batch(self, items: List[Tuple[np.ndarray, int]]) -> List[Transcription]:
+        """Prepíše dávku výpovedí (audio, submitted_ns) v jednom STT threade."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._transcribe_batch_blocking, items)
+
+    def model_size_for(self, duration_sec: float) -> str:
+        """Veľkosť modelu pre výpoveď danej dĺžky (v CPU režime podľa tierov)."""
+        if not self.performance_mode or not self.config.cpu_models:
+            return self.config.size
+        for tier in self.config.cpu_models:
+            max_sec = tier.get("max_sec")
+            if max_sec is None or duration_sec <= max_sec:
+                return tier["size"]
+        return self.config.cpu_models[-1]["size"]
+
+    async def offload(self, standby: Optional[str] = None):
+        """
+        Uvoľní hlavné modely; voliteľne načíta malý náhradný model na CPU.
+
+        Náhradný model sa načíta skôr, než sa hlavné uvoľnia, takže prepis
+        je stále možný. Rozbehnutý prepis dobehne (model drží jeho thread).
+
+        Args:
+            standby: Veľkosť náhradného modelu (None = bez modelu)
+        """
+        loop = asyncio.get_running_loop()
+        if standby is None:
+            self._standby = None
+        elif self.standby_model != standby:
+            model = await loop.run_in_executor(self._executor, self._create_standby, standby)
+            self._standby = (standby, model)
+        with self._models_lock:
+            self._offloaded = True
+            self._models.clear()
+            self._pipelines.clear()
+        await loop.run_in_executor(None, gc.collect)
+
+    async def restore(self):
+        """
+        Znovu načíta hlavné modely (na pôvodnom zariadení) a uvoľní náhradný.
+
+        Načítava sa vo vlastnom (rovnako pinovanom) threade, aby STT pool
+        mohol medzitým prepisovať náhradným modelom.
+        """
+        loop = asyncio.get_running_loop()
+        loader = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="stt-load",
+            initializer=pin_current_thread,
+            initargs=(self._pin,),
+        )
+        try:
+            for size in self.primary_sizes():
+                await loop.run_in_executor(loader, self._get_model, size)
+        finally:
+            loader.shutdown(wait=False)
+        with self._models_lock:
+            self._offloaded = False
+            self._standby = None
+        await loop.run_in_executor(None, gc.collect)
+
+    def close(self):
+        if self.batcher:
+            self.batcher.stop()
+            self.batcher = None
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _transcribe_blocking(self, audio: np.ndarray, submitted_ns: int) -> Transcription:
+        started_ns = time.perf_counter_ns()
+        duration = len(audio) / self.sample_rate
+        size, model = self._model_for(duration)
+
+        # transcribe() spustí VAD, mel a detekciu jazyka,
+        # dekódovanie segmentov prebieha až pri iterácii
+        segments, info = model.transcribe(
+            audio=audio,
+            language=self.config.language,
+            beam_size=self.config.beam_size,
+            best_of=self.config.best_of,
+            temperature=self.config.temperature,
+            vad_filter=self.config.vad_filter,
+            no_speech_threshold=self.config.no_speech_threshold,
+        )
+        prepared_ns = time.perf_counter_ns()
+        text = " ".join(segment.text.strip() for segment in segments)
+        return Transcription(
+            text=text,
+            language=info.language,
+            language_probability=info.language_probability,
+            duration_sec=duration,
+            model=size,
+            submitted_ns=submitted_ns,
+            started_ns=started_ns,
+            prepared_ns=prepared_ns,
+            finished_ns=time.perf_counter_ns(),
+        )
+
+    def _transcribe_batch_blocking(
+        self, items: List[Tuple[np.ndarray, int]]
+    ) -> List[Transcription]:
+        """
+        Dekóduje viac výpovedí naraz cez BatchedInferencePipeline.
+
+        Výpovede sa spoja za seba a každá je samostatný clip (clip_timestamps
+        v samploch spojeného audia), segmenty (časy v sekundách) sa potom
+        priradia späť podľa času. VAD sa v dávke nepoužíva,
+        hranice clipov sú hranice výpovedí.
+        """
+        if len(items) == 1 or self._standby_active():
+            return [self._transcribe_blocking(*item) for item in items]
+
+        started_ns = time.perf_counter_ns()
+        durations = [len(audio) / self.sample_rate for audio, _ in items]
+        size = self.model_size_for(max(durations))
+        pipeline = self._get_pipeline(size)
+
+        starts: List[float] = []
+        clips = []
+        position = 0.0
+        for duration in durations:
+            starts.append(position)
+            clips.append(
+                {
+                    "start": int(position * self.sample_rate),
+                    "end": int((position + duration) * self.sample_rate),
+                }
+            )
+            position += duration
+
+        segments, info = pipeline.transcribe(
+            np.concatenate([audio for audio, _ in items]),
+            language=self.config.language,
+            beam_size=self.config.beam_size,
+            best_of=self.config.best_of,
+            temperature=self.config.temperature,
+            no_speech_threshold=self.config.no_speech_threshold,
+            vad_filter=False,
+            clip_timestamps=clips,
+            batch_size=len(items),
+        )
+        prepared_ns = time.perf_counter_ns()
+
+        texts: List[List[str]] = [[] for _ in items]
+        for segment in segments:
+            middle = (segment.start + segment.end) / 2
+            index = max(0, bisect.bisect_right(starts, middle) - 1)
+            texts[index].append(segment.text.strip())
+        finished_ns = time.perf_counter_ns()
+
+        return [
+            Transcription(
+                text=" ".join(parts),
+                language=info.language,
+                language_probability=info.language_probability,
+                duration_sec=duration,
+                model=size,
+                submitted_ns=submitted_ns,
+                started_ns=started_ns,
+                prepared_ns=prepared_ns,
+                finished_ns=finished_ns,
+                batch_size=len(items),
+            )
+            for parts, duration, (_, submitted_ns) in zip(texts, durations, items)
+        ]
+
+    def _get_pipeline(self, size: str):
+        pipeline = self._pipelines.get(size)
+        if pipeline is None:
+            pipeline = self._pipelines[size] = self._batched_pipeline_class()(
+                model=self._get_model(size)
+            )
+        return pipeline
+
+    @staticmethod
+    def _batched_pipeline_class():
+        try:
+            from faster_whisper import BatchedInferencePipeline
+        except ImportError:
+            return None
+        return BatchedInferencePipeline
+
+    def _standby_active(self) -> bool:
+        return self._offloaded and self._standby is not None
+
+    def _model_for(self, duration_sec: float) -> Tuple[str, Any]:
+        """Model pre výpoveď - počas nečinnosti náhradný, inak podľa tierov."""
+        standby = self._standby
+        if self._offloaded and standby is not None:
+            return standby
+        size = self.model_size_for(duration_sec)
+        return size, self._get_model(size)
+
+    def _create_standby(self, size: str):
+        logger.info(f"Načítavam náhradný Whisper model {size} (cpu, {self.config.idle_compute_type})")
+        return self.model_factory(
+            size,
+            device="cpu",
+            compute_type=self.config.idle_compute_type,
+            cpu_threads=self.cpu_threads if self.device == "cpu" else 0,
+            num_workers=1,
+        )
+
+    def _get_model(self, size: str):
+        """Vráti (a pri prvom použití načíta) model danej veľkosti."""
+        model = self._models.get(size)
+        if model is not None:
+            return model
+        with self._models_lock:
+            if size not in self._models:
+                logger.info(f"Načítavam Whisper model {size} ({self.device}, {self.compute_type})")
+                self._models[size] = self.model_factory(
+                    size,
+                    device=self.device,
+                    compute_type=self.compute_type,
+                    cpu_threads=self.cpu_threads if self.device == "cpu" else 0,
+                    num_workers=self.config.num_workers,
+                )
+            return self._models[size]
+
+    @staticmethod
+    def _cuda_available() -> bool:
+        """CUDA cez CTranslate2 (závislosť faster-whisper), bez importu torch."""
+        try:
+            import ctranslate2
+
+            if ctranslate2.get_cuda_device_count() < 1:
+                raise RuntimeError("CUDA nie je dostupná")
+            return True
+        except Exception as e:
+            logger.error(f"CUDA zlyhala: {str(e)}")
+            logger.info("Prepínam na CPU")
+            return False
+
+
+@dataclass
+class _PendingUtterance:
+    audio: np.ndarray
+    submitted_ns: int
+    future: asyncio.Future
+
+
+class TranscriptionBatcher:
+    """
+    Zlučuje čakajúce výpovede do dávok pre batched dekódovanie.
+
+    Dávka sa zbiera, kým je voľný STT worker: výpovede, ktoré prišli počas
+    dekódovania predchádzajúcej dávky, idú spolu. Voliteľne sa po prvej
+    výpovedi čaká ešte window_ms na ďalšie, najviac však max_wait_ms od
+    jej odoslania (strop latencie pridanej dávkovaním).
+
+    Výpovede, ktorých turn bol medzitým zrušený (barge-in pri rýchlom
+    opakovaní PTT), sa zahodia pri zbere aj tesne pred dekódovaním.
+    """
+
+    def __init__(
+        self,
+        stt: WhisperSTT,
+        window_ms: float = 0.0,
+        max_batch: int = 8,
+        max_wait_ms: float = 200.0,
+        slots: int = 1,
+    ):
+        """
+        Args:
+            stt: STT služba, ktorá dávky dekóduje
+            window_ms: Ako dlho po poslednej výpovedi čakať na ďalšiu
+            max_batch: Maximálna veľkosť dávky
+            max_wait_ms: Maximálne čakanie najstaršej výpovede na dávku
+            slots: Počet súbežne dekódovaných dávok (num_workers)
+        """
+        self.stt = stt
+        self.window_ms = window_ms
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self._queue: "asyncio.Queue[_PendingUtterance]" = asyncio.Queue()
+        self._slots = asyncio.Semaphore(slots)
+        self._task: Optional[asyncio.Task] = None
+        self._held: Optional[_PendingUtterance] = None
+        self.batches = 0
+        self.batched_utterances = 0
+        self.dropped_cancelled = 0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def submit(self, audio: np.ndarray, submitted_ns: int) -> Transcription:
+        """Zaradí výpoveď do najbližšej dávky a počká na jej prepis."""
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(_PendingUtterance(audio, submitted_ns, future))
+        return await future
+
+    async def _run(self):
+        while True:
+            await self._slots.acquire()
+            try:
+                batch = await self._collect()
+            except asyncio.CancelledError:
+                self._slots.release()
+                raise
+            asyncio.get_running_loop().create_task(self._dispatch(batch))
+
+    async def _collect(self) -> List[_PendingUtterance]:
+        first, self._held = self._held, None
+        while first is None or self._cancelled(first):
+            first = await self._queue.get()
+        batch = [first]
+        if self._batchable(first):
+            deadline = first.submitted_ns + int(self.max_wait_ms * 1e6)
+            while len(batch) < self.max_batch:
+                timeout = min(self.window_ms * 1e6, deadline - time.perf_counter_ns()) / 1e9
+                try:
+                    if timeout <= 0:
+                        item = self._queue.get_nowait()
+                    else:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                    break
+                if self._cancelled(item):
+                    continue
+                if not self._batchable(item):
+                    # Dlhá výpoveď ide samostatne hneď za touto dávkou
+                    self._held = item
+                    break
+                batch.append(item)
+        return batch
+
+    def _batchable(self, item: _PendingUtterance) -> bool:
+        return len(item.audio) / self.stt.sample_rate <= MAX_BATCH_UTTERANCE_SEC
+
+    def _cancelled(self, item: _PendingUtterance) -> bool:
+        """Čakajúci turn bol zrušený - future je už hotová, prepis netreba."""
+        if item.future.done():
+            self.dropped_cancelled += 1
+            return True
+        return False
+
+    async def _dispatch(self, batch: List[_PendingUtterance]):
+        # Počas čakania na dávku (window_ms) mohli byť turny zrušené
+        batch = [item for item in batch if not self._cancelled(item)]
+        if not batch:
+            self._slots.release()
+            return
+        try:
+            results = await self.stt.transcribe_batch(
+                [(item.audio, item.submitted_ns) for item in batch]
+            )
+        except Exception as e:
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(e)
+        else:
+            if len(batch) > 1:
+                self.batches += 1
+                self.batched_utterances += len(batch)
+                logger.info(f"STT dávka: {len(batch)} výpovedí")
+            for item, result in zip(batch, results):
+                if not item.future.done():
+                    item.future.set_result(result)
+        finally:
+            self._slots.release()
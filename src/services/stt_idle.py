@@ -0,0 +1,283 @@
+"""
+Uvoľnenie Whisper modelu počas nečinnosti.
+
+Pri dlhom hraní bez PTT zaberá veľký model (large-v2) niekoľko GB RAM/VRAM.
+IdleModelManager obalí WhisperSTT s rovnakým rozhraním: po nečinnosti model
+uvoľní alebo nahradí malým CPU modelom (demote), pri stlačení PTT začne
+veľký model načítavať súbežne s nahrávaním a drží pamäť procesu pod
+system.memory_limit_mb (RAM procesu + odhad VRAM modelu na GPU).
+"""
+
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from ..config.config import ModelConfig
+from ..utils.metrics_server import process_rss_mb
+from ..utils.telemetry import telemetry
+from .stt import Transcription, WhisperSTT
+
+logger = logging.getLogger(__name__)
+
+# Približná veľkosť váh modelov faster-whisper vo float16 (MB)
+MODEL_SIZE_MB = {
+    "tiny": 75,
+    "base": 145,
+    "small": 465,
+    "medium": 1460,
+    "large-v1": 2950,
+    "large-v2": 2950,
+    "large-v3": 2950,
+    "large": 2950,
+    "large-v3-turbo": 1550,
+    "turbo": 1550,
+    "distil-small": 320,
+    "distil-medium": 750,
+    "distil-large-v2": 1450,
+    "distil-large-v3": 1450,
+}
+
+# Násobok veľkosti podľa kvantizácie CTranslate2
+COMPUTE_TYPE_SCALE = {
+    "int8": 0.5,
+    "int8_float16": 0.5,
+    "int8_bfloat16": 0.5,
+    "int8_float32": 0.5,
+    "float16": 1.0,
+    "bfloat16": 1.0,
+    "float32": 2.0,
+}
+
+CHECK_INTERVAL_SEC = 5.0
+# Nad limitom pamäte sa model uvoľní až po krátkej nečinnosti (nie medzi turnmi)
+LIMIT_GRACE_SEC = 30.0
+
+
+def estimate_model_mb(size: str, compute_type: str) -> Optional[float]:
+    """Odhad pamäte modelu v MB (None pre neznámy model)."""
+    base = MODEL_SIZE_MB.get(size[:-3] if size.endswith(".en") else size)
+    if base is None:
+        return None
+    return base * COMPUTE_TYPE_SCALE.get(compute_type, 1.0)
+
+
+class IdleModelManager:
+    """WhisperSTT s uvoľnením modelu pri nečinnosti a limitom pamäte."""
+
+    def __init__(
+        self,
+        stt: WhisperSTT,
+        config: ModelConfig,
+        memory_limit_mb: int = 0,
+        memory_source: Callable[[], Optional[float]] = process_rss_mb,
+    ):
+        """
+        Args:
+            stt: Lokálny Whisper (načíta sa v load)
+            config: Konfigurácia modelu (sekcia model.idle)
+            memory_limit_mb: Strop RAM procesu + VRAM modelu (0 = bez limitu)
+            memory_source: Zdroj RSS procesu v MB (testy)
+        """
+        self.stt = stt
+        self.config = config
+        self.memory_limit_mb = memory_limit_mb
+        self.memory_source = memory_source
+        self.idle_timeout_sec = config.idle_timeout_sec if config.idle_enabled else None
+        self._last_activity = time.monotonic()
+        self._busy = 0
+        self._monitor: Optional[asyncio.Task] = None
+        self._offloading: Optional[asyncio.Task] = None
+        self._restoring: Optional[asyncio.Task] = None
+        self._denied_at = float("-inf")
+        # Počítadlá a posledné časy pre metriky
+        self.offloads: Dict[str, int] = {"idle": 0, "memory": 0}
+        self.reloads: Dict[str, int] = {"ok": 0, "denied": 0, "error": 0}
+        self.standby_transcriptions = 0
+        self.last_reload_ms = 0.0
+        self.last_wait_ms = 0.0
+
+    @property
+    def sample_rate(self) -> int:
+        return self.stt.sample_rate
+
+    @property
+    def device(self) -> str:
+        return self.stt.device
+
+    @property
+    def compute_type(self) -> str:
+        return self.stt.compute_type
+
+    @property
+    def reserved_cores(self) -> List[int]:
+        return self.stt.reserved_cores
+
+    @property
+    def batcher(self):
+        return self.stt.batcher
+
+    @property
+    def loaded_models(self) -> List[str]:
+        if self.stt.offloaded:
+            return [self.stt.standby_model] if self.stt.standby_model else []
+        return self.stt.loaded_models
+
+    @property
+    def state(self) -> str:
+        """loaded | restoring | offloaded"""
+        if not self.stt.offloaded:
+            return "loaded"
+        if self._restoring is not None and not self._restoring.done():
+            return "restoring"
+        return "offloaded"
+
+    async def load(self):
+        await self.stt.load()
+        footprint = self.primary_footprint_mb()
+        if self.memory_limit_mb and footprint > self.memory_limit_mb:
+            logger.warning(
+                f"Whisper {', '.join(self.stt.primary_sizes())} (~{footprint:.0f} MB) "
+                f"presahuje limit pamäte {self.memory_limit_mb} MB"
+            )
+        self._monitor = asyncio.ensure_future(self._watch())
+
+    def wake(self):
+        """PTT stlačené - veľký model sa načítava súbežne s nahrávaním (event loop)."""
+        self._last_activity = time.monotonic()
+        if self._offloading is not None and not self._offloading.done():
+            return  # _ready počká na dokončenie uvoľnenia
+        if time.monotonic() - self._denied_at < LIMIT_GRACE_SEC:
+            return  # limit pamäte - ďalší pokus až po chvíli
+        if self.stt.offloaded and (self._restoring is None or self._restoring.done()):
+            self._restoring = asyncio.ensure_future(self._restore())
+
+    async def transcribe(self, audio: np.ndarray) -> Transcription:
+        self._busy += 1
+        try:
+            await self._ready()
+            if self.stt.offloaded:
+                self.standby_transcriptions += 1
+            return await self.stt.transcribe(audio)
+        finally:
+            self._busy -= 1
+            self._last_activity = time.monotonic()
+
+    def close(self):
+        for task in (self._monitor, self._offloading, self._restoring):
+            if task is not None:
+                task.cancel()
+        self.stt.close()
+
+    def primary_footprint_mb(self) -> float:
+        """Odhad pamäte hlavných modelov."""
+        sizes = self.stt.primary_sizes()
+        estimates = [estimate_model_mb(size, self.stt.compute_type) for size in sizes]
+        return sum(mb for mb in estimates if mb is not None)
+
+    def model_memory_mb(self) -> float:
+        """Odhad pamäte práve načítaných modelov."""
+        if not self.stt.offloaded:
+            return self.primary_footprint_mb()
+        standby = self.stt.standby_model
+        return (estimate_model_mb(standby, self.config.idle_compute_type) or 0.0) if standby else 0.0
+
+    def memory_mb(self) -> Optional[float]:
+        """RAM procesu + odhad VRAM modelov na GPU (tie v RSS nie sú)."""
+        rss = self.memory_source()
+        if rss is None:
+            return None
+        if self.stt.device == "cuda" and not self.stt.offloaded:
+            rss += self.primary_footprint_mb()
+        return rss
+
+    async def _ready(self):
+        """Počká na rozbehnuté uvoľnenie/načítanie pred prepisom."""
+        if self._offloading is not None and not self._offloading.done():
+            await asyncio.wait({self._offloading})
+        self.wake()
+        task = self._restoring
+        if task is None or task.done():
+            return
+        start = time.perf_counter()
+        # S náhradným modelom sa na veľký čaká len obmedzene
+        timeout = self.config.idle_reload_wait_sec if self.stt.standby_model else None
+        await asyncio.wait({task}, timeout=timeout)
+        self.last_wait_ms = (time.perf_counter() - start) * 1000
+        telemetry.record("stt_reload_wait", self.last_wait_ms)
+        if not task.done():
+            logger.info(
+                f"Whisper model sa ešte načítava, prepisujem náhradným {self.stt.standby_model}"
+            )
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(CHECK_INTERVAL_SEC)
+            try:
+                await self._check()
+            except Exception as e:
+                logger.error(f"Chyba pri uvoľňovaní Whisper modelu: {e}")
+
+    async def _check(self):
+        if self.stt.offloaded or self._busy or self.state == "restoring":
+            return
+        idle_sec = time.monotonic() - self._last_activity
+        if self.idle_timeout_sec is not None and idle_sec >= self.idle_timeout_sec:
+            await self._offload("idle")
+        elif self.memory_limit_mb and idle_sec >= LIMIT_GRACE_SEC:
+            used = self.memory_mb()
+            if used is not None and used > self.memory_limit_mb:
+                logger.warning(f"Pamäť {used:.0f} MB nad limitom {self.memory_limit_mb} MB")
+                await self._offload("memory")
+
+    async def _offload(self, reason: str):
+        standby = self.config.idle_model if self.config.idle_action == "demote" else None
+        before = self.memory_mb()
+        self._offloading = asyncio.ensure_future(self.stt.offload(standby))
+        await self._offloading
+        self.offloads[reason] += 1
+        after = self.memory_mb()
+        memory = f", pamäť {before:.0f} -> {after:.0f} MB" if before is not None and after is not None else ""
+        logger.info(
+            f"Whisper model uvoľnený ({'nečinnosť' if reason == 'idle' else 'limit pamäte'}, "
+            f"náhradný: {standby or 'žiadny'}{memory})"
+        )
+
+    def _fits(self, extra_mb: float) -> bool:
+        if not self.memory_limit_mb:
+            return True
+        used = self.memory_source()
+        return used is None or used + extra_mb <= self.memory_limit_mb
+
+    async def _restore(self):
+        # Náhradný model sa po načítaní uvoľní
+        if not self._fits(self.primary_footprint_mb() - self.model_memory_mb()):
+            self.reloads["denied"] += 1
+            self._denied_at = time.monotonic()
+            logger.warning(
+                f"Whisper model sa nenačíta - prekročil by limit pamäte {self.memory_limit_mb} MB"
+            )
+            await self._ensure_standby()
+            return
+        start = time.perf_counter()
+        try:
+            await self.stt.restore()
+        except Exception as e:
+            self.reloads["error"] += 1
+            logger.error(f"Opätovné načítanie Whisper modelu zlyhalo: {e}")
+            await self._ensure_standby()
+            return
+        self.reloads["ok"] += 1
+        self.last_reload_ms = (time.perf_counter() - start) * 1000
+        telemetry.record("stt_reload", self.last_reload_ms)
+        logger.info(
+            f"Whisper model načítaný po nečinnosti za {self.last_reload_ms:.0f} ms "
+            f"({', '.join(self.stt.loaded_models)})"
+        )
+
+    async def _ensure_standby(self):
+        """Bez veľkého modelu treba aspoň náhradný (aj pri action=unload)."""
+        if self.stt.standby_model is None:
+            await self.stt.offload(self.config.idle_model)
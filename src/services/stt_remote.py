@@ -0,0 +1,460 @@
+"""
+Vzdialený prepis reči - protokol a klient pre STT server na inom stroji.
+
+Whisper (napr. large-v2) tak nesúperí s hrou o CPU/GPU. Klient má
+rovnaké rozhranie ako WhisperSTT, počas držania PTT posiela audio na
+server priebežne (po pustení ostáva poslať len koniec) a pri výpadku
+alebo timeoute prepíše výpoveď lokálnym modelom.
+
+Rámec protokolu (TCP, big-endian):
+
+    typ (u8) | dĺžka payloadu (u32) | payload
+
+HELLO/READY a RESULT nesú JSON, AUDIO nesie PCM int16 (little-endian)
+alebo Opus pakety s 2-bajtovou dĺžkou. Jedno spojenie prenáša výpovede
+postupne (START, AUDIO..., END -> RESULT); spojenia sa držia v pool-e.
+"""
+
+import asyncio
+import json
+import logging
+import socket
+import struct
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..config.config import RemoteSTTConfig
+from .stt import Transcription, WhisperSTT
+
+logger = logging.getLogger(__name__)
+
+PROTOCOL_VERSION = 1
+
+HELLO = 1
+READY = 2
+START = 3
+AUDIO = 4
+END = 5
+RESULT = 6
+CANCEL = 7
+PING = 8
+PONG = 9
+ERROR = 10
+
+FRAME_HEADER = struct.Struct("!BI")
+MAX_FRAME_BYTES = 16 * 1024 * 1024
+
+
+class ProtocolError(Exception):
+    """Neočakávaný alebo chybný rámec (aj ERROR zo servera)."""
+
+
+def encode_frame(kind: int, payload: bytes = b"") -> bytes:
+    return FRAME_HEADER.pack(kind, len(payload)) + payload
+
+
+def encode_json(kind: int, data: Dict[str, Any]) -> bytes:
+    return encode_frame(kind, json.dumps(data, ensure_ascii=False).encode("utf-8"))
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Tuple[int, bytes]:
+    """
+    Prečíta jeden rámec.
+
+    Raises:
+        asyncio.IncompleteReadError: Spojenie sa zavrelo
+        ProtocolError: Príliš veľký rámec
+    """
+    header = await reader.readexactly(FRAME_HEADER.size)
+    kind, length = FRAME_HEADER.unpack(header)
+    if length > MAX_FRAME_BYTES:
+        raise ProtocolError(f"Rámec {kind} má {length} B (limit {MAX_FRAME_BYTES})")
+    payload = await reader.readexactly(length) if length else b""
+    return kind, payload
+
+
+class Pcm16Encoder:
+    """float32 -> PCM int16 little-endian."""
+
+    def encode(self, block: np.ndarray) -> bytes:
+        return (np.clip(block, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+    def flush(self) -> bytes:
+        return b""
+
+
+class Pcm16Decoder:
+    def decode(self, payload: bytes) -> np.ndarray:
+        return np.frombuffer(payload, dtype="<i2").astype(np.float32) / 32767
+
+
+class OpusEncoder:
+    """float32 -> Opus pakety (20 ms) s 2-bajtovou dĺžkou pred každým."""
+
+    def __init__(self, sample_rate: int):
+        import opuslib
+
+        self.frame = sample_rate // 50
+        self._encoder = opuslib.Encoder(sample_rate, 1, opuslib.APPLICATION_VOIP)
+        self._pending = np.zeros(0, dtype=np.float32)
+
+    def encode(self, block: np.ndarray) -> bytes:
+        pending = np.concatenate((self._pending, block))
+        count = len(pending) // self.frame
+        self._pending = pending[count * self.frame:]
+        return b"".join(self._packet(pending[i * self.frame:(i + 1) * self.frame]) for i in range(count))
+
+    def flush(self) -> bytes:
+        """Posledný neúplný rámec doplnený tichom (server oreže podľa počtu vzoriek)."""
+        if not len(self._pending):
+            return b""
+        frame = np.zeros(self.frame, dtype=np.float32)
+        frame[: len(self._pending)] = self._pending
+        self._pending = np.zeros(0, dtype=np.float32)
+        return self._packet(frame)
+
+    def _packet(self, frame: np.ndarray) -> bytes:
+        pcm = (np.clip(frame, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+        packet = self._encoder.encode(pcm, self.frame)
+        return struct.pack("!H", len(packet)) + packet
+
+
+class OpusDecoder:
+    def __init__(self, sample_rate: int):
+        import opuslib
+
+        self.frame = sample_rate // 50
+        self._decoder = opuslib.Decoder(sample_rate, 1)
+
+    def decode(self, payload: bytes) -> np.ndarray:
+        frames = []
+        offset = 0
+        while offset < len(payload):
+            (length,) = struct.unpack_from("!H", payload, offset)
+            offset += 2
+            pcm = self._decoder.decode(payload[offset:offset + length], self.frame)
+            offset += length
+            frames.append(np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32767)
+        return np.concatenate(frames) if frames else np.zeros(0, dtype=np.float32)
+
+
+def create_encoder(codec: str, sample_rate: int):
+    """
+    Raises:
+        ValueError: Neznámy kodek
+        ImportError: Opus bez nainštalovaného opuslib
+    """
+    if codec == "pcm16":
+        return Pcm16Encoder()
+    if codec == "opus":
+        return OpusEncoder(sample_rate)
+    raise ValueError(f"Neznámy kodek: {codec}")
+
+
+def create_decoder(codec: str, sample_rate: int):
+    if codec == "pcm16":
+        return Pcm16Decoder()
+    if codec == "opus":
+        return OpusDecoder(sample_rate)
+    raise ValueError(f"Neznámy kodek: {codec}")
+
+
+def codec_available(codec: str) -> bool:
+    try:
+        create_encoder(codec, 16000)
+        return True
+    except Exception:
+        return False
+
+
+class _Connection:
+    """Jedno spojenie so serverom po handshaku."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, info: Dict[str, Any]):
+        self.reader = reader
+        self.writer = writer
+        self.info = info
+
+    @property
+    def usable(self) -> bool:
+        return not self.writer.is_closing() and not self.reader.at_eof()
+
+    async def send(self, frame: bytes):
+        self.writer.write(frame)
+        await self.writer.drain()
+
+    async def expect(self, kind: int) -> bytes:
+        got, payload = await read_frame(self.reader)
+        if got == ERROR:
+            raise ProtocolError(payload.decode("utf-8", "replace"))
+        if got != kind:
+            raise ProtocolError(f"Očakávaný rámec {kind}, prišiel {got}")
+        return payload
+
+    def close(self):
+        if not self.writer.is_closing():
+            self.writer.close()
+
+
+class ConnectionPool:
+    """Pool spojení so serverom (handshake len pri otvorení spojenia)."""
+
+    def __init__(self, config: RemoteSTTConfig, codec: str, sample_rate: int):
+        self.config = config
+        self.codec = codec
+        self.sample_rate = sample_rate
+        self._idle: List[_Connection] = []
+        self.opened = 0
+
+    async def acquire(self) -> _Connection:
+        while self._idle:
+            connection = self._idle.pop()
+            if connection.usable:
+                return connection
+            connection.close()
+        return await asyncio.wait_for(self._connect(), self.config.connect_timeout_sec)
+
+    def release(self, connection: _Connection):
+        if connection.usable and len(self._idle) < self.config.pool_size:
+            self._idle.append(connection)
+        else:
+            connection.close()
+
+    async def warm(self) -> Dict[str, Any]:
+        """Otvorí spojenia do veľkosti pool-u, vráti informácie o serveri."""
+        connections = [await self.acquire() for _ in range(max(1, self.config.pool_size))]
+        info = connections[0].info
+        for connection in connections:
+            self.release(connection)
+        return info
+
+    def close(self):
+        for connection in self._idle:
+            connection.close()
+        self._idle.clear()
+
+    async def _connect(self) -> _Connection:
+        reader, writer = await asyncio.open_connection(self.config.host, self.config.port)
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            # Malé AUDIO rámce počas nahrávania nemajú čakať na Nagle
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        writer.write(
+            encode_json(
+                HELLO,
+                {
+                    "version": PROTOCOL_VERSION,
+                    "token": self.config.token,
+                    "codec": self.codec,
+                    "sample_rate": self.sample_rate,
+                },
+            )
+        )
+        await writer.drain()
+        connection = _Connection(reader, writer, {})
+        try:
+            connection.info = json.loads(await connection.expect(READY))
+        except Exception:
+            connection.close()
+            raise
+        self.opened += 1
+        return connection
+
+
+class _RemoteUtterance:
+    """Jedna výpoveď posielaná na server (priebežne počas PTT)."""
+
+    def __init__(self, client: "RemoteSTT"):
+        self.client = client
+        self.queued = 0
+        self.connection: Optional[_Connection] = None
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._send())
+
+    def feed(self, block: np.ndarray):
+        """Zaradí blok na odoslanie (v event loope)."""
+        self.queued += len(block)
+        self._queue.put_nowait(block)
+
+    async def finish(self, audio: np.ndarray, timeout: float) -> Dict[str, Any]:
+        """
+        Dopošle zvyšok výpovede a počká na výsledok.
+
+        Args:
+            audio: Celá výpoveď (začiatok už mohol odísť cez feed)
+            timeout: Limit na výsledok od pustenia PTT
+        """
+        if self.queued > len(audio):
+            raise ProtocolError("Odoslané audio nesedí s výpoveďou")
+        if len(audio) > self.queued:
+            self.feed(audio[self.queued:])
+        self._queue.put_nowait(None)
+        return await asyncio.wait_for(self._complete(len(audio)), timeout)
+
+    async def _complete(self, samples: int) -> Dict[str, Any]:
+        await self._task
+        await self.connection.send(encode_json(END, {"samples": samples}))
+        result = json.loads(await self.connection.expect(RESULT))
+        self.client.pool.release(self.connection)
+        self.connection = None
+        return result
+
+    async def _send(self):
+        self.connection = await self.client.pool.acquire()
+        await self.connection.send(encode_frame(START))
+        encoder = create_encoder(self.client.codec, self.client.sample_rate)
+        while True:
+            block = await self._queue.get()
+            if block is None:
+                break
+            payload = encoder.encode(block)
+            if payload:
+                await self.connection.send(encode_frame(AUDIO, payload))
+        tail = encoder.flush()
+        if tail:
+            await self.connection.send(encode_frame(AUDIO, tail))
+
+    def cancel(self):
+        """Zahodí výpoveď (barge-in, chyba); spojenie sa nevracia do pool-u."""
+        if not self._task.done():
+            self._task.cancel()
+        elif not self._task.cancelled():
+            self._task.exception()  # chyba už je zalogovaná cez fallback
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+class RemoteSTT:
+    """Klient vzdialeného STT s rozhraním WhisperSTT a lokálnym fallbackom."""
+
+    def __init__(self, config: RemoteSTTConfig, local: WhisperSTT, sample_rate: int = 16000):
+        """
+        Args:
+            config: Konfigurácia servera a fallbacku
+            local: Lokálny Whisper pre fallback (načíta sa podľa fallback_preload)
+            sample_rate: Vzorkovanie výpovedí
+        """
+        self.config = config
+        self.local = local
+        self.sample_rate = sample_rate
+        self.codec = config.codec
+        if self.codec != "pcm16" and not codec_available(self.codec):
+            logger.warning(f"Kodek {self.codec} nie je dostupný, posielam pcm16")
+            self.codec = "pcm16"
+        self.pool = ConnectionPool(config, self.codec, sample_rate)
+        self.server_info: Dict[str, Any] = {}
+        self.reserved_cores: List[int] = []
+        self.batcher = None
+        self._utterance: Optional[_RemoteUtterance] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._local_loading: Optional[asyncio.Task] = None
+        # Počítadlá pre metriky
+        self.remote_count = 0
+        self.fallback_count = 0
+
+    @property
+    def device(self) -> str:
+        return f"remote:{self.server_info.get('device', '?')}"
+
+    @property
+    def compute_type(self) -> str:
+        return self.server_info.get("compute_type", "")
+
+    @property
+    def loaded_models(self) -> List[str]:
+        remote = [f"{self.config.host}:{m}" for m in self.server_info.get("models", [])]
+        return remote + self.local.loaded_models
+
+    async def load(self):
+        """Otvorí spojenia so serverom; lokálny model podľa fallback_preload."""
+        self._loop = asyncio.get_running_loop()
+        try:
+            self.server_info = await self.pool.warm()
+            logger.info(
+                f"STT server {self.config.host}:{self.config.port} pripojený "
+                f"({', '.join(self.server_info.get('models', []))}, {self.server_info.get('device')}, "
+                f"kodek {self.codec})"
+            )
+        except Exception as e:
+            logger.warning(f"STT server {self.config.host}:{self.config.port} nedostupný: {e}")
+            if not self.config.fallback_local:
+                raise
+        if self.config.fallback_local and (self.config.fallback_preload or not self.server_info):
+            await self._ensure_local()
+
+    def begin_stream(self):
+        """
+        PTT stlačené - otvorí výpoveď na serveri (volať v event loope).
+
+        Musí byť naplánované pred prvým feed() nahrávky; call_soon_threadsafe
+        zachováva poradie, takže bloky idú na server v poradí nahrávky.
+        """
+        if not self.config.stream_while_recording:
+            return
+        if self._utterance is not None:
+            self._utterance.cancel()
+        self._utterance = _RemoteUtterance(self)
+
+    def feed(self, block: np.ndarray):
+        """Blok z audio callbacku (thread-safe)."""
+        if self.config.stream_while_recording and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._feed, block)
+
+    def _feed(self, block: np.ndarray):
+        if self._utterance is not None:
+            self._utterance.feed(block)
+
+    async def transcribe(self, audio: np.ndarray) -> Transcription:
+        """Prepíše výpoveď na serveri; pri chybe alebo timeoute lokálne."""
+        submitted_ns = time.perf_counter_ns()
+        utterance, self._utterance = self._utterance, None
+        try:
+            if utterance is None:
+                utterance = _RemoteUtterance(self)
+            result = await utterance.finish(audio, self.config.result_timeout_sec)
+        except asyncio.CancelledError:
+            # Barge-in zrušil turn - rozpracované spojenie sa zahodí
+            utterance.cancel()
+            raise
+        except Exception as e:
+            utterance.cancel()
+            reason = "timeout" if isinstance(e, asyncio.TimeoutError) else str(e) or type(e).__name__
+            if not self.config.fallback_local:
+                raise
+            self.fallback_count += 1
+            logger.warning(f"Vzdialený prepis zlyhal ({reason}), prepisujem lokálne")
+            await self._ensure_local()
+            return await self.local.transcribe(audio)
+
+        self.remote_count += 1
+        finished_ns = time.perf_counter_ns()
+        started_ns = finished_ns - int(result["decode_ms"] * 1e6)
+        return Transcription(
+            text=result["text"],
+            language=result["language"],
+            language_probability=result["language_probability"],
+            duration_sec=len(audio) / self.sample_rate,
+            model=f"remote:{result['model']}",
+            submitted_ns=submitted_ns,
+            started_ns=started_ns,
+            prepared_ns=started_ns + int(result.get("prepare_ms", 0.0) * 1e6),
+            finished_ns=finished_ns,
+            batch_size=result.get("batch_size", 1),
+        )
+
+    async def _ensure_local(self):
+        """Načíta lokálny model raz (súbežné výpadky čakajú na to isté načítanie)."""
+        if self._local_loading is None:
+            logger.info("Načítavam lokálny Whisper pre fallback")
+            self._local_loading = asyncio.ensure_future(self.local.load())
+        await asyncio.shield(self._local_loading)
+
+    def close(self):
+        if self._utterance is not None:
+            self._utterance.cancel()
+            self._utterance = None
+        self.pool.close()
+        self.local.close()
@@ -0,0 +1,230 @@
+"""
+Samostatný STT server - Whisper na druhom stroji.
+
+Okolo WhisperSTT (rovnaké nastavenia modelu z config.yaml, vrátane
+batchingu súbežných výpovedí) obsluhuje klientov RemoteSTT cez
+binárny protokol zo stt_remote.
+
+    python -m src.services.stt_server --host 0.0.0.0 --port 8765
+"""
+
+import argparse
+import asyncio
+import hmac
+import json
+import logging
+import sys
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from ..config.config import AppConfig
+from .stt import WhisperSTT
+from .stt_remote import (
+    AUDIO,
+    CANCEL,
+    END,
+    ERROR,
+    HELLO,
+    PING,
+    PONG,
+    PROTOCOL_VERSION,
+    READY,
+    RESULT,
+    START,
+    ProtocolError,
+    create_decoder,
+    encode_frame,
+    encode_json,
+    read_frame,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class STTServer:
+    """Asyncio TCP server nad WhisperSTT."""
+
+    def __init__(
+        self,
+        stt: WhisperSTT,
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        token: str = "",
+        max_utterance_sec: float = 120.0,
+    ):
+        """
+        Args:
+            stt: Načítaný WhisperSTT
+            host: Adresa na počúvanie
+            port: Port
+            token: Zdieľaný kľúč (prázdny = bez overenia)
+            max_utterance_sec: Najdlhšia prijatá výpoveď (chráni pamäť servera)
+        """
+        self.stt = stt
+        self.host = host
+        self.port = port
+        self.token = token
+        self.max_samples = int(max_utterance_sec * stt.sample_rate)
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.utterances = 0
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        sockets = ", ".join(str(s.getsockname()[:2]) for s in self.server.sockets)
+        logger.info(f"STT server počúva na {sockets}")
+
+    async def stop(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        peer = writer.get_extra_info("peername")
+        try:
+            codec = await self._handshake(reader, writer)
+            logger.info(f"Klient {peer} pripojený ({codec})")
+            await self._serve(reader, writer, codec)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except ProtocolError as e:
+            logger.warning(f"Klient {peer}: {e}")
+            writer.write(encode_frame(ERROR, str(e).encode("utf-8")))
+        finally:
+            writer.close()
+            logger.info(f"Klient {peer} odpojený")
+
+    async def _handshake(self, reader, writer) -> str:
+        """Overí HELLO a odpovie READY s informáciami o modeli; vráti kodek."""
+        kind, payload = await read_frame(reader)
+        if kind != HELLO:
+            raise ProtocolError("Spojenie musí začať rámcom HELLO")
+        hello = json.loads(payload)
+        if self.token and not hmac.compare_digest(
+            str(hello.get("token") or "").encode("utf-8"), self.token.encode("utf-8")
+        ):
+            raise ProtocolError("Neplatný token")
+        if hello.get("version") != PROTOCOL_VERSION:
+            raise ProtocolError(f"Nepodporovaná verzia protokolu {hello.get('version')}")
+        if hello.get("sample_rate") != self.stt.sample_rate:
+            raise ProtocolError(f"Server prijíma len {self.stt.sample_rate}Hz")
+        codec = hello.get("codec", "pcm16")
+        try:
+            create_decoder(codec, self.stt.sample_rate)
+        except (ImportError, ValueError) as e:
+            raise ProtocolError(f"Kodek {codec} nie je dostupný: {e}")
+        writer.write(
+            encode_json(
+                READY,
+                {
+                    "models": self.stt.loaded_models,
+                    "device": self.stt.device,
+                    "compute_type": self.stt.compute_type,
+                },
+            )
+        )
+        await writer.drain()
+        return codec
+
+    async def _serve(self, reader, writer, codec: str):
+        decoder = None
+        chunks = []
+        received = 0
+        while True:
+            kind, payload = await read_frame(reader)
+            if kind == START:
+                decoder = create_decoder(codec, self.stt.sample_rate)
+                chunks, received = [], 0
+            elif kind == AUDIO:
+                if decoder is None:
+                    raise ProtocolError("AUDIO bez START")
+                chunk = decoder.decode(payload)
+                received += len(chunk)
+                if received > self.max_samples:
+                    raise ProtocolError(
+                        f"Výpoveď presiahla {self.max_samples / self.stt.sample_rate:.0f}s"
+                    )
+                chunks.append(chunk)
+            elif kind == END:
+                if decoder is None:
+                    raise ProtocolError("END bez START")
+                samples = json.loads(payload).get("samples") if payload else None
+                audio = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+                # Opus dopĺňa posledný rámec tichom
+                audio = audio[:samples] if samples is not None else audio
+                decoder, chunks, received = None, [], 0
+                try:
+                    writer.write(encode_json(RESULT, await self._transcribe(audio)))
+                except Exception as e:
+                    # Chyba modelu ukončí len výpoveď, klient prepne na fallback
+                    logger.error(f"Chyba prepisu: {e}")
+                    writer.write(encode_frame(ERROR, str(e).encode("utf-8")))
+                await writer.drain()
+            elif kind == CANCEL:
+                decoder, chunks, received = None, [], 0
+            elif kind == PING:
+                writer.write(encode_frame(PONG))
+                await writer.drain()
+            else:
+                raise ProtocolError(f"Neočakávaný rámec {kind}")
+
+    async def _transcribe(self, audio: np.ndarray) -> dict:
+        result = await self.stt.transcribe(audio)
+        self.utterances += 1
+        logger.info(
+            f"Prepis {result.duration_sec:.1f}s ({result.model}): fronta {result.queue_ms:.0f}ms, "
+            f"dekódovanie {result.decode_ms:.0f}ms"
+        )
+        return {
+            "text": result.text,
+            "language": result.language,
+            "language_probability": result.language_probability,
+            "model": result.model,
+            "queue_ms": result.queue_ms,
+            "decode_ms": result.decode_ms,
+            "prepare_ms": (result.prepared_ns - result.started_ns) / 1e6,
+            "batch_size": result.batch_size,
+        }
+
+
+async def _serve_forever(args) -> int:
+    config = AppConfig.from_yaml(args.config)
+    stt = WhisperSTT(config.model, sample_rate=config.audio.stt_sample_rate)
+    await stt.load()
+    logger.info(f"Whisper model načítaný ({', '.join(stt.loaded_models)}, {stt.device})")
+    server = STTServer(
+        stt,
+        host=args.host or config.remote_stt.host,
+        port=args.port or config.remote_stt.port,
+        token=config.remote_stt.token if args.token is None else args.token,
+        max_utterance_sec=config.remote_stt.max_utterance_sec,
+    )
+    await server.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+        stt.close()
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="STT server pre Elenu (Whisper na inom stroji)")
+    parser.add_argument("--config", type=Path, default=Path("config.yaml"))
+    parser.add_argument("--host", help="Adresa (predvolene remote_stt.host)")
+    parser.add_argument("--port", type=int, help="Port (predvolene remote_stt.port)")
+    parser.add_argument("--token", help="Zdieľaný kľúč (predvolene remote_stt.token)")
+    args = parser.parse_args()
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+    try:
+        return asyncio.run(_serve_forever(args))
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
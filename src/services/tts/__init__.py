@@ -2,6 +2,25 @@
 Text-to-Speech služby pre Elenu.
 """
 
-from .azure_tts import AzureTTS, TTSError, TTSConfigError, TTSServiceError
+from .base import (
+    TTSEngine, TTSError, TTSConfigError, TTSServiceError, TTSInterrupted, TTSBudgetExceeded,
+)
+from .failover import FailoverTTS
 
-__all__ = ['AzureTTS', 'TTSError', 'TTSConfigError', 'TTSServiceError']
+__all__ = [
+    'TTSEngine', 'AzureTTS', 'LocalTTS', 'FailoverTTS',
+    'TTSError', 'TTSConfigError', 'TTSServiceError', 'TTSInterrupted', 'TTSBudgetExceeded',
+]
+
+
+# AzureTTS (Azure Speech SDK) a LocalTTS (scipy) sa načítajú až pri prvom
+# použití, aby import balíka nespomaľoval štart
+_LAZY = {'AzureTTS': '.azure_tts', 'LocalTTS': '.local_tts'}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        import importlib
+
+        return getattr(importlib.import_module(_LAZY[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
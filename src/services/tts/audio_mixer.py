@@ -0,0 +1,252 @@
+"""
+Lokálny audio mixer pre prehrávanie vyrenderovanej reči cez sounddevice.
+
+Syntéza a prehrávanie sú oddelené: TTS renderuje PCM do pamäte a mixer ho
+prehráva v PortAudio callback threade. Vety idú za sebou bez medzier,
+hlasitosť sa dá plynulo stlmiť (ducking) a hodiny prehrávania slúžia na
+časovanie titulkov podľa skutočne prehraného zvuku.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class PlaybackHandle:
+    """Sledovanie jednej prehrávanej položky."""
+
+    def __init__(self, pcm: np.ndarray, sample_rate: int, loop: asyncio.AbstractEventLoop):
+        self.pcm = pcm
+        self.sample_rate = sample_rate
+        self.position = 0  # počet už odovzdaných framov
+        self.started = False
+        self.started_ns: Optional[int] = None  # perf_counter_ns prvého odovzdaného bloku
+        self.interrupted = False
+        self._loop = loop
+        self._done = loop.create_future()
+        self._latency_frames = 0
+        self.boundary_task: Optional[asyncio.Task] = None
+
+    def position_ms(self) -> float:
+        """Aktuálna pozícia prehrávania v ms (so započítanou latenciou výstupu)."""
+        frames = max(0, self.position - self._latency_frames)
+        return frames * 1000.0 / self.sample_rate
+
+    @property
+    def duration_ms(self) -> float:
+        return len(self.pcm) * 1000.0 / self.sample_rate
+
+    @property
+    def audible_at_ns(self) -> Optional[int]:
+        """Kedy začal byť zvuk počuť (začiatok prehrávania + latencia výstupu)."""
+        if self.started_ns is None:
+            return None
+        return self.started_ns + self._latency_frames * 1_000_000_000 // self.sample_rate
+
+    @property
+    def done(self) -> bool:
+        return self._done.done()
+
+    async def wait(self) -> bool:
+        """
+        Počká na dohranie položky.
+
+        Returns:
+            True ak dohrala celá, False ak bola prerušená
+        """
+        return await asyncio.shield(self._done)
+
+    def _finish(self, completed: bool):
+        """Volané z mixer threadu."""
+        self._loop.call_soon_threadsafe(self._resolve, completed)
+
+    def _resolve(self, completed: bool):
+        if not self._done.done():
+            self._done.set_result(completed)
+
+
+class AudioMixer:
+    """Prehrávanie PCM položiek za sebou (gapless) s ovládaním hlasitosti."""
+
+    def __init__(
+        self,
+        sample_rate: int = 48000,
+        device: Optional[int] = None,
+        blocksize: int = 480,
+        ramp_ms: float = 30.0,
+    ):
+        """
+        Inicializuje mixer.
+
+        Args:
+            sample_rate: Vzorkovacia frekvencia výstupu (musí sedieť s TTS)
+            device: Index výstupného zariadenia (None = default)
+            blocksize: Počet framov na callback (480 = 10 ms pri 48 kHz)
+            ramp_ms: Dĺžka prechodu hlasitosti pri duckingu a zastavení
+        """
+        self.sample_rate = sample_rate
+        self.device = device
+        self.blocksize = blocksize
+        self._ramp_step = 1.0 / max(1.0, ramp_ms * sample_rate / 1000.0)
+
+        self._queue: Deque[PlaybackHandle] = deque()
+        self._lock = threading.Lock()
+        self._gain = 1.0
+        self._target_gain = 1.0
+        self._stream: Optional[Any] = None  # sounddevice.OutputStream
+        self._silent = threading.Event()
+        self._silent.set()
+        self.underflows = 0
+
+    def start(self):
+        """Otvorí výstupný stream (zostáva otvorený kvôli nízkej latencii)."""
+        if self._stream is not None:
+            return
+        # PortAudio sa načíta až pri prvom prehrávaní (rýchlejší štart)
+        import sounddevice as sd
+
+        self._stream = sd.OutputStream(
+            samplerate=self.sample_rate,
+            channels=1,
+            dtype=np.float32,
+            blocksize=self.blocksize,
+            device=self.device,
+            latency="low",
+            callback=self._callback,
+        )
+        self._stream.start()
+        logger.info(
+            f"Audio mixer spustený ({self.sample_rate}Hz, latencia {self._stream.latency * 1000:.0f}ms)"
+        )
+
+    def close(self):
+        """Zastaví a zatvorí výstupný stream."""
+        self.stop_all()
+        if self._stream is not None:
+            try:
+                self._stream.stop()
+                self._stream.close()
+            except Exception as e:
+                logger.error(f"Chyba pri zatváraní audio mixera: {e}")
+            finally:
+                self._stream = None
+
+    def play(self, pcm: np.ndarray, sample_rate: int) -> PlaybackHandle:
+        """
+        Zaradí PCM na prehranie hneď za aktuálnu položku.
+
+        Args:
+            pcm: Mono PCM (int16 alebo float32)
+            sample_rate: Vzorkovacia frekvencia PCM
+
+        Returns:
+            PlaybackHandle pre sledovanie pozície a dokončenia
+        """
+        if sample_rate != self.sample_rate:
+            raise ValueError(
+                f"Nesprávna vzorkovacia frekvencia {sample_rate}Hz (mixer: {self.sample_rate}Hz)"
+            )
+        self.start()
+
+        if pcm.dtype == np.int16:
+            pcm = pcm.astype(np.float32) / 32768.0
+        handle = PlaybackHandle(pcm, sample_rate, asyncio.get_running_loop())
+        handle._latency_frames = int((self._stream.latency or 0.0) * self.sample_rate)
+
+        with self._lock:
+            self._queue.append(handle)
+            self._silent.clear()
+        return handle
+
+    def duck(self, gain: float):
+        """Plynulo zmení hlasitosť (napr. 0.3 počas reči streamera)."""
+        self._target_gain = max(0.0, min(1.0, gain))
+
+    def unduck(self):
+        """Vráti plnú hlasitosť."""
+        self._target_gain = 1.0
+
+    @property
+    def is_playing(self) -> bool:
+        return not self._silent.is_set()
+
+    def stop_all(self) -> int:
+        """
+        Okamžite zastaví prehrávanie a zahodí všetky položky.
+
+        Returns:
+            Počet prerušených položiek
+        """
+        with self._lock:
+            handles = list(self._queue)
+            self._queue.clear()
+        for handle in handles:
+            handle.interrupted = True
+            handle._finish(False)
+        return len(handles)
+
+    def stop(self, handles) -> int:
+        """
+        Okamžite zastaví len zadané položky, ostatné hrajú ďalej.
+
+        Args:
+            handles: Položky na zastavenie (prehrávané aj čakajúce)
+
+        Returns:
+            Počet prerušených položiek
+        """
+        targets = set(handles)
+        with self._lock:
+            stopped = [handle for handle in self._queue if handle in targets]
+            self._queue = deque(handle for handle in self._queue if handle not in targets)
+        for handle in stopped:
+            handle.interrupted = True
+            handle._finish(False)
+        return len(stopped)
+
+    async def wait_silent(self, timeout: float = 0.5) -> bool:
+        """Počká, kým mixer odovzdá ticho do výstupu."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._silent.wait, timeout)
+
+    def _callback(self, outdata, frames, time_info, status):
+        """PortAudio callback (mixer thread) - skladá položky za sebou."""
+        if status.output_underflow:
+            self.underflows += 1
+
+        out = outdata[:, 0]
+        out.fill(0.0)
+        written = 0
+
+        with self._lock:
+            while written < frames and self._queue:
+                handle = self._queue[0]
+                if not handle.started:
+                    handle.started = True
+                    handle.started_ns = time.perf_counter_ns()
+                take = min(frames - written, len(handle.pcm) - handle.position)
+                out[written:written + take] = handle.pcm[handle.position:handle.position + take]
+                handle.position += take
+                written += take
+                if handle.position >= len(handle.pcm):
+                    self._queue.popleft()
+                    handle._finish(True)
+            idle = not self._queue
+
+        # Rampa hlasitosti (ducking) bez kliknutí
+        if self._gain != self._target_gain or self._gain != 1.0:
+            direction = 1.0 if self._target_gain > self._gain else -1.0
+            ramp = self._gain + direction * self._ramp_step * np.arange(1, frames + 1, dtype=np.float32)
+            ramp = np.minimum(ramp, self._target_gain) if direction > 0 else np.maximum(ramp, self._target_gain)
+            out *= ramp
+            self._gain = float(ramp[-1])
+
+        if idle and written < frames:
+            self._silent.set()
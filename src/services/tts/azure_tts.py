@@ -6,45 +6,46 @@ import os
 import asyncio
 import logging
 from pathlib import Path
-from typing import List, Tuple, Optional
-from dataclasses import dataclass
+from typing import List, Optional
+import numpy as np
 import azure.cognitiveservices.speech as speechsdk
+from .audio_mixer import AudioMixer
+from .base import (
+    RenderedSpeech,
+    TTSConfigError,
+    TTSEngine,
+    TTSServiceError,
+    TTSWordBoundary,
+)
+from .ssml import SSMLBuilder
+from ..usage import UsageMeter
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
-class TTSWordBoundary:
-    """Reprezentuje boundary event pre jedno slovo."""
-    time_ms: int  # Čas v milisekundách
-    text_offset: int  # Offset v texte
-    word_length: int  # Dĺžka slova
-
-
-class TTSError(Exception):
-    """Základná výnimka pre TTS chyby."""
-    pass
-
-
-class TTSConfigError(TTSError):
-    """Výnimka pre chyby v konfigurácii."""
-    pass
-
-
-class TTSServiceError(TTSError):
-    """Výnimka pre chyby Azure služby."""
-    pass
-
-
-class AzureTTS:
+class AzureTTS(TTSEngine):
     """Azure Cognitive Services TTS implementácia."""
 
-    def __init__(self, voice: Optional[str] = None):
+    name = "azure"
+    billable = True
+
+    def __init__(
+        self,
+        voice: Optional[str] = None,
+        mixer: Optional[AudioMixer] = None,
+        cache_size: int = 64,
+        ssml: Optional[SSMLBuilder] = None,
+        usage: Optional[UsageMeter] = None,
+    ):
         """
         Inicializuje Azure TTS.
         
         Args:
             voice: Voliteľný hlas na použitie. Ak None, použije sa hodnota z env.
+            mixer: Audio mixer pre prehrávanie (None = vytvorí sa vlastný)
+            cache_size: Počet vyrenderovaných viet držaných v pamäti
+            ssml: SSML builder (prosody, <lang>); None = predvolené nastavenia hlasu
+            usage: Voliteľné počítadlo spotreby (znaky sa počítajú do rozpočtu)
         """
         self.speech_key = os.getenv("AZURE_SPEECH_KEY")
         self.service_region = os.getenv("AZURE_SPEECH_REGION")
@@ -67,103 +68,72 @@ class AzureTTS:
             speechsdk.SpeechSynthesisOutputFormat.Riff48Khz16BitMonoPcm
         )
 
+        # Renderovanie do pamäte - raw PCM bez WAV hlavičky
+        self.pcm_config = speechsdk.SpeechConfig(
+            subscription=self.speech_key,
+            region=self.service_region
+        )
+        self.pcm_config.speech_synthesis_voice_name = self.voice_name
+        self.pcm_config.set_speech_synthesis_output_format(
+            speechsdk.SpeechSynthesisOutputFormat.Raw48Khz16BitMonoPcm
+        )
+
+        super().__init__(mixer=mixer, cache_size=cache_size, usage=usage)
+        self.ssml = ssml or SSMLBuilder(self.voice_name)
+
         logger.info(
             f"AzureTTS inicializované (voice={self.voice_name}, region={self.service_region})"
         )
 
-    async def speak_async(self, text: str, on_word_boundary=None, on_completed=None) -> List[TTSWordBoundary]:
-        """
-        Asynchrónne prehrá text a vráti word boundaries.
-        
-        Args:
-            text: Text na prehranie
-            on_word_boundary: Voliteľný callback pre word boundary eventy
-            on_completed: Voliteľný callback po dokončení syntézy
-            
-        Returns:
-            List of word boundary events
-        """
+    def _render_blocking(self, parts: List[str]) -> RenderedSpeech:
+        """Syntéza SSML do PullAudioOutputStream (beží v executore)."""
+        document = self.ssml.build(parts)
         boundaries: List[TTSWordBoundary] = []
-        # Použitie default audio výstupu
-        audio_config = speechsdk.audio.AudioOutputConfig(use_default_speaker=True)
-        
+        stream = speechsdk.audio.PullAudioOutputStream()
+        audio_config = speechsdk.audio.AudioOutputConfig(stream=stream)
         synthesizer = speechsdk.SpeechSynthesizer(
-            speech_config=self.speech_config, 
+            speech_config=self.pcm_config,
             audio_config=audio_config
         )
 
-        # Event handler pre word boundary eventy
         def handle_boundary_event(evt: speechsdk.SpeechSynthesisWordBoundaryEventArgs):
+            # Pri SSML Azure vracia offset do SSML - prevedieme na offset v texte
+            text_offset = document.to_text_offset(evt.text_offset)
+            if text_offset is None:
+                return
             # Konverzia zo 100-nanosekúnd na milisekundy
-            time_ms = evt.audio_offset // 10000
-            boundary = TTSWordBoundary(
-                time_ms=time_ms,
-                text_offset=evt.text_offset,
+            boundaries.append(TTSWordBoundary(
+                time_ms=evt.audio_offset // 10000,
+                text_offset=text_offset,
                 word_length=evt.word_length
-            )
-            boundaries.append(boundary)
-            
-            # Ak je nastavený callback, zavoláme ho
-            if on_word_boundary:
-                loop = asyncio.get_event_loop()
-                loop.create_task(on_word_boundary(text, boundary))
-
-        done_event = asyncio.Event()
-        error = None
-
-        def handle_canceled(evt: speechsdk.SpeechSynthesisEventArgs):
-            nonlocal error
-            details = speechsdk.CancellationDetails.from_result(evt.result)
-            error = TTSServiceError(
-                f"Syntéza zlyhala: {details.reason} - {details.error_details}"
-            )
-            done_event.set()
-
-        def handle_completed(evt: speechsdk.SpeechSynthesisEventArgs):
-            logger.info("Syntéza dokončená, prehrávanie ukončené")
-            if on_completed:
-                on_completed(evt)
-            done_event.set()
+            ))
 
-        # Pripojenie event handlerov
         synthesizer.synthesis_word_boundary.connect(handle_boundary_event)
-        synthesizer.synthesis_completed.connect(handle_completed)
-        synthesizer.synthesis_canceled.connect(handle_canceled)
-
-        # Spustenie syntézy
-        result = synthesizer.speak_text_async(text)
-        
-        try:
-            # Čakáme na dokončenie syntézy
-            await asyncio.wait_for(done_event.wait(), timeout=30.0)
-            
-            if error:
-                raise error
-                
-            if not result:
-                raise TTSServiceError("Syntéza zlyhala bez špecifickej chyby")
-                
-        except asyncio.TimeoutError:
-            logger.error("Timeout pri čakaní na TTS syntézu")
-            raise TTSServiceError("TTS syntéza trvala príliš dlho")
-        except Exception as e:
-            logger.error(f"Chyba pri TTS syntéze: {str(e)}")
-            raise
+        result = synthesizer.speak_ssml_async(document.ssml).get()
 
-        return sorted(boundaries, key=lambda x: x.time_ms)
+        if result.reason != speechsdk.ResultReason.SynthesizingAudioCompleted:
+            details = speechsdk.CancellationDetails.from_result(result)
+            raise TTSServiceError(
+                f"Syntéza zlyhala: {details.reason} - {details.error_details}"
+            )
 
-    def speak(self, text: str) -> List[TTSWordBoundary]:
-        """
-        Synchrónna verzia speak metódy.
-        
-        Args:
-            text: Text na prehranie
-            
-        Returns:
-            List of word boundary events
-        """
-        loop = asyncio.get_event_loop()
-        return loop.run_until_complete(self.speak_async(text))
+        # Syntetizér musí zaniknúť, aby sa stream uzavrel a read vrátil 0
+        del synthesizer
+        chunks = []
+        buffer = bytes(32000)
+        while True:
+            filled = stream.read(buffer)
+            if filled == 0:
+                break
+            chunks.append(buffer[:filled])
+
+        pcm = np.frombuffer(b"".join(chunks), dtype=np.int16)
+        return RenderedSpeech(
+            text=document.text,
+            pcm=pcm,
+            sample_rate=self.SAMPLE_RATE,
+            boundaries=sorted(boundaries, key=lambda x: x.time_ms),
+        )
 
     async def synthesize_to_wav(
         self, 
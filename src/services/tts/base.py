@@ -0,0 +1,277 @@
+"""
+Spoločné rozhranie TTS providerov.
+
+Každý provider renderuje text do mono PCM v pamäti (RenderedSpeech) spolu
+s word boundaries a prehráva ho cez zdieľaný AudioMixer. Providery sa tak
+dajú voľne zamieňať (Azure, lokálny engine, failover) bez zmeny TTSQueue.
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Set
+
+import numpy as np
+
+from ..usage import TTS_MODE_CACHE_ONLY, UsageMeter
+from .audio_mixer import AudioMixer, PlaybackHandle
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TTSWordBoundary:
+    """Reprezentuje boundary event pre jedno slovo."""
+    time_ms: int  # Čas v milisekundách
+    text_offset: int  # Offset v texte
+    word_length: int  # Dĺžka slova
+
+
+class TTSError(Exception):
+    """Základná výnimka pre TTS chyby."""
+    pass
+
+
+class TTSConfigError(TTSError):
+    """Výnimka pre chyby v konfigurácii."""
+    pass
+
+
+class TTSServiceError(TTSError):
+    """Výnimka pre chyby TTS služby (Azure, lokálny engine)."""
+    pass
+
+
+class TTSInterrupted(TTSError):
+    """Prehrávanie bolo prerušené (barge-in)."""
+    pass
+
+
+class TTSBudgetExceeded(TTSError):
+    """Rozpočet znakov je vyčerpaný a text nie je v cache."""
+    pass
+
+
+@dataclass
+class RenderedSpeech:
+    """Vyrenderovaná reč v pamäti (mono PCM int16) s word boundaries."""
+    text: str
+    pcm: np.ndarray
+    sample_rate: int
+    boundaries: List[TTSWordBoundary] = field(default_factory=list)
+
+    @property
+    def duration_ms(self) -> float:
+        return len(self.pcm) * 1000.0 / self.sample_rate
+
+
+class TTSEngine:
+    """
+    Základ TTS providera: cache, prehrávanie cez mixer a časovanie titulkov.
+
+    Potomok implementuje _render_blocking (beží v executore).
+    """
+
+    SAMPLE_RATE = 48000
+    name = "tts"
+    billable = False  # či sa syntéza platí (počíta do rozpočtu znakov)
+
+    def __init__(
+        self,
+        mixer: Optional[AudioMixer] = None,
+        cache_size: int = 64,
+        usage: Optional[UsageMeter] = None,
+    ):
+        """
+        Args:
+            mixer: Audio mixer pre prehrávanie (None = vytvorí sa vlastný)
+            cache_size: Počet vyrenderovaných viet držaných v pamäti
+            usage: Voliteľné počítadlo spotreby a rozpočtu
+        """
+        self.mixer = mixer or AudioMixer(sample_rate=self.SAMPLE_RATE)
+        self.usage = usage
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, RenderedSpeech]" = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.render_errors = 0
+        self._active: Set[PlaybackHandle] = set()
+
+    async def synthesize_async(
+        self, text: str, parts: Optional[List[str]] = None
+    ) -> RenderedSpeech:
+        """
+        Vyrenderuje text do PCM v pamäti (bez prehrávania).
+
+        Args:
+            text: Text na syntézu
+            parts: Voliteľne viac krátkych viet na syntézu v jednej
+                požiadavke (text je potom " ".join(parts))
+
+        Returns:
+            RenderedSpeech s PCM a word boundaries (offsety do textu)
+
+        Raises:
+            TTSBudgetExceeded: Ak je platená syntéza obmedzená len na cache
+        """
+        cached = self.cached(text, parts)
+        if cached is not None:
+            self.cache_hits += 1
+            return cached
+        self.cache_misses += 1
+
+        metered = self.billable and self.usage is not None
+        if metered and self.usage.tts_mode() == TTS_MODE_CACHE_ONLY:
+            raise TTSBudgetExceeded("Rozpočet TTS znakov vyčerpaný, text nie je v cache")
+
+        parts = parts or [text]
+        try:
+            speech = await asyncio.get_running_loop().run_in_executor(
+                None, self._render_blocking, parts
+            )
+        except Exception:
+            self.render_errors += 1
+            raise
+        if metered:
+            self.usage.record_tts(len(speech.text))
+
+        if self.cache_size > 0:
+            self._cache["\n".join(parts)] = speech
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return speech
+
+    def cached(self, text: str, parts: Optional[List[str]] = None) -> Optional[RenderedSpeech]:
+        """Vráti už vyrenderovanú reč z cache (bez syntézy) alebo None."""
+        key = "\n".join(parts or [text])
+        speech = self._cache.get(key)
+        if speech is not None:
+            self._cache.move_to_end(key)
+        return speech
+
+    def _render_blocking(self, parts: List[str]) -> RenderedSpeech:
+        """Syntéza viet do PCM (beží v executore)."""
+        raise NotImplementedError
+
+    def start_playback(self, speech: RenderedSpeech, on_word_boundary=None) -> PlaybackHandle:
+        """
+        Zaradí vyrenderovanú reč do mixera hneď za aktuálne prehrávanú.
+
+        Args:
+            speech: Výsledok synthesize_async
+            on_word_boundary: Voliteľný async callback (text, boundary) časovaný
+                podľa hodín prehrávania
+
+        Returns:
+            PlaybackHandle prehrávanej položky
+        """
+        handle = self.mixer.play(speech.pcm, speech.sample_rate)
+        self._active.add(handle)
+        if on_word_boundary and speech.boundaries:
+            handle.boundary_task = asyncio.create_task(
+                self._emit_boundaries(handle, speech, on_word_boundary)
+            )
+        return handle
+
+    async def wait_playback(self, handle: PlaybackHandle):
+        """
+        Počká na dohranie položky.
+
+        Raises:
+            TTSInterrupted: Ak bolo prehrávanie prerušené
+        """
+        try:
+            completed = await handle.wait()
+        finally:
+            self._active.discard(handle)
+            if handle.boundary_task and not handle.boundary_task.done():
+                handle.boundary_task.cancel()
+        if not completed:
+            raise TTSInterrupted("Prehrávanie prerušené")
+
+    async def _emit_boundaries(self, handle: PlaybackHandle, speech: RenderedSpeech, callback):
+        """Volá callback pre slová v momente, keď ich mixer skutočne prehráva."""
+        for boundary in speech.boundaries:
+            while not handle.done:
+                remaining = boundary.time_ms - handle.position_ms()
+                if remaining <= 0:
+                    break
+                await asyncio.sleep(min(remaining, 50.0) / 1000.0)
+            if handle.done and handle.interrupted:
+                return
+            await callback(speech.text, boundary)
+
+    async def stop_speaking_async(self, handles: Optional[Iterable[PlaybackHandle]] = None) -> bool:
+        """
+        Okamžite zastaví prehrávanie.
+
+        Args:
+            handles: Len tieto položky (None = všetko v mixeri); ostatné
+                položky hrajú ďalej
+
+        Returns:
+            True ak sa niečo prehrávalo a bolo zastavené
+        """
+        if handles is None:
+            if not self._active:
+                return False
+            self.mixer.stop_all()
+            await self.mixer.wait_silent()
+        else:
+            targets = self._active.intersection(handles)
+            if not targets:
+                return False
+            self.mixer.stop(targets)
+            if not self._active - targets:
+                await self.mixer.wait_silent()
+        logger.info("TTS prehrávanie prerušené")
+        return True
+
+    async def speak_async(
+        self,
+        text: str,
+        on_word_boundary=None,
+        on_completed=None,
+        prefetched: Optional[RenderedSpeech] = None,
+    ) -> List[TTSWordBoundary]:
+        """
+        Asynchrónne prehrá text a vráti word boundaries.
+
+        Args:
+            text: Text na prehranie
+            on_word_boundary: Voliteľný callback pre word boundary eventy
+            on_completed: Voliteľný callback po dohraní (dostane RenderedSpeech)
+            prefetched: Voliteľný, vopred vyrenderovaný text (synthesize_async)
+
+        Returns:
+            List of word boundary events
+        """
+        try:
+            speech = prefetched or await self.synthesize_async(text)
+        except TTSError:
+            raise
+        except Exception as e:
+            logger.error(f"Chyba pri TTS syntéze: {str(e)}")
+            raise TTSServiceError(str(e)) from e
+
+        handle = self.start_playback(speech, on_word_boundary=on_word_boundary)
+        await self.wait_playback(handle)
+
+        logger.info("Syntéza dokončená, prehrávanie ukončené")
+        if on_completed:
+            on_completed(speech)
+        return speech.boundaries
+
+    def speak(self, text: str) -> List[TTSWordBoundary]:
+        """
+        Synchrónna verzia speak metódy.
+
+        Args:
+            text: Text na prehranie
+
+        Returns:
+            List of word boundary events
+        """
+        loop = asyncio.get_event_loop()
+        return loop.run_until_complete(self.speak_async(text))
@@ -0,0 +1,155 @@
+"""
+Automatické prepínanie medzi primárnym (Azure) a záložným (lokálnym) TTS.
+
+Ak primárny provider nevráti audio do latency_threshold_ms (plus
+latency_per_char_ms na znak, keďže sa renderuje celá položka naraz) alebo
+zlyhá (výpadok siete, minutá kvóta, chyba SDK), položka sa vyrenderuje
+záložným enginom.
+Po niekoľkých takýchto zlyhaniach po sebe sa na cooldown_sec prepne úplne
+na zálohu a potom sa primárny provider znova vyskúša.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional
+
+from ..usage import TTS_MODE_NORMAL, UsageMeter
+from .base import RenderedSpeech, TTSEngine
+
+logger = logging.getLogger(__name__)
+
+
+class FailoverTTS(TTSEngine):
+    """TTS provider s automatickým prepnutím na zálohu pri latencii alebo chybe."""
+
+    name = "failover"
+
+    def __init__(
+        self,
+        primary: TTSEngine,
+        fallback: TTSEngine,
+        latency_threshold_ms: float = 1500.0,
+        latency_per_char_ms: float = 8.0,
+        max_failures: int = 2,
+        cooldown_sec: float = 120.0,
+        usage: Optional[UsageMeter] = None,
+    ):
+        """
+        Inicializuje failover.
+
+        Args:
+            primary: Primárny provider (Azure)
+            fallback: Záložný provider (lokálny engine)
+            latency_threshold_ms: Maximálna doba čakania na primárny provider
+                pri krátkej položke
+            latency_per_char_ms: Príspevok na každý znak položky (dlhšia
+                odpoveď sa renderuje dlhšie a nemá spúšťať failover)
+            max_failures: Počet pomalých/chybných syntéz po sebe, po ktorom
+                sa prepne na zálohu
+            cooldown_sec: Ako dlho používať len zálohu pred ďalším pokusom
+            usage: Voliteľné počítadlo spotreby; pri šetriacom režime sa
+                primárny provider používa len z cache
+        """
+        # Vlastná cache netreba, majú ju oba providery
+        super().__init__(mixer=primary.mixer, cache_size=0, usage=usage)
+        self.primary = primary
+        self.fallback = fallback
+        self.latency_threshold_ms = latency_threshold_ms
+        self.latency_per_char_ms = latency_per_char_ms
+        self.max_failures = max_failures
+        self.cooldown_sec = cooldown_sec
+
+        self._failures = 0
+        self._failed_over_at: Optional[float] = None
+        self.stats: Dict[str, int] = {
+            "primary": 0,
+            "fallback": 0,
+            "timeouts": 0,
+            "errors": 0,
+            "failovers": 0,
+            "budget": 0,
+        }
+
+    @property
+    def using_fallback(self) -> bool:
+        """True ak je primárny provider dočasne vyradený."""
+        if self._failed_over_at is None:
+            return False
+        if time.monotonic() - self._failed_over_at < self.cooldown_sec:
+            return True
+        logger.info(f"Failover cooldown vypršal, skúšam znova {self.primary.name} TTS")
+        self._failed_over_at = None
+        self._failures = 0
+        return False
+
+    async def synthesize_async(
+        self, text: str, parts: Optional[List[str]] = None
+    ) -> RenderedSpeech:
+        """
+        Vyrenderuje text primárnym providerom, pri pomalej odpovedi alebo
+        chybe záložným.
+        """
+        if self.usage is not None and self.usage.tts_mode() != TTS_MODE_NORMAL:
+            cached = self.primary.cached(text, parts)
+            if cached is not None:
+                self.stats["primary"] += 1
+                return cached
+            self.stats["budget"] += 1
+            return await self._synthesize_fallback(text, parts)
+
+        if self.using_fallback:
+            return await self._synthesize_fallback(text, parts)
+
+        timeout_ms = self.timeout_ms(text, parts)
+        task = asyncio.ensure_future(self.primary.synthesize_async(text, parts))
+        try:
+            speech = await asyncio.wait_for(asyncio.shield(task), timeout=timeout_ms / 1000.0)
+        except asyncio.TimeoutError:
+            # Primárna syntéza dobehne na pozadí a uloží sa do jeho cache
+            task.add_done_callback(self._consume_result)
+            self.stats["timeouts"] += 1
+            logger.warning(
+                f"{self.primary.name} TTS neodpovedal do {timeout_ms:.0f}ms, "
+                f"používam {self.fallback.name} TTS"
+            )
+            self._record_failure()
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        except Exception as e:
+            # Nielen TTSError - aj RuntimeError/OSError zo SDK má skončiť zálohou, nie tichom
+            self.stats["errors"] += 1
+            logger.warning(f"{self.primary.name} TTS zlyhal ({e}), používam {self.fallback.name} TTS")
+            self._record_failure()
+        else:
+            self._failures = 0
+            self.stats["primary"] += 1
+            return speech
+
+        return await self._synthesize_fallback(text, parts)
+
+    def timeout_ms(self, text: str, parts: Optional[List[str]] = None) -> float:
+        """Limit čakania na primárnu syntézu úmerný dĺžke položky."""
+        chars = len(" ".join(parts)) if parts else len(text)
+        return self.latency_threshold_ms + self.latency_per_char_ms * chars
+
+    async def _synthesize_fallback(self, text: str, parts: Optional[List[str]]) -> RenderedSpeech:
+        self.stats["fallback"] += 1
+        return await self.fallback.synthesize_async(text, parts)
+
+    def _record_failure(self):
+        self._failures += 1
+        if self._failures >= self.max_failures and self._failed_over_at is None:
+            self._failed_over_at = time.monotonic()
+            self.stats["failovers"] += 1
+            logger.warning(
+                f"Prepínam na {self.fallback.name} TTS na {self.cooldown_sec:.0f}s "
+                f"({self._failures} zlyhaní po sebe)"
+            )
+
+    @staticmethod
+    def _consume_result(task: asyncio.Future):
+        """Vyzdvihne výsledok opustenej syntézy, aby sa nelogovala ako neošetrená."""
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Oneskorená primárna syntéza zlyhala: {task.exception()}")
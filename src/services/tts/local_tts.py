@@ -0,0 +1,245 @@
+"""
+Lokálny (offline) TTS engine na CPU.
+
+Volá espeak-ng alebo Piper ako podproces, výstup prevzorkuje na frekvenciu
+mixera a word boundaries odhadne z dĺžky slov a rozsahu reči v PCM (ani
+jeden CLI nástroj ich nevracia). Slúži ako záloha pri pomalom Azure alebo
+minutej kvóte a umožňuje testovať TTS cestu bez siete.
+"""
+
+import json
+import logging
+import re
+import shutil
+import struct
+import subprocess
+from math import gcd
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+from scipy.signal import resample_poly
+
+from .audio_mixer import AudioMixer
+from .base import RenderedSpeech, TTSConfigError, TTSEngine, TTSServiceError, TTSWordBoundary
+
+logger = logging.getLogger(__name__)
+
+ENGINE_ESPEAK = "espeak-ng"
+ENGINE_PIPER = "piper"
+ENGINES = (ENGINE_ESPEAK, ENGINE_PIPER)
+
+# Časový limit pre jeden podproces (ochrana pred zaseknutým enginom)
+_PROCESS_TIMEOUT_SEC = 30.0
+# Prah energie (voči maximu) pre určenie začiatku a konca reči
+_SPEECH_THRESHOLD = 0.02
+
+
+class LocalTTS(TTSEngine):
+    """Lokálny TTS cez espeak-ng alebo Piper."""
+
+    name = "local"
+
+    def __init__(
+        self,
+        engine: str = ENGINE_ESPEAK,
+        voice: str = "sk",
+        model_path: Optional[str] = None,
+        rate: float = 1.0,
+        pitch: float = 0.0,
+        volume: float = 1.0,
+        sentence_break_ms: int = 250,
+        mixer: Optional[AudioMixer] = None,
+        cache_size: int = 64,
+    ):
+        """
+        Inicializuje lokálny TTS.
+
+        Args:
+            engine: "espeak-ng" alebo "piper"
+            voice: Hlas pre espeak-ng (napr. "sk")
+            model_path: Cesta k Piper .onnx modelu (vedľa musí byť .onnx.json)
+            rate: Rýchlosť reči (1.0 = normálna)
+            pitch: Posun výšky hlasu v poltónoch (len espeak-ng)
+            volume: Hlasitosť (1.0 = normálna)
+            sentence_break_ms: Pauza medzi spojenými vetami
+            mixer: Audio mixer pre prehrávanie
+            cache_size: Počet vyrenderovaných viet držaných v pamäti
+
+        Raises:
+            TTSConfigError: Ak engine nie je nainštalovaný alebo chýba model
+        """
+        if engine not in ENGINES:
+            raise TTSConfigError(f"Neznámy lokálny TTS engine: {engine} (podporované: {ENGINES})")
+
+        self.engine = engine
+        self.voice = voice
+        self.rate = rate
+        self.pitch = pitch
+        self.volume = volume
+        self.sentence_break_ms = sentence_break_ms
+
+        self.binary = shutil.which(engine)
+        if self.binary is None:
+            raise TTSConfigError(f"Lokálny TTS engine '{engine}' nie je nainštalovaný (chýba v PATH)")
+
+        self.model_path = None
+        self.model_sample_rate = None
+        if engine == ENGINE_PIPER:
+            if not model_path or not Path(model_path).exists():
+                raise TTSConfigError(f"Piper model neexistuje: {model_path}")
+            self.model_path = Path(model_path)
+            self.model_sample_rate = self._read_piper_sample_rate(self.model_path)
+
+        super().__init__(mixer=mixer, cache_size=cache_size)
+        logger.info(f"LocalTTS inicializované (engine={engine}, voice={model_path or voice})")
+
+    @staticmethod
+    def _read_piper_sample_rate(model_path: Path) -> int:
+        """Prečíta vzorkovaciu frekvenciu z konfigurácie Piper modelu."""
+        config_path = model_path.with_name(model_path.name + ".json")
+        try:
+            with open(config_path, "r", encoding="utf-8") as f:
+                return int(json.load(f)["audio"]["sample_rate"])
+        except (OSError, KeyError, ValueError) as e:
+            raise TTSConfigError(f"Nepodarilo sa načítať konfiguráciu Piper modelu {config_path}: {e}")
+
+    def _render_blocking(self, parts: List[str]) -> RenderedSpeech:
+        """Vyrenderuje vety jednu po druhej a spojí ich s pauzou (beží v executore)."""
+        pause = np.zeros(int(self.SAMPLE_RATE * self.sentence_break_ms / 1000), dtype=np.int16)
+        chunks: List[np.ndarray] = []
+        boundaries: List[TTSWordBoundary] = []
+        sample_count = 0
+        text_pos = 0
+
+        for index, part in enumerate(parts):
+            if index > 0:
+                chunks.append(pause)
+                sample_count += len(pause)
+                text_pos += 1  # medzera v " ".join(parts)
+
+            pcm = self._synthesize_part(part)
+            offset_ms = sample_count * 1000.0 / self.SAMPLE_RATE
+            for boundary in self._estimate_boundaries(part, pcm):
+                boundaries.append(TTSWordBoundary(
+                    time_ms=int(offset_ms + boundary.time_ms),
+                    text_offset=text_pos + boundary.text_offset,
+                    word_length=boundary.word_length,
+                ))
+            chunks.append(pcm)
+            sample_count += len(pcm)
+            text_pos += len(part)
+
+        return RenderedSpeech(
+            text=" ".join(parts),
+            pcm=np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.int16),
+            sample_rate=self.SAMPLE_RATE,
+            boundaries=boundaries,
+        )
+
+    def _synthesize_part(self, text: str) -> np.ndarray:
+        """Spustí engine pre jednu vetu a vráti PCM int16 vo frekvencii mixera."""
+        if self.engine == ENGINE_PIPER:
+            command = [
+                self.binary,
+                "--model", str(self.model_path),
+                "--output_raw",
+                "--length_scale", f"{1.0 / max(self.rate, 0.1):.3f}",
+            ]
+        else:
+            command = [
+                self.binary,
+                "-v", self.voice,
+                "-s", str(int(175 * self.rate)),
+                "-p", str(int(min(99, max(0, 50 + self.pitch * 8)))),
+                "-a", str(int(min(200, max(0, 100 * self.volume)))),
+                "--stdin",
+                "--stdout",
+            ]
+
+        try:
+            result = subprocess.run(
+                command,
+                input=text.encode("utf-8"),
+                capture_output=True,
+                timeout=_PROCESS_TIMEOUT_SEC,
+                check=True,
+            )
+        except subprocess.CalledProcessError as e:
+            stderr = e.stderr.decode("utf-8", errors="replace").strip()
+            raise TTSServiceError(f"Lokálny TTS zlyhal ({self.engine}): {stderr}") from e
+        except (OSError, subprocess.TimeoutExpired) as e:
+            raise TTSServiceError(f"Lokálny TTS zlyhal ({self.engine}): {e}") from e
+
+        if self.engine == ENGINE_PIPER:
+            pcm, sample_rate = np.frombuffer(result.stdout, dtype=np.int16), self.model_sample_rate
+            if self.volume != 1.0:
+                pcm = np.clip(pcm.astype(np.float32) * self.volume, -32768, 32767).astype(np.int16)
+        else:
+            pcm, sample_rate = self._parse_wav(result.stdout)
+        return self._resample(pcm, sample_rate)
+
+    @staticmethod
+    def _parse_wav(data: bytes) -> Tuple[np.ndarray, int]:
+        """
+        Rozparsuje WAV z stdout.
+
+        espeak-ng pri zápise do rúry nepozná dĺžku dát a veľkosti v hlavičke
+        nie sú spoľahlivé, preto sa berie všetko za "data" chunkom.
+        """
+        if len(data) < 44 or data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+            raise TTSServiceError("Lokálny TTS nevrátil platný WAV")
+        sample_rate = struct.unpack("<I", data[24:28])[0]
+        data_pos = data.find(b"data", 12)
+        if data_pos < 0:
+            raise TTSServiceError("Lokálny TTS nevrátil platný WAV (chýba data chunk)")
+        payload = data[data_pos + 8:]
+        payload = payload[:len(payload) - len(payload) % 2]
+        return np.frombuffer(payload, dtype=np.int16), sample_rate
+
+    def _resample(self, pcm: np.ndarray, sample_rate: int) -> np.ndarray:
+        """Prevzorkuje PCM na frekvenciu mixera."""
+        if sample_rate == self.SAMPLE_RATE or len(pcm) == 0:
+            return pcm
+        divisor = gcd(self.SAMPLE_RATE, sample_rate)
+        resampled = resample_poly(
+            pcm.astype(np.float32), self.SAMPLE_RATE // divisor, sample_rate // divisor
+        )
+        return np.clip(resampled, -32768, 32767).astype(np.int16)
+
+    def _estimate_boundaries(self, text: str, pcm: np.ndarray) -> List[TTSWordBoundary]:
+        """
+        Odhadne časy slov: rozsah reči (bez ticha na začiatku a konci) sa
+        rozdelí medzi slová podľa ich dĺžky, interpunkcia pridáva pauzu.
+        """
+        words = list(re.finditer(r"\S+", text))
+        if not words or len(pcm) == 0:
+            return []
+
+        frame = self.SAMPLE_RATE // 100  # 10 ms
+        frames = len(pcm) // frame
+        if frames > 0:
+            energy = np.abs(pcm[:frames * frame].astype(np.float32)).reshape(frames, frame).mean(axis=1)
+            voiced = np.nonzero(energy > energy.max() * _SPEECH_THRESHOLD)[0]
+        else:
+            voiced = np.zeros(0, dtype=np.int64)
+        if len(voiced):
+            start_ms, end_ms = voiced[0] * 10.0, (voiced[-1] + 1) * 10.0
+        else:
+            start_ms, end_ms = 0.0, len(pcm) * 1000.0 / self.SAMPLE_RATE
+
+        weights = [
+            len(word.group(0)) + (3 if word.group(0)[-1] in ",;:.!?" else 1) for word in words
+        ]
+        scale = (end_ms - start_ms) / sum(weights)
+
+        boundaries = []
+        elapsed = start_ms
+        for word, weight in zip(words, weights):
+            boundaries.append(TTSWordBoundary(
+                time_ms=int(elapsed),
+                text_offset=word.start(),
+                word_length=len(word.group(0)),
+            ))
+            elapsed += weight * scale
+        return boundaries
@@ -0,0 +1,179 @@
+"""
+Zostavovanie SSML pre Azure TTS.
+
+Builder aplikuje nastavenia rate/pitch/volume cez <prosody>, vkladá pauzy
+medzi vety, obaľuje anglické herné termíny do <lang xml:lang="en-US"> a
+spája viac krátkych viet do jednej požiadavky. Pre každý kus textu si drží
+mapovanie offsetov SSML -> pôvodný text, aby word boundary eventy (ktoré
+Azure pri SSML vracia v offsetoch SSML) ukazovali do pôvodného textu.
+"""
+
+import bisect
+import logging
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple
+from xml.sax.saxutils import quoteattr
+
+logger = logging.getLogger(__name__)
+
+# Termíny, ktoré sa v slovenských vetách čítajú po anglicky
+DEFAULT_ENGLISH_TERMS = [
+    "braindance", "cyberdeck", "cyberware", "cyberpsycho", "edgerunner", "fixer",
+    "netrunner", "netrunning", "ripperdoc", "sandevistan", "shard", "street kid",
+    "corpo", "nomad", "quickhack", "daemon", "militech", "arasaka", "kiroshi",
+    "night city", "afterlife", "delamain", "relic", "flatline", "preem", "choom",
+]
+
+_ENTITIES = {"&": "&amp;", "<": "&lt;", ">": "&gt;"}
+
+
+def load_glossary_terms(path: Path) -> List[str]:
+    """
+    Načíta anglické termíny z lore glosára (riadky "- **Termín (...)** - ...").
+
+    Args:
+        path: Cesta k lore/glossary.md
+
+    Returns:
+        Zoznam termínov (bez vysvetlivky v zátvorke)
+    """
+    terms = []
+    try:
+        for line in path.read_text(encoding="utf-8").splitlines():
+            match = re.match(r"^\s*-\s+\*\*([^*]+)\*\*", line)
+            if match:
+                term = match.group(1).split("(")[0].strip()
+                if term:
+                    terms.append(term)
+    except OSError as e:
+        logger.warning(f"Nepodarilo sa načítať glosár {path}: {e}")
+    return terms
+
+
+@dataclass
+class SSMLDocument:
+    """Výsledné SSML s mapovaním offsetov späť do pôvodného textu."""
+
+    ssml: str
+    text: str
+    # (ssml_start, ssml_end, text_start, text_length) pre každý kus textu
+    spans: List[Tuple[int, int, int, int]] = field(default_factory=list)
+
+    def __post_init__(self):
+        self._starts = [span[0] for span in self.spans]
+
+    def to_text_offset(self, ssml_offset: int) -> Optional[int]:
+        """
+        Prevedie offset v SSML na offset v pôvodnom texte.
+
+        Returns:
+            Offset v texte alebo None ak offset ukazuje do značky
+        """
+        index = bisect.bisect_right(self._starts, ssml_offset) - 1
+        if index < 0:
+            return None
+        ssml_start, ssml_end, text_start, text_length = self.spans[index]
+        if ssml_offset >= ssml_end:
+            return None
+        if ssml_end - ssml_start == text_length:
+            return text_start + (ssml_offset - ssml_start)
+        return text_start  # XML entita - jeden znak textu
+
+
+class SSMLBuilder:
+    """Zostavuje SSML s prosody, pauzami a <lang> pre anglické termíny."""
+
+    def __init__(
+        self,
+        voice: str,
+        rate: float = 1.0,
+        pitch: float = 0.0,
+        volume: float = 1.0,
+        sentence_break_ms: int = 250,
+        english_terms: Optional[Iterable[str]] = None,
+    ):
+        """
+        Inicializuje builder.
+
+        Args:
+            voice: Názov Azure hlasu (napr. sk-SK-ViktoriaNeural)
+            rate: Rýchlosť reči (1.0 = normálna)
+            pitch: Posun výšky hlasu v poltónoch
+            volume: Hlasitosť (1.0 = normálna)
+            sentence_break_ms: Pauza medzi spojenými vetami
+            english_terms: Termíny na obalenie do <lang xml:lang="en-US">
+                (None = bez <lang>, funguje len s multilingual hlasmi)
+        """
+        self.voice = voice
+        self.language = "-".join(voice.split("-")[:2])
+        self.rate = f"{round((rate - 1.0) * 100):+d}%"
+        self.pitch = f"{pitch:+.1f}st"
+        self.volume = f"{round((volume - 1.0) * 100):+d}%"
+        self.sentence_break_ms = sentence_break_ms
+
+        self._terms_pattern = None
+        terms = sorted({t.lower() for t in english_terms or []}, key=len, reverse=True)
+        if terms:
+            self._terms_pattern = re.compile(
+                r"\b(" + "|".join(re.escape(t) for t in terms) + r")\b", re.IGNORECASE
+            )
+
+    def build(self, sentences: Sequence[str]) -> SSMLDocument:
+        """
+        Zostaví jedno SSML z jednej alebo viacerých viet.
+
+        Pôvodný text je " ".join(sentences) a na neho sa mapujú offsety.
+
+        Args:
+            sentences: Vety/položky na prečítanie v jednej požiadavke
+
+        Returns:
+            SSMLDocument
+        """
+        parts: List[str] = []
+        spans: List[Tuple[int, int, int, int]] = []
+        ssml_len = 0
+        text_pos = 0
+
+        def emit(markup: str):
+            nonlocal ssml_len
+            parts.append(markup)
+            ssml_len += len(markup)
+
+        def emit_text(chunk: str):
+            nonlocal text_pos
+            for piece in re.split(r"([&<>])", chunk):
+                if not piece:
+                    continue
+                escaped = _ENTITIES.get(piece, piece)
+                spans.append((ssml_len, ssml_len + len(escaped), text_pos, len(piece)))
+                emit(escaped)
+                text_pos += len(piece)
+
+        emit(
+            '<speak version="1.0" xmlns="http://www.w3.org/2001/10/synthesis" '
+            f"xml:lang={quoteattr(self.language)}>"
+            f"<voice name={quoteattr(self.voice)}>"
+            f"<prosody rate={quoteattr(self.rate)} pitch={quoteattr(self.pitch)} "
+            f"volume={quoteattr(self.volume)}>"
+        )
+
+        for index, sentence in enumerate(sentences):
+            if index > 0:
+                emit(f'<break time="{self.sentence_break_ms}ms"/>')
+                text_pos += 1  # medzera v " ".join(sentences)
+
+            last = 0
+            if self._terms_pattern is not None:
+                for match in self._terms_pattern.finditer(sentence):
+                    emit_text(sentence[last:match.start()])
+                    emit('<lang xml:lang="en-US">')
+                    emit_text(match.group(0))
+                    emit("</lang>")
+                    last = match.end()
+            emit_text(sentence[last:])
+
+        emit("</prosody></voice></speak>")
+        return SSMLDocument(ssml="".join(parts), text=" ".join(sentences), spans=spans)
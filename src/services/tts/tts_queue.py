@@ -3,146 +3,411 @@ Queue management pre TTS požiadavky.
 """
 
 import asyncio
+import heapq
 import logging
-from typing import Optional
-from dataclasses import dataclass
-from .azure_tts import TTSWordBoundary, AzureTTS
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
+from ...utils.tracing import SPAN_PLAYBACK_DONE, SPAN_TTS_FIRST_AUDIO, TurnTrace, now_ns
+from .audio_mixer import PlaybackHandle
+from .base import TTSBudgetExceeded, TTSEngine, TTSInterrupted, TTSWordBoundary
 
 logger = logging.getLogger(__name__)
 
+# Politiky pri plnej fronte
+DROP_NEW = "drop_new"        # zahodí novú položku (pôvodné správanie)
+DROP_OLDEST = "drop_oldest"  # zahodí najstaršiu položku
+DROP_LOWEST = "drop_lowest"  # zahodí najmenej prioritnú položku (ak je nová dôležitejšia)
+BLOCK = "block"              # počká na voľné miesto
+DROP_POLICIES = (DROP_NEW, DROP_OLDEST, DROP_LOWEST, BLOCK)
+
 
 @dataclass
 class TTSRequest:
     """Reprezentuje jednu TTS požiadavku vo fronte."""
     text: str
     priority: int = 0
+    enqueued_at: float = field(default_factory=time.perf_counter)
+    # Krátke položky spojené do jednej SSML požiadavky (text = " ".join(parts))
+    parts: List[str] = field(default_factory=list)
+    # Trace turnov, ktorých odpoveď táto položka prehráva
+    traces: List[TurnTrace] = field(default_factory=list)
+    enqueued_ns: int = field(default_factory=now_ns)
+
+    def __post_init__(self):
+        if not self.parts:
+            self.parts = [self.text]
+
+    def merge(self, text: str, trace: Optional[TurnTrace] = None):
+        """Pripojí ďalšiu krátku položku do tejto požiadavky."""
+        self.parts.append(text)
+        self.text = " ".join(self.parts)
+        if trace is not None:
+            self.traces.append(trace)
+
+    def finish_traces(self, status: str, handle: Optional[PlaybackHandle] = None):
+        """Zapíše TTS spany (ak sa prehrávalo) a ukončí trace turnov."""
+        end_ns = now_ns()
+        for trace in self.traces:
+            if handle is not None and handle.audible_at_ns is not None:
+                audible_ns = min(handle.audible_at_ns, end_ns)
+                trace.add(SPAN_TTS_FIRST_AUDIO, self.enqueued_ns, audible_ns, chars=len(self.text))
+                trace.add(SPAN_PLAYBACK_DONE, audible_ns, end_ns, audio_ms=handle.duration_ms)
+            trace.finish(tts_status=status)
+        self.traces.clear()
+
+
+@dataclass
+class TTSQueueStats:
+    """Metriky TTS fronty."""
+    enqueued: int = 0
+    played: int = 0
+    dropped: int = 0
+    interrupted: int = 0
+    failed: int = 0
+    prefetch_hits: int = 0
+    batched: int = 0
+    max_depth: int = 0
+    # Dohrané znaky a dĺžka audia (rýchlosť reči pre odhad úspory)
+    played_chars: int = 0
+    played_audio_ms: float = 0.0
+    wait_ms: Deque[float] = field(default_factory=lambda: deque(maxlen=500))
+
+    def snapshot(self, depth: int) -> Dict[str, float]:
+        """Vráti aktuálne metriky vrátane percentilov čakania vo fronte."""
+        waits = sorted(self.wait_ms)
+
+        def pct(p: float) -> float:
+            if not waits:
+                return 0.0
+            return waits[min(len(waits) - 1, int(p * len(waits)))]
+
+        return {
+            "depth": depth,
+            "max_depth": self.max_depth,
+            "enqueued": self.enqueued,
+            "played": self.played,
+            "dropped": self.dropped,
+            "interrupted": self.interrupted,
+            "failed": self.failed,
+            "prefetch_hits": self.prefetch_hits,
+            "batched": self.batched,
+            "played_chars": self.played_chars,
+            "played_audio_ms": self.played_audio_ms,
+            "wait_p50_ms": pct(0.50),
+            "wait_p95_ms": pct(0.95),
+        }
 
 
 class TTSQueue:
-    """Správa fronty TTS požiadaviek."""
+    """Správa fronty TTS požiadaviek s jedným trvalým konzumentom."""
 
-    def __init__(self, tts: AzureTTS, max_size: int = 10):
+    def __init__(
+        self,
+        tts: TTSEngine,
+        max_size: int = 10,
+        synthesis_slot: Optional[asyncio.Semaphore] = None,
+        drop_policy: str = DROP_NEW,
+        batch_max_chars: int = 0,
+    ):
         """
         Inicializuje TTS queue.
-        
+
         Args:
-            tts: AzureTTS inštancia
+            tts: TTS provider (AzureTTS, LocalTTS, FailoverTTS)
             max_size: Maximálna veľkosť fronty
+            synthesis_slot: Voliteľný semafor plánovača obmedzujúci súbežné syntézy
+            drop_policy: Čo robiť pri plnej fronte (viď DROP_POLICIES)
+            batch_max_chars: Krátke položky s rovnakou prioritou sa spájajú do
+                jednej syntézy, kým spolu nepresiahnu tento počet znakov (0 = vypnuté)
         """
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(
+                f"Neplatná drop policy '{drop_policy}'. "
+                f"Povolené hodnoty: {', '.join(DROP_POLICIES)}"
+            )
+
         self.tts = tts
         self.max_size = max_size
-        self.queue: asyncio.PriorityQueue[tuple[int, int, TTSRequest]] = asyncio.PriorityQueue(max_size)
-        self.is_processing = False
-        self._counter = 0  # Pre zachovanie FIFO poradia pri rovnakej priorite
-        self._current_task: Optional[asyncio.Task] = None
+        self.synthesis_slot = synthesis_slot or asyncio.Semaphore(2)
+        self.drop_policy = drop_policy
+        self.batch_max_chars = batch_max_chars
+        self.stats = TTSQueueStats()
+
+        # Halda (priorita, poradie, požiadavka) - poradie zachováva FIFO pri rovnakej priorite
+        self._heap: List[Tuple[int, int, TTSRequest]] = []
+        self._counter = 0
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+        self._prefetched: Dict[int, asyncio.Task] = {}
+        self._worker: Optional[asyncio.Task] = None
+        self._current: Optional[TTSRequest] = None
+        # Položky odovzdané mixeru (prehrávaná a nasledujúca bez medzery)
+        self._playing: Dict[PlaybackHandle, TTSRequest] = {}
+        # Posledný barge-in: položky staršie než tento čas s prioritou <= drop sú zastarané
+        self._interrupted_at = 0.0
+        self._interrupt_drop_priority = -1
+
+    @property
+    def depth(self) -> int:
+        """Počet čakajúcich položiek."""
+        return len(self._heap)
+
+    @property
+    def is_processing(self) -> bool:
+        """True ak sa práve niečo prehráva."""
+        return self._current is not None
 
-    async def add(self, text: str, priority: int = 0) -> bool:
+    def start(self):
+        """Spustí trvalého konzumenta v bežiacom event loope."""
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Zastaví konzumenta a zahodí čakajúce položky."""
+        await self.flush()
+        if self._worker:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+
+    @property
+    def ms_per_char(self) -> Optional[float]:
+        """Nameraná dĺžka prehrávania na znak (None pred prvým dohraním)."""
+        if not self.stats.played_chars:
+            return None
+        return self.stats.played_audio_ms / self.stats.played_chars
+
+    def metrics(self) -> Dict[str, float]:
+        """Vráti metriky fronty."""
+        return self.stats.snapshot(depth=self.depth)
+
+    async def add(self, text: str, priority: int = 0, trace: Optional[TurnTrace] = None) -> bool:
         """
         Pridá text do fronty.
-        
+
         Args:
             text: Text na syntézu
             priority: Priorita (nižšie číslo = vyššia priorita)
-            
+            trace: Voliteľný trace turnu - fronta doň zapíše tts_first_audio
+                a playback_done a turn ukončí
+
         Returns:
-            True ak bol text pridaný, False ak je fronta plná
+            True ak bol text pridaný, False ak bol zahodený
         """
-        if self.queue.full():
-            logger.warning("TTS fronta je plná, správa zahodená")
-            return False
+        self.start()
+        request = TTSRequest(text=text, priority=priority, traces=[trace] if trace else [])
+
+        if self._merge_into_queued(text, priority, trace):
+            self.stats.enqueued += 1
+            self.stats.batched += 1
+            return True
+
+        while len(self._heap) >= self.max_size:
+            if self.drop_policy == BLOCK:
+                self._not_full.clear()
+                await self._not_full.wait()
+                continue
+            if self.drop_policy == DROP_NEW:
+                self.stats.dropped += 1
+                request.finish_traces("dropped")
+                logger.warning("TTS fronta je plná, správa zahodená")
+                return False
+            if self.drop_policy == DROP_OLDEST:
+                victim = min(self._heap, key=lambda item: item[1])
+            else:
+                victim = max(self._heap)
+                if victim[0] <= priority:
+                    self.stats.dropped += 1
+                    request.finish_traces("dropped")
+                    logger.warning("TTS fronta je plná, správa s nízkou prioritou zahodená")
+                    return False
+            self._remove(victim)
+            self.stats.dropped += 1
+            logger.warning("TTS fronta je plná, zahodená staršia/menej dôležitá správa")
 
         self._counter += 1
-        request = TTSRequest(text=text, priority=priority)
-        await self.queue.put((priority, self._counter, request))
-        
-        if not self.is_processing:
-            self._current_task = asyncio.create_task(self.process_queue())
-        
+        heapq.heappush(self._heap, (priority, self._counter, request))
+        self.stats.enqueued += 1
+        self.stats.max_depth = max(self.stats.max_depth, len(self._heap))
+        self._not_empty.set()
+        if self._current is not None:
+            # Konzument čaká na dohranie - bez toho by sa nová položka renderovala až po ňom
+            self._schedule_prefetch()
+        return True
+
+    def _merge_into_queued(self, text: str, priority: int, trace: Optional[TurnTrace]) -> bool:
+        """
+        Pripojí krátky text k poslednej čakajúcej položke s rovnakou prioritou.
+
+        Položky, ktorých syntéza už beží (prefetch), sa nemenia.
+        """
+        if not self.batch_max_chars:
+            return False
+        same = [item for item in self._heap if item[0] == priority]
+        if not same:
+            return False
+        _, counter, request = max(same, key=lambda item: item[1])
+        if counter in self._prefetched:
+            return False
+        if len(request.text) + 1 + len(text) > self.batch_max_chars:
+            return False
+        request.merge(text, trace)
         return True
 
-    async def process_queue(self):
-        """Spracuje všetky požiadavky vo fronte."""
-        self.is_processing = True
-        
+    async def _run(self):
+        """
+        Trvalý konzument.
+
+        Nasledujúca položka sa vyrenderuje vopred a do mixera sa zaradí ešte
+        počas prehrávania aktuálnej, takže vety idú za sebou bez medzery.
+        """
+        previous: Optional[Tuple[TTSRequest, PlaybackHandle]] = None
+        while True:
+            if not self._heap:
+                if previous is not None:
+                    await self._complete(*previous)
+                    previous = None
+                    continue
+                self._not_empty.clear()
+                await self._not_empty.wait()
+                continue
+
+            _, counter, request = heapq.heappop(self._heap)
+            self._not_full.set()
+            self.stats.wait_ms.append((time.perf_counter() - request.enqueued_at) * 1000)
+
+            render = self._prefetched.pop(counter, None)
+            if render is not None:
+                self.stats.prefetch_hits += 1
+            else:
+                render = asyncio.create_task(self._render(request))
+            self._schedule_prefetch()
+
+            try:
+                speech = await render
+                if self._is_stale(request):
+                    self.stats.dropped += 1
+                    request.finish_traces("interrupted")
+                    continue
+                self._current = request
+                handle = self.tts.start_playback(speech, on_word_boundary=self._print_word)
+                self._playing[handle] = request
+            except asyncio.CancelledError:
+                raise
+            except TTSBudgetExceeded as e:
+                self.stats.dropped += 1
+                request.finish_traces("budget")
+                logger.info(f"TTS požiadavka preskočená: {e}")
+                continue
+            except Exception as e:
+                self.stats.failed += 1
+                request.finish_traces("failed")
+                logger.error(f"Chyba pri spracovaní TTS požiadavky: {e}")
+                continue
+
+            if previous is not None:
+                await self._complete(*previous)
+            previous = (request, handle)
+
+    async def _render(self, request: TTSRequest):
+        """Vyrenderuje požiadavku v rámci limitu súbežných syntéz."""
+        async with self.synthesis_slot:
+            return await self.tts.synthesize_async(request.text, parts=request.parts)
+
+    async def _complete(self, request: TTSRequest, handle: PlaybackHandle):
+        """Počká na dohranie položky a zapíše výsledok do metrík."""
+        status = "failed"
         try:
-            while not self.queue.empty():
-                _, _, request = await self.queue.get()
-                try:
-                    # Vytvoríme event pre sledovanie word boundaries
-                    word_printed = asyncio.Event()
-                    printed_text = []
-
-                    async def handle_word_boundary(text: str, boundary: TTSWordBoundary):
-                        """Callback pre spracovanie word boundary eventu."""
-                        word = text[boundary.text_offset:boundary.text_offset + boundary.word_length]
-                        printed_text.append(word)
-                        print(f"{word} ", end="", flush=True)  # Pridáme medzeru za každé slovo
-                        word_printed.set()
-
-                    # Vytvoríme future pre dokončenie syntézy
-                    synthesis_done = asyncio.Future()
-                    
-                    def on_synthesis_complete(evt):
-                        synthesis_done.set_result(True)
-                    
-                    # Spustíme TTS s callbackmi
-                    boundaries = await self.tts.speak_async(
-                        request.text,
-                        on_word_boundary=handle_word_boundary,
-                        on_completed=on_synthesis_complete
-                    )
-                    
-                    # Počkáme na dokončenie syntézy
-                    await synthesis_done
-                    
-                except Exception as e:
-                    logger.error(f"Chyba pri spracovaní TTS požiadavky: {e}")
-                finally:
-                    self.queue.task_done()
+            await self.tts.wait_playback(handle)
+            self.stats.played += 1
+            self.stats.played_chars += len(request.text)
+            self.stats.played_audio_ms += handle.duration_ms
+            status = "played"
+        except TTSInterrupted:
+            self.stats.interrupted += 1
+            status = "interrupted"
+            logger.info("TTS požiadavka prerušená (barge-in)")
+        except Exception as e:
+            self.stats.failed += 1
+            logger.error(f"Chyba pri prehrávaní TTS požiadavky: {e}")
         finally:
-            self.is_processing = False
+            request.finish_traces(status, handle)
+            self._playing.pop(handle, None)
+            if self._current is request:
+                self._current = None
 
-    async def _display_timed_text(self, text: str, boundaries: list[TTSWordBoundary]):
+    async def _print_word(self, text: str, boundary: TTSWordBoundary):
+        """Callback pre spracovanie word boundary eventu."""
+        word = text[boundary.text_offset:boundary.text_offset + boundary.word_length]
+        print(f"{word} ", end="", flush=True)  # Pridáme medzeru za každé slovo
+
+    def _is_stale(self, request: TTSRequest) -> bool:
+        """True ak položku (rozrenderovanú počas barge-in) nahradil novší turn."""
+        return (
+            request.enqueued_at < self._interrupted_at
+            and request.priority <= self._interrupt_drop_priority
+        )
+
+    def _schedule_prefetch(self):
+        """Spustí renderovanie položky na čele fronty počas prehrávania aktuálnej."""
+        if not self._heap:
+            return
+        _, counter, request = self._heap[0]
+        if counter not in self._prefetched:
+            self._prefetched[counter] = asyncio.create_task(self._render(request))
+
+    def _remove(self, item: Tuple[int, int, TTSRequest]):
+        """Odstráni položku z haldy a zruší jej prefetch."""
+        self._heap.remove(item)
+        heapq.heapify(self._heap)
+        item[2].finish_traces("dropped")
+        task = self._prefetched.pop(item[1], None)
+        if task:
+            task.cancel()
+        self._not_full.set()
+
+    async def interrupt(self, drop_priority: int = 0) -> Optional[float]:
         """
-        Zobrazí text synchrónne s TTS časovaním.
-        
+        Barge-in: okamžite stíši aktuálne prehrávanie a zahodí zastarané položky.
+
+        Položky s prioritou <= drop_priority (odpovede na predchádzajúci turn
+        streamera) sa zastavia alebo zahodia, menej prioritné (chat) zostanú
+        vo fronte a prehrajú sa až po novej odpovedi. Odpoveď do chatu, ktorú
+        už prehráva mixer, dohrá.
+
         Args:
-            text: Celý text na zobrazenie
-            boundaries: List word boundary eventov
+            drop_priority: Najnižšia priorita, ktorá sa ešte zahodí
+
+        Returns:
+            Čas od prerušenia po ticho v milisekundách alebo None ak nič nehralo
         """
-        if not boundaries:
-            return
+        start = time.perf_counter()
+        self._interrupted_at = start
+        self._interrupt_drop_priority = drop_priority
+        handles = [
+            handle for handle, request in self._playing.items() if request.priority <= drop_priority
+        ]
+        stopped = bool(handles) and await self.tts.stop_speaking_async(handles)
+        silence_ms = (time.perf_counter() - start) * 1000
+
+        stale = [item for item in self._heap if item[0] <= drop_priority]
+        for item in stale:
+            self._remove(item)
+        self.stats.dropped += len(stale)
 
-        # Zoradíme boundaries podľa času
-        boundaries.sort(key=lambda x: x.time_ms)
-        
-        # Pre každé slovo vypočítame čas čakania od predchádzajúceho
-        last_time = 0
-        for boundary in boundaries:
-            # Vypočítame čas čakania
-            wait_time = (boundary.time_ms - last_time) / 1000.0  # konverzia na sekundy
-            if wait_time > 0:
-                await asyncio.sleep(wait_time)
-            
-            # Získame slovo z textu
-            word = text[boundary.text_offset:boundary.text_offset + boundary.word_length]
-            # Vypíšeme slovo
-            print(word, end="", flush=True)
-            
-            last_time = boundary.time_ms
+        if not stopped and not stale:
+            return None
+        logger.info(
+            f"Barge-in: ticho po {silence_ms:.0f}ms, zahodené položky: {len(stale)}"
+        )
+        return silence_ms if stopped else None
 
     async def flush(self):
-        """Vyčistí frontu."""
-        if self._current_task:
-            self._current_task.cancel()
-            try:
-                await self._current_task
-            except asyncio.CancelledError:
-                pass
-        
-        while not self.queue.empty():
-            try:
-                await self.queue.get()
-                self.queue.task_done()
-            except asyncio.QueueEmpty:
-                break
+        """Vyčistí frontu a zastaví aktuálne prehrávanie."""
+        for item in list(self._heap):
+            self._remove(item)
+        if self._current is not None:
+            await self.tts.stop_speaking_async()
@@ -0,0 +1,450 @@
+"""
+Asynchrónne čítanie Twitch chatu cez IRC a odpovedanie cez OpenAI asistenta.
+
+Správy z chatu prechádzajú filtrom (trigger prefix, cooldown na diváka,
+de-duplikácia), nárazy otázok sa spájajú do jedného volania asistenta
+a odpovede sa posielajú späť do chatu cez rate limiter.
+"""
+
+import asyncio
+import logging
+import os
+import ssl
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from ..config.config import TwitchConfig
+from ..core.scheduler import LANE_CHAT, LANE_VIP, DeadlineExceeded
+from .reply import AssistantReply
+
+logger = logging.getLogger(__name__)
+
+
+class TwitchChatError(RuntimeError):
+    """Výnimka pre chyby Twitch chatu."""
+
+    pass
+
+
+class TwitchCredentials:
+    def __init__(self):
+        """Načíta prihlasovacie údaje bota z premenných prostredia."""
+        token = os.getenv("TWITCH_ACCESS_TOKEN_BOT")
+        channel = os.getenv("TWITCH_CHANNEL")
+
+        if not token or not channel:
+            raise TwitchChatError(
+                "Chýbajú potrebné premenné prostredia - skontroluj "
+                "TWITCH_ACCESS_TOKEN_BOT a TWITCH_CHANNEL v súbore .env."
+            )
+
+        self.token = token if token.startswith("oauth:") else f"oauth:{token}"
+        self.channel = channel.lstrip("#").lower()
+        self.nick = os.getenv("TWITCH_BOT_NICK", self.channel).lower()
+
+
+@dataclass
+class ChatMessage:
+    """Jedna správa z Twitch chatu."""
+
+    author: str
+    text: str
+    tags: Dict[str, str] = field(default_factory=dict)
+    received_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def badges(self) -> Dict[str, str]:
+        """Badge diváka (napr. {"moderator": "1", "subscriber": "12"})."""
+        raw = self.tags.get("badges", "")
+        result = {}
+        for badge in raw.split(","):
+            if badge:
+                name, _, version = badge.partition("/")
+                result[name] = version
+        return result
+
+    @property
+    def is_moderator(self) -> bool:
+        badges = self.badges
+        return self.tags.get("mod") == "1" or "moderator" in badges or "broadcaster" in badges
+
+    @property
+    def is_subscriber(self) -> bool:
+        return self.tags.get("subscriber") == "1" or "subscriber" in self.badges
+
+    @property
+    def lane(self) -> str:
+        """Pruh plánovača pre túto správu (mody a suby majú prednosť)."""
+        return LANE_VIP if self.is_moderator or self.is_subscriber else LANE_CHAT
+
+
+@dataclass
+class ChatStats:
+    """Počítadlá spracovania chatu."""
+
+    received: int = 0
+    accepted: int = 0
+    ignored: int = 0
+    dropped_cooldown: int = 0
+    dropped_duplicate: int = 0
+    dropped_overflow: int = 0
+    dropped_deadline: int = 0
+    dropped_outbound: int = 0
+    batches: int = 0
+    replies_sent: int = 0
+    reconnects: int = 0
+
+
+def parse_irc_line(line: str) -> Tuple[Dict[str, str], str, str, List[str]]:
+    """
+    Rozparsuje jeden IRC riadok (vrátane IRCv3 tagov).
+
+    Args:
+        line: Riadok bez CRLF
+
+    Returns:
+        (tags, prefix, command, params) - posledný parameter obsahuje trailing text
+    """
+    tags: Dict[str, str] = {}
+    prefix = ""
+
+    if line.startswith("@"):
+        raw_tags, _, line = line[1:].partition(" ")
+        for item in raw_tags.split(";"):
+            key, _, value = item.partition("=")
+            tags[key] = value.replace("\\s", " ").replace("\\:", ";")
+
+    if line.startswith(":"):
+        prefix, _, line = line[1:].partition(" ")
+
+    trailing = None
+    if " :" in line:
+        line, _, trailing = line.partition(" :")
+
+    parts = line.split()
+    command = parts[0].upper() if parts else ""
+    params = parts[1:]
+    if trailing is not None:
+        params.append(trailing)
+
+    return tags, prefix, command, params
+
+
+class RateLimiter:
+    """Token bucket limiter pre odchádzajúce správy."""
+
+    def __init__(self, max_messages: int, period_sec: float):
+        self.capacity = float(max_messages)
+        self.refill_rate = max_messages / period_sec
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_rate)
+        self._updated = now
+
+    async def acquire(self):
+        """Počká, kým je možné poslať ďalšiu správu."""
+        while True:
+            self._refill()
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return
+            await asyncio.sleep((1.0 - self._tokens) / self.refill_rate)
+
+
+class TwitchChatService:
+    """Pripojenie na Twitch IRC, filtrovanie otázok a odpovede cez asistenta."""
+
+    def __init__(
+        self,
+        config: TwitchConfig,
+        credentials: TwitchCredentials,
+        assistant,
+        scheduler=None,
+        on_reply: Optional[Callable[[List[ChatMessage], AssistantReply], Awaitable[None]]] = None,
+    ):
+        """
+        Inicializuje chat službu.
+
+        Args:
+            config: Konfigurácia Twitch chatu
+            credentials: Token, kanál a nick bota
+            assistant: AssistantService (používa sa get_reply)
+            scheduler: Voliteľný PriorityScheduler (pruhy vip/chat)
+            on_reply: Voliteľný callback po získaní odpovede (napr. TTS)
+        """
+        self.config = config
+        self.credentials = credentials
+        self.assistant = assistant
+        self.scheduler = scheduler
+        self.on_reply = on_reply
+        self.stats = ChatStats()
+
+        self._prefixes = tuple(p.lower() for p in config.trigger_prefixes)
+        self._last_seen: Dict[str, float] = {}
+        self._recent: "OrderedDict[str, float]" = OrderedDict()
+        self._pending: asyncio.Queue = asyncio.Queue(config.max_pending)
+        # Odchádzajúce správy za rate limiterom; pri výpadku spojenia sa najstaršie zahodia
+        self._outbound: Deque[str] = deque(maxlen=config.max_outbound)
+        self._outbound_ready = asyncio.Event()
+        self._limiter = RateLimiter(config.rate_limit_messages, config.rate_limit_period_sec)
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._tasks: List[asyncio.Task] = []
+        self._answers: set = set()
+        self._running = False
+
+    def start(self):
+        """Spustí pripojenie, batcher a odosielanie v bežiacom event loope."""
+        if self._running:
+            return
+        self._running = True
+        self._tasks = [
+            asyncio.create_task(self._connection_loop()),
+            asyncio.create_task(self._batch_loop()),
+            asyncio.create_task(self._send_loop()),
+        ]
+        logger.info(f"Twitch chat spustený (kanál: #{self.credentials.channel})")
+
+    async def stop(self):
+        """Zastaví všetky úlohy a zatvorí spojenie."""
+        self._running = False
+        for task in [*self._tasks, *self._answers]:
+            task.cancel()
+        await asyncio.gather(*self._tasks, *self._answers, return_exceptions=True)
+        self._tasks = []
+        await self._close_writer()
+        logger.info("Twitch chat zastavený")
+
+    async def send_message(self, text: str):
+        """Zaradí správu na odoslanie do chatu (delí dlhé texty)."""
+        limit = self.config.max_reply_length
+        text = " ".join(text.split())
+        while text:
+            if len(text) <= limit:
+                chunk, text = text, ""
+            else:
+                cut = text.rfind(" ", 0, limit)
+                cut = cut if cut > 0 else limit
+                chunk, text = text[:cut], text[cut:].lstrip()
+            if len(self._outbound) == self._outbound.maxlen:
+                self.stats.dropped_outbound += 1
+            self._outbound.append(chunk)
+        self._outbound_ready.set()
+
+    # --- Príjem -----------------------------------------------------------
+
+    async def _connection_loop(self):
+        """Udržiava spojenie s IRC serverom (reconnect s backoffom)."""
+        backoff = 1.0
+        while self._running:
+            try:
+                reader, writer = await asyncio.open_connection(
+                    self.config.host,
+                    self.config.port,
+                    ssl=ssl.create_default_context() if self.config.use_tls else None,
+                )
+                self._writer = writer
+                await self._login()
+                backoff = 1.0
+                await self._read_loop(reader)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Twitch spojenie zlyhalo: {e}")
+            finally:
+                await self._close_writer()
+
+            if self._running:
+                self.stats.reconnects += 1
+                logger.info(f"Opätovné pripojenie na Twitch o {backoff:.0f}s")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60.0)
+
+    async def _login(self):
+        await self._write_raw(f"PASS {self.credentials.token}")
+        await self._write_raw(f"NICK {self.credentials.nick}")
+        await self._write_raw("CAP REQ :twitch.tv/tags twitch.tv/commands")
+        await self._write_raw(f"JOIN #{self.credentials.channel}")
+
+    async def _read_loop(self, reader: asyncio.StreamReader):
+        while self._running:
+            raw = await reader.readline()
+            if not raw:
+                raise ConnectionError("Server ukončil spojenie")
+            line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+            if line:
+                await self._handle_line(line)
+
+    async def _handle_line(self, line: str):
+        tags, prefix, command, params = parse_irc_line(line)
+
+        if command == "PING":
+            await self._write_raw(f"PONG :{params[-1] if params else 'tmi.twitch.tv'}")
+        elif command == "PRIVMSG" and len(params) >= 2:
+            author = tags.get("display-name") or prefix.split("!", 1)[0]
+            self._ingest(ChatMessage(author=author, text=params[-1], tags=tags))
+        elif command == "RECONNECT":
+            raise ConnectionError("Server požiadal o reconnect")
+        elif command == "NOTICE" and params:
+            logger.warning(f"Twitch NOTICE: {params[-1]}")
+
+    def _ingest(self, message: ChatMessage):
+        """Prefiltruje správu a zaradí ju do fronty na odpoveď."""
+        self.stats.received += 1
+        author_key = message.author.lower()
+
+        if author_key == self.credentials.nick:
+            self.stats.ignored += 1
+            return
+
+        text = message.text.strip()
+        if self._prefixes:
+            lowered = text.lower()
+            prefix = next((p for p in self._prefixes if lowered.startswith(p)), None)
+            if prefix is None:
+                self.stats.ignored += 1
+                return
+            text = text[len(prefix):].lstrip(" ,:")
+        if not text:
+            self.stats.ignored += 1
+            return
+        message.text = text
+
+        now = message.received_at
+        last = self._last_seen.get(author_key)
+        if last is not None and now - last < self.config.user_cooldown_sec and not message.is_moderator:
+            self.stats.dropped_cooldown += 1
+            return
+
+        key = " ".join(text.lower().split())
+        self._expire_recent(now)
+        if key in self._recent:
+            self.stats.dropped_duplicate += 1
+            return
+
+        try:
+            self._pending.put_nowait(message)
+        except asyncio.QueueFull:
+            self.stats.dropped_overflow += 1
+            return
+
+        self._recent[key] = now
+        self._last_seen[author_key] = now
+        self.stats.accepted += 1
+
+        if len(self._last_seen) > 10000:
+            cutoff = now - self.config.user_cooldown_sec
+            self._last_seen = {k: t for k, t in self._last_seen.items() if t >= cutoff}
+
+    def _expire_recent(self, now: float):
+        cutoff = now - self.config.dedup_window_sec
+        while self._recent:
+            key, seen = next(iter(self._recent.items()))
+            if seen >= cutoff:
+                break
+            self._recent.popitem(last=False)
+
+    # --- Spracovanie ------------------------------------------------------
+
+    async def _batch_loop(self):
+        """Spája nárazy otázok do jedného volania asistenta."""
+        while self._running:
+            batch = [await self._pending.get()]
+            deadline = time.monotonic() + self.config.batch_window_sec
+            while len(batch) < self.config.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._pending.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            lanes: Dict[str, List[ChatMessage]] = {}
+            for message in batch:
+                lanes.setdefault(message.lane, []).append(message)
+            for messages in lanes.values():
+                self.stats.batches += 1
+                if self.scheduler is None:
+                    await self._answer_safe(messages)
+                    continue
+                # Súbežnosť a poradie rieši plánovač
+                task = asyncio.create_task(self._answer_safe(messages))
+                self._answers.add(task)
+                task.add_done_callback(self._answers.discard)
+
+    async def _answer_safe(self, batch: List[ChatMessage]):
+        try:
+            await self._answer(batch)
+        except DeadlineExceeded:
+            self.stats.dropped_deadline += len(batch)
+            logger.info(f"Otázky z chatu zahodené po deadline ({len(batch)} správ)")
+        except Exception as e:
+            logger.error(f"Chyba pri odpovedi do chatu: {e}")
+
+    async def _answer(self, batch: List[ChatMessage]):
+        if len(batch) == 1:
+            author_name = batch[0].author
+            user_input = batch[0].text
+        else:
+            author_name = "Twitch chat"
+            lines = "\n".join(f"[{m.author}]: {m.text}" for m in batch)
+            user_input = f"Viac otázok z chatu naraz, odpovedz stručne každému:\n{lines}"
+
+        logger.info(f"Chat dávka ({len(batch)} správ) -> asistent")
+        lane = batch[0].lane
+        ask = lambda: self.assistant.get_reply(author_name, user_input, conversation=lane)
+        if self.scheduler:
+            reply = await self.scheduler.submit(lane, ask)
+        else:
+            reply = await ask()
+        if not reply:
+            return
+
+        # Do chatu ide podrobná verzia, krátku môže on_reply prečítať
+        mentions = " ".join(f"@{m.author}" for m in batch)
+        await self.send_message(f"{mentions} {reply.detail}")
+
+        if self.on_reply:
+            await self.on_reply(batch, reply)
+
+    # --- Odosielanie ------------------------------------------------------
+
+    async def _send_loop(self):
+        """Odosiela správy do chatu v rámci Twitch rate limitu."""
+        while self._running:
+            if not self._outbound:
+                self._outbound_ready.clear()
+                await self._outbound_ready.wait()
+                continue
+            if self._writer is None:
+                # Bez spojenia nemíňame tokeny limitera
+                await asyncio.sleep(1.0)
+                continue
+            await self._limiter.acquire()
+            text = self._outbound.popleft()
+            try:
+                await self._write_raw(f"PRIVMSG #{self.credentials.channel} :{text}")
+                self.stats.replies_sent += 1
+            except Exception as e:
+                logger.warning(f"Odoslanie do chatu zlyhalo: {e}")
+                self._outbound.appendleft(text)
+
+    async def _write_raw(self, line: str):
+        if self._writer is None:
+            raise ConnectionError("Nie je pripojenie na Twitch")
+        self._writer.write(f"{line}\r\n".encode("utf-8"))
+        await self._writer.drain()
+
+    async def _close_writer(self):
+        writer, self._writer = self._writer, None
+        if writer is not None:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except Exception:
+                pass
@@ -0,0 +1,228 @@
+"""
+Počítadlo spotreby a nákladov za Azure TTS a OpenAI.
+
+Každé volanie len pripočíta čísla do denného bucketu v pamäti (pod zámkom,
+bez I/O); súhrn za aktuálny mesiac sa udržiava inkrementálne. Na disk sa
+ukladá periodicky mimo event loopu do rolovacieho JSON súboru (posledných
+retention_days dní). Pri priblížení sa k mesačnému rozpočtu meter prepína
+lacnejšie režimy: kratšie odpovede asistenta, lokálne TTS a nakoniec Azure
+TTS len z cache.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import date
+from pathlib import Path
+from typing import Any, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Režimy TTS podľa čerpania rozpočtu znakov
+TTS_MODE_NORMAL = "normal"
+TTS_MODE_LOCAL = "local"  # preferuj lokálny engine
+TTS_MODE_CACHE_ONLY = "cache_only"  # Azure len z cache
+
+# Režimy asistenta podľa čerpania rozpočtu tokenov
+LLM_MODE_NORMAL = "normal"
+LLM_MODE_SHORT = "short"  # kratšie odpovede
+
+_COUNTERS = ("tts_chars", "tts_requests", "prompt_tokens", "completion_tokens", "llm_requests")
+
+
+class UsageMeter:
+    """Počíta znaky, tokeny a požiadavky a vyhodnocuje mäkký rozpočet."""
+
+    def __init__(self, config, store_path: Optional[Path] = None):
+        """
+        Inicializuje meter a načíta uloženú spotrebu.
+
+        Args:
+            config: UsageConfig
+            store_path: Prepíše cestu k súboru so spotrebou z konfigurácie
+        """
+        self.config = config
+        self.store_path = Path(store_path or config.store_path)
+
+        self._lock = threading.Lock()
+        self._days: Dict[str, Dict[str, int]] = {}
+        self._month: Dict[str, int] = dict.fromkeys(_COUNTERS, 0)
+        self._month_key = date.today().strftime("%Y-%m")
+        self._recent: Dict[str, Deque[float]] = {"tts": deque(), "llm": deque()}
+        self._dirty = False
+        self._flush_task: Optional[asyncio.Task] = None
+        self._tts_mode = TTS_MODE_NORMAL
+        self._llm_mode = LLM_MODE_NORMAL
+
+        self._load()
+        self._update_modes()
+
+    def start(self):
+        """Spustí periodické ukladanie v bežiacom event loope."""
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """Zastaví periodické ukladanie a uloží posledný stav."""
+        if self._flush_task:
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+        await asyncio.get_running_loop().run_in_executor(None, self.flush)
+
+    def record_tts(self, chars: int):
+        """Započíta syntetizované (platené) znaky."""
+        self._add({"tts_chars": chars, "tts_requests": 1}, "tts")
+
+    def record_llm(self, prompt_tokens: int, completion_tokens: int):
+        """Započíta tokeny jedného runu asistenta."""
+        self._add(
+            {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "llm_requests": 1},
+            "llm",
+        )
+
+    def tts_mode(self) -> str:
+        """Aktuálny režim TTS (TTS_MODE_*)."""
+        return self._tts_mode
+
+    def llm_mode(self) -> str:
+        """Aktuálny režim asistenta (LLM_MODE_*)."""
+        return self._llm_mode
+
+    def requests_per_minute(self, kind: str) -> int:
+        """Počet požiadaviek ("tts" alebo "llm") za poslednú minútu."""
+        with self._lock:
+            recent = self._recent[kind]
+            self._trim(recent, time.monotonic())
+            return len(recent)
+
+    def cost_usd(self) -> Dict[str, float]:
+        """Odhad nákladov za aktuálny mesiac."""
+        with self._lock:
+            month = dict(self._month)
+        tts = month["tts_chars"] / 1e6 * self.config.tts_price_per_million_chars
+        llm = (
+            month["prompt_tokens"] / 1e6 * self.config.prompt_price_per_million_tokens
+            + month["completion_tokens"] / 1e6 * self.config.completion_price_per_million_tokens
+        )
+        return {"tts": tts, "llm": llm, "total": tts + llm}
+
+    def metrics(self) -> Dict[str, Any]:
+        """Vráti súhrn spotreby za mesiac, RPM, náklady a režimy."""
+        with self._lock:
+            snapshot: Dict[str, Any] = {f"month_{k}": v for k, v in self._month.items()}
+        snapshot["tts_rpm"] = self.requests_per_minute("tts")
+        snapshot["llm_rpm"] = self.requests_per_minute("llm")
+        snapshot["tts_budget_ratio"] = self._ratio("tts")
+        snapshot["llm_budget_ratio"] = self._ratio("llm")
+        snapshot.update({f"cost_{k}_usd": v for k, v in self.cost_usd().items()})
+        snapshot["tts_mode"] = self._tts_mode
+        snapshot["llm_mode"] = self._llm_mode
+        return snapshot
+
+    def flush(self):
+        """Uloží spotrebu na disk (atomicky, volať mimo event loopu)."""
+        with self._lock:
+            if not self._dirty:
+                return
+            cutoff = date.fromordinal(date.today().toordinal() - self.config.retention_days)
+            self._days = {
+                day: counters
+                for day, counters in self._days.items()
+                if date.fromisoformat(day) >= cutoff
+            }
+            data = {"days": {day: dict(counters) for day, counters in self._days.items()}}
+            self._dirty = False
+
+        tmp_path = self.store_path.with_suffix(self.store_path.suffix + ".tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.store_path)
+        except OSError as e:
+            logger.error(f"Chyba pri ukladaní spotreby: {e}")
+            with self._lock:
+                self._dirty = True
+
+    def _add(self, values: Dict[str, int], kind: str):
+        now = time.monotonic()
+        today = date.today()
+        with self._lock:
+            month_key = today.strftime("%Y-%m")
+            if month_key != self._month_key:
+                self._month_key = month_key
+                self._month = dict.fromkeys(_COUNTERS, 0)
+            day = self._days.setdefault(today.isoformat(), dict.fromkeys(_COUNTERS, 0))
+            for key, value in values.items():
+                day[key] = day.get(key, 0) + value
+                self._month[key] += value
+            recent = self._recent[kind]
+            recent.append(now)
+            self._trim(recent, now)
+            self._dirty = True
+        self._update_modes()
+
+    @staticmethod
+    def _trim(recent: Deque[float], now: float):
+        while recent and now - recent[0] > 60.0:
+            recent.popleft()
+
+    def _ratio(self, kind: str) -> float:
+        if kind == "tts":
+            budget = self.config.tts_monthly_char_budget
+            used = self._month["tts_chars"]
+        else:
+            budget = self.config.llm_monthly_token_budget
+            used = self._month["prompt_tokens"] + self._month["completion_tokens"]
+        return used / budget if budget else 0.0
+
+    def _update_modes(self):
+        """Prepočíta režimy a zaloguje zmenu."""
+        tts_ratio = self._ratio("tts")
+        if tts_ratio >= 1.0:
+            tts_mode = TTS_MODE_CACHE_ONLY
+        elif tts_ratio >= self.config.soft_limit_ratio:
+            tts_mode = TTS_MODE_LOCAL
+        else:
+            tts_mode = TTS_MODE_NORMAL
+
+        llm_mode = (
+            LLM_MODE_SHORT if self._ratio("llm") >= self.config.soft_limit_ratio else LLM_MODE_NORMAL
+        )
+
+        if tts_mode != self._tts_mode:
+            logger.warning(f"TTS rozpočet vyčerpaný na {tts_ratio:.0%}, režim TTS: {tts_mode}")
+            self._tts_mode = tts_mode
+        if llm_mode != self._llm_mode:
+            logger.warning(f"Rozpočet tokenov vyčerpaný na {self._ratio('llm'):.0%}, režim asistenta: {llm_mode}")
+            self._llm_mode = llm_mode
+
+    def _load(self):
+        """Načíta uloženú spotrebu a spočíta súhrn za aktuálny mesiac."""
+        if not self.store_path.exists():
+            return
+        try:
+            with open(self.store_path, "r", encoding="utf-8") as f:
+                self._days = json.load(f).get("days", {})
+        except (OSError, ValueError) as e:
+            logger.warning(f"Nepodarilo sa načítať spotrebu z {self.store_path}: {e}")
+            return
+
+        for day, counters in self._days.items():
+            if day.startswith(self._month_key):
+                for key in _COUNTERS:
+                    self._month[key] += counters.get(key, 0)
+        logger.info(
+            f"Spotreba za {self._month_key}: {self._month['tts_chars']} TTS znakov, "
+            f"{self._month['prompt_tokens'] + self._month['completion_tokens']} tokenov"
+        )
+
+    async def _flush_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.config.flush_interval_sec)
+            await loop.run_in_executor(None, self.flush)
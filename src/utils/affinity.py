@@ -0,0 +1,70 @@
+"""
+Pinovanie threadov na CPU jadrá.
+
+Slúži na oddelenie audio callbacku (a event loopu) od STT threadov, aby
+dekódovanie na CPU nespôsobovalo výpadky zvuku. Na Linuxe sa používa
+sched_setaffinity (platí pre volajúci thread), na Windows
+SetThreadAffinityMask; inde sa pinovanie ticho vynechá.
+"""
+
+import logging
+import os
+import sys
+from typing import List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def available_cores() -> List[int]:
+    """Jadrá, na ktorých smie proces bežať."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def split_cores(reserved: int) -> Tuple[List[int], List[int]]:
+    """
+    Rozdelí jadrá na vyhradené (audio, event loop) a zvyšné (STT).
+
+    Args:
+        reserved: Počet jadier pre audio; ak by na STT nič neostalo,
+            nerezervuje sa nič
+
+    Returns:
+        (vyhradené jadrá, jadrá pre STT)
+    """
+    cores = available_cores()
+    if reserved <= 0 or len(cores) <= reserved:
+        return [], cores
+    return cores[:reserved], cores[reserved:]
+
+
+def pin_current_thread(cores: Sequence[int]) -> bool:
+    """
+    Obmedzí aktuálny thread na dané jadrá.
+
+    Thready vytvorené týmto threadom (napr. pool CTranslate2) zdedia
+    nastavenie na Linuxe.
+
+    Returns:
+        True ak sa pinovanie podarilo
+    """
+    if not cores:
+        return False
+    try:
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, set(cores))
+            return True
+        if sys.platform == "win32":
+            import ctypes
+
+            mask = 0
+            for core in cores:
+                mask |= 1 << core
+            kernel32 = ctypes.windll.kernel32
+            kernel32.GetCurrentThread.restype = ctypes.c_void_p
+            kernel32.SetThreadAffinityMask.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+            return kernel32.SetThreadAffinityMask(kernel32.GetCurrentThread(), mask) != 0
+    except (OSError, ValueError, AttributeError) as e:
+        logger.warning(f"Pinovanie threadu na jadrá {list(cores)} zlyhalo: {e}")
+    return False
@@ -0,0 +1,210 @@
+"""
+Živý panel metrík v termináli (curses).
+
+Beží ako samostatný proces a číta Prometheus endpoint Eleny, takže sa
+nebije s výstupom hlavnej aplikácie (ktorá po každej odpovedi čistí
+obrazovku). Spustenie:
+
+    python -m src.utils.dashboard [--url http://127.0.0.1:9108/metrics] [--interval 1.0]
+
+Na Windows treba doinštalovať balík windows-curses.
+"""
+
+import argparse
+import re
+import sys
+import time
+import urllib.request
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+_SAMPLE_RE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})?\s+(\S+)')
+_LABEL_RE = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+Metrics = Dict[str, List[Tuple[Dict[str, str], float]]]
+
+
+def parse_metrics(text: str) -> Metrics:
+    """Rozparsuje Prometheus text formát na {názov: [(labels, hodnota)]}."""
+    metrics: Metrics = defaultdict(list)
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        match = _SAMPLE_RE.match(line)
+        if not match:
+            continue
+        name, raw_labels, value = match.groups()
+        labels = {key: val.replace('\\"', '"') for key, val in _LABEL_RE.findall(raw_labels or "")}
+        try:
+            metrics[name].append((labels, float(value)))
+        except ValueError:
+            continue
+    return metrics
+
+
+def fetch_metrics(url: str, timeout: float = 2.0) -> Metrics:
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return parse_metrics(response.read().decode("utf-8"))
+
+
+def _value(metrics: Metrics, name: str, **labels) -> Optional[float]:
+    for sample_labels, value in metrics.get(name, []):
+        if all(sample_labels.get(k) == v for k, v in labels.items()):
+            return value
+    return None
+
+
+def _rate(current: Metrics, previous: Optional[Metrics], elapsed: float, name: str, **labels) -> float:
+    """Prírastok countera za sekundu od posledného načítania."""
+    if not previous or elapsed <= 0:
+        return 0.0
+    now, before = _value(current, name, **labels), _value(previous, name, **labels)
+    if now is None or before is None:
+        return 0.0
+    return max(0.0, now - before) / elapsed
+
+
+def render_lines(current: Metrics, previous: Optional[Metrics], elapsed: float) -> List[str]:
+    """Zostaví riadky panelu z metrík."""
+    lines = ["Elena - živé metriky", ""]
+
+    lines.append(f"{'Fáza':<18}{'p50':>9}{'p95':>9}{'p99':>9}{'n':>8}")
+    stages = sorted({labels["stage"] for labels, _ in current.get("elena_stage_latency_ms", [])})
+    for stage in stages:
+        p50 = _value(current, "elena_stage_latency_ms", stage=stage, quantile="0.5") or 0.0
+        p95 = _value(current, "elena_stage_latency_ms", stage=stage, quantile="0.95") or 0.0
+        p99 = _value(current, "elena_stage_latency_ms", stage=stage, quantile="0.99") or 0.0
+        count = _value(current, "elena_stage_observations_total", stage=stage) or 0.0
+        lines.append(f"{stage:<18}{p50:>7.0f}ms{p95:>7.0f}ms{p99:>7.0f}ms{count:>8.0f}")
+    if not stages:
+        lines.append("  (zatiaľ žiadne turny)")
+    lines.append("")
+
+    depth = _value(current, "elena_tts_queue_depth")
+    if depth is not None:
+        wait95 = _value(current, "elena_tts_queue_wait_ms", quantile="0.95") or 0.0
+        played = _value(current, "elena_tts_queue_items_total", outcome="played") or 0.0
+        dropped = _value(current, "elena_tts_queue_items_total", outcome="dropped") or 0.0
+        lines.append(
+            f"TTS fronta: {depth:.0f} čaká, p95 čakanie {wait95:.0f}ms, "
+            f"prehrané {played:.0f}, zahodené {dropped:.0f}"
+        )
+    for labels, value in current.get("elena_scheduler_queue_depth", []):
+        lane = labels.get("lane", "?")
+        wait = _value(current, "elena_scheduler_wait_ms", lane=lane) or 0.0
+        lines.append(f"Plánovač [{lane}]: {value:.0f} čaká, p95 čakanie {wait:.0f}ms")
+    lines.append("")
+
+    for labels, ratio in current.get("elena_tts_cache_hit_ratio", []):
+        provider = labels.get("provider", "?")
+        errors = _value(current, "elena_tts_errors_total", provider=provider) or 0.0
+        lines.append(f"TTS {provider}: cache {ratio:.0%}, chyby {errors:.0f}")
+    requests = _value(current, "elena_openai_requests_total")
+    if requests is not None:
+        errors = _value(current, "elena_openai_errors_total") or 0.0
+        rpm = _rate(current, previous, elapsed, "elena_openai_requests_total") * 60
+        error_rate = errors / requests if requests else 0.0
+        lines.append(f"OpenAI: {requests:.0f} volaní ({rpm:.1f}/min), chybovosť {error_rate:.1%}")
+    for labels, ratio in current.get("elena_http_connection_reuse_ratio", []):
+        host = labels.get("endpoint", "?")
+        opened = _value(current, "elena_http_connections_opened_total", endpoint=host) or 0.0
+        retries = _value(current, "elena_http_retries_total", endpoint=host) or 0.0
+        breaker = next(
+            (
+                state["state"]
+                for state, value in current.get("elena_http_breaker_state", [])
+                if state.get("endpoint") == host and value
+            ),
+            "?",
+        )
+        lines.append(
+            f"HTTP {host}: {opened:.0f} spojení, reuse {ratio:.0%}, "
+            f"opakovania {retries:.0f}, breaker {breaker}"
+        )
+    reduction = _value(current, "elena_tts_reply_char_reduction")
+    if reduction is not None:
+        saved_ms = _value(current, "elena_tts_playback_saved_ms_total") or 0.0
+        lines.append(f"Krátke odpovede: -{reduction:.0%} TTS znakov, ušetrené ~{saved_ms / 1000:.0f} s")
+    cost = _value(current, "elena_usage_cost_usd")
+    if cost is not None:
+        chars = _value(current, "elena_usage_month", kind="tts_chars") or 0.0
+        lines.append(f"Mesiac: {chars:.0f} TTS znakov, odhad ${cost:.2f}")
+    lines.append("")
+
+    cpu = _value(current, "elena_process_cpu_percent")
+    load = _value(current, "elena_system_load1")
+    system = f"CPU procesu: {cpu or 0.0:.0f}%"
+    rss = _value(current, "elena_process_memory_mb")
+    if rss is not None:
+        system += f", RAM {rss:.0f} MB"
+    if load is not None:
+        system += f", load {load:.2f}"
+    for labels, value in current.get("elena_gpu_utilization_percent", []):
+        memory = _value(current, "elena_gpu_memory_used_mb", gpu=labels.get("gpu")) or 0.0
+        system += f", GPU{labels.get('gpu')} {value:.0f}% ({memory:.0f} MB)"
+    lines.append(system)
+    underflows = _value(current, "elena_audio_underflows_total")
+    if underflows is not None:
+        lines.append(f"Audio podtečenia: {underflows:.0f}")
+    overflows = _value(current, "elena_audio_input_overflows_total")
+    if overflows is not None:
+        lines.append(f"Mikrofón pretečenia: {overflows:.0f}")
+    states = {labels.get("state"): value for labels, value in current.get("elena_stt_model_state", [])}
+    if states:
+        state = next((name for name, value in states.items() if value), "?")
+        whisper = f"Whisper: {state}, ~{_value(current, 'elena_stt_model_memory_mb') or 0.0:.0f} MB"
+        reload_ms = _value(current, "elena_stt_reload_ms")
+        if reload_ms:
+            whisper += f", posledné načítanie {reload_ms:.0f} ms"
+        lines.append(whisper)
+    return lines
+
+
+def _run(screen, url: str, interval: float):
+    import curses
+
+    curses.curs_set(0)
+    screen.nodelay(True)
+    previous: Optional[Metrics] = None
+    previous_at = time.monotonic()
+
+    while True:
+        try:
+            current = fetch_metrics(url)
+            now = time.monotonic()
+            lines = render_lines(current, previous, now - previous_at)
+            previous, previous_at = current, now
+        except OSError as e:
+            lines = [f"Elena - metriky nedostupné ({url})", "", str(e)]
+
+        screen.erase()
+        height, width = screen.getmaxyx()
+        for row, line in enumerate(lines[: height - 1]):
+            screen.addnstr(row, 0, line, width - 1)
+        screen.addnstr(height - 1, 0, "q = koniec", width - 1)
+        screen.refresh()
+
+        deadline = time.monotonic() + interval
+        while time.monotonic() < deadline:
+            if screen.getch() in (ord("q"), ord("Q")):
+                return
+            time.sleep(0.05)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Živý panel metrík Eleny")
+    parser.add_argument("--url", default="http://127.0.0.1:9108/metrics")
+    parser.add_argument("--interval", type=float, default=1.0)
+    args = parser.parse_args()
+
+    try:
+        import curses
+    except ImportError:
+        print("Modul curses nie je dostupný (na Windows: pip install windows-curses)")
+        sys.exit(1)
+
+    curses.wrapper(_run, args.url, args.interval)
+
+
+if __name__ == "__main__":
+    main()
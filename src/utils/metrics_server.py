@@ -0,0 +1,234 @@
+"""
+Lokálny HTTP endpoint s metrikami v Prometheus textovom formáte.
+
+Komponenty registrujú metriky ako callbacky, ktoré sa vyhodnotia až pri
+požiadavke na /metrics - v hot path sa teda nič navyše nepočíta. Server
+beží v event loope Eleny (asyncio.start_server), bez ďalších závislostí.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+Labels = Dict[str, str]
+Sample = Tuple[Labels, float]
+SampleSource = Callable[[], Union[float, Iterable[Sample]]]
+
+
+@dataclass
+class _Family:
+    name: str
+    kind: str  # gauge | counter
+    help: str
+    source: SampleSource
+
+
+class MetricsRegistry:
+    """Registrované metriky, vyhodnocované pri každom scrape."""
+
+    def __init__(self, prefix: str = "elena"):
+        self.prefix = prefix
+        self._families: List[_Family] = []
+
+    def gauge(self, name: str, help: str, source: SampleSource):
+        """
+        Zaregistruje gauge.
+
+        Args:
+            name: Názov bez prefixu (napr. "tts_queue_depth")
+            help: Popis metriky
+            source: Callback vracajúci číslo alebo zoznam (labels, hodnota)
+        """
+        self._families.append(_Family(f"{self.prefix}_{name}", "gauge", help, source))
+
+    def counter(self, name: str, help: str, source: SampleSource):
+        """Zaregistruje counter (monotónne rastúca hodnota)."""
+        self._families.append(_Family(f"{self.prefix}_{name}_total", "counter", help, source))
+
+    def render(self) -> str:
+        """Vráti všetky metriky v Prometheus text formáte 0.0.4."""
+        lines: List[str] = []
+        for family in self._families:
+            try:
+                value = family.source()
+            except Exception as e:
+                logger.debug(f"Metrika {family.name} nedostupná: {e}")
+                continue
+            if value is None:
+                continue
+            samples = [({}, value)] if isinstance(value, (int, float)) else list(value)
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for labels, sample in samples:
+                if sample is None:
+                    continue
+                lines.append(f"{family.name}{_format_labels(labels)} {float(sample):.6g}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    pairs = (f'{key}="{_escape_label(value)}"' for key, value in labels.items())
+    return "{" + ",".join(pairs) + "}"
+
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def process_rss_mb() -> Optional[float]:
+    """Rezidentná pamäť procesu v MB (psutil, /proc alebo Win32 API; None ak nejde zistiť)."""
+    try:
+        import psutil
+
+        return psutil.Process().memory_info().rss / 1024 / 1024
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError, AttributeError):
+        pass
+    if os.name == "nt":
+        import ctypes
+        from ctypes import wintypes
+
+        class _Counters(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD),
+                ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        counters = _Counters()
+        counters.cb = ctypes.sizeof(counters)
+        kernel32 = ctypes.windll.kernel32
+        kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+        if kernel32.K32GetProcessMemoryInfo(
+            kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb
+        ):
+            return counters.WorkingSetSize / 1024 / 1024
+    return None
+
+
+class ProcessStats:
+    """Vyťaženie CPU procesu a GPU (ak je dostupné NVML)."""
+
+    def __init__(self):
+        self._last_wall = time.monotonic()
+        self._last_cpu = time.process_time()
+        self._cpu_percent = 0.0
+        self._nvml = None
+        self._gpu_handles: list = []
+        try:
+            import pynvml
+
+            pynvml.nvmlInit()
+            self._nvml = pynvml
+            self._gpu_handles = [
+                pynvml.nvmlDeviceGetHandleByIndex(i) for i in range(pynvml.nvmlDeviceGetCount())
+            ]
+        except Exception:
+            # pynvml nie je nainštalované alebo nie je NVIDIA GPU
+            self._nvml = None
+
+    def cpu_percent(self) -> float:
+        """CPU čas procesu od posledného volania v % jedného jadra."""
+        now_wall, now_cpu = time.monotonic(), time.process_time()
+        elapsed = now_wall - self._last_wall
+        if elapsed >= 0.5:
+            self._cpu_percent = (now_cpu - self._last_cpu) / elapsed * 100.0
+            self._last_wall, self._last_cpu = now_wall, now_cpu
+        return self._cpu_percent
+
+    def memory_mb(self) -> Optional[float]:
+        return process_rss_mb()
+
+    def load_average(self) -> Optional[float]:
+        try:
+            return os.getloadavg()[0]
+        except (AttributeError, OSError):
+            return None
+
+    def gpu_utilization(self) -> List[Sample]:
+        if self._nvml is None:
+            return []
+        samples = []
+        for index, handle in enumerate(self._gpu_handles):
+            rates = self._nvml.nvmlDeviceGetUtilizationRates(handle)
+            samples.append(({"gpu": str(index)}, float(rates.gpu)))
+        return samples
+
+    def gpu_memory_mb(self) -> List[Sample]:
+        if self._nvml is None:
+            return []
+        samples = []
+        for index, handle in enumerate(self._gpu_handles):
+            memory = self._nvml.nvmlDeviceGetMemoryInfo(handle)
+            samples.append(({"gpu": str(index)}, memory.used / 1024 / 1024))
+        return samples
+
+
+class MetricsServer:
+    """Minimálny HTTP server pre GET /metrics."""
+
+    def __init__(self, registry: MetricsRegistry, host: str = "127.0.0.1", port: int = 9108):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        logger.info(f"Metriky dostupné na http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5.0)
+            # Zvyšok hlavičiek nás nezaujíma, len ich prečítame
+            while True:
+                line = await asyncio.wait_for(reader.readline(), timeout=5.0)
+                if line in (b"\r\n", b"\n", b""):
+                    break
+
+            parts = request_line.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+                status, body = "200 OK", self.registry.render().encode("utf-8")
+                content_type = "text/plain; version=0.0.4; charset=utf-8"
+            else:
+                status, body = "404 Not Found", b"not found\n"
+                content_type = "text/plain; charset=utf-8"
+
+            writer.write(
+                (
+                    f"HTTP/1.1 {status}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    "Connection: close\r\n\r\n"
+                ).encode("latin-1")
+                + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError) as e:
+            logger.debug(f"Metrics požiadavka zlyhala: {e}")
+        finally:
+            writer.close()
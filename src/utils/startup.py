@@ -0,0 +1,167 @@
+"""
+Profil štartu aplikácie - waterfall importov a inicializácie služieb.
+
+Fázy inicializácie sa merajú vždy (lacné perf_counter), importy len so
+zapnutým profilom (--profile-startup): builtins.__import__ sa obalí
+meraním, ktoré zaznamená každý import, ktorý reálne načítal nové moduly.
+Výstup ukazuje, čo beží súbežne a čo štart naozaj brzdí.
+"""
+
+import builtins
+import importlib.util
+import sys
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, List, Optional
+
+from .tracing import now_ns
+
+KIND_IMPORT = "import"
+KIND_INIT = "init"
+
+
+@dataclass
+class StartupSpan:
+    """Import alebo fáza inicializácie (časy sú perf_counter_ns)."""
+
+    name: str
+    kind: str
+    start_ns: int
+    end_ns: int
+    depth: int = 0
+    thread: str = ""
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+
+class _ImportTimer:
+    """Náhrada builtins.__import__, ktorá meria importy nových modulov."""
+
+    def __init__(self, profiler: "StartupProfiler"):
+        self.profiler = profiler
+        self.original = builtins.__import__
+        self._local = threading.local()
+
+    def __call__(self, name, globals=None, locals=None, fromlist=(), level=0):
+        depth = getattr(self._local, "depth", 0)
+        before = len(sys.modules)
+        start_ns = now_ns()
+        self._local.depth = depth + 1
+        try:
+            return self.original(name, globals, locals, fromlist, level)
+        finally:
+            self._local.depth = depth
+            if len(sys.modules) > before:
+                self.profiler.record(
+                    self._label(name, globals, fromlist, level), KIND_IMPORT, start_ns, now_ns(), depth
+                )
+
+    @staticmethod
+    def _label(name: str, globals, fromlist, level: int) -> str:
+        if not level:
+            return name
+        package = (globals or {}).get("__package__") or ""
+        try:
+            resolved = importlib.util.resolve_name("." * level + name, package)
+        except (ImportError, ValueError):
+            resolved = "." * level + name
+        if not name and fromlist:
+            resolved = f"{resolved}.{fromlist[0]}"
+        return resolved
+
+
+class StartupProfiler:
+    """Zaznamenáva importy a fázy štartu a vypíše ich ako waterfall."""
+
+    def __init__(self, enabled: bool = False):
+        """
+        Args:
+            enabled: Merať aj importy (inak len fázy inicializácie)
+        """
+        self.enabled = enabled
+        self.origin_ns = now_ns()
+        self.end_ns: Optional[int] = None
+        self.spans: List[StartupSpan] = []
+        self._lock = threading.Lock()
+        self._timer: Optional[_ImportTimer] = None
+
+    def install(self):
+        """Začne merať importy (len so zapnutým profilom)."""
+        if self.enabled and self._timer is None:
+            self._timer = _ImportTimer(self)
+            builtins.__import__ = self._timer
+
+    def finish(self):
+        """Ukončí meranie; ďalšie importy už nespomaľuje."""
+        if self._timer is not None:
+            if builtins.__import__ is self._timer:
+                builtins.__import__ = self._timer.original
+            self._timer = None
+        if self.end_ns is None:
+            self.end_ns = now_ns()
+
+    @property
+    def total_ms(self) -> float:
+        return ((self.end_ns or now_ns()) - self.origin_ns) / 1e6
+
+    def record(self, name: str, kind: str, start_ns: int, end_ns: int, depth: int = 0):
+        span = StartupSpan(name, kind, start_ns, end_ns, depth, threading.current_thread().name)
+        with self._lock:
+            self.spans.append(span)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Zmeria fázu inicializácie (funguje aj okolo await a vo vláknach)."""
+        start_ns = now_ns()
+        try:
+            yield
+        finally:
+            self.record(name, KIND_INIT, start_ns, now_ns())
+
+    def phase_ms(self, name: str) -> Optional[float]:
+        """Trvanie fázy v ms (None ak neprebehla)."""
+        for span in self.spans:
+            if span.kind == KIND_INIT and span.name == name:
+                return span.duration_ms
+        return None
+
+    def format_waterfall(self, min_ms: float = 2.0, max_depth: int = 2, width: int = 40) -> str:
+        """
+        Waterfall importov a fáz štartu.
+
+        Args:
+            min_ms: Kratšie importy sa vynechajú (fázy sa ukážu vždy)
+            max_depth: Maximálna hĺbka vnorených importov
+            width: Šírka časovej osi v znakoch
+
+        Returns:
+            Viacriadkový text na výpis do konzoly
+        """
+        total_ns = max(1, (self.end_ns or now_ns()) - self.origin_ns)
+        with self._lock:
+            spans = [
+                span
+                for span in self.spans
+                if span.kind == KIND_INIT or (span.depth <= max_depth and span.duration_ms >= min_ms)
+            ]
+        spans.sort(key=lambda span: span.start_ns)
+
+        imports_ms = sum(s.duration_ms for s in self.spans if s.kind == KIND_IMPORT and s.depth == 0)
+        lines = [
+            f"Štart za {total_ns / 1e6:.0f} ms"
+            + (f" (importy najvyššej úrovne {imports_ms:.0f} ms)" if self.enabled else ""),
+            f"{'':<44} {'od':>7} {'trvanie':>9}  {'vlákno':<12}",
+        ]
+        for span in spans:
+            offset = int((span.start_ns - self.origin_ns) / total_ns * width)
+            length = max(1, round((span.end_ns - span.start_ns) / total_ns * width))
+            bar = " " * offset + ("█" if span.kind == KIND_INIT else "▒") * length
+            label = ("  " * span.depth + ("" if span.kind == KIND_INIT else "import ") + span.name)[:44]
+            lines.append(
+                f"{label:<44} {(span.start_ns - self.origin_ns) / 1e6:>5.0f}ms "
+                f"{span.duration_ms:>7.1f}ms  {span.thread[:12]:<12} |{bar}"
+            )
+        return "\n".join(lines)
@@ -1,12 +1,19 @@
 """
 Telemetria a metriky pre monitorovanie výkonu.
+
+Merania sa v hot path len zapíšu do histogramov v pamäti a vložia do
+fronty; na disk (append-only JSONL) ich zapisuje samostatný thread.
+Percentily p50/p95/p99 počíta logaritmický histogram s pevným počtom
+bucketov (HDR štýl), takže pamäť nerastie ani pri mnohohodinovom streame.
 """
 
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 from dataclasses import dataclass
 from datetime import datetime
-import statistics
 import json
+import math
+import queue
+import threading
 from pathlib import Path
 import logging
 
@@ -33,26 +40,170 @@ class LatencyMetrics:
     metadata: Dict
 
 
+class LatencyHistogram:
+    """
+    Streamingový histogram latencií s relatívnou presnosťou (HDR štýl).
+
+    Každá mocnina dvoch je rozdelená na sub_buckets lineárnych bucketov,
+    relatívna chyba percentilu je teda najviac 1 / sub_buckets. Rozsah je
+    pevný (min_ms až max_ms), hodnoty mimo sa orežú na okraj.
+    """
+
+    def __init__(self, min_ms: float = 0.1, max_ms: float = 600_000.0, sub_buckets: int = 64):
+        self.min_ms = min_ms
+        self.sub_buckets = sub_buckets
+        self._octaves = max(1, math.ceil(math.log2(max_ms / min_ms)))
+        self._counts = [0] * (self._octaves * sub_buckets + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, value_ms: float):
+        """Zaznamená jednu hodnotu (O(1), bez alokácií)."""
+        self._counts[self._index(value_ms)] += 1
+        self.count += 1
+        self.total += value_ms
+        if value_ms < self.min:
+            self.min = value_ms
+        if value_ms > self.max:
+            self.max = value_ms
+
+    def percentile(self, p: float) -> float:
+        """Vráti p-ty percentil (p v rozsahu 0-100)."""
+        if self.count == 0:
+            return 0.0
+        rank = max(1, math.ceil(p / 100.0 * self.count))
+        seen = 0
+        for index, bucket_count in enumerate(self._counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(self._upper_bound(index), self.max)
+        return self.max
+
+    def snapshot(self) -> Dict[str, float]:
+        """Súhrn: počet, priemer, min/max a p50/p95/p99."""
+        if self.count == 0:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean": self.total / self.count,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+    def _index(self, value_ms: float) -> int:
+        if value_ms <= self.min_ms:
+            return 0
+        octave, fraction = divmod(math.log2(value_ms / self.min_ms), 1.0)
+        if octave >= self._octaves:
+            return len(self._counts) - 1
+        # Lineárne sub-buckety v rámci oktávy [2^n, 2^(n+1))
+        sub = int((2.0 ** fraction - 1.0) * self.sub_buckets)
+        return 1 + int(octave) * self.sub_buckets + min(sub, self.sub_buckets - 1)
+
+    def _upper_bound(self, index: int) -> float:
+        if index == 0:
+            return self.min_ms
+        octave, sub = divmod(index - 1, self.sub_buckets)
+        return self.min_ms * (2.0 ** octave) * (1.0 + (sub + 1) / self.sub_buckets)
+
+
+class RunningStats:
+    """Počet, priemer a rozsah hodnoty bez uchovávania bodov."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def record(self, value: float):
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def snapshot(self) -> Dict[str, float]:
+        if self.count == 0:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean": self.total / self.count,
+            "min": self.min,
+            "max": self.max,
+        }
+
+
 class Telemetry:
-    def __init__(self, metrics_file: Path):
+    def __init__(
+        self, metrics_file: Optional[Path], max_pending: int = 10_000, log_every: int = 10
+    ):
         """
         Inicializuje systém telemetrie.
 
         Args:
-            metrics_file: Cesta k súboru pre ukladanie metrík
+            metrics_file: Cesta k append-only JSONL súboru pre ukladanie metrík
+                (None = len histogramy v pamäti)
+            max_pending: Maximálny počet záznamov čakajúcich na zápis
+                (pri zaseknutom disku sa ďalšie zahadzujú)
+            log_every: Po koľkých meraniach latencie zalogovať percentily
         """
         self.metrics_file = metrics_file
-        self.latencies: List[LatencyMetrics] = []
-        self.transcription_quality: List[MetricPoint] = []
-        self.assistant_quality: List[MetricPoint] = []
+        self.log_every = log_every
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.transcription_quality = RunningStats()
+        self.assistant_quality = RunningStats()
+        self.dropped = 0
+
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=max_pending)
+        self._writer: Optional[threading.Thread] = None
+        self._latency_count = 0
+
+    def record(self, stage: str, value_ms: float):
+        """Zaznamená latenciu jednej fázy do histogramu (bez zápisu na disk)."""
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = LatencyHistogram()
+            histogram.record(value_ms)
+
+    def record_turn(self, stages: Dict[str, float], metadata: Optional[Dict] = None):
+        """
+        Zaznamená trvanie fáz jedného turnu (napr. TurnTrace.summary()).
+
+        Args:
+            stages: Názov fázy -> trvanie v ms
+            metadata: Voliteľné metadáta do JSONL záznamu
+        """
+        for stage, value_ms in stages.items():
+            self.record(stage, value_ms)
+        self._emit({"type": "turn", "stages": stages, "metadata": metadata or {}})
 
     def add_latency(self, metrics: LatencyMetrics):
         """Pridá nové meranie latencie"""
-        self.latencies.append(metrics)
-        self._save_metrics()
+        self.record("transcription", metrics.transcription_ms)
+        self.record("first_token", metrics.first_token_ms)
+        self.record("assistant", metrics.assistant_ms)
+        self.record("total", metrics.total_ms)
+        self._emit(
+            {
+                "type": "latency",
+                "transcription_ms": metrics.transcription_ms,
+                "first_token_ms": metrics.first_token_ms,
+                "assistant_ms": metrics.assistant_ms,
+                "total_ms": metrics.total_ms,
+                "metadata": metrics.metadata,
+            }
+        )
 
         # Analyzuj a loguj štatistiky
-        if len(self.latencies) >= 10:
+        self._latency_count += 1
+        if self._latency_count % self.log_every == 0:
             self._analyze_latencies()
 
     def add_transcription_quality(
@@ -65,11 +216,9 @@ class Telemetry:
             confidence: Skóre kvality (0-1)
             metadata: Voliteľné metadáta
         """
-        self.transcription_quality.append(
-            MetricPoint(
-                timestamp=datetime.now(), value=confidence, metadata=metadata or {}
-            )
-        )
+        with self._lock:
+            self.transcription_quality.record(confidence)
+        self._emit({"type": "transcription_quality", "value": confidence, "metadata": metadata or {}})
 
     def add_assistant_quality(
         self, response_length: int, metadata: Optional[Dict] = None
@@ -81,75 +230,94 @@ class Telemetry:
             response_length: Dĺžka odpovede
             metadata: Voliteľné metadáta
         """
-        self.assistant_quality.append(
-            MetricPoint(
-                timestamp=datetime.now(),
-                value=float(response_length),
-                metadata=metadata or {},
-            )
+        with self._lock:
+            self.assistant_quality.record(float(response_length))
+        self._emit(
+            {"type": "assistant_quality", "value": float(response_length), "metadata": metadata or {}}
         )
 
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Percentily všetkých fáz a súhrn kvality."""
+        with self._lock:
+            result = {stage: h.snapshot() for stage, h in self.histograms.items()}
+            result["transcription_quality"] = self.transcription_quality.snapshot()
+            result["assistant_quality"] = self.assistant_quality.snapshot()
+        return result
+
+    def set_metrics_file(self, metrics_file: Optional[Path]):
+        """
+        Zmení JSONL súbor (tracing.metrics_path); None = bez zápisu na disk.
+
+        Čakajúce záznamy sa dopíšu ešte do pôvodného súboru.
+        """
+        self.close()
+        self.metrics_file = metrics_file
+
+    def close(self, timeout: float = 2.0):
+        """Dopíše čakajúce záznamy a ukončí writer thread."""
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join(timeout)
+            self._writer = None
+
     def _analyze_latencies(self):
-        """Analyzuje nazbierané latencie a loguje štatistiky"""
-        trans_times = [latency.transcription_ms for latency in self.latencies[-10:]]
-        assist_times = [latency.assistant_ms for latency in self.latencies[-10:]]
-        total_times = [latency.total_ms for latency in self.latencies[-10:]]
-
-        logger.info("Štatistiky latencií (posledných 10):")
-        logger.info(
-            f"Transkripcia: {statistics.mean(trans_times):.0f}ms "
-            f"(min={min(trans_times):.0f}, "
-            f"max={max(trans_times):.0f})"
-        )
-        logger.info(
-            f"Asistent: {statistics.mean(assist_times):.0f}ms "
-            f"(min={min(assist_times):.0f}, "
-            f"max={max(assist_times):.0f})"
-        )
-        logger.info(
-            f"Celkovo: {statistics.mean(total_times):.0f}ms "
-            f"(min={min(total_times):.0f}, "
-            f"max={max(total_times):.0f})"
-        )
+        """Loguje percentily latencií"""
+        snapshot = self.snapshot()
+        logger.info("Štatistiky latencií:")
+        for stage in ("transcription", "assistant", "total"):
+            stats = snapshot.get(stage)
+            if not stats or not stats["count"]:
+                continue
+            logger.info(
+                f"{stage}: p50={stats['p50']:.0f}ms p95={stats['p95']:.0f}ms "
+                f"p99={stats['p99']:.0f}ms (n={stats['count']})"
+            )
 
-    def _save_metrics(self):
-        """Uloží metriky do súboru"""
+    def _emit(self, record: Dict[str, Any]):
+        """Vloží záznam do fronty pre writer thread (neblokuje)."""
+        if self.metrics_file is None:
+            return
+        record["timestamp"] = datetime.now().isoformat()
+        self._ensure_writer()
         try:
-            data = {
-                "latencies": [
-                    {
-                        "timestamp": datetime.now().isoformat(),
-                        "transcription_ms": latency.transcription_ms,
-                        "first_token_ms": latency.first_token_ms,
-                        "assistant_ms": latency.assistant_ms,
-                        "total_ms": latency.total_ms,
-                        "metadata": latency.metadata,
-                    }
-                    for latency in self.latencies[-100:]  # len posledných 100
-                ],
-                "transcription_quality": [
-                    {
-                        "timestamp": m.timestamp.isoformat(),
-                        "value": m.value,
-                        "metadata": m.metadata,
-                    }
-                    for m in self.transcription_quality[-100:]
-                ],
-                "assistant_quality": [
-                    {
-                        "timestamp": m.timestamp.isoformat(),
-                        "value": m.value,
-                        "metadata": m.metadata,
-                    }
-                    for m in self.assistant_quality[-100:]
-                ],
-            }
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
 
-            with open(self.metrics_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            logger.error(f"Chyba pri ukladaní metrík: {e}")
+    def _ensure_writer(self):
+        if self._writer is None:
+            with self._lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(
+                        target=self._write_loop, name="telemetry-writer", daemon=True
+                    )
+                    self._writer.start()
+
+    def _write_loop(self):
+        """Writer thread - pripisuje záznamy na koniec JSONL súboru."""
+        try:
+            f = open(self.metrics_file, "a", encoding="utf-8")
+        except OSError as e:
+            logger.error(f"Chyba pri otváraní súboru metrík: {e}")
+            return
+        with f:
+            while True:
+                batch: List[Optional[Dict[str, Any]]] = [self._queue.get()]
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                try:
+                    for record in batch:
+                        if record is not None:
+                            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    f.flush()
+                except (OSError, TypeError, ValueError) as e:
+                    logger.error(f"Chyba pri ukladaní metrík: {e}")
+                if None in batch:
+                    return
 
 
 # Singleton inštancia
-telemetry = Telemetry(Path("metrics.json"))
+telemetry = Telemetry(Path("metrics.jsonl"))
@@ -0,0 +1,297 @@
+"""
+Trasovanie latencie jedného turnu naprieč capture, STT, LLM a TTS.
+
+Každý turn (stlačenie PTT až dohranie odpovede) má vlastné trace ID a
+spany pre jednotlivé fázy. Dokončené turny sa držia v kruhovom bufferi
+v pamäti a exportujú sa ako OTLP/JSON (ExportTraceServiceRequest, jeden
+riadok na turn) do lokálneho súboru, ktorý sa dá načítať do Jaegera
+alebo OpenTelemetry Collectora (filelog/otlpjson).
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Fázy turnu (názvy spanov)
+SPAN_CAPTURE = "capture"
+SPAN_VAD = "vad"
+SPAN_STT = "stt"
+SPAN_RETRIEVE = "retrieve"
+SPAN_LLM_FIRST_TOKEN = "llm_first_token"
+SPAN_LLM_DONE = "llm_done"
+SPAN_TTS_FIRST_AUDIO = "tts_first_audio"
+SPAN_PLAYBACK_DONE = "playback_done"
+
+# Rozdiel medzi perf_counter_ns a unixovým časom (spany sa merajú monotónne)
+_EPOCH_OFFSET_NS = time.time_ns() - time.perf_counter_ns()
+
+
+def now_ns() -> int:
+    """Monotónny čas v ns (rovnaký zdroj ako time.perf_counter_ns)."""
+    return time.perf_counter_ns()
+
+
+@dataclass
+class Span:
+    """Jeden úsek turnu (časy sú perf_counter_ns)."""
+
+    name: str
+    span_id: str
+    start_ns: int
+    end_ns: Optional[int] = None
+    parent_id: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.end_ns is None:
+            return None
+        return (self.end_ns - self.start_ns) / 1e6
+
+
+class SpanScope:
+    """Context manager pre span (with trace.span("stt"): ...)."""
+
+    def __init__(self, trace: "TurnTrace", span: Span):
+        self.trace = trace
+        self.span = span
+
+    def __enter__(self) -> Span:
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.span.attributes["error"] = exc_type.__name__
+        self.trace.end(self.span)
+        return False
+
+
+class TurnTrace:
+    """Trace jedného turnu - root span "turn" a spany jednotlivých fáz."""
+
+    def __init__(self, tracer: "Tracer", name: str, start_ns: Optional[int] = None, **attributes):
+        self.tracer = tracer
+        self.trace_id = os.urandom(16).hex()
+        self.root = Span(
+            name=name,
+            span_id=os.urandom(8).hex(),
+            start_ns=start_ns or now_ns(),
+            attributes=dict(attributes),
+        )
+        self.spans: List[Span] = []
+        self.finished = False
+        self._lock = threading.Lock()
+
+    @property
+    def turn_id(self) -> str:
+        return self.trace_id
+
+    def start(self, name: str, parent: Optional[Span] = None, **attributes) -> Span:
+        """Otvorí span (ukončí sa cez end)."""
+        span = Span(
+            name=name,
+            span_id=os.urandom(8).hex(),
+            start_ns=now_ns(),
+            parent_id=(parent or self.root).span_id,
+            attributes=attributes,
+        )
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+    def end(self, span: Span, end_ns: Optional[int] = None, **attributes):
+        """Uzavrie span."""
+        if span.end_ns is None:
+            span.end_ns = end_ns or now_ns()
+        span.attributes.update(attributes)
+
+    def span(self, name: str, parent: Optional[Span] = None, **attributes) -> SpanScope:
+        """Span ako context manager."""
+        return SpanScope(self, self.start(name, parent=parent, **attributes))
+
+    def add(
+        self, name: str, start_ns: int, end_ns: int, parent: Optional[Span] = None, **attributes
+    ) -> Span:
+        """Zapíše už zmeraný span (napr. z iného threadu alebo spätne)."""
+        span = self.start(name, parent=parent, **attributes)
+        span.start_ns = start_ns
+        span.end_ns = end_ns
+        return span
+
+    def get(self, name: str) -> Optional[Span]:
+        """Vráti posledný span s daným názvom."""
+        with self._lock:
+            for span in reversed(self.spans):
+                if span.name == name:
+                    return span
+        return None
+
+    def finish(self, **attributes):
+        """Ukončí turn a odovzdá ho tracerovi (opakované volanie nič nerobí)."""
+        with self._lock:
+            if self.finished:
+                return
+            self.finished = True
+            self.root.end_ns = now_ns()
+            self.root.attributes.update(attributes)
+            for span in self.spans:
+                if span.end_ns is None:
+                    span.end_ns = self.root.end_ns
+                    span.attributes.setdefault("unfinished", True)
+        self.tracer._on_finished(self)
+
+    def summary(self) -> Dict[str, float]:
+        """Trvanie fáz v ms (názov spanu -> ms)."""
+        result = {span.name: span.duration_ms for span in self.spans if span.end_ns is not None}
+        if self.root.end_ns is not None:
+            result[self.root.name] = self.root.duration_ms
+        return result
+
+
+class OTLPFileExporter:
+    """
+    Zapisuje turny ako OTLP/JSON riadky do súboru.
+
+    Zápis beží v samostatnom threade, export z event loopu len vloží turn
+    do fronty.
+    """
+
+    def __init__(self, path: Path, service_name: str = "elena", max_pending: int = 1000):
+        self.path = Path(path)
+        self.service_name = service_name
+        self._queue: "queue.Queue[Optional[TurnTrace]]" = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._writer, name="otlp-exporter", daemon=True)
+        self._thread.start()
+        self.dropped = 0
+
+    def export(self, trace: TurnTrace):
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout: float = 2.0):
+        """Dopíše čakajúce turny a ukončí writer thread."""
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _writer(self):
+        with open(self.path, "a", encoding="utf-8") as f:
+            while True:
+                trace = self._queue.get()
+                if trace is None:
+                    return
+                try:
+                    f.write(json.dumps(self.to_otlp(trace), ensure_ascii=False) + "\n")
+                    if self._queue.empty():
+                        f.flush()
+                except (OSError, TypeError, ValueError) as e:
+                    logger.error(f"Chyba pri exporte trace: {e}")
+
+    def to_otlp(self, trace: TurnTrace) -> Dict[str, Any]:
+        """Prevedie turn na OTLP/JSON ExportTraceServiceRequest."""
+        spans = [self._span_to_otlp(trace, trace.root)]
+        spans.extend(self._span_to_otlp(trace, span) for span in trace.spans)
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": _otlp_attributes({"service.name": self.service_name})},
+                    "scopeSpans": [{"scope": {"name": "elena.tracing"}, "spans": spans}],
+                }
+            ]
+        }
+
+    @staticmethod
+    def _span_to_otlp(trace: TurnTrace, span: Span) -> Dict[str, Any]:
+        result = {
+            "traceId": trace.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(span.start_ns + _EPOCH_OFFSET_NS),
+            "endTimeUnixNano": str((span.end_ns or span.start_ns) + _EPOCH_OFFSET_NS),
+            "attributes": _otlp_attributes(span.attributes),
+        }
+        if span.parent_id:
+            result["parentSpanId"] = span.parent_id
+        if span.attributes.get("error"):
+            result["status"] = {"code": 2, "message": str(span.attributes["error"])}
+        return result
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    result = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            encoded = {"boolValue": value}
+        elif isinstance(value, int):
+            encoded = {"intValue": str(value)}
+        elif isinstance(value, float):
+            encoded = {"doubleValue": value}
+        else:
+            encoded = {"stringValue": str(value)}
+        result.append({"key": key, "value": encoded})
+    return result
+
+
+class Tracer:
+    """Vytvára turny a drží posledné dokončené v kruhovom bufferi."""
+
+    def __init__(self, ring_size: int = 200, exporter: Optional[OTLPFileExporter] = None):
+        """
+        Args:
+            ring_size: Počet posledných turnov držaných v pamäti
+            exporter: Voliteľný exportér dokončených turnov
+        """
+        self.exporter = exporter
+        self._ring: Deque[TurnTrace] = deque(maxlen=ring_size)
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[TurnTrace], None]] = []
+
+    @classmethod
+    def from_config(cls, config) -> "Tracer":
+        """Vytvorí tracer z TracingConfig."""
+        exporter = None
+        if config.export_path:
+            exporter = OTLPFileExporter(Path(config.export_path), service_name=config.service_name)
+        return cls(ring_size=config.ring_size, exporter=exporter)
+
+    def new_turn(self, name: str = "turn", start_ns: Optional[int] = None, **attributes) -> TurnTrace:
+        """Začne nový turn."""
+        return TurnTrace(self, name, start_ns=start_ns, **attributes)
+
+    def add_listener(self, callback: Callable[["TurnTrace"], None]):
+        """Zaregistruje callback volaný pre každý dokončený turn."""
+        self._listeners.append(callback)
+
+    def recent(self, count: Optional[int] = None) -> List[TurnTrace]:
+        """Posledné dokončené turny (najnovší posledný)."""
+        with self._lock:
+            traces = list(self._ring)
+        return traces[-count:] if count else traces
+
+    def close(self):
+        if self.exporter:
+            self.exporter.close()
+
+    def _on_finished(self, trace: TurnTrace):
+        with self._lock:
+            self._ring.append(trace)
+        if self.exporter:
+            self.exporter.export(trace)
+        for callback in self._listeners:
+            try:
+                callback(trace)
+            except Exception as e:
+                logger.error(f"Chyba v listeneri trace: {e}")
+        stages = ", ".join(f"{name}={ms:.0f}ms" for name, ms in trace.summary().items())
+        logger.info(f"Turn {trace.trace_id[:8]}: {stages}")
@@ -0,0 +1,223 @@
+"""
+Lore funkcie asistenta: argumenty nesprávneho typu a slučka requires_action (falošný OpenAI klient).
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+import pytest
+
+from src.config.config import LoreConfig
+from src.services.lore import LoreCard, LoreIndex, LoreTools
+from src.utils.tracing import SPAN_LLM_DONE, SPAN_RETRIEVE, Tracer
+
+pytest.importorskip("openai")
+
+from src.services.assistant import AssistantService  # noqa: E402
+
+
+def make_tools() -> LoreTools:
+    cards = [
+        LoreCard(
+            id="panam_palmer",
+            title="Panam Palmer",
+            type="character",
+            category="nomads",
+            path="characters/panam_palmer.yaml",
+            spoiler_level=1,
+            aliases=["Panam"],
+            data={"summary": "Nomádka z klanu Aldecaldos."},
+        ),
+        LoreCard(
+            id="ghost_town",
+            title="Ghost Town",
+            type="quest",
+            category="main",
+            path="quests/act2/ghost_town.yaml",
+            spoiler_level=2,
+            data={"summary": "Prvý quest s Panam.", "voľby": ["Voľba: pomôcť Panam"]},
+        ),
+    ]
+    return LoreTools(LoreIndex(cards), LoreConfig())
+
+
+@pytest.mark.parametrize(
+    "name, arguments",
+    [
+        ("lookup_card", {"id": None}),
+        ("lookup_card", {"id": {"x": 1}}),
+        ("search_lore", {"query": ["a"]}),
+        ("search_lore", {"query": "Panam", "spoiler_level": "vysoká"}),
+        ("quest_choices", {"quest": ""}),
+        ("quest_choices", {"iny": "Ghost Town"}),
+    ],
+)
+def test_bad_argument_types_return_error(name, arguments):
+    tools = make_tools()
+    result = json.loads(tools.call(name, json.dumps(arguments)))
+    assert "error" in result
+    assert tools.errors == 1
+
+
+def test_numeric_arguments_are_coerced():
+    tools = make_tools()
+    assert "error" in json.loads(tools.call("lookup_card", '{"id": 5}'))
+    result = json.loads(tools.call("search_lore", '{"query": "Panam", "spoiler_level": 1}'))
+    assert result["spoiler_level"] == 1
+    assert [card["id"] for card in result["results"]] == ["panam_palmer"]
+    # "neexistuje" je platný výsledok, nie chyba volania
+    assert tools.errors == 0
+
+
+def test_unexpected_handler_exception_returns_error(monkeypatch):
+    tools = make_tools()
+
+    def broken(*args, **kwargs):
+        raise KeyError("index")
+
+    monkeypatch.setattr(tools.index, "search", broken)
+    result = json.loads(tools.call("search_lore", '{"query": "Panam"}'))
+    assert result == {"error": "interná chyba funkcie search_lore"}
+    assert tools.errors == 1
+
+
+class FakeRuns:
+    """Runs API: prvý retrieve vyžiada volania funkcií, po výstupoch je run hotový."""
+
+    def __init__(
+        self, threads: "FakeThreads", tool_calls: List[SimpleNamespace], fail_submit: bool
+    ):
+        self.threads = threads
+        self.tool_calls = tool_calls
+        self.fail_submit = fail_submit
+        self.submitted: List[List[Dict[str, str]]] = []
+        self.cancelled: List[str] = []
+        self._runs: Dict[str, SimpleNamespace] = {}
+
+    async def create(self, thread_id: str, assistant_id: str, **kwargs):
+        run = SimpleNamespace(id=f"run_{len(self._runs)}", thread_id=thread_id, status="queued")
+        run.required_action = SimpleNamespace(
+            submit_tool_outputs=SimpleNamespace(tool_calls=self.tool_calls)
+        )
+        self._runs[run.id] = run
+        self.threads.active[thread_id] = run.id
+        return run
+
+    async def retrieve(self, thread_id: str, run_id: str):
+        run = self._runs[run_id]
+        if run.status == "queued":
+            run.status = "requires_action"
+        elif run.status == "in_progress":
+            run.status = "completed"
+            self.threads.active.pop(thread_id, None)
+        return run
+
+    async def submit_tool_outputs(self, thread_id: str, run_id: str, tool_outputs):
+        if self.fail_submit:
+            self.fail_submit = False
+            raise RuntimeError("submit_tool_outputs zlyhal")
+        self.submitted.append(tool_outputs)
+        run = self._runs[run_id]
+        run.status = "in_progress"
+        return run
+
+    async def cancel(self, thread_id: str, run_id: str):
+        self.cancelled.append(run_id)
+        self._runs[run_id].status = "cancelled"
+        self.threads.active.pop(thread_id, None)
+
+
+class FakeThreads:
+    def __init__(self, tool_calls: List[SimpleNamespace], fail_submit: bool):
+        self.active: Dict[str, str] = {}
+        self.runs = FakeRuns(self, tool_calls, fail_submit)
+        self.messages = SimpleNamespace(create=self._create_message, list=self._list_messages)
+
+    async def create(self):
+        return SimpleNamespace(id="thread_1")
+
+    async def _create_message(self, thread_id: str, role: str, content: str):
+        # Ako API: do vlákna s aktívnym runom sa nedá pridať správa
+        if thread_id in self.active:
+            raise RuntimeError(f"Thread {thread_id} má aktívny run {self.active[thread_id]}")
+
+    async def _list_messages(self, thread_id: str):
+        text = SimpleNamespace(value="Panam je nomádka.")
+        return SimpleNamespace(data=[SimpleNamespace(content=[SimpleNamespace(text=text)])])
+
+
+def make_service(tool_calls: List[SimpleNamespace], fail_submit: bool = False) -> AssistantService:
+    config = SimpleNamespace(api_key="test", assistant_id="asst_test")
+    service = AssistantService(config, tools=make_tools())
+    threads = FakeThreads(tool_calls, fail_submit)
+    interpreter = SimpleNamespace(dict=lambda **kwargs: {"type": "code_interpreter"})
+    assistant = SimpleNamespace(tools=[interpreter])
+
+    async def retrieve_assistant(assistant_id: str):
+        return assistant
+
+    assistants = SimpleNamespace(retrieve=retrieve_assistant)
+    service.client = SimpleNamespace(beta=SimpleNamespace(threads=threads, assistants=assistants))
+    return service
+
+
+def tool_call(call_id: str, name: str, arguments: Optional[dict]) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=call_id, function=SimpleNamespace(name=name, arguments=json.dumps(arguments))
+    )
+
+
+def test_requires_action_submits_output_for_every_call():
+    calls = [
+        tool_call("call_1", "lookup_card", {"id": "Panam"}),
+        tool_call("call_2", "lookup_card", {"id": None}),
+        tool_call("call_3", "search_lore", {"query": ["a"]}),
+    ]
+    service = make_service(calls)
+
+    response = asyncio.run(service.get_response("Používateľ", "Kto je Panam?", max_retries=1))
+
+    runs = service.client.beta.threads.runs
+    assert response == "Panam je nomádka."
+    assert service.tool_rounds == 1
+    [outputs] = runs.submitted
+    assert [output["tool_call_id"] for output in outputs] == ["call_1", "call_2", "call_3"]
+    results = [json.loads(output["output"]) for output in outputs]
+    assert results[0]["id"] == "panam_palmer"
+    assert "error" in results[1] and "error" in results[2]
+    assert runs.cancelled == []
+
+
+def test_tool_round_is_traced_as_retrieve_span():
+    service = make_service([tool_call("call_1", "search_lore", {"query": "Panam"})])
+    trace = Tracer().new_turn()
+    llm_span = trace.start(SPAN_LLM_DONE)
+
+    asyncio.run(service.get_reply("Používateľ", "Kto je Panam?", max_retries=1, trace=trace))
+    trace.end(llm_span)
+
+    retrieve = trace.get(SPAN_RETRIEVE)
+    assert retrieve is not None
+    assert retrieve.parent_id == llm_span.span_id
+    assert retrieve.attributes == {"tools": "search_lore", "calls": 1}
+    assert llm_span.start_ns <= retrieve.start_ns <= retrieve.end_ns <= llm_span.end_ns
+
+
+def test_failed_tool_round_cancels_run_and_frees_thread():
+    service = make_service([tool_call("call_1", "lookup_card", {"id": "Panam"})], fail_submit=True)
+
+    async def scenario():
+        failed = await service.get_response("Používateľ", "Kto je Panam?", max_retries=1)
+        # Run zostal v requires_action - bez zrušenia by ďalšia správa do vlákna zlyhala
+        following = await service.get_response("Používateľ", "A Judy?", max_retries=1)
+        return failed, following
+
+    failed, following = asyncio.run(scenario())
+
+    runs = service.client.beta.threads.runs
+    assert failed == "Prepáč, Elena má technický problém s OpenAI komunikáciou."
+    assert runs.cancelled == ["run_0"]
+    assert following == "Panam je nomádka."
+    assert service.errors == 1
@@ -0,0 +1,76 @@
+"""
+Výber bloku a vzorkovania audio probe proti FakeInputBackend (bez zvukovej karty).
+"""
+
+import yaml
+
+from src.benchmark.stubs import FakeInputBackend, FakeInputDevice, VirtualClock
+from src.config.config import AudioConfig
+from src.services.audio_probe import AudioProbe, build_profile, save_profile
+
+
+def fake_device(**overrides) -> FakeInputDevice:
+    # Bez jitteru, aby výsledok nezávisel od zaťaženia stroja
+    settings = dict(jitter_ms=0.0, min_stable_block_ms=5.0)
+    settings.update(overrides)
+    return FakeInputDevice(**settings)
+
+
+def make_probe(devices, default_device: int = 0, **kwargs) -> AudioProbe:
+    # Virtuálne hodiny: časy callbackov nezávisia od plánovača OS
+    clock = VirtualClock()
+    backend = FakeInputBackend(devices, default_device=default_device, clock=clock)
+    return AudioProbe(backend=backend, clock=clock.now, sleep=clock.sleep, **kwargs)
+
+
+def test_selects_smallest_stable_blocksize_at_native_rate():
+    probe = make_probe(
+        [fake_device()],
+        duration_sec=0.2,
+        sample_rates=[16000],
+        blocksizes=[128, 256, 1024],
+    )
+    results = probe.run(probe.candidate_devices())
+
+    by_point = {(r.sample_rate, r.blocksize): r for r in results}
+    # 128 framov pri 48 kHz = 2.7 ms, pod hranicou stability zariadenia -> pretečenia
+    assert by_point[(48000, 128)].overflows > 0
+    assert not by_point[(48000, 128)].stable
+    assert by_point[(48000, 256)].stable
+
+    selected = probe.select(results)
+    assert (selected.sample_rate, selected.blocksize) == (48000, 256)
+    assert selected.native
+
+
+def test_configured_device_profile(tmp_path):
+    config = AudioConfig(
+        sample_rate=48000,
+        channels=1,
+        blocksize=1024,
+        pre_roll_sec=0.25,
+        post_roll_sec=0.25,
+        input_device_index=1,
+    )
+    probe = make_probe(
+        [
+            fake_device(name="Predvolený"),
+            fake_device(name="USB mikrofón", default_samplerate=16000, sample_rates=(16000,)),
+        ],
+        duration_sec=0.2,
+        sample_rates=[48000],
+        blocksizes=[64, 128, 256],
+    )
+    results = probe.run(probe.candidate_devices(device=config.input_device_index))
+    selected = probe.select(results, device=config.input_device_index)
+    path = tmp_path / "audio_profile.yaml"
+    save_profile(build_profile(results, selected), path)
+    config.apply_profile(selected.settings())
+
+    # 64 framov pri 16 kHz = 4 ms (nestabilné), 128 = 8 ms
+    assert (config.input_device_index, config.sample_rate, config.blocksize) == (1, 16000, 128)
+    profile = yaml.safe_load(path.read_text(encoding="utf-8"))
+    assert profile["selected"] == selected.settings()
+    assert profile["measurement"]["device_name"] == "USB mikrofón"
+    # 48 kHz zariadenie nepodporuje - meranie skončí chybou, nie pádom
+    assert any(r["sample_rate"] == 48000 and r["error"] for r in profile["results"])
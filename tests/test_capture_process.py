@@ -0,0 +1,85 @@
+"""
+Zachytávanie v samostatnom procese: callback s blokmi zo zdieľaného bufferu počas nahrávania.
+
+Dcérsky proces nahrádza test - zapisuje priamo do SharedRing.
+"""
+
+import threading
+import time
+from typing import List
+
+import numpy as np
+
+from src.config.config import AudioConfig
+from src.services.capture_process import (
+    CALLBACK_POLL_SEC,
+    FLUSH_ACK,
+    FLUSH_REQUEST,
+    ProcessAudioCapture,
+    SharedRing,
+)
+
+
+def make_capture(callback=None) -> ProcessAudioCapture:
+    config = AudioConfig(
+        sample_rate=48000,
+        channels=1,
+        blocksize=1024,
+        pre_roll_sec=0.25,
+        post_roll_sec=0.25,
+        input_device_index=None,
+        ring_sec=2.0,
+    )
+    capture = ProcessAudioCapture(config=config, callback=callback)
+    capture.ring = SharedRing(capture.capacity)
+    return capture
+
+
+def acknowledge_flush(ring: SharedRing, tail: np.ndarray):
+    """Ako dcérsky proces: po požiadavke dopíše koniec nahrávky a potvrdí flush."""
+    while ring.header[FLUSH_REQUEST] == ring.header[FLUSH_ACK]:
+        time.sleep(0.001)
+    ring.write(tail)
+    ring.header[FLUSH_ACK] = ring.header[FLUSH_REQUEST]
+
+
+def test_blocks_reach_callback_while_recording():
+    received: List[np.ndarray] = []
+    capture = make_capture(callback=received.append)
+    ring = capture.ring
+    speech = np.arange(16000, dtype=np.float32)
+    try:
+        ring.write(np.ones(500, dtype=np.float32))  # pred stlačením PTT
+        capture.start_recording()
+        for block in np.array_split(speech[:12000], 6):
+            ring.write(block)
+            time.sleep(CALLBACK_POLL_SEC)
+        deadline = time.monotonic() + 2.0
+        while sum(len(block) for block in received) < 12000 and time.monotonic() < deadline:
+            time.sleep(CALLBACK_POLL_SEC)
+        streamed = sum(len(block) for block in received)
+
+        flusher = threading.Thread(target=acknowledge_flush, args=(ring, speech[12000:]))
+        flusher.start()
+        audio = np.array(capture.stop_recording())
+        flusher.join()
+        after_stop = sum(len(block) for block in received)
+    finally:
+        capture.stop_stream()
+
+    assert streamed == 12000
+    # Koniec dopísaný pri flushi už callback nedostane - doplní ho príjemca z výpovede
+    assert after_stop == streamed
+    np.testing.assert_array_equal(np.concatenate(received), speech[:12000])
+    np.testing.assert_array_equal(audio, speech)
+
+
+def test_no_polling_without_callback():
+    capture = make_capture()
+    try:
+        capture.start_recording()
+        assert capture._poll_thread is None
+        capture.ring.write(np.ones(100, dtype=np.float32))
+        assert len(capture.stop_recording(timeout=0.01)) == 100
+    finally:
+        capture.stop_stream()
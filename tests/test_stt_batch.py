@@ -0,0 +1,137 @@
+"""
+Dávkový prepis: clip_timestamps v samploch, priradenie segmentov výpovediam
+a vynechanie výpovedí zrušených turnov.
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from src.config.config import ModelConfig
+from src.services.stt import TranscriptionBatcher, WhisperSTT
+
+SAMPLE_RATE = 16000
+
+
+class FakePipeline:
+    """Vráti jeden segment na clip s časmi v sekundách ako BatchedInferencePipeline."""
+
+    calls = []
+
+    def __init__(self, model):
+        self.model = model
+
+    def transcribe(self, audio, clip_timestamps, **kwargs):
+        FakePipeline.calls.append((len(audio), clip_timestamps, kwargs))
+        segments = [
+            SimpleNamespace(
+                text=f" výpoveď {index}",
+                start=clip["start"] / SAMPLE_RATE,
+                end=clip["end"] / SAMPLE_RATE,
+            )
+            for index, clip in enumerate(clip_timestamps)
+        ]
+        return iter(segments), SimpleNamespace(language="sk", language_probability=0.9)
+
+
+def make_stt(monkeypatch) -> WhisperSTT:
+    config = ModelConfig(
+        size="small",
+        language="sk",
+        cuda_enabled=False,
+        cuda_compute_type="float16",
+        cpu_compute_type="int8",
+        beam_size=1,
+        best_of=1,
+        temperature=0.0,
+        vad_filter=False,
+        no_speech_threshold=0.6,
+        cpu_performance_mode=False,
+    )
+    monkeypatch.setattr(WhisperSTT, "_batched_pipeline_class", staticmethod(lambda: FakePipeline))
+    return WhisperSTT(config, sample_rate=SAMPLE_RATE, model_factory=lambda size, **kwargs: object())
+
+
+def test_batch_clips_are_sample_offsets(monkeypatch):
+    stt = make_stt(monkeypatch)
+    lengths = [SAMPLE_RATE * 2, SAMPLE_RATE // 2, SAMPLE_RATE * 3]
+    items = [(np.zeros(length, dtype=np.float32), index) for index, length in enumerate(lengths)]
+
+    results = stt._transcribe_batch_blocking(items)
+
+    total, clips, kwargs = FakePipeline.calls[-1]
+    assert total == sum(lengths)
+    assert clips == [
+        {"start": 0, "end": 32000},
+        {"start": 32000, "end": 40000},
+        {"start": 40000, "end": 88000},
+    ]
+    assert kwargs["batch_size"] == 3
+    assert [result.text for result in results] == ["výpoveď 0", "výpoveď 1", "výpoveď 2"]
+    assert [result.duration_sec for result in results] == [2.0, 0.5, 3.0]
+
+
+class GatedSTT:
+    """transcribe_batch čaká na uvoľnenie brány; zaznamená dekódované dávky."""
+
+    sample_rate = SAMPLE_RATE
+
+    def __init__(self):
+        self.gate = asyncio.Event()
+        self.batches = []
+
+    async def transcribe_batch(self, items):
+        self.batches.append([len(audio) for audio, _ in items])
+        await self.gate.wait()
+        return [SimpleNamespace(text=str(len(audio))) for audio, _ in items]
+
+
+def test_cancelled_turns_are_not_decoded():
+    async def scenario():
+        stt = GatedSTT()
+        batcher = TranscriptionBatcher(stt, window_ms=0.0, slots=1)
+        batcher.start()
+
+        def submit(samples: int) -> asyncio.Task:
+            audio = np.zeros(samples, dtype=np.float32)
+            return asyncio.ensure_future(batcher.submit(audio, time.perf_counter_ns()))
+
+        first = submit(100)
+        await asyncio.sleep(0.01)  # prvá dávka sa dekóduje, ďalšie čakajú vo fronte
+        replaced = [submit(200), submit(300)]
+        latest = submit(400)
+        await asyncio.sleep(0.01)
+        # Barge-in: opakované PTT zrušilo staršie turny
+        for task in replaced:
+            task.cancel()
+        stt.gate.set()
+        results = [(await first).text, (await latest).text]
+        batcher.stop()
+        return stt.batches, batcher.dropped_cancelled, results
+
+    batches, dropped, results = asyncio.run(scenario())
+    assert batches == [[100], [400]]
+    assert dropped == 2
+    assert results == ["100", "400"]
+
+
+def test_turn_cancelled_during_batch_window_is_dropped():
+    async def scenario():
+        stt = GatedSTT()
+        stt.gate.set()
+        batcher = TranscriptionBatcher(stt, window_ms=50.0, max_wait_ms=50.0)
+        batcher.start()
+        now = time.perf_counter_ns()
+        cancelled = asyncio.ensure_future(batcher.submit(np.zeros(100, dtype=np.float32), now))
+        kept = asyncio.ensure_future(batcher.submit(np.zeros(200, dtype=np.float32), now))
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        result = await kept
+        batcher.stop()
+        return stt.batches, result.text
+
+    batches, text = asyncio.run(scenario())
+    assert batches == [[200]]
+    assert text == "200"
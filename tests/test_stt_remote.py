@@ -0,0 +1,177 @@
+"""
+Vzdialený STT cez loopback: protokol klient/server a lokálny fallback (stub STT).
+"""
+
+import asyncio
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from src.config.config import RemoteSTTConfig
+from src.services.stt import Transcription
+from src.services.stt_remote import RemoteSTT
+from src.services.stt_server import STTServer
+
+SAMPLE_RATE = 16000
+TOKEN = "tajne"
+
+
+class StubSTT:
+    """Rozhranie WhisperSTT bez modelu; zaznamená dĺžky prepisovaného audia."""
+
+    def __init__(self, text: str, fail: Optional[str] = None):
+        self.text = text
+        self.fail = fail
+        self.sample_rate = SAMPLE_RATE
+        self.device = "cpu"
+        self.compute_type = "int8"
+        self.loaded = False
+        self.received: List[int] = []
+
+    @property
+    def loaded_models(self) -> List[str]:
+        return ["small"] if self.loaded else []
+
+    async def load(self):
+        self.loaded = True
+
+    async def transcribe(self, audio: np.ndarray) -> Transcription:
+        if self.fail:
+            raise RuntimeError(self.fail)
+        self.received.append(len(audio))
+        now = time.perf_counter_ns()
+        return Transcription(
+            text=self.text,
+            language="sk",
+            language_probability=0.9,
+            duration_sec=len(audio) / self.sample_rate,
+            model="small",
+            submitted_ns=now,
+            started_ns=now,
+            prepared_ns=now,
+            finished_ns=now,
+        )
+
+    def close(self):
+        pass
+
+
+async def start_server(stt: StubSTT, **kwargs) -> STTServer:
+    server = STTServer(stt, host="127.0.0.1", port=0, token=TOKEN, **kwargs)
+    await server.start()
+    server.port = server.server.sockets[0].getsockname()[1]
+    return server
+
+
+def make_client(port: int, token: str = TOKEN, **overrides) -> RemoteSTT:
+    settings = dict(
+        enabled=True,
+        host="127.0.0.1",
+        port=port,
+        token=token,
+        pool_size=1,
+        connect_timeout_sec=1.0,
+        result_timeout_sec=2.0,
+    )
+    settings.update(overrides)
+    return RemoteSTT(RemoteSTTConfig(**settings), local=StubSTT("lokálny prepis"), sample_rate=SAMPLE_RATE)
+
+
+def speech(seconds: float) -> np.ndarray:
+    return (0.1 * np.sin(np.arange(int(seconds * SAMPLE_RATE)) / 10.0)).astype(np.float32)
+
+
+def run(scenario):
+    return asyncio.run(asyncio.wait_for(scenario(), 10.0))
+
+
+def test_streamed_utterance_is_transcribed_remotely():
+    async def scenario():
+        remote = StubSTT("vzdialený prepis")
+        server = await start_server(remote)
+        client = make_client(server.port)
+        try:
+            await client.load()
+            audio = speech(1.0)
+            # Prvá polovica počas držania PTT, zvyšok pri pustení
+            client.begin_stream()
+            for block in np.array_split(audio[: SAMPLE_RATE // 2], 5):
+                client.feed(block)
+            await asyncio.sleep(0.05)
+            first = await client.transcribe(audio)
+            second = await client.transcribe(speech(0.3))
+        finally:
+            client.close()
+            await server.stop()
+        return remote, client, first, second
+
+    remote, client, first, second = run(scenario)
+    assert first.text == "vzdialený prepis"
+    assert first.model == "remote:small"
+    assert remote.received == [SAMPLE_RATE, int(0.3 * SAMPLE_RATE)]
+    assert client.remote_count == 2
+    assert client.fallback_count == 0
+    # Obe výpovede išli jedným spojením z pool-u
+    assert client.pool.opened == 1
+
+
+def test_falls_back_to_local_when_server_is_down():
+    async def scenario():
+        server = await start_server(StubSTT("nepoužije sa"))
+        port = server.port
+        await server.stop()
+        client = make_client(port)
+        await client.load()
+        result = await client.transcribe(speech(0.5))
+        client.close()
+        return client, result
+
+    client, result = run(scenario)
+    assert result.text == "lokálny prepis"
+    assert client.server_info == {}
+    assert client.fallback_count == 1
+
+
+def test_server_error_and_wrong_token_fall_back():
+    async def scenario():
+        server = await start_server(StubSTT("", fail="CUDA out of memory"))
+        failing = make_client(server.port)
+        wrong_token = make_client(server.port, token="zly")
+        try:
+            await failing.load()
+            await wrong_token.load()
+            results = [await failing.transcribe(speech(0.5)), await wrong_token.transcribe(speech(0.5))]
+        finally:
+            failing.close()
+            wrong_token.close()
+            await server.stop()
+        return failing, wrong_token, results
+
+    failing, wrong_token, results = run(scenario)
+    assert [result.text for result in results] == ["lokálny prepis", "lokálny prepis"]
+    assert failing.server_info["models"] == []
+    assert wrong_token.server_info == {}
+    assert failing.fallback_count == wrong_token.fallback_count == 1
+
+
+def test_server_rejects_oversized_utterance():
+    async def scenario():
+        remote = StubSTT("vzdialený prepis")
+        server = await start_server(remote, max_utterance_sec=1.0)
+        client = make_client(server.port)
+        try:
+            await client.load()
+            too_long = await client.transcribe(speech(1.5))
+            short = await client.transcribe(speech(0.5))
+        finally:
+            client.close()
+            await server.stop()
+        return remote, client, too_long, short
+
+    remote, client, too_long, short = run(scenario)
+    assert too_long.text == "lokálny prepis"
+    # Ďalšia výpoveď ide na server novým spojením
+    assert short.text == "vzdialený prepis"
+    assert remote.received == [SAMPLE_RATE // 2]
+    assert client.pool.opened == 2
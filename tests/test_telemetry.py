@@ -0,0 +1,31 @@
+"""
+Telemetria: JSONL súbor podľa tracing.metrics_path a režim bez zápisu.
+"""
+
+import json
+
+from src.utils.telemetry import Telemetry
+
+
+def test_records_go_to_configured_file(tmp_path):
+    telemetry = Telemetry(tmp_path / "prvy.jsonl")
+    telemetry.record_turn({"stt": 120.0})
+    telemetry.set_metrics_file(tmp_path / "druhy.jsonl")
+    telemetry.record_turn({"stt": 80.0})
+    telemetry.close()
+
+    first = [json.loads(line) for line in (tmp_path / "prvy.jsonl").read_text().splitlines()]
+    second = [json.loads(line) for line in (tmp_path / "druhy.jsonl").read_text().splitlines()]
+    assert [record["stages"] for record in first] == [{"stt": 120.0}]
+    assert [record["stages"] for record in second] == [{"stt": 80.0}]
+    assert telemetry.snapshot()["stt"]["count"] == 2
+
+
+def test_disabled_file_keeps_histograms(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    telemetry = Telemetry(None)
+    telemetry.record_turn({"llm_done": 900.0})
+    telemetry.close()
+
+    assert list(tmp_path.iterdir()) == []
+    assert telemetry.snapshot()["llm_done"]["count"] == 1
@@ -0,0 +1,45 @@
+"""
+Failover TTS: záloha pri ľubovoľnej chybe primárneho providera a limit podľa dĺžky.
+"""
+
+import asyncio
+from typing import List
+
+from src.benchmark.stubs import NullAudioMixer, StubConfig, StubTTS
+from src.services.tts.base import RenderedSpeech
+from src.services.tts.failover import FailoverTTS
+
+
+class BrokenTTS(StubTTS):
+    name = "broken"
+
+    def _render_blocking(self, parts: List[str]) -> RenderedSpeech:
+        raise RuntimeError("SDK sa zasekla")
+
+
+def make_failover(primary_config: StubConfig, primary_cls=StubTTS, **kwargs) -> FailoverTTS:
+    mixer = NullAudioMixer()
+    primary = primary_cls(primary_config, mixer=mixer)
+    fallback = StubTTS(StubConfig(tts_base_ms=1.0, tts_ms_per_char=0.0), mixer=mixer)
+    return FailoverTTS(primary, fallback, **kwargs)
+
+
+def test_non_tts_exception_falls_back():
+    tts = make_failover(StubConfig(), primary_cls=BrokenTTS)
+    speech = asyncio.run(tts.synthesize_async("ahoj"))
+    assert speech.text == "ahoj"
+    assert tts.stats["errors"] == 1
+    assert tts.stats["fallback"] == 1
+
+
+def test_latency_threshold_scales_with_text_length():
+    # Primárny renderuje 10 ms + 2 ms/znak: 300 znakov = 610 ms
+    tts = make_failover(
+        StubConfig(tts_base_ms=10.0, tts_ms_per_char=2.0),
+        latency_threshold_ms=200.0,
+        latency_per_char_ms=3.0,
+    )
+    speech = asyncio.run(tts.synthesize_async("a" * 300))
+    assert len(speech.text) == 300
+    assert tts.stats == {**tts.stats, "primary": 1, "timeouts": 0, "fallback": 0}
+    assert tts.timeout_ms("", parts=["ab", "cd"]) == 200.0 + 3.0 * 5
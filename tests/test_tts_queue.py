@@ -0,0 +1,56 @@
+"""
+TTS fronta so stub providerom a mixerom bez zvukovej karty.
+"""
+
+import asyncio
+
+from src.benchmark.stubs import NullAudioMixer, StubConfig, StubTTS
+from src.services.tts.tts_queue import TTSQueue
+
+STREAMER, CHAT = 0, 2
+
+
+def test_barge_in_keeps_chat_reply_already_in_mixer():
+    async def scenario():
+        mixer = NullAudioMixer(speed=1.0)
+        tts = StubTTS(StubConfig(tts_base_ms=5.0, tts_ms_per_char=0.0), mixer=mixer)
+        queue = TTSQueue(tts)
+        await queue.add("odpoveď streamerovi " * 2, priority=STREAMER)  # ~2.7 s
+        await queue.add("krátko do chatu", priority=CHAT)  # ~1 s, hneď za ňou v mixeri
+        await asyncio.sleep(0.3)
+        assert sorted(request.priority for request in queue._playing.values()) == [STREAMER, CHAT]
+
+        silence_ms = await queue.interrupt(drop_priority=STREAMER)
+        await asyncio.sleep(1.5)
+        stats = queue.metrics()
+        await queue.stop()
+        mixer.close()
+        return silence_ms, stats
+
+    silence_ms, stats = asyncio.run(scenario())
+    assert silence_ms is not None
+    assert stats["interrupted"] == 1
+    assert stats["played"] == 1
+    assert stats["played_chars"] == len("krátko do chatu")
+
+
+def test_item_added_during_playback_is_prefetched():
+    async def scenario():
+        mixer = NullAudioMixer(speed=1.0)
+        tts = StubTTS(StubConfig(tts_base_ms=5.0, tts_ms_per_char=0.0), mixer=mixer)
+        queue = TTSQueue(tts)
+        await queue.add("prvá veta odpovede", priority=STREAMER)  # ~1.2 s
+        await asyncio.sleep(0.2)
+        assert queue.is_processing
+        await queue.add("druhá veta", priority=STREAMER)
+        prefetched = len(queue._prefetched)
+        await asyncio.sleep(2.2)
+        stats = queue.metrics()
+        await queue.stop()
+        mixer.close()
+        return prefetched, stats
+
+    prefetched, stats = asyncio.run(scenario())
+    assert prefetched == 1
+    assert stats["prefetch_hits"] == 1
+    assert stats["played"] == 2
@@ -0,0 +1,254 @@
+"""
+Twitch chat proti lokálnemu falošnému IRC serveru (bez siete a tokenov).
+"""
+
+import asyncio
+import time
+from typing import List, Tuple
+
+import pytest
+
+from src.config.config import TwitchConfig
+from src.services.reply import AssistantReply
+from src.services.twitch_chat import ChatMessage, TwitchChatService, parse_irc_line
+
+CHANNEL = "elena_test"
+
+
+class FakeIRCServer:
+    """Minimálny IRC server: zaznamená prijaté riadky a vie posielať vlastné."""
+
+    def __init__(self):
+        self.lines: List[Tuple[float, str]] = []
+        self.joined = asyncio.Event()
+        self._received = asyncio.Condition()
+        self._writer = None
+        self._server = None
+
+    async def start(self) -> int:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        self._writer = writer
+        while True:
+            raw = await reader.readline()
+            if not raw:
+                return
+            line = raw.decode("utf-8").rstrip("\r\n")
+            async with self._received:
+                self.lines.append((time.monotonic(), line))
+                self._received.notify_all()
+            if line.startswith("JOIN"):
+                self.joined.set()
+
+    async def send(self, line: str):
+        self._writer.write(f"{line}\r\n".encode("utf-8"))
+        await self._writer.drain()
+
+    async def wait_for(self, prefix: str, count: int = 1, timeout: float = 5.0) -> List[Tuple[float, str]]:
+        async def matching():
+            async with self._received:
+                while True:
+                    found = [item for item in self.lines if item[1].startswith(prefix)]
+                    if len(found) >= count:
+                        return found
+                    await self._received.wait()
+
+        return await asyncio.wait_for(matching(), timeout)
+
+
+class FakeAssistant:
+    def __init__(self):
+        self.calls: List[Tuple[str, str, str]] = []
+
+    async def get_reply(self, author_name: str, user_input: str, conversation: str = "default"):
+        self.calls.append((author_name, user_input, conversation))
+        return AssistantReply(spoken="Krátko.", detail="Podrobná odpoveď.")
+
+
+class FakeCredentials:
+    token = "oauth:test"
+    channel = CHANNEL
+    nick = "elena_bot"
+
+
+def privmsg(author: str, text: str, tags: str = "") -> str:
+    prefix = f"@{tags} " if tags else ""
+    return f"{prefix}:{author}!{author}@{author}.tmi.twitch.tv PRIVMSG #{CHANNEL} :{text}"
+
+
+async def start_chat(**overrides) -> Tuple[FakeIRCServer, TwitchChatService, FakeAssistant]:
+    server = FakeIRCServer()
+    port = await server.start()
+    settings = dict(host="127.0.0.1", port=port, use_tls=False, batch_window_sec=0.2)
+    settings.update(overrides)
+    assistant = FakeAssistant()
+    chat = TwitchChatService(TwitchConfig(**settings), FakeCredentials(), assistant)
+    chat.start()
+    await asyncio.wait_for(server.joined.wait(), 5.0)
+    return server, chat, assistant
+
+
+def test_parse_irc_line_tags_and_trailing():
+    tags, prefix, command, params = parse_irc_line(
+        "@badges=moderator/1;display-name=Ana\\sB :ana!ana@ana PRIVMSG #kanal :!elena ahoj : svet"
+    )
+    assert tags == {"badges": "moderator/1", "display-name": "Ana B"}
+    assert prefix == "ana!ana@ana"
+    assert command == "PRIVMSG"
+    assert params == ["#kanal", "!elena ahoj : svet"]
+
+
+def test_login_and_ping_pong():
+    async def scenario():
+        server, chat, _ = await start_chat()
+        try:
+            sent = [line for _, line in server.lines]
+            assert sent[:2] == ["PASS oauth:test", "NICK elena_bot"]
+            assert f"JOIN #{CHANNEL}" in sent
+            await server.send("PING :tmi.twitch.tv")
+            pong = await server.wait_for("PONG")
+            assert pong[0][1] == "PONG :tmi.twitch.tv"
+        finally:
+            await chat.stop()
+            await server.close()
+
+    asyncio.run(scenario())
+
+
+def test_privmsg_burst_is_batched_into_one_reply():
+    async def scenario():
+        server, chat, assistant = await start_chat()
+        try:
+            await server.send(privmsg("ana", "!elena kde je krypta?", tags="display-name=Ana"))
+            await server.send(privmsg("boris", "!elena aký level?"))
+            await server.send(privmsg("cyril", "bez prefixu"))
+            reply = await server.wait_for(f"PRIVMSG #{CHANNEL}")
+        finally:
+            await chat.stop()
+            await server.close()
+
+        assert len(assistant.calls) == 1
+        author, user_input, conversation = assistant.calls[0]
+        assert author == "Twitch chat"
+        assert "[Ana]: kde je krypta?" in user_input
+        assert "[boris]: aký level?" in user_input
+        assert conversation == "chat"
+        assert reply[0][1] == f"PRIVMSG #{CHANNEL} :@Ana @boris Podrobná odpoveď."
+        assert chat.stats.received == 3
+        assert chat.stats.accepted == 2
+        assert chat.stats.ignored == 1
+        assert chat.stats.batches == 1
+
+    asyncio.run(scenario())
+
+
+def test_outbound_rate_limit():
+    async def scenario():
+        server, chat, _ = await start_chat(rate_limit_messages=2, rate_limit_period_sec=1.0)
+        try:
+            for index in range(4):
+                await chat.send_message(f"správa {index}")
+            sent = await server.wait_for(f"PRIVMSG #{CHANNEL}", count=4)
+        finally:
+            await chat.stop()
+            await server.close()
+
+        times = [at for at, _ in sent]
+        assert [line.rsplit(" ", 1)[1] for _, line in sent] == ["0", "1", "2", "3"]
+        # Dva tokeny hneď, potom 1 správa za 0.5 s
+        assert times[1] - times[0] < 0.2
+        assert times[2] - times[0] == pytest.approx(0.5, abs=0.15)
+        assert times[3] - times[0] == pytest.approx(1.0, abs=0.15)
+
+    asyncio.run(scenario())
+
+
+def test_send_loop_keeps_tokens_while_disconnected():
+    async def scenario():
+        chat = TwitchChatService(
+            TwitchConfig(rate_limit_messages=2, rate_limit_period_sec=30.0),
+            FakeCredentials(),
+            FakeAssistant(),
+        )
+        chat._running = True
+        await chat.send_message("čaká na spojenie")
+        sender = asyncio.create_task(chat._send_loop())
+        await asyncio.sleep(0.1)
+        chat._running = False
+        sender.cancel()
+        await asyncio.gather(sender, return_exceptions=True)
+        chat._limiter._refill()
+        return chat
+
+    chat = asyncio.run(scenario())
+    assert chat._limiter._tokens == pytest.approx(2.0)
+    assert list(chat._outbound) == ["čaká na spojenie"]
+
+
+def offline_chat(**overrides) -> TwitchChatService:
+    """Chat bez spojenia - správy sa vkladajú priamo cez _ingest."""
+    settings = dict(user_cooldown_sec=30.0, dedup_window_sec=120.0)
+    settings.update(overrides)
+    return TwitchChatService(TwitchConfig(**settings), FakeCredentials(), FakeAssistant())
+
+
+def ingest(chat: TwitchChatService, author: str, text: str, at: float, tags=None):
+    chat._ingest(ChatMessage(author=author, text=f"!elena {text}", tags=tags or {}, received_at=at))
+
+
+def test_duplicate_question_expires_after_dedup_window():
+    chat = offline_chat(user_cooldown_sec=0.0, dedup_window_sec=120.0)
+    ingest(chat, "ana", "Kde je   Panam?", at=1000.0)
+    ingest(chat, "boris", "kde je panam?", at=1060.0)
+    ingest(chat, "cyril", "Kde je Panam?", at=1121.0)
+
+    assert chat.stats.dropped_duplicate == 1
+    assert chat.stats.accepted == 2
+    assert [chat._pending.get_nowait().author for _ in range(2)] == ["ana", "cyril"]
+
+
+def test_user_cooldown_exempts_moderators():
+    chat = offline_chat(user_cooldown_sec=30.0)
+    ingest(chat, "ana", "prvá otázka", at=1000.0)
+    ingest(chat, "Ana", "druhá otázka", at=1010.0)
+    ingest(chat, "ana", "tretia otázka", at=1031.0)
+    ingest(chat, "mod", "otázka moda", at=1000.0, tags={"mod": "1"})
+    ingest(chat, "mod", "ďalšia otázka moda", at=1001.0, tags={"mod": "1"})
+
+    assert chat.stats.dropped_cooldown == 1
+    assert chat.stats.accepted == 4
+
+
+def test_max_pending_sheds_new_messages_without_penalty():
+    chat = offline_chat(max_pending=2)
+    ingest(chat, "ana", "otázka 1", at=1000.0)
+    ingest(chat, "boris", "otázka 2", at=1000.1)
+    ingest(chat, "cyril", "otázka 3", at=1000.2)
+
+    assert chat.stats.dropped_overflow == 1
+    assert chat._pending.qsize() == 2
+    # Zahodená správa nezapočíta cooldown ani de-duplikáciu - po uvoľnení fronty prejde
+    chat._pending.get_nowait()
+    ingest(chat, "cyril", "otázka 3", at=1000.3)
+    assert chat.stats.accepted == 3
+
+
+def test_outbound_queue_drops_oldest_chunks():
+    async def scenario():
+        chat = offline_chat(max_outbound=3, max_reply_length=20)
+        await chat.send_message("prvá správa")
+        await chat.send_message("druhá správa")
+        await chat.send_message("tretia správa je dlhšia než limit")
+        return chat
+
+    chat = asyncio.run(scenario())
+    assert list(chat._outbound) == ["druhá správa", "tretia správa je", "dlhšia než limit"]
+    assert chat.stats.dropped_outbound == 1